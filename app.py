@@ -1,19 +1,27 @@
 
 
+import logging
 import os
 import streamlit as st
 import time
 
+# services.* log through the standard logging module; third-party loggers
+# (httpx logs every request at INFO) stay at the root WARNING level.
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("services").setLevel(os.getenv("PORTAL_LOG_LEVEL", "INFO").upper())
+
 # Default OAuth client authorization for packaged desktop/local runs.
 # services.auth reads CLIENT_AUTH during import, so this must be set before
 # importing login_ui. Environment variables still override this value.
-os.environ.setdefault(
-    "CLIENT_AUTH",
-    "Basic ZXh0ZXJuYWwtY2xpZW50Ojg1dDQkS2JTWmtWRHNCdUQ="
-)
+from services.tenants import DEFAULT_CLIENT_AUTH
+
+os.environ.setdefault("CLIENT_AUTH", DEFAULT_CLIENT_AUTH)
 
 from services.auth import login_ui
-from services.activity_logger import install_file_uploader_logging, install_requests_logging
+from services import metrics
+from services.job_api import start_api
+from services.profiling import profile_run
+from services.activity_logger import install_file_uploader_logging, install_requests_logging, job_logging
 
 # ---- Core Modules ----
 from modules.paycodes import paycodes_ui
@@ -44,6 +52,10 @@ from modules.organization_locations import organization_locations_ui
 from modules.schedule_delete import schedule_delete_ui
 from modules.admin_logs import admin_logs_ui
 from modules.access_control import access_control_ui
+from modules.config_bundle import config_bundle_ui
+from modules.config_snapshot import config_snapshot_ui
+from modules.tenant_fanout import tenant_registry_ui
+from modules.dev_panel import dev_metrics_panel, profiling_panel
 
 
 # ================= PAGE CONFIG =================
@@ -55,6 +67,10 @@ st.set_page_config(
 
 install_requests_logging()
 install_file_uploader_logging()
+metrics.install_parse_timing()
+metrics.install_render_timing()
+metrics.start_exporter()
+start_api()
 
 # Hide Streamlit's automatic multipage navigation so only the
 # custom module router in the sidebar is visible.
@@ -99,6 +115,8 @@ default_menu_options = [
     "Accrual Policies",
     "Accrual Policy Sets",
     "Accruals",
+    "Config Bundles",
+    "Config Search",
     "Emp Lookup Table",
     "Known Locations",
     "Org Locations",
@@ -157,6 +175,8 @@ menu_icons = {
     "Schedule Pattern Update": "🧷",
     "Known Locations": "📍",
     "Org Locations": "🗺️",
+    "Config Bundles": "📦",
+    "Config Search": "🔎",
     "User Access Control": "🔐",
 }
 
@@ -192,6 +212,9 @@ with st.sidebar:
         label_visibility="collapsed",
     )
 
+    if not is_logs_admin:
+        tenant_registry_ui()
+
     if st.button("🚪 Logout"):
         st.session_state.clear()
         st.rerun()
@@ -199,62 +222,74 @@ with st.sidebar:
 st.session_state.active_module = menu
 
 # ================= MAIN ROUTER =================
-if menu == "Paycodes":
-    paycodes_ui()
-elif menu == "Paycode Events":
-    paycode_events_ui()
-elif menu == "Paycode Combinations":
-    paycode_combinations_ui()
-elif menu == "Paycode Event Sets":
-    paycode_event_sets_ui()
-elif menu == "Shift Templates":
-    shift_templates_ui()
-elif menu == "Shift Template Sets":
-    shift_template_sets_ui()
-elif menu == "Schedule Patterns":
-    schedule_patterns_ui()
-elif menu == "Schedule Pattern Sets":
-    schedule_pattern_sets_ui()
-elif menu == "Emp Lookup Table":
-    employee_lookup_table_ui()
-elif menu == "Org Lookup Table":
-    organization_location_lookup_table_ui()
-elif menu == "Accruals":
-    accruals_ui()
-elif menu == "Accrual Policies":
-    accrual_policies_ui()
-elif menu == "Accrual Policy Sets":
-    accrual_policy_sets_ui()
-elif menu == "Timeoff Policies":
-    timeoff_policies_ui()
-elif menu == "Timeoff Policy Sets":
-    timeoff_policy_sets_ui()
-elif menu == "Regularization Policies":
-    regularization_policies_ui()
-elif menu == "Regularization Policy Sets":
-    regularization_policy_sets_ui()
-elif menu == "Roles":
-    roles_ui()
-elif menu == "Overtime Policies":
-    overtime_policies_ui()
-elif menu == "Timecard Analyzer":
-    timecard_analyzer_ui()
-elif menu == "Timecard Updation":
-    timecard_updation_ui()
-elif menu == "Punch Update":
-    punch_ui()
-elif menu == "Schedule Pattern Update":
-    schedule_pattern_mapper_ui()
-elif menu == "Known Locations":
-    known_locations_ui()
-elif menu == "Org Locations":
-    organization_locations_ui()
-elif menu == "Schedule Delete":
-    schedule_delete_ui()
-elif menu == "Admin Logs":
-    admin_logs_ui()
-elif menu == "User Access Control":
-    if st.session_state.get("username") == "Logs@BT":
-        access_control_ui()
-    else:
-        st.error("❌ You are not authorized")
+# Every HTTP call a module makes during this run is rolled up into one
+# JOB_SUMMARY log row instead of one row per request, and profiled when
+# PORTAL_PROFILE or the admin switch selects the module.
+with job_logging(menu) as job, profile_run(menu) as profile:
+    if menu == "Paycodes":
+        paycodes_ui()
+    elif menu == "Paycode Events":
+        paycode_events_ui()
+    elif menu == "Paycode Combinations":
+        paycode_combinations_ui()
+    elif menu == "Paycode Event Sets":
+        paycode_event_sets_ui()
+    elif menu == "Shift Templates":
+        shift_templates_ui()
+    elif menu == "Shift Template Sets":
+        shift_template_sets_ui()
+    elif menu == "Schedule Patterns":
+        schedule_patterns_ui()
+    elif menu == "Schedule Pattern Sets":
+        schedule_pattern_sets_ui()
+    elif menu == "Emp Lookup Table":
+        employee_lookup_table_ui()
+    elif menu == "Org Lookup Table":
+        organization_location_lookup_table_ui()
+    elif menu == "Accruals":
+        accruals_ui()
+    elif menu == "Accrual Policies":
+        accrual_policies_ui()
+    elif menu == "Accrual Policy Sets":
+        accrual_policy_sets_ui()
+    elif menu == "Timeoff Policies":
+        timeoff_policies_ui()
+    elif menu == "Timeoff Policy Sets":
+        timeoff_policy_sets_ui()
+    elif menu == "Regularization Policies":
+        regularization_policies_ui()
+    elif menu == "Regularization Policy Sets":
+        regularization_policy_sets_ui()
+    elif menu == "Roles":
+        roles_ui()
+    elif menu == "Overtime Policies":
+        overtime_policies_ui()
+    elif menu == "Timecard Analyzer":
+        timecard_analyzer_ui()
+    elif menu == "Timecard Updation":
+        timecard_updation_ui()
+    elif menu == "Punch Update":
+        punch_ui()
+    elif menu == "Schedule Pattern Update":
+        schedule_pattern_mapper_ui()
+    elif menu == "Known Locations":
+        known_locations_ui()
+    elif menu == "Org Locations":
+        organization_locations_ui()
+    elif menu == "Schedule Delete":
+        schedule_delete_ui()
+    elif menu == "Config Bundles":
+        config_bundle_ui()
+    elif menu == "Config Search":
+        config_snapshot_ui()
+    elif menu == "Admin Logs":
+        admin_logs_ui()
+    elif menu == "User Access Control":
+        if st.session_state.get("username") == "Logs@BT":
+            access_control_ui()
+        else:
+            st.error("❌ You are not authorized")
+
+with st.sidebar:
+    dev_metrics_panel(menu, job.metrics)
+    profiling_panel(menu, profile, default_menu_options)
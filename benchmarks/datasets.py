@@ -0,0 +1,326 @@
+"""Synthetic upload sheets and API payloads shaped like each module's data.
+
+Frames follow the module upload templates and include the mess real sheets
+have: blank optional cells, mixed-case booleans, times typed as text or
+Excel fractions. Builders are vectorised and seeded, so 1M-row sheets build
+in seconds and every run sees the same data.
+
+    python -m benchmarks.datasets paycodes --rows 100k --format csv --out /tmp/bench
+    python -m benchmarks.datasets all --rows 1k
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 7
+BOOL_TEXT = np.array(["TRUE", "FALSE", "true", "False", "1", "0", ""], dtype=object)
+LEVELS = [
+    (26203, "Entity"), (26212, "Cluster"), (26227, "Sub Region"), (26354, "Location"), (26386, "Function"),
+    (26669, "Sub Function"), (27029, "Category"), (27066, "Department"), (27096, "Reporting Manager"),
+]
+
+
+def parse_rows(text: str) -> int:
+    """'1k', '100k' or '1M' to a row count."""
+    text = str(text).strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def _rng(seed):
+    return np.random.default_rng(DEFAULT_SEED if seed is None else seed)
+
+
+def _labels(prefix: str, rows: int) -> np.ndarray:
+    return np.char.add(prefix, np.char.zfill(np.arange(rows).astype(str), 7)).astype(object)
+
+
+def _sometimes(rng, values: np.ndarray, share: float, blank="") -> np.ndarray:
+    """values with roughly `share` of them kept and the rest blank."""
+    values = values.astype(object)
+    values[rng.random(len(values)) >= share] = blank
+    return values
+
+
+def _alongside(present, value) -> np.ndarray:
+    """value wherever `present` has a value, blank elsewhere."""
+    values = np.full(len(present), "", dtype=object)
+    mask = np.asarray(present, dtype=object) != ""
+    values[mask] = value[mask] if isinstance(value, np.ndarray) else value
+    return values
+
+
+def _pick(rng, options, rows: int) -> np.ndarray:
+    options = np.asarray(options, dtype=object)
+    return options[rng.integers(0, len(options), rows)]
+
+
+# ======================================================
+# UPLOAD SHEETS
+# ======================================================
+def paycodes_frame(rows: int, linked_ids: list[int], seed=None) -> pd.DataFrame:
+    rng = _rng(seed)
+    return pd.DataFrame({
+        "id": [""] * rows,
+        "code": _labels("BENCH", rows),
+        "description": _sometimes(rng, np.char.add("Benchmark paycode ", np.arange(rows).astype(str)), 0.8),
+        "inactive": _pick(rng, ["FALSE", "false", ""], rows),
+        "absence": _pick(rng, BOOL_TEXT, rows),
+        "schedule": _pick(rng, BOOL_TEXT, rows),
+        "exception": _pick(rng, BOOL_TEXT, rows),
+        "linkedPaycode": _sometimes(rng, _pick(rng, linked_ids, rows), 0.3),
+        "presentDays": _pick(rng, [1, 0, 0.5, ""], rows),
+        "leaveDays": _pick(rng, [0, 1, ""], rows),
+        "payableDays": _pick(rng, [1, 0, ""], rows),
+        "otHours": _sometimes(rng, rng.integers(0, 4, rows), 0.2),
+    })
+
+
+def shift_templates_frame(rows: int, paycode_ids: list[int], seed=None) -> pd.DataFrame:
+    rng = _rng(seed)
+    night = rng.random(rows) < 0.25
+    frame = pd.DataFrame({
+        "name": _labels("BENCH_SHIFT_", rows),
+        "description": np.char.add("Benchmark shift ", np.arange(rows).astype(str)).astype(object),
+        # Text, seconds-precision text and Excel day fractions all show up in real sheets.
+        "startTime": np.where(night, _pick(rng, ["21:00:00", 0.875], rows), _pick(rng, ["09:00", "08:30:00", 0.375], rows)),
+        "endTime": np.where(night, _pick(rng, ["06:00:00", 0.25], rows), _pick(rng, ["18:00", "17:30:00", 0.75], rows)),
+        "Night Shift": np.where(night, "TRUE", _pick(rng, ["FALSE", "", "false"], rows)),
+        "beforeStartToleranceMinute": _sometimes(rng, rng.integers(0, 60, rows), 0.7),
+        "afterStartToleranceMinute": _sometimes(rng, rng.integers(0, 60, rows), 0.7),
+        "lateInToleranceMinute": _sometimes(rng, rng.integers(0, 30, rows), 0.5),
+        "earlyOutToleranceMinute": _sometimes(rng, rng.integers(0, 30, rows), 0.5),
+        "report": _pick(rng, ["TRUE", "FALSE"], rows),
+        **{day: _pick(rng, ["TRUE", "true"], rows) for day in ("monday", "tuesday", "wednesday", "thursday", "friday")},
+        **{day: _pick(rng, ["FALSE", ""], rows) for day in ("saturday", "sunday")},
+    })
+    for slot in (1, 2, 3):
+        keep = 1.0 if slot == 1 else 0.6 if slot == 2 else 0.2
+        frame[f"paycode_id{slot}"] = _sometimes(rng, _pick(rng, paycode_ids, rows), keep)
+        frame[f"paycode_startMinute{slot}"] = (slot - 1) * 240
+        frame[f"paycode_endMinute{slot}"] = _sometimes(rng, np.full(rows, slot * 240), 0.7)
+    frame["exception_paycode_id1"] = _sometimes(rng, _pick(rng, paycode_ids, rows), 0.3)
+    frame["exception_type1"] = _alongside(frame["exception_paycode_id1"], "LATE_IN")
+    frame["exception_startMinute1"] = _alongside(frame["exception_paycode_id1"], 15)
+    frame["exception_endMinute1"] = ""
+    return frame
+
+
+def overtime_policies_frame(rows: int, seed=None) -> pd.DataFrame:
+    rng = _rng(seed)
+    frame = pd.DataFrame({
+        "id": [""] * rows,
+        "name": _labels("BENCH_OT_", rows),
+        "description": _sometimes(rng, _labels("Overtime policy ", rows), 0.5),
+        "Applicability": _pick(rng, ["DAILY", "WEEKLY", ""], rows),
+        "minMinute": _pick(rng, [30, 60, ""], rows),
+        "maxDailyMinute": _pick(rng, [240, 180, ""], rows),
+        "maxWeeklyMinute": _sometimes(rng, np.full(rows, 900), 0.3),
+        "skipTotalizationRoundings": _pick(rng, BOOL_TEXT, rows),
+    })
+    for slot in (1, 2, 3):
+        keep = 0.9 if slot == 1 else 0.5 / slot
+        start = _sometimes(rng, np.full(rows, (slot - 1) * 30), keep)
+        frame[f"rounding_startMinute{slot}"] = start
+        frame[f"rounding_endMinute{slot}"] = _alongside(start, slot * 30)
+        frame[f"rounding_roundMinute{slot}"] = _alongside(start, 15)
+    group = _sometimes(rng, _pick(rng, ["NATIONAL", "REGIONAL"], rows), 0.4)
+    frame["holidayGroup1"] = group
+    frame["holidayGroup_minMinute1"] = _alongside(group, 60)
+    frame["holidayGroup_maxDailyMinute1"] = _alongside(group, 480)
+    return frame
+
+
+def accrual_policies_frame(rows: int, accrual_ids: list[int], paycode_ids: list[int], seed=None) -> pd.DataFrame:
+    rng = _rng(seed)
+    frame = pd.DataFrame({
+        "id": [""] * rows,
+        "name": _labels("BENCH_AP_", rows),
+        "description": _sometimes(rng, _labels("Accrual policy ", rows), 0.5),
+        "accrualId": _pick(rng, accrual_ids, rows),
+        "grantType": _pick(rng, ["FIXED", "EARNED"], rows),
+        "grantFrequency": _pick(rng, ["MONTHLY", "YEARLY", "QUARTERLY"], rows),
+        "grantStartDate": _pick(rng, ["01/01", "01/04", ""], rows),
+        "forceAvail": _pick(rng, BOOL_TEXT, rows),
+        "carryoverAmountMax": _pick(rng, BOOL_TEXT, rows),
+        "grantExpiredAfter": _sometimes(rng, rng.integers(1, 12, rows), 0.3),
+    })
+    for slot in (1, 2):
+        start = _sometimes(rng, np.full(rows, (slot - 1) * 12), 1.0 if slot == 1 else 0.4)
+        frame[f"grantStart{slot}"] = start
+        frame[f"grantEnd{slot}"] = _alongside(start, slot * 12)
+        frame[f"grantMax{slot}"] = _alongside(start, _pick(rng, ["FALSE", "TRUE"], rows))
+        frame[f"grantAmount{slot}"] = _alongside(start, _pick(rng, [1, 1.5, 2], rows))
+    rule = _sometimes(rng, _pick(rng, ["GENDER", "GRADE"], rows), 0.2)
+    frame["ruleCondition1"] = rule
+    frame["ruleValue1"] = _alongside(rule, "F")
+    for slot in (1, 2):
+        paycode = _sometimes(rng, _pick(rng, paycode_ids, rows), 0.9 if slot == 1 else 0.3)
+        frame[f"takingPaycodeID{slot}"] = paycode
+        frame[f"takingAmount{slot}"] = _alongside(paycode, 1)
+    return frame
+
+
+def schedule_delete_frame(rows: int, seed=None) -> pd.DataFrame:
+    rng = _rng(seed)
+    return pd.DataFrame({
+        "externalNumber": np.char.add("E", (100000 + rng.integers(0, 50000, rows)).astype(str)).astype(object),
+        "date": pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+    }).assign(date=lambda frame: frame["date"].dt.strftime("%Y-%m-%d"))
+
+
+def punches_frame(rows: int, seed=None) -> pd.DataFrame:
+    rng = _rng(seed)
+    stamps = pd.Timestamp("2026-01-01 06:00") + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, rows), unit="min")
+    return pd.DataFrame({
+        "externalNumber": (100000 + rng.integers(0, 50000, rows)).astype(object),
+        "dateTime": stamps.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+
+def timecard_updation_frame(rows: int, paycode_ids: list[int], seed=None) -> pd.DataFrame:
+    rng = _rng(seed)
+    return schedule_delete_frame(rows, seed).rename(columns={"date": "attendanceDate"}).assign(
+        paycode_id=_pick(rng, paycode_ids, rows)
+    )
+
+
+# ======================================================
+# API PAYLOADS
+# ======================================================
+def paycode_objects(rows: int, seed=None) -> list[dict]:
+    """GET /paycodes items, with properties as dicts or JSON text like the API returns."""
+    rng = _rng(seed)
+    day_flags = _pick(rng, ["P", "A", "L", "WO", "H"], rows)
+    linked = rng.integers(1, max(rows, 2), rows)
+    objects = []
+    for n in range(rows):
+        properties = {"DAY_FLAG": day_flags[n], "PAYDED_FLG": "Y" if n % 3 else "N"}
+        if n % 5 == 0:
+            properties["HOLIDAY_OT_GROUP"] = "GROUP_A"
+        if n % 7 == 0:
+            properties[f"CUSTOM_{n % 4}"] = str(n)
+        objects.append({
+            "id": n + 1,
+            "code": f"PC{n:07d}",
+            "description": f"Paycode {n}",
+            "inactive": False,
+            "linkedPaycode": {"id": int(linked[n])} if n % 4 == 0 else None,
+            "properties": properties if n % 2 else str(properties).replace("'", '"'),
+        })
+    return objects
+
+
+def level_columns() -> list[dict]:
+    return [{"id": level_id, "name": name} for level_id, name in LEVELS]
+
+
+def organization_location_objects(rows: int, seed=None) -> list[dict]:
+    """GET /organization_locations items; some only carry a path, as older tenants return."""
+    rng = _rng(seed)
+    entry_ids = rng.integers(1000, 99999, (rows, len(LEVELS)))
+    objects = []
+    for n in range(rows):
+        location = {
+            "id": n + 1,
+            "name": f"LOC{n:07d}",
+            "knownLocation": {"id": int(entry_ids[n, 0])} if n % 3 else None,
+            "properties": {"PERIOD_START_DAY": 1 + n % 28},
+            "paycodeEventSet": {"id": 10 + n % 5},
+            "shiftTemplateSet": {"id": 20 + n % 7} if n % 2 else None,
+        }
+        if n % 10 == 0:
+            location["path"] = "/".join(str(value) for value in entry_ids[n])
+            location["organizationEntries"] = []
+        else:
+            location["organizationEntries"] = [
+                {"id": int(entry_ids[n, index]), "organizationLevelId": level_id}
+                if index % 2 else
+                {"organizationEntry": {"id": int(entry_ids[n, index])}, "organizationLevel": {"id": level_id}}
+                for index, (level_id, _) in enumerate(LEVELS)
+            ]
+        objects.append(location)
+    return objects
+
+
+def timecard_entries(rows: int, shifts=20, paycodes=50, seed=None):
+    """(timecard, entry) pairs plus shift and paycode lookups for analyze_entry."""
+    rng = _rng(seed)
+    shift_lookup = {
+        str(n): {"id": n, "name": f"SHIFT{n}", "startTime": f"1970-01-01 {8 + n % 4:02d}:00:00",
+                 "endTime": f"1970-01-0{1 if n % 5 else 2} {(17 + n % 4) % 24:02d}:00:00"}
+        for n in range(1, shifts + 1)
+    }
+    paycode_lookup = {str(n): {"id": n, "code": f"PC{n}", "description": f"Paycode {n}"} for n in range(1, paycodes + 1)}
+    offsets = rng.integers(-30, 45, (rows, 2))
+    pairs = []
+    for n in range(rows):
+        day = f"2026-{1 + n % 12:02d}-{1 + n % 28:02d}"
+        shift_id = 1 + n % shifts
+        start_hour = 8 + shift_id % 4
+        punches = [{
+            "punchInTime": f"{day}T{start_hour:02d}:{max(0, offsets[n, 0]) % 60:02d}:00",
+            "punchOutTime": f"{day} {start_hour + 9:02d}:{abs(offsets[n, 1]) % 60:02d}:00",
+            "shiftTemplate": {"id": shift_id if n % 6 else 1 + (shift_id % shifts)},
+            "punchInException": n % 17 == 0,
+            "punchOutException": False,
+        }]
+        if n % 9 == 0:
+            punches.append({"punchInTime": f"{day} 20:00:00", "punchOutTime": None, "shiftTemplate": None})
+        entry = {
+            "employee": {"id": n, "externalNumber": f"E{n}"},
+            "schedule": {"shiftTemplate": {"id": shift_id}},
+            "attendancePunches": punches,
+            "attendancePaycode": {"paycode": {"id": 1 + n % paycodes}, "version": 1},
+        }
+        pairs.append(({"attendanceDate": day}, entry))
+    return pairs, shift_lookup, paycode_lookup
+
+
+# ======================================================
+# FILES
+# ======================================================
+FRAMES = {
+    "paycodes": lambda rows: paycodes_frame(rows, list(range(1, 201))),
+    "shift_templates": lambda rows: shift_templates_frame(rows, list(range(1, 201))),
+    "overtime_policies": overtime_policies_frame,
+    "accrual_policies": lambda rows: accrual_policies_frame(rows, list(range(1, 21)), list(range(1, 201))),
+    "schedule_delete": schedule_delete_frame,
+    "punches": punches_frame,
+    "timecard_updation": lambda rows: timecard_updation_frame(rows, list(range(1, 201))),
+}
+
+
+def write_dataset(name: str, rows: int, out_dir: Path, file_format="csv") -> Path:
+    frame = FRAMES[name](rows)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{name}_{rows}.{file_format}"
+    if file_format == "xlsx":
+        frame.to_excel(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic upload sheets.")
+    parser.add_argument("names", nargs="+", help=f"'all' or any of: {', '.join(FRAMES)}")
+    parser.add_argument("--rows", nargs="+", default=["1k"], help="e.g. 1k 100k 1M")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args()
+
+    names = list(FRAMES) if args.names == ["all"] else args.names
+    for name in names:
+        for rows in map(parse_rows, args.rows):
+            if args.format == "xlsx" and rows > 1_048_575:
+                print(f"skip {name} {rows}: beyond the Excel row limit")
+                continue
+            print(write_dataset(name, rows, Path(args.out), args.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Micro-benchmarks for the CPU-bound steps between a sheet and a request.
+
+Each benchmark builds its input from benchmarks.datasets once, then times
+only the step itself (best of --repeat runs) and reports microseconds per
+row. A run fails when a step is slower than its ceiling in CEILINGS_US or,
+with --baseline, slower than the baseline by more than --tolerance.
+
+    python -m benchmarks.micro                            # all, 10k rows
+    python -m benchmarks.micro --rows 1k 100k normalize_time analyze_entry
+    python -m benchmarks.micro --rows 1M --output micro.json --baseline last_release.json
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from benchmarks import datasets
+
+DEFAULT_ROWS = ["10k"]
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+XLSX_MAX_ROWS = 100_000  # openpyxl writes ~10k rows/s; larger sheets are read from csv
+
+# Per-row ceilings in microseconds, about 2.5x the steady-state cost measured
+# at 10k-100k rows. Runs of 1k rows or fewer pay fixed setup costs per row and
+# can exceed them.
+CEILINGS_US = {
+    "read_sheet": 250,
+    "normalize_time": 12,
+    "shift_prepare": 100,
+    "paycodes_prepare": 35,
+    "paycodes_flatten_export": 8,
+    "accrual_nest_groups": 35,
+    "accrual_build_payload": 30,
+    "accrual_prepare": 100,
+    "build_rows_from_locations": 25,
+    "analyze_entry": 900,
+    "listing_frame": 70,
+    "encode_payloads": 3,
+}
+
+
+@dataclass
+class Micro:
+    name: str
+    setup: Callable[[int], object]
+    fn: Callable[[object], object]
+    description: str
+
+
+MICROS: dict[str, Micro] = {}
+
+
+def micro(name: str, setup: Callable[[int], object]):
+    def register(fn):
+        MICROS[name] = Micro(name, setup, fn, (fn.__doc__ or "").strip())
+        return fn
+    return register
+
+
+# ======================================================
+# BENCHMARKS
+# ======================================================
+def _sheet(rows):
+    frame = datasets.paycodes_frame(rows, list(range(1, 201)))
+    buffer = io.BytesIO()
+    if rows <= XLSX_MAX_ROWS:
+        frame.to_excel(buffer, index=False)
+        return "xlsx", buffer.getvalue()
+    frame.to_csv(buffer, index=False)
+    return "csv", buffer.getvalue()
+
+
+@micro("read_sheet", setup=_sheet)
+def _read_sheet(args):
+    """Upload bytes to a filled DataFrame, as every upload module does."""
+    kind, data = args
+    reader = pd.read_excel if kind == "xlsx" else pd.read_csv
+    return reader(io.BytesIO(data)).fillna("")
+
+
+def _time_cells(rows):
+    frame = datasets.shift_templates_frame(rows, [1])
+    return list(frame["startTime"]) + list(frame["endTime"])
+
+
+@micro("normalize_time", setup=_time_cells)
+def _normalize_time(values):
+    """Shift start/end cells (text, HH:MM:SS, Excel fractions) to API datetimes."""
+    from modules.shift_templates import normalize_time
+    return [normalize_time(value) for value in values]
+
+
+@micro("shift_prepare", setup=lambda rows: datasets.shift_templates_frame(rows, list(range(1, 201))))
+def _shift_prepare(frame):
+    """Shift template sheet to payloads."""
+    from modules.shift_templates import _prepare_shift_rows
+    return _prepare_shift_rows(frame)
+
+
+@micro("paycodes_prepare", setup=lambda rows: datasets.paycodes_frame(rows, list(range(1, 201))))
+def _paycodes_prepare(frame):
+    """Paycode sheet to payloads (schema coercion and duplicate check)."""
+    from modules.paycodes import _prepare_paycode_rows
+    return _prepare_paycode_rows(frame)
+
+
+@micro("paycodes_flatten_export", setup=lambda rows: pd.DataFrame(datasets.paycode_objects(rows)))
+def _paycodes_flatten_export(frame):
+    """Exported paycodes with their properties spread into columns."""
+    from modules.paycodes import _flatten_export
+    return _flatten_export(frame.copy())
+
+
+def _accrual_frame(rows):
+    return datasets.accrual_policies_frame(rows, list(range(1, 21)), list(range(1, 201)))
+
+
+@micro("accrual_nest_groups", setup=_accrual_frame)
+def _accrual_nest_groups(frame):
+    """Numbered accrual policy columns melted into per-row groups."""
+    from modules.accrual_policies import _nest_policy_groups
+    return _nest_policy_groups(frame)
+
+
+def _accrual_records(rows):
+    from modules.accrual_policies import POLICY_SCHEMA, _nest_policy_groups
+
+    frame = _accrual_frame(rows)
+    nested, _ = _nest_policy_groups(frame)
+    records = POLICY_SCHEMA.coerce(frame).records()
+    return [
+        (record, {key: entries.get(index, []) for key, entries in nested.items()})
+        for index, record in zip(frame.index, records)
+    ]
+
+
+@micro("accrual_build_payload", setup=_accrual_records)
+def _accrual_build_payload(pairs):
+    """Accrual policy payloads from already coerced records."""
+    from modules.accrual_policies import _build_payload
+    return [_build_payload(record, groups) for record, groups in pairs]
+
+
+@micro("accrual_prepare", setup=_accrual_frame)
+def _accrual_prepare(frame):
+    """Accrual policy sheet to payloads, end to end."""
+    from modules.accrual_policies import _prepare_policy_rows
+    return _prepare_policy_rows(frame)
+
+
+@micro("build_rows_from_locations", setup=lambda rows: (datasets.organization_location_objects(rows), datasets.level_columns()))
+def _build_rows_from_locations(args):
+    """Organization locations flattened into export rows."""
+    from modules.organization_locations import build_rows_from_locations
+    return build_rows_from_locations(*args)
+
+
+@micro("analyze_entry", setup=datasets.timecard_entries)
+def _analyze_entry(args):
+    """Timecard entries checked against their shift and paycode."""
+    from modules.timecard_analyzer import analyze_entry
+    pairs, shift_lookup, paycode_lookup = args
+    return [analyze_entry(timecard, entry, shift_lookup, paycode_lookup) for timecard, entry in pairs]
+
+
+def _listing_body(rows):
+    return json.dumps({"content": datasets.organization_location_objects(rows)}).encode()
+
+
+@micro("listing_frame", setup=_listing_body)
+def _listing_frame(body):
+    """Listing response body streamed into a flattened DataFrame (bulk delete, exports)."""
+    from services import fastjson
+    chunks = (body[i:i + fastjson.CHUNK_BYTES] for i in range(0, len(body), fastjson.CHUNK_BYTES))
+    rows = fastjson.Columns().extend(fastjson.ArrayStream(chunks))
+    return rows.frame()
+
+
+@micro("encode_payloads", setup=datasets.paycode_objects)
+def _encode_payloads(objects):
+    """Request payloads encoded to JSON bytes, as the bulk sessions send them."""
+    from services import fastjson
+    return [fastjson.dumps(obj) for obj in objects]
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+def run_micro(bench: Micro, rows: int, repeat: int) -> dict:
+    started = time.perf_counter()
+    args = bench.setup(rows)
+    setup_s = time.perf_counter() - started
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        bench.fn(args)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    us_per_row = best * 1e6 / rows
+    return {
+        "benchmark": bench.name,
+        "rows": rows,
+        "best_s": round(best, 4),
+        "us_per_row": round(us_per_row, 2),
+        "ceiling_us": CEILINGS_US.get(bench.name),
+        "setup_s": round(setup_s, 2),
+    }
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    previous = {(item["benchmark"], item["rows"]): item for item in baseline}
+    regressions = []
+    for item in results:
+        ceiling = item["ceiling_us"]
+        if ceiling is not None and item["us_per_row"] > ceiling:
+            regressions.append(f"{item['benchmark']} @ {item['rows']}: {item['us_per_row']} µs/row over the {ceiling} µs ceiling")
+        before = previous.get((item["benchmark"], item["rows"]))
+        if before and item["us_per_row"] > before["us_per_row"] * (1 + tolerance):
+            regressions.append(
+                f"{item['benchmark']} @ {item['rows']}: {before['us_per_row']} → {item['us_per_row']} µs/row"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time parsing and payload building per row.")
+    parser.add_argument("benchmarks", nargs="*", help=f"default: all of {', '.join(MICROS)}")
+    parser.add_argument("--rows", nargs="+", default=DEFAULT_ROWS, help="e.g. 1k 100k 1M")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    unknown = [name for name in args.benchmarks if name not in MICROS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = []
+    for name in args.benchmarks or list(MICROS):
+        for rows in map(datasets.parse_rows, args.rows):
+            result = run_micro(MICROS[name], rows, args.repeat)
+            results.append(result)
+            print(
+                f"{name:<28} {rows:>9,} rows  {result['best_s']:>8.3f}s  "
+                f"{result['us_per_row']:>8.2f} µs/row  (ceiling {result['ceiling_us']})",
+                flush=True,
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "results": results,
+        }, indent=2))
+
+    baseline = json.loads(Path(args.baseline).read_text())["results"] if args.baseline else []
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
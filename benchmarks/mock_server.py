@@ -0,0 +1,533 @@
+"""Local stand-in for a tenant and the Supabase log store.
+
+Serves the endpoints the portal calls so modules can be timed without a live
+tenant:
+
+- /authorization-server/oauth/token
+- /resource-server/api/<resource>[/<id>] (in-memory CRUD, optional paging)
+- /resource-server/api/schedule_planner/, /schedules/action, /punches/action/,
+  /timecards and /web-client/restProxy/timecards/
+- Supabase /rest/v1/<table> and /storage/v1/object/...
+
+Latency, 500s and 429s (random or above an in-flight capacity) are injected
+on every request. --gzip-min-bytes gzips larger responses, and gzip request
+bodies are accepted unless --no-gzip-requests. With --tls the tenant is served
+over https (self-signed), and --http2 serves HTTP/2 instead of HTTP/1.1 (needs
+the h2 package). Run standalone with
+`python -m benchmarks.mock_server --latency-ms 40 --capacity 8`, then point the
+app's host and SUPABASE_URL at the printed address.
+"""
+
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import os
+import random
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/resource-server/api/"
+SPECIAL_RESOURCES = {"schedule_planner", "schedules", "punches", "timecards"}
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    error_rate: float = 0.0  # share of requests answered with 500
+    throttle_rate: float = 0.0  # share of requests answered with 429
+    capacity: int = 0  # in-flight requests before 429s start; 0 = unlimited
+    retry_after_seconds: float = 1.0
+    page_size: int = 100  # default size when a listing asks for ?page=
+    gzip_min_bytes: int = 0  # gzip responses this large for clients that accept it; 0 = never
+    gzip_requests: bool = True  # accept Content-Encoding: gzip bodies (False answers 415)
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 1024  # the default backlog of 5 drops connects from wide async runs
+    daemon_threads = True
+
+
+class MockTenant:
+    def __init__(self, config: MockConfig | None = None, host="127.0.0.1", port=0, tls=None, http2=False):
+        """tls=(certfile, keyfile) serves https; http2 serves HTTP/2 only (ALPN h2, or h2c without tls)."""
+        self.config = config or MockConfig()
+        self.store: dict[str, dict[int, dict]] = {}
+        self.tables: dict[str, list[dict]] = {}
+        self.files: dict[str, bytes] = {}
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "peak_in_flight": 0, "connections": 0, "gzip_requests": 0}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._scheme = "https" if tls else "http"
+        self._thread: threading.Thread | None = None
+        if http2:
+            self._server = _H2Server(self, host, port, _tls_context(tls, "h2") if tls else None)
+        else:
+            self._server = _Server((host, port), self._handler())
+            if tls:
+                self._server.socket = _tls_context(tls, "http/1.1").wrap_socket(
+                    self._server.socket, server_side=True, do_handshake_on_connect=False
+                )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{self._scheme}://{host}:{port}"
+
+    def start(self) -> "MockTenant":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --------------------------------------------------
+    # Data
+    # --------------------------------------------------
+    def seed(self, resource: str, objects: list[dict]) -> list[int]:
+        """Store objects under new ids and return the ids."""
+        with self._lock:
+            bucket = self.store.setdefault(resource, {})
+            ids = []
+            for obj in objects:
+                object_id = next(self._ids)
+                bucket[object_id] = {**obj, "id": object_id}
+                ids.append(object_id)
+        return ids
+
+    def objects(self, resource: str) -> list[dict]:
+        with self._lock:
+            return list(self.store.get(resource, {}).values())
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {"requests": 0, "throttled": 0, "errors": 0, "peak_in_flight": 0, "connections": 0, "gzip_requests": 0}
+
+    # --------------------------------------------------
+    # Fault injection
+    # --------------------------------------------------
+    def _enter(self) -> int | None:
+        """Count the request in; returns an injected status code, if any."""
+        config = self.config
+        with self._lock:
+            self._in_flight += 1
+            self.stats["requests"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self._in_flight)
+            over_capacity = config.capacity and self._in_flight > config.capacity
+            roll = random.random()
+            if over_capacity or roll < config.throttle_rate:
+                self.stats["throttled"] += 1
+                return 429
+            if roll < config.throttle_rate + config.error_rate:
+                self.stats["errors"] += 1
+                return 500
+        delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return None
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    # --------------------------------------------------
+    # Routes
+    # --------------------------------------------------
+    def _list(self, resource, query):
+        items = self.objects(resource)
+        if "page" not in query:
+            return items
+        size = int(query.get("size", [self.config.page_size])[0])
+        page = int(query["page"][0])
+        return {
+            "content": items[page * size:(page + 1) * size],
+            "number": page,
+            "size": size,
+            "totalElements": len(items),
+            "totalPages": (len(items) + size - 1) // size,
+        }
+
+    def _resource(self, method, resource, object_id, query, body):
+        if resource == "schedule_planner":
+            date = query.get("fromDate", [""])[0]
+            employee = self._employee(query.get("externalNumber", [""])[0])
+            entry = {"scheduleDate": date, "currentSchedule": {"id": employee["id"] * 10, "version": 1}}
+            return 200, {"data": [{"employee": employee, "entries": [entry]}]}
+        if resource in SPECIAL_RESOURCES:
+            return 200, {"status": "OK"}
+
+        with self._lock:
+            bucket = self.store.setdefault(resource, {})
+            if method == "POST" and object_id is None:
+                new_id = next(self._ids)
+                bucket[new_id] = {**(body or {}), "id": new_id}
+                return 201, bucket[new_id]
+            if method == "PUT" and object_id is not None:
+                if object_id not in bucket:
+                    return 404, {"message": f"{resource} {object_id} not found"}
+                bucket[object_id] = {**(body or {}), "id": object_id}
+                return 200, bucket[object_id]
+            if method == "DELETE" and object_id is not None:
+                if bucket.pop(object_id, None) is None:
+                    return 404, {"message": f"{resource} {object_id} not found"}
+                return 204, None
+            if method == "GET" and object_id is not None:
+                found = bucket.get(object_id)
+                return (200, found) if found else (404, {"message": f"{resource} {object_id} not found"})
+        if method == "GET":
+            return 200, self._list(resource, query)
+        return 405, {"message": f"{method} not supported"}
+
+    def _employee(self, external_number):
+        digits = re.sub(r"\D", "", external_number or "") or "0"
+        return {"id": int(digits) % 1_000_000 + 1, "externalNumber": external_number}
+
+    def _timecards(self, query):
+        employee = self._employee(query.get("externalNumber", [""])[0])
+        entry = {"index": 0, "employee": employee, "attendancePaycode": {"version": 1, "paycode": {"id": 1}}}
+        return 200, {"data": [{"employee": employee, "entries": [entry]}]}
+
+    def _supabase(self, method, path, query, body):
+        if path.startswith("/storage/v1/object/sign/"):
+            key = path[len("/storage/v1/object/sign/"):]
+            return 200, {"signedURL": f"/object/sign/{key}?token=mock"}
+        if path.startswith("/storage/v1/object/"):
+            key = path[len("/storage/v1/object/"):]
+            if method in ("POST", "PUT"):
+                self.files[key] = body if isinstance(body, bytes) else json.dumps(body).encode()
+                return 200, {"Key": key}
+            data = self.files.get(key.removeprefix("public/"))
+            return (200, data) if data is not None else (404, {"message": "not found"})
+
+        table = path[len("/rest/v1/"):].strip("/")
+        with self._lock:
+            rows = self.tables.setdefault(table, [])
+            if method == "POST":
+                for row in body if isinstance(body, list) else [body]:
+                    rows.append({"id": len(rows) + 1, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), **row})
+                return 201, None
+            if method == "DELETE":
+                rows.clear()
+                return 204, None
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", [str(len(rows))])[0])
+            return 200, rows[offset:offset + limit]
+
+    # --------------------------------------------------
+    # Requests (shared by the HTTP/1.1 and HTTP/2 listeners)
+    # --------------------------------------------------
+    def _connected(self) -> None:
+        with self._lock:
+            self.stats["connections"] += 1
+
+    def respond(self, method, target, content_type, raw, content_encoding=None, accept_encoding=""):
+        """(status, body bytes, headers) for one request, with gzip either way if configured."""
+        content_encoding = (content_encoding or "identity").strip().lower()
+        if content_encoding != "identity":
+            if content_encoding != "gzip" or not self.config.gzip_requests:
+                return _encode(415, {"message": f"Unsupported Content-Encoding {content_encoding}"})
+            try:
+                raw = gzip.decompress(raw)
+            except (OSError, EOFError):
+                return _encode(400, {"message": "Malformed gzip body"})
+            with self._lock:
+                self.stats["gzip_requests"] += 1
+
+        status, data, headers = self._respond(method, target, content_type, raw)
+        minimum = self.config.gzip_min_bytes
+        if minimum and len(data) >= minimum and "gzip" in (accept_encoding or "").lower():
+            data = gzip.compress(data, compresslevel=6, mtime=0)
+            headers = {**headers, "Content-Encoding": "gzip", "Content-Length": str(len(data))}
+        return status, data, headers
+
+    def _respond(self, method, target, content_type, raw):
+        parts = urlsplit(target)
+        path, query = parts.path, parse_qs(parts.query)
+        body = raw
+        if "json" in (content_type or "") and raw:
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                pass
+
+        injected = self._enter()
+        try:
+            if injected == 429:
+                return _encode(429, {"message": "Too many requests"}, {"Retry-After": f"{self.config.retry_after_seconds:g}"})
+            if injected == 500:
+                return _encode(500, {"message": "Injected failure"})
+
+            if path.startswith("/authorization-server/oauth/token"):
+                status, payload = 200, {"access_token": "mock-token", "token_type": "bearer", "expires_in": 3600}
+            elif path.startswith("/web-client/restProxy/timecards"):
+                status, payload = self._timecards(query)
+            elif path.startswith(("/rest/v1/", "/storage/v1/")):
+                status, payload = self._supabase(method, path, query, body)
+            elif path.startswith(API_PREFIX):
+                segments = path[len(API_PREFIX):].strip("/").split("/")
+                object_id = int(segments[1]) if len(segments) > 1 and segments[1].isdigit() else None
+                status, payload = self._resource(method, segments[0], object_id, query, body)
+            else:
+                status, payload = 404, {"message": f"No mock for {path}"}
+            return _encode(status, payload)
+        finally:
+            self._leave()
+
+    def _handler(self):
+        tenant = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this every
+            # response waits on the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                if isinstance(self.request, ssl.SSLSocket):
+                    self.request.do_handshake()  # here, not in the accept loop
+                super().setup()
+                tenant._connected()
+
+            def _dispatch(self, method):
+                raw = b""
+                if method in ("POST", "PUT", "PATCH"):
+                    length = int(self.headers.get("Content-Length") or 0)
+                    raw = self.rfile.read(length) if length else b""
+                status, data, headers = tenant.respond(
+                    method, self.path, self.headers.get("Content-Type"), raw,
+                    self.headers.get("Content-Encoding"), self.headers.get("Accept-Encoding", ""),
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+        return Handler
+
+
+# ======================================================
+# TLS / HTTP/2
+# ======================================================
+def _tls_context(tls, protocol) -> ssl.SSLContext:
+    certfile, keyfile = tls
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(certfile, keyfile)
+    context.set_alpn_protocols([protocol])
+    return context
+
+
+def self_signed_cert(directory) -> tuple[str, str]:
+    """Cert/key pair for 127.0.0.1 and localhost (needs the openssl command)."""
+    certfile, keyfile = os.path.join(directory, "mock.crt"), os.path.join(directory, "mock.key")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+         "-keyout", keyfile, "-out", certfile, "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost"],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+class _H2Server:
+    """HTTP/2 listener on an asyncio loop; requests are answered on a thread pool
+    so injected latency does not block the other streams."""
+
+    def __init__(self, tenant, host, port, context):
+        self.tenant = tenant
+        self.context = context
+        self.loop = asyncio.new_event_loop()
+        self.pool = ThreadPoolExecutor(max_workers=1024, thread_name_prefix="mock-h2")
+        self.server = self.loop.run_until_complete(
+            self.loop.create_server(lambda: _H2Connection(self), host, port, ssl=context, backlog=1024)
+        )
+        self.server_address = self.server.sockets[0].getsockname()
+
+    def serve_forever(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def server_close(self):
+        self.server.close()
+        self.pool.shutdown(wait=False)
+
+
+class _H2Connection(asyncio.Protocol):
+    def __init__(self, server: _H2Server):
+        import h2.config
+        import h2.connection
+
+        self.server = server
+        self.h2 = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.streams: dict[int, tuple[dict, bytearray]] = {}
+        self.window_open: dict[int, asyncio.Event] = {}
+        self.transport = None
+
+    def connection_made(self, transport):
+        import h2.settings
+
+        self.transport = transport
+        self.server.tenant._connected()
+        self.h2.initiate_connection()
+        self.h2.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+        self._flush()
+
+    def _flush(self):
+        data = self.h2.data_to_send()
+        if data and not self.transport.is_closing():
+            self.transport.write(data)
+
+    def data_received(self, data):
+        import h2.events
+        import h2.exceptions
+
+        try:
+            events = self.h2.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self._flush()
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self.streams[event.stream_id] = (dict(event.headers), bytearray())
+            elif isinstance(event, h2.events.DataReceived):
+                if event.stream_id in self.streams:
+                    self.streams[event.stream_id][1].extend(event.data)
+                self.h2.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded) and event.stream_id in self.streams:
+                headers, body = self.streams.pop(event.stream_id)
+                self.server.loop.create_task(self._answer(event.stream_id, headers, bytes(body)))
+            elif isinstance(event, h2.events.StreamReset):
+                self.streams.pop(event.stream_id, None)
+            elif isinstance(event, h2.events.WindowUpdated):
+                for stream_id, opened in self.window_open.items():
+                    if event.stream_id in (0, stream_id):
+                        opened.set()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self._flush()
+
+    def connection_lost(self, exc):
+        for opened in self.window_open.values():
+            opened.set()
+
+    async def _answer(self, stream_id, headers, body):
+        import h2.exceptions
+
+        status, data, extra = await self.server.loop.run_in_executor(
+            self.server.pool, self.server.tenant.respond,
+            headers[":method"], headers[":path"], headers.get("content-type"), body,
+            headers.get("content-encoding"), headers.get("accept-encoding", ""),
+        )
+        if self.transport.is_closing():
+            return
+        try:
+            self.h2.send_headers(
+                stream_id, [(":status", str(status)), *((k.lower(), v) for k, v in extra.items())], end_stream=not data,
+            )
+            self._flush()
+            while data:
+                window = min(self.h2.local_flow_control_window(stream_id), self.h2.max_outbound_frame_size)
+                if window <= 0:
+                    opened = self.window_open.setdefault(stream_id, asyncio.Event())
+                    opened.clear()
+                    await opened.wait()
+                    if self.transport.is_closing():
+                        return
+                    continue
+                chunk, data = data[:window], data[window:]
+                self.h2.send_data(stream_id, chunk, end_stream=not data)
+                self._flush()
+        except h2.exceptions.StreamClosedError:
+            pass
+        finally:
+            self.window_open.pop(stream_id, None)
+
+
+def _encode(status, payload, extra_headers=None):
+    if isinstance(payload, bytes):
+        data, content_type = payload, "application/octet-stream"
+    else:
+        data = json.dumps(payload).encode() if payload is not None else b""
+        content_type = "application/json"
+    return status, data, {"Content-Type": content_type, "Content-Length": str(len(data)), **(extra_headers or {})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=MockConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=MockConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate)
+    parser.add_argument("--throttle-rate", type=float, default=MockConfig.throttle_rate)
+    parser.add_argument("--capacity", type=int, default=MockConfig.capacity)
+    parser.add_argument("--retry-after", type=float, default=MockConfig.retry_after_seconds)
+    parser.add_argument("--page-size", type=int, default=MockConfig.page_size)
+    parser.add_argument("--gzip-min-bytes", type=int, default=MockConfig.gzip_min_bytes, help="gzip responses at least this large")
+    parser.add_argument("--no-gzip-requests", action="store_true", help="answer gzip request bodies with 415")
+    parser.add_argument("--seed-paycodes", type=int, default=50, help="paycodes created at startup")
+    parser.add_argument("--tls", action="store_true", help="serve https with a throwaway self-signed cert")
+    parser.add_argument("--http2", action="store_true", help="serve HTTP/2 (h2 over TLS, h2c without --tls)")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        capacity=args.capacity,
+        retry_after_seconds=args.retry_after,
+        page_size=args.page_size,
+        gzip_min_bytes=args.gzip_min_bytes,
+        gzip_requests=not args.no_gzip_requests,
+    )
+    tls = self_signed_cert(tempfile.mkdtemp(prefix="mock-tenant-")) if args.tls else None
+    tenant = MockTenant(config, args.host, args.port, tls=tls, http2=args.http2).start()
+    if tls:
+        print(f"Trust the certificate with REQUESTS_CA_BUNDLE={tls[0]}")
+    tenant.seed("paycodes", [{"code": f"PC{n:04d}", "description": f"Paycode {n}"} for n in range(args.seed_paycodes)])
+    print(f"Mock tenant listening on {tenant.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        tenant.stop()
+
+
+if __name__ == "__main__":
+    main()
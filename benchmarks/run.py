@@ -0,0 +1,443 @@
+"""Throughput benchmarks for the portal's upload, export and delete paths.
+
+Every scenario runs the same functions the module UI calls, in its own
+process, against a local MockTenant. Reported per scenario: rows/s, request
+p50/p95 (from the job logger), peak RSS of the worker process and what the
+mock server saw.
+
+    python -m benchmarks.run                               # all scenarios, 1,000 rows
+    python -m benchmarks.run --rows 5000 --latency-ms 40 paycodes_upload
+    python -m benchmarks.run --output today.json --baseline last_release.json
+    python -m benchmarks.run --engine threads async --rows 5000 --workers 500 paycodes_upload
+    python -m benchmarks.run --transport http1 http2 --tls --workers 64 paycodes_upload
+    python -m benchmarks.run --gzip-min-bytes 1024 --compress-requests config_export
+
+With --baseline the run exits non-zero when a scenario's rows/s drops or its
+p95 grows by more than --tolerance. --engine runs the scenarios once per
+bulk engine (BULK_ENGINE); --workers sets the rows in flight for both
+(BULK_MAX_WORKERS) and lifts the per-host limit to match. --transport runs
+them against an HTTP/1.1 and/or an HTTP/2 mock (BULK_HTTP2), --tls over https
+so connection setup includes the TLS handshake; server_connections is how
+many connections the mock accepted. --gzip-min-bytes has the mock gzip
+responses and --compress-requests gzips large request bodies; sent_kb and
+received_kb are wire sizes and saved_kb what compression saved.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from benchmarks import datasets
+from benchmarks.mock_server import MockConfig, MockTenant, self_signed_cert
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_ROWS = 1000
+DEFAULT_TOLERANCE = 0.2
+BASE_PAYCODES = 200
+BASE_ACCRUALS = 20
+
+
+@dataclass
+class Context:
+    url: str
+    rows: int
+    seeded: dict[str, list[int]] = field(default_factory=dict)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {
+            "Authorization": "Bearer mock-token",
+            "Content-Type": "application/json;charset=UTF-8",
+            "Accept": "application/json",
+        }
+
+    def api_url(self, resource: str) -> str:
+        return f"{self.url}/resource-server/api/{resource}"
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: Callable[[Context], int]
+    seed: Callable[[MockTenant, int], dict[str, list[int]]] | None = None
+
+
+SCENARIOS: dict[str, Scenario] = {}
+
+
+def scenario(name, seed=None):
+    def register(run):
+        SCENARIOS[name] = Scenario(name, run, seed)
+        return run
+    return register
+
+
+def _ok(results, column="Status", ok=("Success",)) -> int:
+    return sum(1 for row in results if row.get(column) in ok)
+
+
+# ======================================================
+# SCENARIOS
+# ======================================================
+@scenario("paycodes_upload")
+def _paycodes_upload(ctx: Context) -> int:
+    from modules.paycodes import PAYCODE_REFERENCES, _prepare_paycode_rows, _send_paycode_rows
+    from services.preflight import block_rows, preflight
+
+    df = datasets.paycodes_frame(ctx.rows, ctx.seeded["paycodes"])
+    prepared = _prepare_paycode_rows(df)
+    blocked = preflight(df, PAYCODE_REFERENCES, ctx.url, ctx.headers).row_errors()
+    return _ok(_send_paycode_rows(block_rows(prepared, blocked), ctx.api_url("paycodes"), ctx.headers))
+
+
+@scenario("shift_templates_upload")
+def _shift_templates_upload(ctx: Context) -> int:
+    from modules.shift_templates import _prepare_shift_rows, _send_shift_rows
+
+    df = datasets.shift_templates_frame(ctx.rows, ctx.seeded["paycodes"])
+    return _ok(_send_shift_rows(_prepare_shift_rows(df), ctx.api_url("shift_templates"), ctx.headers))
+
+
+@scenario("overtime_policies_upload")
+def _overtime_policies_upload(ctx: Context) -> int:
+    from modules.overtime_policies import _prepare_overtime_rows, _send_overtime_rows
+
+    df = datasets.overtime_policies_frame(ctx.rows)
+    results = _send_overtime_rows(_prepare_overtime_rows(df), ctx.api_url("overtime_policies"), ctx.headers)
+    return _ok(results, ok=(200, 201))
+
+
+@scenario("accrual_policies_upload")
+def _accrual_policies_upload(ctx: Context) -> int:
+    from modules.accrual_policies import POLICY_REFERENCES, _prepare_policy_rows, _send_policy_rows
+    from services.preflight import block_rows, preflight
+
+    df = datasets.accrual_policies_frame(ctx.rows, ctx.seeded["accruals"], ctx.seeded["paycodes"])
+    prepared = _prepare_policy_rows(df)
+    blocked = preflight(df, POLICY_REFERENCES, ctx.url, ctx.headers).row_errors()
+    results = _send_policy_rows(block_rows(prepared, blocked), ctx.api_url("accrual_policies"), ctx.headers)
+    return _ok(results, ok=("SUCCESS",))
+
+
+def _seed_delete_targets(tenant: MockTenant, rows: int) -> dict[str, list[int]]:
+    return {"known_locations": tenant.seed("known_locations", [{"name": f"DEL{n}"} for n in range(rows)])}
+
+
+@scenario("bulk_delete", seed=_seed_delete_targets)
+def _bulk_delete(ctx: Context) -> int:
+    from services.bulk import delete_ids
+
+    results = delete_ids(ctx.api_url("known_locations"), ctx.seeded["known_locations"], ctx.headers)
+    return int((results["Status"] == "Deleted").sum())
+
+
+@scenario("punch_upload")
+def _punch_upload(ctx: Context) -> int:
+    from modules.punch import _prepare_punch_rows, _send_punch_rows
+
+    results = _send_punch_rows(_prepare_punch_rows(datasets.punches_frame(ctx.rows)), ctx.api_url("punches"), ctx.headers)
+    return _ok(results, column="status", ok=("SUCCESS",))
+
+
+@scenario("timecard_updation")
+def _timecard_updation(ctx: Context) -> int:
+    from modules.timecard_updation import _normalize_timecard_upload, _send_timecard_rows
+
+    df, _ = _normalize_timecard_upload(datasets.timecard_updation_frame(ctx.rows, ctx.seeded["paycodes"]))
+    results = _send_timecard_rows(df, ctx.url, ctx.headers, {}, {})
+    return _ok(results, ok=("SUCCESS",))
+
+
+@scenario("schedule_delete")
+def _schedule_delete(ctx: Context) -> int:
+    from modules.schedule_delete import _run_delete_flow
+
+    results = _run_delete_flow(datasets.schedule_delete_frame(ctx.rows), ctx.url, "mock-token")
+    return int((results["status"] == "SUCCESS").sum())
+
+
+def _seed_export(tenant: MockTenant, rows: int) -> dict[str, list[int]]:
+    per_resource = max(1, rows // 4)
+    return {
+        "shift_templates": tenant.seed("shift_templates", [{"name": f"EXP_SHIFT_{n}"} for n in range(per_resource)]),
+        "known_locations": tenant.seed("known_locations", [{"name": f"EXP_LOC_{n}"} for n in range(per_resource)]),
+        "paycode_events": tenant.seed("paycode_events", [{"name": f"EXP_EVT_{n}"} for n in range(per_resource)]),
+    }
+
+
+@scenario("config_export", seed=_seed_export)
+def _config_export(ctx: Context) -> int:
+    from services.bundle import export_bundle, read_bundle
+
+    _, items = read_bundle(export_bundle(ctx.url, ctx.headers))
+    return sum(len(objects) for objects in items.values())
+
+
+@scenario("snapshot_refresh", seed=_seed_export)
+def _snapshot_refresh(ctx: Context) -> int:
+    from services import snapshot
+
+    report = snapshot.refresh(ctx.url, ctx.headers)
+    return int(report["Objects"].fillna(0).sum())
+
+
+# ======================================================
+# WORKER (one process per scenario)
+# ======================================================
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _peak_threads(stop: threading.Event, peak: list[int]) -> None:
+    while not stop.wait(0.02):
+        peak[0] = max(peak[0], threading.active_count())
+
+
+def _run_worker(name: str, url: str, rows: int, seeded: dict) -> dict:
+    from services.activity_logger import _percentile, install_requests_logging, job_logging
+    from services import http2, metrics
+    from services.bulk import ENGINE
+
+    install_requests_logging()
+    ctx = Context(url, rows, seeded)
+    stop, peak = threading.Event(), [threading.active_count()]
+    sampler = threading.Thread(target=_peak_threads, args=(stop, peak), daemon=True)
+    sampler.start()
+    with job_logging(f"Benchmark {name}") as job:
+        started = time.perf_counter()
+        ok_rows = SCENARIOS[name].run(ctx)
+        seconds = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+    latencies = sorted(job.latencies_ms)
+    transfer = {"request": [0, 0], "response": [0, 0]}
+    for (_, direction), (payload, wire) in metrics.REGISTRY.transfer.items():
+        transfer[direction][0] += payload
+        transfer[direction][1] += wire
+    return {
+        "scenario": name,
+        "engine": ENGINE,
+        "rows": rows,
+        "ok_rows": ok_rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "requests": job.request_count,
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_threads": peak[0],
+        "protocols": ", ".join(sorted(set(http2.negotiated().values()))) or "HTTP/1.1",
+        "sent_kb": round(transfer["request"][1] / 1024, 1),
+        "received_kb": round(transfer["response"][1] / 1024, 1),
+        "saved_kb": round(sum(payload - wire for payload, wire in transfer.values()) / 1024, 1),
+    }
+
+
+# ======================================================
+# DRIVER
+# ======================================================
+def _revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run_scenarios(
+    names, rows, config: MockConfig, engines=("threads",), workers=None, transports=("http1",), tls=False,
+    compress_requests=False,
+) -> list[dict]:
+    # Log inserts go to their own instance so the job logger can tell them apart.
+    supabase = MockTenant(MockConfig(latency_ms=0, jitter_ms=0)).start()
+    results = []
+    with tempfile.TemporaryDirectory() as cert_dir:
+        cert = self_signed_cert(cert_dir) if tls else None
+        try:
+            for transport in transports:
+                tenant = MockTenant(config, tls=cert, http2=transport == "http2").start()
+                base = {
+                    "paycodes": tenant.seed("paycodes", [{"code": f"BASE{n:04d}"} for n in range(BASE_PAYCODES)]),
+                    "accruals": tenant.seed("accruals", [{"name": f"ACCRUAL{n}"} for n in range(BASE_ACCRUALS)]),
+                }
+                try:
+                    for engine in engines:
+                        for name in names:
+                            results.append(
+                                _run_scenario(
+                                    tenant, supabase, base, name, rows, engine, workers, transport, cert,
+                                    compress_requests,
+                                )
+                            )
+                finally:
+                    tenant.stop()
+        finally:
+            supabase.stop()
+    return results
+
+
+def _run_scenario(
+    tenant, supabase, base, name, rows, engine, workers, transport="http1", cert=None, compress_requests=False,
+) -> dict:
+    spec = SCENARIOS[name]
+    seeded = {**base, **(spec.seed(tenant, rows) if spec.seed else {})}
+    tenant.reset_stats()
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "CONFIG_PORTAL_DATA_DIR": data_dir,
+            "SUPABASE_URL": supabase.url,
+            "CLIENT_AUTH": os.getenv("CLIENT_AUTH", "Basic bWFjaGluZTptb2Nr"),
+            "BULK_ENGINE": engine,
+            # Over TLS the protocol is negotiated; plain http needs h2c prior knowledge.
+            "BULK_HTTP2": ("1" if cert else "h2c") if transport == "http2" else "0",
+            "HTTP_COMPRESS_REQUESTS": "1" if compress_requests else "0",
+        }
+        if cert:
+            env["REQUESTS_CA_BUNDLE"] = cert[0]
+        if workers:
+            env.update({
+                "BULK_MAX_WORKERS": str(workers),
+                "BULK_MAX_IN_FLIGHT": str(workers),
+                "BULK_INITIAL_IN_FLIGHT": str(workers),
+            })
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--worker", name, "--url", tenant.url,
+             "--rows", str(rows), "--seeded", json.dumps(seeded)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if process.returncode != 0:
+        print(process.stderr[-2000:], file=sys.stderr)
+        return {
+            "scenario": name, "engine": engine, "transport": transport, "rows": rows,
+            "error": f"exit {process.returncode}",
+        }
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result.update({
+        "transport": transport,
+        "server_connections": tenant.stats["connections"],
+        "server_peak_in_flight": tenant.stats["peak_in_flight"],
+        "server_throttled": tenant.stats["throttled"],
+        "server_errors": tenant.stats["errors"],
+        "server_gzip_requests": tenant.stats["gzip_requests"],
+    })
+    print(
+        f"{name} [{engine}, {transport}]: {result['rows_per_sec']} rows/s, p95 {result['p95_ms']} ms, "
+        f"{result['server_connections']} connection(s)",
+        file=sys.stderr,
+    )
+    return result
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> pd.DataFrame:
+    def key(row):
+        return row["scenario"], row.get("engine", "threads"), row.get("transport", "http1")
+
+    previous = {key(row): row for row in baseline if "error" not in row}
+    rows = []
+    for row in results:
+        before = previous.get(key(row))
+        if not before or "error" in row:
+            continue
+        speed = row["rows_per_sec"] / before["rows_per_sec"] - 1 if before["rows_per_sec"] else 0.0
+        p95 = row["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rows.append({
+            "scenario": row["scenario"],
+            "engine": row.get("engine", "threads"),
+            "transport": row.get("transport", "http1"),
+            "rows/s": f"{before['rows_per_sec']} -> {row['rows_per_sec']} ({speed:+.0%})",
+            "p95 ms": f"{before['p95_ms']} -> {row['p95_ms']} ({p95:+.0%})",
+            "regression": speed < -tolerance or p95 > tolerance,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark portal paths against a local mock tenant.")
+    parser.add_argument("scenarios", nargs="*", help=f"default: all ({', '.join(SCENARIOS)})")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--latency-ms", type=float, default=MockConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=MockConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate)
+    parser.add_argument("--throttle-rate", type=float, default=MockConfig.throttle_rate)
+    parser.add_argument("--capacity", type=int, default=MockConfig.capacity)
+    parser.add_argument("--page-size", type=int, default=MockConfig.page_size)
+    parser.add_argument("--gzip-min-bytes", type=int, default=MockConfig.gzip_min_bytes, help="mock gzips responses this large")
+    parser.add_argument("--compress-requests", action="store_true", help="run with HTTP_COMPRESS_REQUESTS=1")
+    parser.add_argument("--engine", nargs="+", choices=["threads", "async"], default=["threads"])
+    parser.add_argument("--workers", type=int, help="rows in flight (default: BULK_MAX_WORKERS)")
+    parser.add_argument("--transport", nargs="+", choices=["http1", "http2"], default=["http1"])
+    parser.add_argument("--tls", action="store_true", help="serve the mock over https (self-signed)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--seeded", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_run_worker(args.worker, args.url, args.rows, json.loads(args.seeded))))
+        return
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        capacity=args.capacity,
+        page_size=args.page_size,
+        gzip_min_bytes=args.gzip_min_bytes,
+    )
+    if "http2" in args.transport:
+        try:
+            import h2  # noqa: F401
+            import httpx  # noqa: F401
+        except ImportError:
+            parser.error("--transport http2 needs httpx[http2] installed")
+    results = run_scenarios(
+        args.scenarios or list(SCENARIOS), args.rows, config, args.engine, args.workers, args.transport, args.tls,
+        args.compress_requests,
+    )
+    print(pd.DataFrame(results).to_string(index=False))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "revision": _revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "config": vars(config),
+            "results": results,
+        }, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        comparison = compare(results, baseline, args.tolerance)
+        print()
+        print(comparison.to_string(index=False))
+        if not comparison.empty and comparison["regression"].any():
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
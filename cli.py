@@ -0,0 +1,256 @@
+"""Headless batch runner for module uploads, deletes and exports.
+
+Credentials come from the environment: PORTAL_HOST plus either PORTAL_TOKEN
+or PORTAL_USERNAME / PORTAL_PASSWORD (the token is renewed between chunks on
+long runs). Results are written as CSV or JSONL, chosen by the output file's
+extension, and appended chunk by chunk so a killed run keeps what it sent.
+
+    python cli.py upload paycodes --file paycodes.xlsx --output paycodes_results.csv --workers 16
+    python cli.py upload accrual_policies --file policies.csv --output out.jsonl --start-row 40001
+    python cli.py delete known_locations --file ids.csv --column id --output deleted.csv
+    python cli.py delete schedules --file schedules.xlsx --output schedules_deleted.csv
+    python cli.py export paycodes shift_templates --output-dir exports --format csv
+    python cli.py export --bundle tenant_config.zip
+
+Exit status is 0 when every row succeeded, 1 when some rows failed and 2 on
+a usage, login or file error.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+import pandas as pd
+import streamlit as st
+
+from services.tenants import DEFAULT_CLIENT_AUTH, Tenant, login_tenant
+
+os.environ.setdefault("CLIENT_AUTH", DEFAULT_CLIENT_AUTH)
+
+from services import fastjson, pipelines
+from services.activity_logger import install_requests_logging, job_logging
+from services.bulk import MAX_WORKERS, RATE_PER_SECOND, parse_ids
+from services.resources import RESOURCES_BY_NAME
+
+DEFAULT_CHUNK_SIZE = 5000
+TOKEN_REFRESH_SECONDS = 25 * 60  # portal sessions are treated as valid for 30 minutes
+
+
+class CliError(Exception):
+    pass
+
+
+# ======================================================
+# INPUT / OUTPUT
+# ======================================================
+def read_sheet(path: Path, dtype=None) -> pd.DataFrame:
+    if not path.exists():
+        raise CliError(f"{path} not found")
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        return pd.read_excel(path, dtype=dtype).fillna("")
+    return pd.read_csv(path, dtype=dtype).fillna("")
+
+
+class ResultWriter:
+    """Appends result frames to a CSV (header once) or JSONL file."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.rows = 0
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+
+    def write(self, frame: pd.DataFrame) -> None:
+        self.rows += len(frame)
+        if self.path is None or frame.empty:
+            return
+        if self.path.suffix.lower() == ".jsonl":
+            with self.path.open("ab") as handle:
+                for record in frame.to_dict("records"):
+                    handle.write(fastjson.dumps(record, default=str) + b"\n")
+        else:
+            header = self.path.stat().st_size == 0
+            frame.to_csv(self.path, mode="a", header=header, index=False)
+
+
+def _progress(label):
+    last = [0.0]
+
+    def report(done, total):
+        now = time.monotonic()
+        if done == total or now - last[0] >= 5:
+            last[0] = now
+            print(f"{label}: {done}/{total}", file=sys.stderr, flush=True)
+    return report
+
+
+# ======================================================
+# TENANT
+# ======================================================
+def tenant_from_env() -> Tenant:
+    host = os.getenv("PORTAL_HOST", "").strip().rstrip("/")
+    if not host:
+        raise CliError("PORTAL_HOST is not set")
+    token = os.getenv("PORTAL_TOKEN", "").strip()
+    username = os.getenv("PORTAL_USERNAME", "").strip()
+    if token:
+        return Tenant(name=host, host=host, username=username or "token", token=token)
+    password = os.getenv("PORTAL_PASSWORD", "")
+    if not username or not password:
+        raise CliError("Set PORTAL_TOKEN, or PORTAL_USERNAME and PORTAL_PASSWORD")
+    try:
+        return login_tenant(host, host, username, password)
+    except Exception as e:
+        raise CliError(str(e)) from e
+
+
+def fresh(tenant: Tenant) -> Tenant:
+    """Tenant with a renewed token once the current one is old, when a password is available."""
+    password = os.getenv("PORTAL_PASSWORD", "")
+    if os.getenv("PORTAL_TOKEN") or not password or time.time() - tenant.issued_at < TOKEN_REFRESH_SECONDS:
+        return tenant
+    print("Renewing access token", file=sys.stderr)
+    return login_tenant(tenant.name, tenant.host, tenant.username, password)
+
+
+# ======================================================
+# COMMANDS
+# ======================================================
+def upload(args, tenant: Tenant, writer: ResultWriter) -> tuple[int, int]:
+    df = read_sheet(Path(args.file))
+    prepared = pipelines.prepare_upload(args.pipeline, df, None if args.skip_reference_check else tenant)
+    prepared = [item for item in prepared if item["Row"] >= args.start_row]
+    print(f"{args.pipeline}: {len(prepared)} row(s) to send", file=sys.stderr)
+
+    ok = failed = 0
+    for start in range(0, len(prepared), args.chunk_size):
+        chunk = prepared[start:start + args.chunk_size]
+        tenant = fresh(tenant)
+        result = pipelines.send_upload(
+            args.pipeline, chunk, tenant, args.workers, args.rate,
+            _progress(f"rows {chunk[0]['Row']}-{chunk[-1]['Row']}"),
+        )
+        writer.write(result.results)
+        ok, failed = ok + result.ok, failed + result.failed
+    return ok, failed
+
+
+def delete(args, tenant: Tenant, writer: ResultWriter) -> tuple[int, int]:
+    if args.resource == "schedules":
+        result = pipelines.run_schedule_delete(read_sheet(Path(args.file)), tenant, args.workers, _progress("slices"))
+        writer.write(result.results)
+        return result.ok, result.failed
+
+    frame = read_sheet(Path(args.file), dtype=str)
+    column = args.column or next((c for c in frame.columns if str(c).strip().lower() == "id"), frame.columns[0])
+    if column not in frame.columns:
+        raise CliError(f"Column {column!r} not in {args.file}")
+    ids = parse_ids(frame[column])
+    print(f"{args.resource}: {len(ids)} id(s) to delete", file=sys.stderr)
+
+    ok = failed = 0
+    for start in range(0, len(ids), args.chunk_size):
+        tenant = fresh(tenant)
+        result = pipelines.run_delete(
+            args.resource, ids[start:start + args.chunk_size], tenant, args.workers, args.rate,
+            _progress(f"ids {start + 1}-{min(start + args.chunk_size, len(ids))}"),
+        )
+        writer.write(result.results)
+        ok, failed = ok + result.ok, failed + result.failed
+    return ok, failed
+
+
+def export(args, tenant: Tenant, writer: ResultWriter) -> tuple[int, int]:
+    if args.bundle:
+        from services.bundle import export_bundle
+
+        data = export_bundle(tenant.host, tenant.headers(), args.resources or None, _progress("resources"))
+        Path(args.bundle).write_bytes(data)
+        print(f"Wrote {args.bundle} ({len(data) / 1024:.0f} KB)", file=sys.stderr)
+        return 1, 0
+
+    if not args.resources:
+        raise CliError("Name the resources to export, or use --bundle")
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    objects = pipelines.run_export(args.resources, tenant, _progress("resources"))
+    for name, items in objects.items():
+        path = out_dir / f"{name}.{args.format}"
+        if args.format == "jsonl":
+            path.write_bytes(b"".join(fastjson.dumps(item, default=str) + b"\n" for item in items))
+        else:
+            fastjson.Columns().extend(items).frame().to_csv(path, index=False)
+        print(f"{name}: {len(items)} object(s) → {path}", file=sys.stderr)
+        writer.write(pd.DataFrame([{"Resource": name, "Objects": len(items), "File": str(path)}]))
+    return len(objects), 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run portal uploads, deletes and exports without the UI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_sending_flags(command):
+        command.add_argument("--file", required=True, help="CSV or Excel input")
+        command.add_argument("--output", help="results file (.csv or .jsonl)")
+        command.add_argument("--workers", type=int, default=MAX_WORKERS, help="parallel requests")
+        command.add_argument("--rate", type=float, default=RATE_PER_SECOND, help="max requests/s, 0 = adaptive only")
+        command.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows written per chunk")
+
+    upload_cmd = commands.add_parser("upload", help="create/update from a module upload sheet")
+    upload_cmd.add_argument("pipeline", choices=sorted(pipelines.UPLOADS))
+    add_sending_flags(upload_cmd)
+    upload_cmd.add_argument("--start-row", type=int, default=1, help="skip sheet rows before this one (resume)")
+    upload_cmd.add_argument("--skip-reference-check", action="store_true")
+    upload_cmd.set_defaults(handler=upload)
+
+    delete_cmd = commands.add_parser("delete", help="delete ids of a resource, or schedules by employee/date")
+    delete_cmd.add_argument("resource", choices=sorted([*RESOURCES_BY_NAME, "schedules"]))
+    add_sending_flags(delete_cmd)
+    delete_cmd.add_argument("--column", help="id column (default: 'id' or the first column)")
+    delete_cmd.set_defaults(handler=delete)
+
+    export_cmd = commands.add_parser("export", help="list resources to files, or export a configuration bundle")
+    export_cmd.add_argument("resources", nargs="*", help=f"any of: {', '.join(sorted(RESOURCES_BY_NAME))}")
+    export_cmd.add_argument("--output-dir", default="exports")
+    export_cmd.add_argument("--format", choices=["csv", "jsonl"], default="jsonl")
+    export_cmd.add_argument("--bundle", help="write a configuration bundle zip instead")
+    export_cmd.add_argument("--output", help="summary file (.csv or .jsonl)")
+    export_cmd.set_defaults(handler=export)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    install_requests_logging()
+    label = " ".join(filter(None, ["CLI", args.command, getattr(args, "pipeline", None) or getattr(args, "resource", None)]))
+
+    started = time.perf_counter()
+    try:
+        with job_logging(label) as job:
+            tenant = tenant_from_env()
+            st.session_state.username = tenant.username
+            writer = ResultWriter(Path(args.output) if args.output else None)
+            ok, failed = args.handler(args, tenant, writer)
+            job.file_name = getattr(args, "file", None)
+            job.rows = ok + failed
+    except (CliError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    print(
+        f"Done in {time.perf_counter() - started:.1f}s: {ok} ok, {failed} failed"
+        + (f" → {args.output}" if args.output else ""),
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,6 +37,18 @@ def run_streamlit() -> None:
     os.chdir(root)
     sys.path.insert(0, str(root))
 
+    # The job API shares this process (and its bulk throttling) with the UI;
+    # start it here so it is up before the first window loads app.py.
+    if os.getenv("PORTAL_API_PORT"):
+        from services.tenants import DEFAULT_CLIENT_AUTH
+
+        os.environ.setdefault("CLIENT_AUTH", DEFAULT_CLIENT_AUTH)
+        from services.activity_logger import install_requests_logging
+        from services.job_api import start_api
+
+        install_requests_logging()
+        start_api()
+
     os.environ.setdefault("STREAMLIT_SERVER_HEADLESS", "true")
     os.environ.setdefault("STREAMLIT_BROWSER_GATHER_USAGE_STATS", "false")
     os.environ.setdefault("STREAMLIT_GLOBAL_DEVELOPMENT_MODE", "false")
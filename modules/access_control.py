@@ -1,7 +1,11 @@
+import os
+
 import requests
 import streamlit as st
 
-SUPABASE_URL = "https://msyljqazsndtxpritfwy.supabase.co"
+from services.auth import invalidate_allowed_users_cache
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://msyljqazsndtxpritfwy.supabase.co").rstrip("/")
 SUPABASE_KEY = "sb_publishable_HXoFqNveyeQcaFrL8suM1A_UBvL2rpZ"
 
 
@@ -33,6 +37,7 @@ def _add_allowed_user(username: str):
         timeout=10,
     )
     response.raise_for_status()
+    invalidate_allowed_users_cache()
 
 
 def _delete_allowed_user(user_id: str):
@@ -43,6 +48,7 @@ def _delete_allowed_user(user_id: str):
         timeout=10,
     )
     response.raise_for_status()
+    invalidate_allowed_users_cache()
 
 
 def access_control_ui():
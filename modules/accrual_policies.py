@@ -9,7 +9,16 @@ from openpyxl.styles import Font, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
 
+from modules.bulk_delete import bulk_delete_section
+from modules.preflight_check import checked_fanout_task, preflight_rows
+from modules.tenant_fanout import fanout_targets, render_fanout_results, run_fanout
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
+from services import metrics, snapshot
+from services.bulk import session
+from services.preflight import ForeignKey, block_rows
+from services.reshape import NumberedGroup
+from services.schema import TRUE_VALUES, Column, Schema
 
 
 UPLOAD_SHEET_NAME = "Accrual_Policies_Upload"
@@ -29,10 +38,47 @@ POLICY_TEMPLATE_COLUMNS = [
     "takingPaycodeID1", "takingAmount1", "takingPaycodeID2", "takingAmount2",
 ]
 
-MAX_PRORATIONS = 50
-MAX_GRANT_AMOUNTS = 20
-MAX_RULES = 20
-MAX_PAYCODES = 20
+# Numbered column groups, melted once per upload instead of probed per row.
+POLICY_GROUPS = {
+    "prorations": NumberedGroup(
+        {"startDate": "startDate(DD/MM){n}", "endDate": "sendDate(DD/MM){n}", "amount": "amount{n}"},
+        Schema(Column("startDate", "str"), Column("endDate", "str"), Column("amount", "float")),
+    ),
+    "grant_amounts": NumberedGroup(
+        {"start": "grantStart{n}", "end": "grantEnd{n}", "max": "grantMax{n}", "amount": "grantAmount{n}"},
+        Schema(Column("start", "int"), Column("end", "int"), Column("max", "str"), Column("amount", "float")),
+    ),
+    "rules": NumberedGroup(
+        {"condition": "ruleCondition{n}", "value": "ruleValue{n}"},
+        Schema(Column("condition", "str"), Column("value", "str")),
+    ),
+    "paycodes": NumberedGroup(
+        {"paycode": "takingPaycodeID{n}", "amount": "takingAmount{n}"},
+        Schema(Column("paycode", "int"), Column("amount", "float")),
+    ),
+}
+
+POLICY_TEXT_FIELDS = ["grantType", "grantFrequency", "grantStartDate", "grantExpiration"]
+POLICY_BOOL_FIELDS = [
+    "forceAvail", "carryoverAmountMax", "prioritizeCarryoverBalance",
+    "carryoverEncashmentAmountMax", "terminationEncashmentAmountMax", "manualEncashmentAmountMax",
+]
+
+POLICY_SCHEMA = Schema(
+    Column("id", "int"),
+    Column("name", "str", required=True),
+    Column("description", "str"),
+    Column("accrualId", "int", required=True),
+    *(Column(field, "str", default="") for field in POLICY_TEXT_FIELDS),
+    *(Column(field, "bool") for field in POLICY_BOOL_FIELDS),
+    Column("grantExpiredAfter", "int"),
+)
+
+POLICY_REFERENCES = (
+    ForeignKey("id", "accrual_policies"),
+    ForeignKey("accrualId", "accruals"),
+    ForeignKey("takingPaycodeID{n}", "paycodes"),
+)
 
 
 def _auth_headers() -> dict[str, str]:
@@ -43,41 +89,6 @@ def _auth_headers() -> dict[str, str]:
     }
 
 
-def _bool_from_cell(value: Any) -> bool:
-    if value is None or value == "":
-        return False
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, (int, float)):
-        return value != 0
-    return str(value).strip().lower() == "true"
-
-
-def _int_from_cell(value: Any) -> int | None:
-    if value is None or value == "":
-        return None
-    try:
-        return int(float(value))
-    except (TypeError, ValueError):
-        return None
-
-
-def _float_from_cell(value: Any) -> float | None:
-    if value is None or value == "":
-        return None
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def _clean_text(value: Any) -> str:
-    if value is None:
-        return ""
-    text = str(value).strip()
-    return "" if text.lower() == "nan" else text
-
-
 def _fetch_json(url: str, headers: dict[str, str]) -> tuple[list[dict[str, Any]], str | None]:
     try:
         response = requests.get(url, headers=headers, timeout=30)
@@ -256,79 +267,64 @@ def _build_template_workbook(
     return output.getvalue()
 
 
-def _build_payload(row: pd.Series) -> dict[str, Any]:
-    name = _clean_text(row.get("name"))
-    description = _clean_text(row.get("description")) or name
-    accrual_id = _int_from_cell(row.get("accrualId"))
+def _nest_policy_groups(dataframe: pd.DataFrame) -> tuple[dict[str, dict[int, list[dict]]], dict[int, str]]:
+    nested: dict[str, dict[int, list[dict]]] = {}
+    errors: dict[int, list[str]] = {}
+    for key, group in POLICY_GROUPS.items():
+        nested[key], group_errors = group.nest(dataframe)
+        for row_index, message in group_errors.items():
+            errors.setdefault(row_index, []).append(message)
+    return nested, {row_index: "; ".join(items) for row_index, items in errors.items()}
+
+
+def _grant_max(text: str) -> bool:
+    # Any nonzero number counts as true, as the sheet parser always did.
+    try:
+        return float(text) != 0
+    except ValueError:
+        return text.lower() in TRUE_VALUES
+
 
-    if not name:
-        raise ValueError("name is required")
-    if accrual_id is None:
-        raise ValueError("accrualId is required")
+def _build_payload(record: dict[str, Any], groups: dict[str, list[dict]]) -> dict[str, Any]:
+    name = record["name"]
+    description = record["description"] or name
 
     grant_prorations = []
-    for index in range(1, MAX_PRORATIONS + 1):
-        start_date = _clean_text(row.get(f"startDate(DD/MM){index}"))
-        end_date = _clean_text(row.get(f"sendDate(DD/MM){index}"))
-        amount = _float_from_cell(row.get(f"amount{index}"))
-        if not start_date and not end_date and amount is None:
-            continue
-        if not start_date or not end_date or amount is None:
-            raise ValueError(f"grantProrations entry {index} is incomplete")
-        grant_prorations.append({"startDate": start_date, "endDate": end_date, "amount": amount})
+    for entry in groups["prorations"]:
+        if entry["startDate"] is None or entry["endDate"] is None or entry["amount"] is None:
+            raise ValueError(f"grantProrations entry {entry['n']} is incomplete")
+        grant_prorations.append({"startDate": entry["startDate"], "endDate": entry["endDate"], "amount": entry["amount"]})
 
     grant_amounts = []
-    for index in range(1, MAX_GRANT_AMOUNTS + 1):
-        start = _int_from_cell(row.get(f"grantStart{index}"))
-        end = _int_from_cell(row.get(f"grantEnd{index}"))
-        maximum = row.get(f"grantMax{index}")
-        amount = _float_from_cell(row.get(f"grantAmount{index}"))
-        if start is None and end is None and amount is None and _clean_text(maximum) == "":
-            continue
-        if start is None or amount is None:
-            raise ValueError(f"grantAmounts entry {index} requires grantStart and grantAmount")
-        item: dict[str, Any] = {"start": start, "amount": amount}
-        if end is not None:
-            item["end"] = end
-        if _clean_text(maximum) != "":
-            item["max"] = _bool_from_cell(maximum)
+    for entry in groups["grant_amounts"]:
+        if entry["start"] is None or entry["amount"] is None:
+            raise ValueError(f"grantAmounts entry {entry['n']} requires grantStart and grantAmount")
+        item: dict[str, Any] = {"start": entry["start"], "amount": entry["amount"]}
+        if entry["end"] is not None:
+            item["end"] = entry["end"]
+        if entry["max"] is not None:
+            item["max"] = _grant_max(entry["max"])
         grant_amounts.append(item)
 
     grant_amount_rules = []
-    for index in range(1, MAX_RULES + 1):
-        condition = _clean_text(row.get(f"ruleCondition{index}"))
-        value = _clean_text(row.get(f"ruleValue{index}"))
-        if not condition and not value:
-            continue
-        if not condition or not value:
-            raise ValueError(f"grantAmountRules entry {index} is incomplete")
-        grant_amount_rules.append({"condition": condition, "value": value})
+    for entry in groups["rules"]:
+        if entry["condition"] is None or entry["value"] is None:
+            raise ValueError(f"grantAmountRules entry {entry['n']} is incomplete")
+        grant_amount_rules.append({"condition": entry["condition"], "value": entry["value"]})
 
     paycodes = []
-    for index in range(1, MAX_PAYCODES + 1):
-        paycode_id = _int_from_cell(row.get(f"takingPaycodeID{index}"))
-        amount = _float_from_cell(row.get(f"takingAmount{index}"))
-        if paycode_id is None and amount is None:
-            continue
-        if paycode_id is None or amount is None:
-            raise ValueError(f"paycodes entry {index} is incomplete")
-        paycodes.append({"paycode": {"id": paycode_id}, "amount": amount})
+    for entry in groups["paycodes"]:
+        if entry["paycode"] is None or entry["amount"] is None:
+            raise ValueError(f"paycodes entry {entry['n']} is incomplete")
+        paycodes.append({"paycode": {"id": entry["paycode"]}, "amount": entry["amount"]})
 
     return {
         "name": name,
         "description": description,
-        "accrual": {"id": accrual_id},
-        "grantType": _clean_text(row.get("grantType")),
-        "grantFrequency": _clean_text(row.get("grantFrequency")),
-        "grantStartDate": _clean_text(row.get("grantStartDate")),
-        "forceAvail": _bool_from_cell(row.get("forceAvail")),
-        "grantExpiration": _clean_text(row.get("grantExpiration")),
-        "grantExpiredAfter": _int_from_cell(row.get("grantExpiredAfter")),
-        "carryoverAmountMax": _bool_from_cell(row.get("carryoverAmountMax")),
-        "prioritizeCarryoverBalance": _bool_from_cell(row.get("prioritizeCarryoverBalance")),
-        "carryoverEncashmentAmountMax": _bool_from_cell(row.get("carryoverEncashmentAmountMax")),
-        "terminationEncashmentAmountMax": _bool_from_cell(row.get("terminationEncashmentAmountMax")),
-        "manualEncashmentAmountMax": _bool_from_cell(row.get("manualEncashmentAmountMax")),
+        "accrual": {"id": record["accrualId"]},
+        **{field: record[field] for field in POLICY_TEXT_FIELDS},
+        **{field: record[field] for field in POLICY_BOOL_FIELDS},
+        "grantExpiredAfter": record["grantExpiredAfter"],
         "grantProrations": grant_prorations,
         "grantAmounts": grant_amounts,
         "grantAmountRules": grant_amount_rules,
@@ -336,6 +332,68 @@ def _build_payload(row: pd.Series) -> dict[str, Any]:
     }
 
 
+@metrics.timed("build")
+def _prepare_policy_rows(dataframe: pd.DataFrame) -> list[dict[str, Any]]:
+    coerced = POLICY_SCHEMA.coerce(dataframe)
+    row_errors = coerced.row_errors()
+    nested, group_errors = _nest_policy_groups(dataframe)
+    prepared = []
+    for index, record in zip(dataframe.index, coerced.records()):
+        item = {"Row": index + 1, "ID": "" if record["id"] is None else record["id"], "Name": record["name"] or ""}
+        try:
+            errors = [message for message in (row_errors.get(index), group_errors.get(index)) if message]
+            if errors:
+                raise ValueError("; ".join(errors))
+            item["payload"] = _build_payload(
+                record, {key: entries.get(index, []) for key, entries in nested.items()}
+            )
+            if record["id"] is not None:
+                item["payload"]["id"] = record["id"]
+        except Exception as exc:  # noqa: BLE001
+            item["error"] = str(exc)
+        prepared.append(item)
+    return prepared
+
+
+def _send_policy_rows(prepared: list[dict[str, Any]], base_url: str, headers: dict[str, str]) -> list[dict[str, Any]]:
+    results = []
+    for item in prepared:
+        try:
+            if "error" in item:
+                raise ValueError(item["error"])
+            payload = item["payload"]
+            policy_id = payload.get("id")
+            if policy_id is not None:
+                response = session().put(f"{base_url}/{policy_id}", headers=headers, json=payload, timeout=30)
+                action = "UPDATE"
+            else:
+                response = session().post(base_url, headers=headers, json=payload, timeout=30)
+                action = "CREATE"
+
+            results.append(
+                {
+                    "Row": item["Row"],
+                    "ID": policy_id or "",
+                    "Name": payload["name"],
+                    "Action": action,
+                    "Status": "SUCCESS" if response.status_code in (200, 201) else f"FAILED ({response.status_code})",
+                    "Response": response.text[:200],
+                }
+            )
+        except Exception as exc:  # noqa: BLE001
+            results.append(
+                {
+                    "Row": item["Row"],
+                    "ID": item["ID"],
+                    "Name": item["Name"],
+                    "Action": "ERROR",
+                    "Status": str(exc),
+                    "Response": "",
+                }
+            )
+    return results
+
+
 def accrual_policies_ui() -> None:
     module_header("📊 Accrual Policies", "Create, update, delete, review, and bulk upload accrual policies")
 
@@ -409,64 +467,32 @@ def accrual_policies_ui() -> None:
         st.success(f"Rows detected: {len(dataframe)}")
         st.dataframe(dataframe, use_container_width=True, height=320)
 
+        targets = fanout_targets("accrual_policies")
+
         if st.button("🚀 Submit Accrual Policies", type="primary", use_container_width=True):
-            results = []
+            annotate_job(file_name=uploaded_file.name, rows=len(dataframe))
             with st.spinner("Processing accrual policies..."):
-                for index, row in dataframe.iterrows():
-                    try:
-                        payload = _build_payload(row)
-                        policy_id = _int_from_cell(row.get("id"))
-                        if policy_id is not None:
-                            payload["id"] = policy_id
-                            response = requests.put(f"{base_url}/{policy_id}", headers=headers, json=payload, timeout=30)
-                            action = "UPDATE"
-                        else:
-                            response = requests.post(base_url, headers=headers, json=payload, timeout=30)
-                            action = "CREATE"
-
-                        results.append(
-                            {
-                                "Row": index + 1,
-                                "ID": policy_id or "",
-                                "Name": payload["name"],
-                                "Action": action,
-                                "Status": "SUCCESS" if response.status_code in (200, 201) else f"FAILED ({response.status_code})",
-                                "Response": response.text[:200],
-                            }
-                        )
-                    except Exception as exc:  # noqa: BLE001
-                        results.append(
-                            {
-                                "Row": index + 1,
-                                "ID": row.get("id", ""),
-                                "Name": row.get("name", ""),
-                                "Action": "ERROR",
-                                "Status": str(exc),
-                                "Response": "",
-                            }
-                        )
-
-            result_df = pd.DataFrame(results)
-            st.dataframe(result_df, use_container_width=True)
-            success_count = (result_df["Status"] == "SUCCESS").sum() if not result_df.empty else 0
-            st.caption(f"Processed {len(result_df)} rows. Successful rows: {success_count}.")
+                prepared = _prepare_policy_rows(dataframe)
+                if len(targets) > 1:
+                    outcomes = run_fanout(
+                        targets,
+                        checked_fanout_task(dataframe, POLICY_REFERENCES, prepared, _send_policy_rows, "accrual_policies"),
+                    )
+                else:
+                    blocked = preflight_rows(dataframe, POLICY_REFERENCES, host, headers)
+                    results = _send_policy_rows(block_rows(prepared, blocked), base_url, headers)
+                    snapshot.invalidate(host, "accrual_policies")
+
+            if len(targets) > 1:
+                render_fanout_results(outcomes, ["Row", "Name"], "accrual_policies")
+            else:
+                result_df = pd.DataFrame(results)
+                st.dataframe(result_df, use_container_width=True)
+                success_count = (result_df["Status"] == "SUCCESS").sum() if not result_df.empty else 0
+                st.caption(f"Processed {len(result_df)} rows. Successful rows: {success_count}.")
 
     st.divider()
-    section_header("🗑️ Delete Accrual Policies")
-
-    delete_ids = st.text_input("Enter policy ids (comma-separated)", placeholder="101, 102, 103")
-    if st.button("Delete Accrual Policies", use_container_width=True):
-        ids = [item.strip() for item in delete_ids.split(",") if item.strip().isdigit()]
-        if not ids:
-            st.warning("Please enter at least one valid numeric id.")
-        else:
-            with st.spinner("Deleting accrual policies..."):
-                for policy_id in ids:
-                    response = requests.delete(f"{base_url}/{policy_id}", headers=headers, timeout=30)
-                    if response.status_code in (200, 204):
-                        st.success(f"Deleted accrual policy {policy_id}")
-                    else:
-                        st.error(f"Failed to delete {policy_id}: HTTP {response.status_code}")
+    bulk_delete_section("Accrual Policies", base_url, headers, key="accrual_policies")
 
     st.divider()
     section_header("⬇️ Download Existing Accrual Policies")
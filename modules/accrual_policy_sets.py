@@ -4,42 +4,74 @@ import pandas as pd
 import requests
 import streamlit as st
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services import metrics
+from services.activity_logger import annotate_job
+from services.schema import Column, Schema
 
 
 UPLOAD_TEMPLATE_COLUMNS = ["id", "Accural Policy Set Name", "Description", "Accural Policy ID"]
+ENTRY_PREFIXES = ("accuralpolicyid", "accrualpolicyid")  # "Accural Policy ID", "accrual_policy_id2", ...
+
+# Headers are matched after _normalize_columns, so spacing, case and punctuation do not matter.
+SET_SCHEMA = Schema(
+    Column("id", "int"),
+    Column("accuralpolicysetname", "str", default="", aliases=("name",)),
+    Column("description", "str", default=""),
+)
 
 
 def _normalize_column_name(column):
     return "".join(char for char in str(column).strip().lower() if char.isalnum())
 
 
-def _get_row_value(row, *column_names):
-    normalized_lookup = {_normalize_column_name(column): column for column in row.index}
-    for column_name in column_names:
-        matching_column = normalized_lookup.get(_normalize_column_name(column_name))
-        if matching_column is not None:
-            return row.get(matching_column)
-    return ""
-
-
-def _safe_int(value):
-    try:
-        return int(float(value))
-    except (TypeError, ValueError):
-        return None
-
-
-def _extract_entry_ids(row):
-    entry_ids = []
-    for column in row.index:
-        normalized = _normalize_column_name(column)
-        if normalized.startswith("accuralpolicyid") or normalized.startswith("accrualpolicyid"):
-            entry_id = _safe_int(row.get(column))
-            if entry_id is not None:
-                entry_ids.append(entry_id)
-
-    return sorted(set(entry_ids))
+def _normalize_columns(df):
+    """df with alphanumeric lower-case headers, keeping the first of any that collide."""
+    renamed = df.rename(columns=_normalize_column_name)
+    return renamed.loc[:, ~renamed.columns.duplicated()]
+
+
+@metrics.timed("build")
+def _group_set_rows(df):
+    """Sets keyed by id (or name when new) with sorted unique entry ids, plus results for unreadable rows."""
+    df = _normalize_columns(df)
+    coerced = SET_SCHEMA.coerce(df)
+    entry_columns = [column for column in df.columns if column.startswith(ENTRY_PREFIXES)]
+    entries = Schema(*(Column(column, "int") for column in entry_columns)).coerce(df)
+    row_errors = coerced.row_errors()
+    entry_errors = entries.row_errors()
+    grouped, failed = {}, []
+
+    for index, record, entry_record in zip(df.index, coerced.records(), entries.records()):
+        errors = [message for message in (row_errors.get(index), entry_errors.get(index)) if message]
+        if errors:
+            failed.append({
+                "Name": record["accuralpolicysetname"] or f"Row {index + 1}",
+                "Action": "Skipped",
+                "Entries": 0,
+                "Status": "Failed",
+                "Response": "; ".join(errors),
+            })
+            continue
+
+        name = record["accuralpolicysetname"]
+        entry_ids = {entry_id for entry_id in entry_record.values() if entry_id is not None}
+        if not name or not entry_ids:
+            continue
+
+        group_key = record["id"] if record["id"] is not None else name
+        group = grouped.setdefault(group_key, {
+            "id": record["id"],
+            "name": name,
+            "description": record["description"] or name,
+            "entries": set(),
+        })
+        group["entries"].update(entry_ids)
+
+    for group in grouped.values():
+        group["entries"] = [{"id": entry_id} for entry_id in sorted(group["entries"])]
+    return list(grouped.values()), failed
 
 
 def _flatten_sets_df(raw_sets):
@@ -142,40 +174,11 @@ def accrual_policy_sets_ui():
         st.dataframe(df, use_container_width=True)
 
         if st.button("🚀 Process Upload", type="primary", use_container_width=True):
-            grouped = {}
-            results = []
-
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
             with st.spinner("⏳ Processing Accrual Policy Sets..."):
-                for _, row in df.iterrows():
-                    raw_id = _get_row_value(row, "id")
-                    name = str(_get_row_value(row, "Accural Policy Set Name", "name")).strip()
-                    description = str(_get_row_value(row, "Description", "description")).strip() or name
-                    entry_ids = _extract_entry_ids(row)
-
-                    if not name or not entry_ids:
-                        continue
-
-                    set_id = _safe_int(raw_id)
-                    group_key = set_id if set_id is not None else name
-
-                    if group_key not in grouped:
-                        grouped[group_key] = {
-                            "id": set_id,
-                            "name": name,
-                            "description": description,
-                            "entries": [],
-                        }
-
-                    for entry_id in entry_ids:
-                        grouped[group_key]["entries"].append({"id": entry_id})
-
-                for grouped_item in grouped.values():
-                    unique_entries = sorted(
-                        {entry.get("id") for entry in grouped_item["entries"] if entry.get("id") is not None}
-                    )
-                    grouped_item["entries"] = [{"id": entry_id} for entry_id in unique_entries]
+                grouped, results = _group_set_rows(df)
 
-                for item in grouped.values():
+                for item in grouped:
                     payload = {
                         "name": item["name"],
                         "description": item["description"],
@@ -205,18 +208,7 @@ def accrual_policy_sets_ui():
 
     st.divider()
 
-    section_header("🗑️ Delete Accrual Policy Sets")
-
-    delete_ids = st.text_input("Enter Accrual Policy Set IDs (comma separated)", placeholder="Example: 39,40")
-
-    if st.button("Delete Accrual Policy Sets", use_container_width=True):
-        ids = [item.strip() for item in delete_ids.split(",") if item.strip().isdigit()]
-        for set_id in ids:
-            response = requests.delete(f"{base_url}/{set_id}", headers=headers)
-            if response.status_code in (200, 204):
-                st.success(f"Deleted ID {set_id}")
-            else:
-                st.error(f"Failed to delete {set_id} → {response.text}")
+    bulk_delete_section("Accrual Policy Sets", base_url, headers, key="accrual_policy_sets")
 
     st.divider()
 
@@ -3,7 +3,9 @@ import pandas as pd
 import requests
 import io
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
 
 # ======================================================
 # ACCRUALS UI
@@ -84,6 +86,7 @@ def accruals_ui():
         st.dataframe(df, use_container_width=True)
 
         if st.button("🚀 Submit Accruals", type="primary", use_container_width=True):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
 
             results = []
 
@@ -164,30 +167,7 @@ def accruals_ui():
     # ==================================================
     # 3️⃣ DELETE ACCRUALS
     # ==================================================
-    section_header("🗑️ Delete Accruals")
-
-    ids_input = st.text_input(
-        "Enter Accrual IDs (comma-separated)",
-        placeholder="79,80,81"
-    )
-
-    if st.button("Delete Accruals", use_container_width=True):
-        ids = [i.strip() for i in ids_input.split(",") if i.strip().isdigit()]
-
-        if not ids:
-            st.warning("Please enter valid numeric IDs")
-            return
-
-        with st.spinner("⏳ Deleting..."):
-            for aid in ids:
-                r = requests.delete(
-                    f"{ACCRUALS_URL}/{aid}",
-                    headers=headers
-                )
-                if r.status_code in (200, 204):
-                    st.success(f"Deleted Accrual ID {aid}")
-                else:
-                    st.error(f"Failed to delete Accrual ID {aid}")
+    bulk_delete_section("Accruals", ACCRUALS_URL, headers, key="accruals")
 
     st.divider()
 
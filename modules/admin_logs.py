@@ -1,14 +1,29 @@
 import io
 import base64
 import mimetypes
+import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, unquote
 
 import pandas as pd
 import requests
 import streamlit as st
 
-SUPABASE_URL = "https://msyljqazsndtxpritfwy.supabase.co"
+from services import log_mirror
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://msyljqazsndtxpritfwy.supabase.co").rstrip("/")
 SUPABASE_KEY = "sb_publishable_HXoFqNveyeQcaFrL8suM1A_UBvL2rpZ"
+SUPABASE_BUCKET = os.getenv("SUPABASE_LOG_BUCKET", "logs-files")
+FILTER_OPTIONS_TTL_SECONDS = 300
+SIGNED_URL_EXPIRES_IN = 60 * 60 * 24 * 30
+SIGNED_URL_REFRESH_MARGIN = 60 * 60
+PREVIEW_BYTES = 64 * 1024
+
+# Signed URLs keyed by storage path, reused until shortly before they expire.
+_signed_url_cache: dict[str, tuple[str, float]] = {}
+_signed_url_lock = threading.Lock()
 
 
 def _supabase_headers(count=False):
@@ -64,7 +79,27 @@ def _fetch_logs(page, page_size, username, module, action, search, start_date, e
     return rows, total_count
 
 
+@st.cache_data(ttl=FILTER_OPTIONS_TTL_SECONDS, show_spinner=False)
 def _fetch_filter_options():
+    # log_filter_options is kept up to date by an insert trigger on logs
+    # (see supabase/migrations), so it holds every distinct value ever logged.
+    response = requests.get(
+        f"{SUPABASE_URL}/rest/v1/log_filter_options",
+        headers=_supabase_headers(),
+        params={"select": "kind,value"},
+        timeout=20,
+    )
+    if response.status_code == 404:
+        return _scan_filter_options()
+    response.raise_for_status()
+    rows = response.json()
+    usernames = sorted({r.get("value") for r in rows if r.get("kind") == "username" and r.get("value")})
+    modules = sorted({r.get("value") for r in rows if r.get("kind") == "module" and r.get("value")})
+    return usernames, modules
+
+
+def _scan_filter_options():
+    # Fallback for projects where the log_filter_options migration is not applied yet.
     params = {"select": "username,module", "order": "created_at.desc", "limit": 1000}
     response = requests.get(f"{SUPABASE_URL}/rest/v1/logs", headers=_supabase_headers(), params=params, timeout=20)
     response.raise_for_status()
@@ -74,61 +109,175 @@ def _fetch_filter_options():
     return usernames, modules
 
 
-def _make_downloadable_url(file_url: str | None):
+def _storage_path(file_url: str | None):
     if not file_url:
         return None
 
     if "object/sign/" in file_url or "token=" in file_url:
-        return file_url
+        return None
 
-    marker_public = f"/storage/v1/object/public/logs-files/"
-    marker_object = f"/storage/v1/object/logs-files/"
-    path = None
+    marker_public = f"/storage/v1/object/public/{SUPABASE_BUCKET}/"
+    marker_object = f"/storage/v1/object/{SUPABASE_BUCKET}/"
 
     if marker_public in file_url:
-        path = file_url.split(marker_public, 1)[1]
-    elif marker_object in file_url:
-        path = file_url.split(marker_object, 1)[1]
+        return unquote(file_url.split(marker_public, 1)[1])
+    if marker_object in file_url:
+        return unquote(file_url.split(marker_object, 1)[1])
+    return None
+
+
+def _absolute_signed_url(signed_part: str) -> str:
+    if signed_part.startswith("http"):
+        return signed_part
+    if signed_part.startswith("/storage/v1"):
+        return f"{SUPABASE_URL}{signed_part}"
+    return f"{SUPABASE_URL}/storage/v1{signed_part}"
+
+
+def _sign_paths(paths: list[str]) -> dict[str, str]:
+    now = time.time()
+    signed: dict[str, str] = {}
+    missing: list[str] = []
+
+    with _signed_url_lock:
+        for path in dict.fromkeys(paths):
+            cached = _signed_url_cache.get(path)
+            if cached and cached[1] - SIGNED_URL_REFRESH_MARGIN > now:
+                signed[path] = cached[0]
+            else:
+                missing.append(path)
 
-    if not path:
-        return file_url
+    if not missing:
+        return signed
 
-    sign_url = f"{SUPABASE_URL}/storage/v1/object/sign/logs-files/{path}"
-    response = requests.post(
-        sign_url,
-        headers=_supabase_headers(),
-        json={"expiresIn": 60 * 60 * 24 * 30},
-        timeout=10,
-    )
+    # One bulk sign call for every uncached path on the page.
+    try:
+        response = requests.post(
+            f"{SUPABASE_URL}/storage/v1/object/sign/{SUPABASE_BUCKET}",
+            headers=_supabase_headers(),
+            json={"expiresIn": SIGNED_URL_EXPIRES_IN, "paths": missing},
+            timeout=10,
+        )
+    except requests.RequestException:
+        return signed
     if response.status_code not in (200, 201):
-        return file_url
+        return signed
 
-    signed = response.json().get("signedURL")
-    if not signed:
-        return file_url
+    expires_at = now + SIGNED_URL_EXPIRES_IN
+    with _signed_url_lock:
+        for item in response.json() or []:
+            path = item.get("path")
+            signed_part = item.get("signedURL") or item.get("signedUrl")
+            if not path or not signed_part or item.get("error"):
+                continue
+            url = _absolute_signed_url(signed_part)
+            _signed_url_cache[path] = (url, expires_at)
+            signed[path] = url
+    return signed
+
+
+def _make_downloadable_urls(file_urls: list[str | None]) -> dict[str, str]:
+    paths = {url: _storage_path(url) for url in file_urls if url}
+    signed = _sign_paths([path for path in paths.values() if path])
+    return {
+        url: signed.get(path, url) if path else url
+        for url, path in paths.items()
+    }
+
+
+def _with_download_name(url: str, file_name: str) -> str:
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}download={quote(file_name)}"
 
-    if signed.startswith("http"):
-        return signed
-    return f"{SUPABASE_URL}{signed}"
 
+def _decode_data_url(file_url: str):
+    header, encoded = file_url.split(",", 1)
+    mime = header.split(";")[0].replace("data:", "") or "application/octet-stream"
+    return base64.b64decode(encoded), mime
 
-def _fetch_file_payload(file_url: str, fallback_name: str):
+
+@st.cache_data(ttl=SIGNED_URL_REFRESH_MARGIN, show_spinner=False, max_entries=64)
+def _fetch_file_preview(file_url: str, max_bytes: int = PREVIEW_BYTES):
     if not file_url:
-        return None, fallback_name, "application/octet-stream"
+        return None, "application/octet-stream", None
 
     if file_url.startswith("data:") and ";base64," in file_url:
-        header, encoded = file_url.split(",", 1)
-        mime = header.split(";")[0].replace("data:", "") or "application/octet-stream"
-        return base64.b64decode(encoded), fallback_name, mime
+        payload, mime = _decode_data_url(file_url)
+        return payload[:max_bytes], mime, len(payload)
 
     try:
-        response = requests.get(file_url, timeout=20)
-        if response.status_code != 200:
-            return None, fallback_name, "application/octet-stream"
-        content_type = response.headers.get("content-type", "application/octet-stream")
-        return response.content, fallback_name, content_type
+        with requests.get(
+            file_url,
+            headers={"Range": f"bytes=0-{max_bytes - 1}"},
+            stream=True,
+            timeout=20,
+        ) as response:
+            if response.status_code not in (200, 206):
+                return None, "application/octet-stream", None
+            content_type = response.headers.get("content-type", "application/octet-stream")
+            total = response.headers.get("content-range", "").split("/")[-1]
+            total_size = int(total) if total.isdigit() else None
+
+            # Servers that ignore Range still only get read up to max_bytes.
+            chunks = []
+            received = 0
+            for chunk in response.iter_content(chunk_size=16 * 1024):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= max_bytes:
+                    break
+            return b"".join(chunks)[:max_bytes], content_type, total_size
     except Exception:
-        return None, fallback_name, "application/octet-stream"
+        return None, "application/octet-stream", None
+
+
+def _render_preview(payload: bytes | None, mime: str, total_size: int | None):
+    if payload is None:
+        st.caption("Preview unavailable.")
+        return
+
+    size_note = f" of {total_size:,} bytes" if total_size else ""
+    st.caption(f"Showing first {len(payload):,} bytes{size_note} ({mime})")
+    if mime.startswith("text/") or mime == "application/json":
+        st.code(payload.decode("utf-8", errors="replace"))
+
+
+def _render_analytics():
+    c1, c2, c3 = st.columns([1, 1, 1])
+    start_day = c1.date_input("From", value=None, key="analytics_start")
+    end_day = c2.date_input("To", value=None, key="analytics_end")
+    force_sync = c3.button("🔄 Sync now", use_container_width=True)
+
+    try:
+        added = log_mirror.sync(force=force_sync)
+    except Exception as ex:
+        st.warning(f"Log mirror sync failed, showing cached data: {ex}")
+        added = 0
+
+    status = log_mirror.mirror_status()
+    st.caption(
+        f"Local mirror: {status['rows']:,} rows ({status['first'] or '-'} → {status['last'] or '-'})"
+        + (f", {added:,} new" if added else "")
+    )
+    if not status["rows"]:
+        st.info("No log rows mirrored yet.")
+        return
+
+    errors_df = log_mirror.errors_by_module(start_day, end_day)
+    st.markdown("**HTTP errors by module**")
+    if errors_df.empty:
+        st.caption("No HTTP request logs in range.")
+    else:
+        st.bar_chart(errors_df.set_index("module")[["4xx", "5xx", "no response"]])
+
+    group_by = st.radio("Daily activity by", ["module", "username"], horizontal=True, key="analytics_group_by")
+    activity_df = log_mirror.daily_activity(start_day, end_day, group_by=group_by)
+    if not activity_df.empty:
+        st.bar_chart(activity_df.pivot_table(index="day", columns=group_by, values="events", fill_value=0))
+
+    status_df = log_mirror.status_distribution(start_day, end_day)
+    if not status_df.empty:
+        st.dataframe(status_df, use_container_width=True, hide_index=True)
 
 
 def admin_logs_ui():
@@ -143,6 +292,9 @@ def admin_logs_ui():
     if "logs_page_size" not in st.session_state:
         st.session_state.logs_page_size = 10
 
+    with st.expander("📈 Usage & Error Analytics", expanded=False):
+        _render_analytics()
+
     with st.container(border=True):
         c1, c2, c3 = st.columns(3)
         search = c1.text_input("Search", placeholder="Username / Module / Action")
@@ -210,13 +362,15 @@ def admin_logs_ui():
     st.dataframe(df, use_container_width=True)
 
     st.markdown("### File Downloads")
+    download_urls = _make_downloadable_urls([r.get("file_url") for r in rows])
     for r in rows:
         if r.get("file_url"):
-            download_url = _make_downloadable_url(r["file_url"])
-            fallback_name = r.get("file_name") or f"{r.get('id')}.bin"
-            file_bytes, file_name, mime = _fetch_file_payload(download_url, fallback_name)
-            if file_bytes:
-                st.download_button(
+            download_url = download_urls.get(r["file_url"], r["file_url"])
+            file_name = r.get("file_name") or f"{r.get('id')}.bin"
+            c1, c2 = st.columns([3, 1])
+            if download_url.startswith("data:") and ";base64," in download_url:
+                file_bytes, mime = _decode_data_url(download_url)
+                c1.download_button(
                     label=f"Download {file_name}",
                     data=file_bytes,
                     file_name=file_name,
@@ -224,7 +378,9 @@ def admin_logs_ui():
                     key=f"dl_{r.get('id')}",
                 )
             else:
-                st.link_button(f"Open {file_name}", download_url)
+                c1.link_button(f"Download {file_name}", _with_download_name(download_url, file_name))
+            if c2.button("Preview", key=f"preview_{r.get('id')}"):
+                _render_preview(*_fetch_file_preview(download_url))
 
     csv_df = pd.DataFrame(rows)[["username", "module", "action", "created_at", "file_name"]]
     csv_bytes = io.BytesIO()
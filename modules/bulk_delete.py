@@ -0,0 +1,168 @@
+import io
+import re
+
+import pandas as pd
+import requests
+import streamlit as st
+
+from modules.ui_helpers import section_header
+from services import fastjson, snapshot, throttle
+from services.bulk import MAX_WORKERS, RATE_PER_SECOND, delete_ids, parse_ids
+from services.resources import API_PREFIX, RESOURCES_BY_NAME
+
+LISTING_TTL_SECONDS = 60
+PREVIEW_COLUMNS = ["id", "code", "name", "description"]
+PREVIEW_ROWS = 200
+
+ID_SOURCES = ["Enter IDs", "Upload file", "Filter existing"]
+
+
+def _snapshot_target(url):
+    """(host, resource) when url is a resource-server list endpoint."""
+    host, _, resource = url.partition(API_PREFIX + "/")
+    resource = resource.split("?")[0].strip("/")
+    return (host, resource) if resource in RESOURCES_BY_NAME else (None, None)
+
+
+@st.cache_data(ttl=LISTING_TTL_SECONDS, show_spinner=False)
+def _fetch_listing(url, headers):
+    host, resource = _snapshot_target(url)
+    if resource:
+        cached = snapshot.list_objects(host, resource)
+        if cached is not None:
+            return pd.DataFrame(cached)
+
+    response = requests.get(url, headers=headers, timeout=60, stream=True)
+    response.raise_for_status()
+    df, _ = fastjson.read_frame(response, flat=False, keys=("content",))
+    return df
+
+
+def _ids_from_text(key):
+    ids_input = st.text_area(
+        "IDs (comma, space or newline separated)",
+        placeholder="Example: 101,102,103",
+        key=f"{key}_delete_text",
+    )
+    return parse_ids(re.split(r"[\s,;]+", ids_input))
+
+
+def _ids_from_file(key):
+    uploaded = st.file_uploader("CSV or Excel with an id column", ["csv", "xlsx", "xls"], key=f"{key}_delete_file")
+    if not uploaded:
+        return []
+    frame = (
+        pd.read_csv(uploaded, dtype=str)
+        if uploaded.name.endswith(".csv")
+        else pd.read_excel(io.BytesIO(uploaded.getvalue()), dtype=str)
+    )
+    if frame.empty:
+        return []
+    columns = list(frame.columns)
+    default = next((i for i, column in enumerate(columns) if str(column).strip().lower() == "id"), 0)
+    column = st.selectbox("ID column", columns, index=default, key=f"{key}_delete_file_column")
+    return parse_ids(frame[column].dropna())
+
+
+def _ids_from_listing(listing, key):
+    if listing.empty or "id" not in listing.columns:
+        st.info("No existing records to filter.")
+        return []
+    columns = [column for column in listing.columns if column != "id"] or ["id"]
+    default = next((columns.index(column) for column in ("name", "code") if column in columns), 0)
+    col1, col2 = st.columns([1, 2])
+    column = col1.selectbox("Filter column", columns, index=default, key=f"{key}_delete_filter_column")
+    needle = col2.text_input("Contains", key=f"{key}_delete_filter_text")
+    if not needle.strip():
+        return []
+    matches = listing[listing[column].astype(str).str.contains(needle.strip(), case=False, regex=False, na=False)]
+    return parse_ids(matches["id"])
+
+
+def bulk_delete_section(label, base_url, headers, key, listing_url=None, note=None):
+    """Delete section shared by the configuration modules.
+
+    IDs come from typed input, an uploaded file or a filter over the cached
+    listing; deletes run concurrently and land in one downloadable table.
+    """
+    section_header(f"🗑️ Delete {label}")
+    if note:
+        st.warning(note)
+
+    listing_url = listing_url or base_url
+    results_key = f"{key}_delete_results"
+
+    source = st.radio("Select IDs from", ID_SOURCES, horizontal=True, key=f"{key}_delete_source")
+
+    listing = pd.DataFrame()
+    if source == "Filter existing":
+        try:
+            listing = _fetch_listing(listing_url, headers)
+        except Exception as e:
+            st.error(f"Failed to fetch existing {label.lower()} → {e}")
+
+    if source == "Enter IDs":
+        ids = _ids_from_text(key)
+    elif source == "Upload file":
+        ids = _ids_from_file(key)
+    else:
+        ids = _ids_from_listing(listing, key)
+
+    if ids:
+        preview = pd.DataFrame({"id": ids})
+        if not listing.empty and "id" in listing.columns:
+            known = listing[[column for column in PREVIEW_COLUMNS if column in listing.columns]].copy()
+            known["id"] = pd.to_numeric(known["id"], errors="coerce")
+            known = known.dropna(subset=["id"]).astype({"id": "int64"}).drop_duplicates("id")
+            preview = preview.merge(known, on="id", how="left")
+
+        st.metric(f"{label} selected", len(ids))
+        st.dataframe(preview.head(PREVIEW_ROWS), use_container_width=True, height=240)
+        if len(preview) > PREVIEW_ROWS:
+            st.caption(f"Showing the first {PREVIEW_ROWS} of {len(preview)} ids.")
+
+        with st.expander("Concurrency", expanded=False):
+            col1, col2 = st.columns(2)
+            workers = col1.number_input("Parallel requests", 1, 32, MAX_WORKERS, key=f"{key}_delete_workers")
+            rate = col2.number_input(
+                "Max requests / second",
+                0.0,
+                100.0,
+                RATE_PER_SECOND,
+                key=f"{key}_delete_rate",
+                help="0 lets the portal adapt to how fast the tenant responds.",
+            )
+
+        confirmed = st.checkbox(f"I want to delete these {len(ids)} {label.lower()}", key=f"{key}_delete_confirm")
+
+        if st.button(f"Delete {label}", disabled=not confirmed, use_container_width=True, key=f"{key}_delete_button"):
+            progress = st.progress(0.0, text="Deleting...")
+
+            def on_progress(done, total):
+                progress.progress(done / total, text=f"Deleted {done} / {total}")
+
+            st.session_state[results_key] = delete_ids(
+                base_url, ids, headers, max_workers=int(workers), rate_per_second=float(rate), on_progress=on_progress
+            )
+            progress.empty()
+            _fetch_listing.clear()
+            host, resource = _snapshot_target(listing_url)
+            if resource:
+                snapshot.invalidate(host, resource)
+
+    results = st.session_state.get(results_key)
+    if results is not None and not results.empty:
+        deleted = int((results["Status"] == "Deleted").sum())
+        col1, col2 = st.columns(2)
+        col1.metric("Deleted", deleted)
+        col2.metric("Failed", len(results) - deleted)
+        st.caption(throttle.describe(base_url))
+        st.dataframe(results, use_container_width=True, height=280)
+        st.download_button(
+            "⬇️ Download Delete Results",
+            data=results.to_csv(index=False),
+            file_name=f"{key}_delete_results.csv",
+            mime="text/csv",
+            use_container_width=True,
+            key=f"{key}_delete_download",
+        )
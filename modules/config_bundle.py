@@ -0,0 +1,154 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from modules.ui_helpers import module_header, section_header
+from services import throttle
+from services.activity_logger import annotate_job
+from services.bundle import (
+    MODE_SKIP,
+    MODE_UPDATE,
+    export_bundle,
+    import_bundle,
+    plan_import,
+    plan_summary,
+    read_bundle,
+)
+from services.resources import BUNDLE_RESOURCES, fetch_resources
+
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {st.session_state.token}",
+        "Content-Type": "application/json;charset=UTF-8",
+        "Accept": "application/json",
+    }
+
+
+def _progress_callback(progress, verb):
+    def on_progress(done, total):
+        progress.progress(done / total if total else 1.0, text=f"{verb} {done} / {total}")
+    return on_progress
+
+
+# ======================================================
+# CONFIGURATION BUNDLES UI
+# ======================================================
+def config_bundle_ui():
+    module_header("📦 Configuration Bundles", "Export a tenant's configuration and import it into another tenant")
+
+    if not st.session_state.get("token"):
+        st.error("Please login first")
+        return
+
+    host = st.session_state.HOST.rstrip("/")
+    headers = _headers()
+
+    # ==================================================
+    # EXPORT
+    # ==================================================
+    section_header("📤 Export Bundle")
+
+    selected = st.multiselect(
+        "Resources to export",
+        BUNDLE_RESOURCES,
+        default=BUNDLE_RESOURCES,
+    )
+
+    if st.button("Build Bundle", type="primary", use_container_width=True, disabled=not selected):
+        progress = st.progress(0.0, text="Fetching...")
+        try:
+            st.session_state.config_bundle_export = export_bundle(
+                host, headers, selected, on_progress=_progress_callback(progress, "Fetched")
+            )
+        except Exception as e:
+            st.error(f"❌ Export failed → {e}")
+        progress.empty()
+
+    if st.session_state.get("config_bundle_export"):
+        manifest, items = read_bundle(st.session_state.config_bundle_export)
+        st.dataframe(
+            pd.DataFrame({"Resource": list(items), "Objects": [len(objects) for objects in items.values()]}),
+            use_container_width=True,
+        )
+        st.download_button(
+            "⬇️ Download Bundle",
+            data=st.session_state.config_bundle_export,
+            file_name=f"config_bundle_{datetime.now():%Y%m%d_%H%M%S}.zip",
+            mime="application/zip",
+            use_container_width=True,
+        )
+
+    st.divider()
+
+    # ==================================================
+    # IMPORT
+    # ==================================================
+    section_header("📥 Import Bundle")
+    st.info(
+        f"Objects are matched to this tenant ({host}) by code or name. "
+        "References between bundled objects are remapped to the new ids."
+    )
+
+    uploaded_file = st.file_uploader("Upload bundle (.zip)", ["zip"], key="config_bundle_upload")
+    if not uploaded_file:
+        return
+
+    try:
+        manifest, items = read_bundle(uploaded_file.getvalue())
+    except Exception as e:
+        st.error(f"❌ Invalid bundle → {e}")
+        return
+
+    with st.expander("Manifest", expanded=False):
+        st.code(json.dumps(manifest, indent=2), language="json")
+
+    mode = st.radio(
+        "Existing objects",
+        [MODE_UPDATE, MODE_SKIP],
+        format_func={MODE_UPDATE: "Update to match the bundle", MODE_SKIP: "Leave unchanged"}.get,
+        horizontal=True,
+    )
+
+    if st.button("🔍 Preview Import", use_container_width=True):
+        with st.spinner("⏳ Matching against this tenant..."):
+            try:
+                levels = plan_import(items, fetch_resources(host, headers, list(items)))
+                st.session_state.config_bundle_plan = plan_summary(levels, mode)
+            except Exception as e:
+                st.session_state.config_bundle_plan = None
+                st.error(f"❌ {e}")
+
+    if st.session_state.get("config_bundle_plan") is not None:
+        st.dataframe(st.session_state.config_bundle_plan, use_container_width=True)
+
+    confirmed = st.checkbox(f"Apply this bundle to {host}")
+    if st.button("🚀 Import Bundle", type="primary", use_container_width=True, disabled=not confirmed):
+        annotate_job(file_name=uploaded_file.name, rows=sum(len(objects) for objects in items.values()))
+        progress = st.progress(0.0, text="Importing...")
+        try:
+            st.session_state.config_bundle_results = import_bundle(
+                host, headers, items, mode, on_progress=_progress_callback(progress, "Applied")
+            )
+        except Exception as e:
+            st.error(f"❌ Import failed → {e}")
+        progress.empty()
+
+    results = st.session_state.get("config_bundle_results")
+    if results is not None and not results.empty:
+        section_header("📊 Import Result")
+        success = int(results["Status"].isin(["Success", "Exists"]).sum())
+        col1, col2 = st.columns(2)
+        col1.metric("Applied", success)
+        col2.metric("Failed", len(results) - success)
+        st.caption(throttle.describe(host))
+        st.dataframe(results, use_container_width=True)
+        st.download_button(
+            "⬇️ Download Import Results",
+            data=results.to_csv(index=False),
+            file_name="config_bundle_import_results.csv",
+            mime="text/csv",
+            use_container_width=True,
+        )
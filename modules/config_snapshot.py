@@ -0,0 +1,106 @@
+import time
+
+import streamlit as st
+
+from modules.ui_helpers import module_header, section_header
+from services import snapshot
+from services.resources import RESOURCES_BY_NAME
+
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {st.session_state.token}",
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+
+
+# ======================================================
+# CONFIGURATION SEARCH UI
+# ======================================================
+def config_snapshot_ui():
+    module_header("🔎 Configuration Search", "Search a local snapshot of this tenant and see what references what")
+
+    if not st.session_state.get("token"):
+        st.error("Please login first")
+        return
+
+    host = st.session_state.HOST.rstrip("/")
+    headers = _headers()
+
+    # ==================================================
+    # SNAPSHOT
+    # ==================================================
+    section_header("🗄️ Snapshot")
+
+    stale = snapshot.stale_resources(host)
+    col1, col2 = st.columns(2)
+    refresh_stale = col1.button(
+        f"🔄 Refresh stale ({len(stale)})", use_container_width=True, disabled=not stale, type="primary"
+    )
+    refresh_all = col2.button("🔄 Refresh everything", use_container_width=True)
+
+    if refresh_stale or refresh_all:
+        names = stale if refresh_stale else list(RESOURCES_BY_NAME)
+        progress = st.progress(0.0, text="Fetching...")
+
+        def on_progress(done, total):
+            progress.progress(done / total, text=f"Fetched {done} / {total} resources")
+
+        st.session_state.config_snapshot_refresh = snapshot.refresh(host, headers, names, on_progress=on_progress)
+        progress.empty()
+
+    if st.session_state.get("config_snapshot_refresh") is not None:
+        with st.expander("Last refresh", expanded=False):
+            st.dataframe(st.session_state.config_snapshot_refresh, use_container_width=True)
+
+    status = snapshot.status(host)
+    if status.empty:
+        st.info("No snapshot for this tenant yet. Refresh to build one.")
+        return
+    st.caption(f"{int(status['Objects'].sum())} objects across {len(status)} resources.")
+    with st.expander("Resources", expanded=False):
+        st.dataframe(status, use_container_width=True)
+
+    st.divider()
+
+    # ==================================================
+    # SEARCH
+    # ==================================================
+    section_header("🔍 Search")
+
+    col1, col2 = st.columns([2, 1])
+    text = col1.text_input("Code, name, description or id", key="config_snapshot_text")
+    resources = col2.multiselect("Resources", list(RESOURCES_BY_NAME), key="config_snapshot_resources")
+
+    started = time.perf_counter()
+    matches = snapshot.search(host, text, resources)
+    st.caption(f"{len(matches)} matches in {(time.perf_counter() - started) * 1000:.1f} ms")
+    st.dataframe(matches, use_container_width=True, height=280)
+
+    if matches.empty:
+        return
+
+    # ==================================================
+    # CROSS-REFERENCES
+    # ==================================================
+    section_header("🔗 Cross-references")
+
+    labels = {
+        f"{row.Resource} · {row.ID} · {row.Key or row.Name}": (row.Resource, row.ID)
+        for row in matches.itertuples(index=False)
+    }
+    selected = st.selectbox("Object", list(labels), key="config_snapshot_selected")
+    resource, object_id = labels[selected]
+
+    started = time.perf_counter()
+    outgoing, incoming = snapshot.references(host, resource, object_id)
+    st.caption(f"Looked up in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"**Uses** ({len(outgoing)})")
+        st.dataframe(outgoing, use_container_width=True)
+    with col2:
+        st.markdown(f"**Used by** ({len(incoming)})")
+        st.dataframe(incoming, use_container_width=True)
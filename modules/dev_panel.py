@@ -0,0 +1,109 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from services import metrics, profiling, throttle
+
+DEV_PANEL_ENABLED = os.getenv("PORTAL_DEV_PANEL", "0").lower() in ("1", "true", "yes")
+
+
+def dev_metrics_panel(module, job_metrics=None):
+    """Sidebar breakdown of where the last run of module spent its time."""
+    if not DEV_PANEL_ENABLED:
+        return
+    with st.expander("🛠 Developer metrics", expanded=False):
+        if job_metrics is not None:
+            summary = job_metrics.summary()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Run", f"{summary['Duration (ms)']} ms")
+            col2.metric("Requests", summary["Requests"])
+            col3.metric("HTTP", f"{summary['HTTP time (ms)']} ms")
+            stages = {stage: round(job_metrics.stage_ms[stage]) for stage in metrics.STAGES if stage in job_metrics.stage_ms}
+            if stages:
+                st.caption(" · ".join(f"{stage} {ms} ms" for stage, ms in stages.items()))
+            st.caption(
+                f"Sent {summary['Sent (KB)']} KB · received {summary['Received (KB)']} KB · "
+                f"saved {summary['Saved (KB)']} KB by compression · "
+                f"{summary['Errors']} errors · {summary['Retries']} retries"
+            )
+
+        endpoints = metrics.REGISTRY.endpoint_rows(module)
+        if endpoints:
+            st.markdown("**Endpoints**")
+            st.dataframe(pd.DataFrame(endpoints), use_container_width=True, hide_index=True)
+
+        transfer = metrics.REGISTRY.transfer_rows(module)
+        if transfer:
+            st.markdown("**Compression**")
+            st.dataframe(pd.DataFrame(transfer), use_container_width=True, hide_index=True)
+
+        jobs = metrics.REGISTRY.recent_jobs(module)
+        if len(jobs) > 1:
+            st.markdown("**Recent runs**")
+            st.dataframe(pd.DataFrame(jobs).fillna(""), use_container_width=True, hide_index=True)
+
+        hosts = throttle.reports()
+        if hosts:
+            st.markdown("**Bulk hosts**")
+            in_flight = metrics.REGISTRY.in_flight
+            st.dataframe(
+                pd.DataFrame(hosts).assign(**{"In flight": [in_flight.get(host["Host"], 0) for host in hosts]}),
+                use_container_width=True, hide_index=True,
+            )
+
+        st.download_button(
+            "⬇ Prometheus text",
+            metrics.prometheus_text(),
+            file_name="portal_metrics.txt",
+            mime="text/plain",
+            use_container_width=True,
+        )
+        if metrics.METRICS_PORT:
+            st.caption(f"Scrape endpoint: http://127.0.0.1:{metrics.METRICS_PORT}/metrics")
+
+
+def _report_downloads(report, key):
+    st.caption(
+        f"**{report.module}** · {report.started_at:%H:%M:%S} · {report.duration_s:.1f}s · "
+        f"{report.samples} samples"
+    )
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        "⬇ Flame graph", report.to_html(), file_name=f"{report.name}.html",
+        mime="text/html", key=f"profile_html_{key}", use_container_width=True,
+    )
+    col2.download_button(
+        "⬇ Stacks", report.collapsed(), file_name=f"{report.name}.collapsed",
+        mime="text/plain", key=f"profile_stacks_{key}", use_container_width=True,
+    )
+
+
+def profiling_panel(module, report, module_options):
+    """Admin switch for profiling module runs, plus downloads of the reports."""
+    is_admin = st.session_state.get("is_admin", False)
+    if not is_admin and report is None:
+        return
+    with st.expander("🔬 Profiling", expanded=report is not None):
+        if report is not None:
+            st.caption("This run was profiled.")
+            _report_downloads(report, "current")
+        if not is_admin:
+            return
+
+        if profiling.ENV_MODULES:
+            st.caption(f"PORTAL_PROFILE: {', '.join(sorted(profiling.ENV_MODULES))}")
+        if "profiling_modules" not in st.session_state:
+            st.session_state.profiling_modules = sorted(profiling.enabled_modules() - profiling.ENV_MODULES)
+        # The switch is shared by every session, so only a change of this
+        # selection updates it; a plain rerun must not replay a stale one.
+        st.multiselect(
+            "Profile next runs of (all sessions)",
+            ["all", *module_options],
+            key="profiling_modules",
+            on_change=lambda: profiling.set_enabled(st.session_state.profiling_modules),
+        )
+
+        for index, saved in enumerate(profiling.recent_reports()):
+            if saved is not report:
+                _report_downloads(saved, index)
@@ -5,6 +5,8 @@ import io
 from openpyxl.styles import PatternFill, Font
 
 from modules.ui_helpers import module_header, section_header
+from services import fastjson
+from services.activity_logger import annotate_job
 
 # ======================================================
 # HELPER: SAFELY FORMAT A CELL VALUE AS TEXT
@@ -48,25 +50,18 @@ def employee_lookup_table_ui():
     # HELPER: FETCH LOOKUP TABLE
     # ==================================================
     def fetch_lookup_table():
-        r = requests.get(GET_URL, headers=headers_auth, timeout=30)
+        r = requests.get(GET_URL, headers=headers_auth, timeout=30, stream=True)
         if r.status_code != 200:
             return None, None
 
-        raw = r.json()
+        rows, raw = fastjson.read_columns(r, flat=False)
 
         headers_meta = sorted(
             raw.get("headers", []),
             key=lambda x: x.get("sequence", 999)
         )
 
-        if "content" in raw and isinstance(raw["content"], list):
-            data = raw["content"]
-        elif "data" in raw and isinstance(raw["data"], list):
-            data = raw["data"]
-        else:
-            data = []
-
-        return headers_meta, data
+        return headers_meta, rows
 
     # ==================================================
     # DOWNLOAD EXISTING DATA (AUTO DOWNLOAD)
@@ -74,7 +69,7 @@ def employee_lookup_table_ui():
     section_header("⬇️ Download Existing Data")
 
     with st.spinner("Preparing download..."):
-        headers_meta, data = fetch_lookup_table()
+        headers_meta, rows = fetch_lookup_table()
         if not headers_meta:
             st.error("❌ Failed to fetch employee lookup data")
             return
@@ -82,10 +77,7 @@ def employee_lookup_table_ui():
         columns = [h["data"] for h in headers_meta]
         input_columns = [h["data"] for h in headers_meta if h.get("type") == "INPUT"]
 
-        df = (
-            pd.DataFrame(data).reindex(columns=columns)
-            if data else pd.DataFrame(columns=columns)
-        )
+        df = rows.frame(columns)
 
         output = io.BytesIO()
         with pd.ExcelWriter(output, engine="openpyxl") as writer:
@@ -136,6 +128,7 @@ def employee_lookup_table_ui():
         st.info(f"Rows detected: {len(df_upload)}")
 
         if st.button("🚀 Validate & Upload", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df_upload))
             with st.spinner("Validating and uploading data..."):
 
                 headers_meta, _ = fetch_lookup_table()
@@ -1,14 +1,22 @@
 from html.parser import HTMLParser
+import asyncio
+import atexit
+import concurrent.futures
+import functools
+import hashlib
 import io
-import tempfile
+import os
 import subprocess
 import sys
+import threading
 
 import streamlit as st
 from pptx import Presentation
 from pptx.util import Inches, Pt
-from playwright.sync_api import sync_playwright
-from playwright.sync_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from services.local_store import data_dir
 
 
 class HTMLTextExtractor(HTMLParser):
@@ -24,12 +32,24 @@ class HTMLTextExtractor(HTMLParser):
         return " ".join(part.strip() for part in self._parts if part.strip())
 
 
+@functools.lru_cache(maxsize=512)
 def html_to_text(html):
     parser = HTMLTextExtractor()
     parser.feed(html)
     return parser.get_text() or " "
 
 
+BROWSER_ARGS = ["--disable-dev-shm-usage", "--no-sandbox"]
+BROWSER_POOL_SIZE = int(os.getenv("HTML_TO_PPT_POOL_SIZE", "4"))
+LAUNCH_TIMEOUT_SECONDS = 120
+CLOSE_TIMEOUT_SECONDS = 30
+SLIDE_TIMEOUT_SECONDS = float(os.getenv("HTML_TO_PPT_SLIDE_TIMEOUT_SECONDS", "60"))
+
+
+class RenderTimeoutError(PlaywrightError):
+    pass
+
+
 def install_chromium(with_deps):
     command = [sys.executable, "-m", "playwright", "install"]
     if with_deps:
@@ -44,31 +64,224 @@ def install_chromium(with_deps):
     return result.stdout
 
 
+class BrowserPool:
+    """One long-lived Chromium with a pool of reusable pages.
+
+    Playwright objects are bound to the event loop that created them, while
+    Streamlit reruns land on arbitrary threads, so the browser lives on its own
+    loop thread and callers hand work to it with run_coroutine_threadsafe.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE):
+        self._size = max(1, size)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._pages = None
+        self._closing = set()
+        self._install_checked = False
+
+    def _start_loop(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="html-to-ppt-browser", daemon=True)
+        thread.start()
+        self._loop, self._thread = loop, thread
+
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(args=BROWSER_ARGS)
+        self._pages = asyncio.Queue()
+        for _ in range(self._size):
+            await self._pages.put(await self._browser.new_page())
+
+    def _submit(self, coroutine, timeout=None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise RenderTimeoutError(f"Chromium did not respond within {timeout:.0f}s")
+
+    def _ensure_browser(self):
+        with self._lock:
+            if self._loop is None:
+                self._start_loop()
+            if self._browser is not None and self._browser.is_connected():
+                return
+            try:
+                self._submit(self._launch(), LAUNCH_TIMEOUT_SECONDS)
+            except RenderTimeoutError:
+                raise
+            except PlaywrightError:
+                # Checked once per process: install Chromium and retry the launch.
+                if self._install_checked:
+                    raise
+                self._install_checked = True
+                try:
+                    install_chromium(with_deps=False)
+                except subprocess.CalledProcessError:
+                    install_chromium(with_deps=True)
+                self._submit(self._launch(), LAUNCH_TIMEOUT_SECONDS)
+            self._install_checked = True
+
+    async def _render(self, html, width, height):
+        # A None slot stands for a page discarded mid-render; open a fresh one.
+        page = await self._pages.get()
+        try:
+            if page is None:
+                page = await self._browser.new_page()
+            # The clock starts once a page is free, so a long deck is not cut short.
+            return await asyncio.wait_for(self._screenshot(page, html, width, height), SLIDE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            page = self._discard(page)
+            raise RenderTimeoutError(f"A slide did not finish rendering within {SLIDE_TIMEOUT_SECONDS:g}s")
+        except asyncio.CancelledError:  # another slide failed while this one was loading
+            page = self._discard(page)
+            raise
+        finally:
+            self._pages.put_nowait(page)
+
+    def _discard(self, page):
+        """Close a page that may still be navigating; it never goes back into the pool."""
+        if page is not None:
+            task = asyncio.ensure_future(page.close())
+            self._closing.add(task)
+            task.add_done_callback(lambda done: self._closing.discard(done) or done.cancelled() or done.exception())
+        return None
+
+    @staticmethod
+    async def _screenshot(page, html, width, height):
+        await page.set_viewport_size({"width": width, "height": height})
+        await page.set_content(html, wait_until="networkidle")
+        return await page.screenshot(full_page=True)
+
+    async def _render_many(self, html_list, width, height):
+        tasks = [asyncio.ensure_future(self._render(html, width, height)) for html in html_list]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:  # one slide failed: free the pages the others hold
+                task.cancel()
+            raise
+
+    def render_many(self, html_list, width=1280, height=720):
+        self._ensure_browser()
+        return self._submit(self._render_many(list(html_list), width, height))
+
+    def close(self):
+        with self._lock:
+            if self._loop is None:
+                return
+
+            async def _shutdown():
+                if self._browser is not None:
+                    await self._browser.close()
+                if self._playwright is not None:
+                    await self._playwright.stop()
+
+            try:
+                self._submit(_shutdown(), CLOSE_TIMEOUT_SECONDS)
+            except RenderTimeoutError:
+                pass  # exiting anyway; the loop thread is a daemon
+            finally:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._browser = self._playwright = self._loop = None
+
+
+_browser_pool = BrowserPool()
+atexit.register(_browser_pool.close)
+
+
 def render_html_to_png(html, width=1280, height=720):
-    try:
-        with sync_playwright() as playwright:
-            browser = playwright.chromium.launch(
-                args=["--disable-dev-shm-usage", "--no-sandbox"]
-            )
-            page = browser.new_page(viewport={"width": width, "height": height})
-            page.set_content(html, wait_until="networkidle")
-            png_bytes = page.screenshot(full_page=True)
-            browser.close()
-        return png_bytes
-    except PlaywrightError:
+    return _browser_pool.render_many([html], width, height)[0]
+
+
+def render_html_list_to_png(html_list, width=1280, height=720):
+    return _browser_pool.render_many(html_list, width, height)
+
+
+class RenderCache:
+    """On-disk PNG cache keyed by (HTML hash, viewport, render mode).
+
+    Entries are touched on every hit and the least recently used files are
+    evicted once the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(html, width, height, mode):
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        return f"{digest}_{width}x{height}_{mode}"
+
+    def _path(self, key):
+        return self._directory / f"{key}.png"
+
+    def get(self, key):
+        path = self._path(key)
         try:
-            install_chromium(with_deps=False)
-        except subprocess.CalledProcessError:
-            install_chromium(with_deps=True)
-        with sync_playwright() as playwright:
-            browser = playwright.chromium.launch(
-                args=["--disable-dev-shm-usage", "--no-sandbox"]
-            )
-            page = browser.new_page(viewport={"width": width, "height": height})
-            page.set_content(html, wait_until="networkidle")
-            png_bytes = page.screenshot(full_page=True)
-            browser.close()
-        return png_bytes
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, png_bytes):
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(png_bytes)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in self._directory.glob("*.png"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+                total += stat.st_size
+            for _, size, entry in sorted(entries):
+                if total <= self._max_bytes:
+                    break
+                try:
+                    entry.unlink()
+                    total -= size
+                except OSError:
+                    pass
+
+
+_render_cache = RenderCache(
+    data_dir("render_cache"),
+    int(os.getenv("HTML_TO_PPT_CACHE_MB", "200")) * 1024 * 1024,
+)
+
+
+def render_slides_cached(slide_html_list, width=1280, height=720, mode="image"):
+    keys = [RenderCache.key(html, width, height, mode) for html in slide_html_list]
+    images = [_render_cache.get(key) for key in keys]
+
+    # Only slides whose HTML changed since the last build go to the browser.
+    misses = [index for index, image in enumerate(images) if image is None]
+    if misses:
+        rendered = render_html_list_to_png([slide_html_list[i] for i in misses], width, height)
+        for index, png_bytes in zip(misses, rendered):
+            images[index] = png_bytes
+            _render_cache.put(keys[index], png_bytes)
+    return images
 
 
 def build_pptx(slide_html_list, include_text_layer, render_mode):
@@ -79,34 +292,32 @@ def build_pptx(slide_html_list, include_text_layer, render_mode):
 
     render_as_image = render_mode == "Render HTML as image (requires Playwright Chromium)"
 
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        for index, html in enumerate(slide_html_list):
-            slide = presentation.slides.add_slide(blank_layout)
-            if render_as_image:
-                png_bytes = render_html_to_png(html)
-                tmp_path = f"{tmp_dir}/slide_{index + 1}.png"
-                with open(tmp_path, "wb") as tmp_file:
-                    tmp_file.write(png_bytes)
-                slide.shapes.add_picture(
-                    tmp_path,
-                    left=Inches(0),
-                    top=Inches(0),
-                    width=presentation.slide_width,
-                    height=presentation.slide_height,
-                )
+    # Cached slides are reused; the rest render in parallel in the browser pool.
+    rendered = render_slides_cached(slide_html_list) if render_as_image else []
 
-            if include_text_layer or not render_as_image:
-                textbox = slide.shapes.add_textbox(
-                    left=Inches(0.6),
-                    top=Inches(0.6),
-                    width=Inches(12.0),
-                    height=Inches(6.3),
-                )
-                text_frame = textbox.text_frame
-                text_frame.word_wrap = True
-                paragraph = text_frame.paragraphs[0]
-                paragraph.text = html_to_text(html)
-                paragraph.font.size = Pt(18)
+    for index, html in enumerate(slide_html_list):
+        slide = presentation.slides.add_slide(blank_layout)
+        if render_as_image:
+            slide.shapes.add_picture(
+                io.BytesIO(rendered[index]),
+                left=Inches(0),
+                top=Inches(0),
+                width=presentation.slide_width,
+                height=presentation.slide_height,
+            )
+
+        if include_text_layer or not render_as_image:
+            textbox = slide.shapes.add_textbox(
+                left=Inches(0.6),
+                top=Inches(0.6),
+                width=Inches(12.0),
+                height=Inches(6.3),
+            )
+            text_frame = textbox.text_frame
+            text_frame.word_wrap = True
+            paragraph = text_frame.paragraphs[0]
+            paragraph.text = html_to_text(html)
+            paragraph.font.size = Pt(18)
 
     buffer = io.BytesIO()
     presentation.save(buffer)
@@ -191,11 +402,14 @@ def html_to_ppt_ui():
             pptx_buffer = build_pptx(slide_html_list, include_text_layer, render_mode)
         except PlaywrightError as exc:
             if render_mode == "Render HTML as image (requires Playwright Chromium)":
-                st.error(
-                    "Playwright Chromium is not available or missing dependencies. "
-                    "Click 'Install Playwright Chromium', then restart the app if needed, "
-                    "or use text-only mode."
-                )
+                if isinstance(exc, RenderTimeoutError):
+                    st.error(f"{exc}. Built a text-only deck instead.")
+                else:
+                    st.error(
+                        "Playwright Chromium is not available or missing dependencies. "
+                        "Click 'Install Playwright Chromium', then restart the app if needed, "
+                        "or use text-only mode."
+                    )
                 pptx_buffer = build_pptx(
                     slide_html_list,
                     include_text_layer=False,
@@ -4,7 +4,11 @@ import requests
 import io
 import hashlib
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services import fastjson
+from services.activity_logger import annotate_job
+from services.schema import Column, Schema
 
 
 # ======================================================
@@ -15,27 +19,17 @@ def file_hash(file_bytes):
 
 
 # ======================================================
-# FLOAT PARSER
+# UPLOAD SCHEMA
 # ======================================================
-def to_float(value):
-    if value is None or str(value).strip() == "":
-        return None
-    try:
-        return float(value)
-    except ValueError:
-        return None
-
-
-# ======================================================
-# ID PARSER
-# ======================================================
-def to_int(value):
-    if value is None or str(value).strip() == "":
-        return None
-    try:
-        return int(float(value))
-    except ValueError:
-        return None
+KNOWN_LOCATION_SCHEMA = Schema(
+    Column("id", "int"),
+    Column("name", "str", required=True),
+    Column("description", "str"),
+    Column("latitude", "float"),
+    Column("longitude", "float"),
+    Column("radius", "float"),
+    Column("accuracy", "float"),
+)
 
 
 # ======================================================
@@ -108,6 +102,7 @@ def known_locations_ui():
         st.info(f"Rows detected: {len(df)}")
 
         if st.button("🚀 Process Upload", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
             with st.spinner("⏳ Uploading and processing known locations... Please wait"):
 
                 if st.session_state.processed_known_locations_file_hash == current_hash:
@@ -118,33 +113,25 @@ def known_locations_ui():
 
                 results = []
 
-                for row_no, row in df.iterrows():
+                coerced = KNOWN_LOCATION_SCHEMA.coerce(df)
+                row_errors = coerced.row_errors()
+
+                for row_no, record in zip(df.index, coerced.records()):
+                    name = record["name"] or ""
                     try:
-                        name = str(row.get("name")).strip()
-                        if not name:
-                            raise ValueError("Known location name is mandatory")
+                        if row_no in row_errors:
+                            raise ValueError(row_errors[row_no])
 
                         payload = {
                             "name": name,
-                            "description": str(row.get("description")).strip()
+                            "description": record["description"] or ""
                         }
 
-                        latitude = to_float(row.get("latitude"))
-                        longitude = to_float(row.get("longitude"))
-                        radius = to_float(row.get("radius"))
-                        accuracy = to_float(row.get("accuracy"))
+                        for field in ("latitude", "longitude", "radius", "accuracy"):
+                            if record[field] is not None:
+                                payload[field] = record[field]
 
-                        if latitude is not None:
-                            payload["latitude"] = latitude
-                        if longitude is not None:
-                            payload["longitude"] = longitude
-                        if radius is not None:
-                            payload["radius"] = radius
-                        if accuracy is not None:
-                            payload["accuracy"] = accuracy
-
-                        raw_id = row.get("id")
-                        location_id = to_int(raw_id)
+                        location_id = record["id"]
 
                         if location_id is not None:
                             payload["id"] = location_id
@@ -176,7 +163,7 @@ def known_locations_ui():
                     except Exception as exc:
                         results.append({
                             "Row": row_no + 1,
-                            "Name": row.get("name"),
+                            "Name": name,
                             "Action": "Error",
                             "HTTP Status": "",
                             "Status": "Failed",
@@ -191,22 +178,7 @@ def known_locations_ui():
     # ==================================================
     # DELETE KNOWN LOCATIONS
     # ==================================================
-    section_header("🗑️ Delete Known Locations")
-
-    ids_input = st.text_input(
-        "Enter Known Location IDs (comma-separated)",
-        placeholder="Example: 101,102,103"
-    )
-
-    if st.button("Delete Known Locations"):
-        with st.spinner("⏳ Deleting known locations..."):
-            ids = [i.strip() for i in ids_input.split(",") if i.strip().isdigit()]
-            for location_id in ids:
-                r = requests.delete(f"{BASE_URL}/{location_id}", headers=headers)
-                if r.status_code in (200, 204):
-                    st.success(f"Deleted Known Location ID {location_id}")
-                else:
-                    st.error(f"Failed to delete ID {location_id} → {r.text}")
+    bulk_delete_section("Known Locations", BASE_URL, headers, key="known_locations")
 
     st.divider()
 
@@ -216,11 +188,11 @@ def known_locations_ui():
     section_header("⬇️ Download Existing Known Locations")
 
     with st.spinner("⏳ Fetching known locations..."):
-        r = requests.get(BASE_URL, headers=headers)
+        r = requests.get(BASE_URL, headers=headers, stream=True)
         if r.status_code != 200:
             st.error("❌ Failed to fetch known locations")
             return
-        df = pd.DataFrame(r.json())
+        df, _ = fastjson.read_frame(r, flat=False)
 
     st.download_button(
         "⬇️ Download Existing Known Locations",
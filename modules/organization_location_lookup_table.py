@@ -5,6 +5,8 @@ import io
 from openpyxl.styles import PatternFill, Font
 
 from modules.ui_helpers import module_header, section_header
+from services import fastjson
+from services.activity_logger import annotate_job
 
 # ======================================================
 # HELPER: CLEAN EXCEL VALUES (REMOVE .0 ISSUE)
@@ -59,19 +61,18 @@ def organization_location_lookup_table_ui():
     # FETCH LOOKUP TABLE
     # ==================================================
     def fetch_lookup_table():
-        r = requests.get(GET_URL, headers=headers_auth, timeout=30)
+        r = requests.get(GET_URL, headers=headers_auth, timeout=30, stream=True)
         if r.status_code != 200:
             return None, None
 
-        raw = r.json()
+        rows, raw = fastjson.read_columns(r, flat=False)
 
         headers_meta = sorted(
             raw.get("headers", []),
             key=lambda x: x.get("sequence", 999)
         )
 
-        data = raw.get("content") or raw.get("data") or []
-        return headers_meta, data
+        return headers_meta, rows
 
     # ==================================================
     # DOWNLOAD EXISTING DATA
@@ -79,7 +80,7 @@ def organization_location_lookup_table_ui():
     section_header("⬇️ Download Existing Data")
 
     with st.spinner("Preparing download..."):
-        headers_meta, data = fetch_lookup_table()
+        headers_meta, rows = fetch_lookup_table()
         if not headers_meta:
             st.error("❌ Failed to fetch lookup data")
             return
@@ -87,7 +88,7 @@ def organization_location_lookup_table_ui():
         columns = [h["data"] for h in headers_meta]
         input_columns = [h["data"] for h in headers_meta if h.get("type") == "INPUT"]
 
-        df = pd.DataFrame(data).reindex(columns=columns) if data else pd.DataFrame(columns=columns)
+        df = rows.frame(columns)
 
         output = io.BytesIO()
         with pd.ExcelWriter(output, engine="openpyxl") as writer:
@@ -146,6 +147,7 @@ def organization_location_lookup_table_ui():
             return
 
         if st.button("🚀 Validate & Upload", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df_upload))
             with st.spinner("Validating and uploading data..."):
 
                 headers_meta, _ = fetch_lookup_table()
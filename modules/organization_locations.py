@@ -4,7 +4,13 @@ import pandas as pd
 import requests
 import streamlit as st
 
+from modules.bulk_delete import bulk_delete_section
+from modules.preflight_check import preflight_rows
 from modules.ui_helpers import module_header, section_header
+from services import metrics, snapshot
+from services.activity_logger import annotate_job
+from services.preflight import ForeignKey
+from services.schema import Column, Schema
 
 LEVEL_LABELS_BY_ID = {
     26203: "Entity",
@@ -18,6 +24,22 @@ LEVEL_LABELS_BY_ID = {
     27096: "Reporting Manager",
 }
 
+LOCATION_COLUMNS = (
+    Column("Id", "int"),
+    Column("Name", "str", required=True),
+    Column("KnownLocation", "int"),
+    Column("Period Start Day", "int"),
+    Column("Paycode Event Set", "int"),
+    Column("Shift Template Set", "int"),
+)
+
+ORG_LOCATION_REFERENCES = (
+    ForeignKey("Id", "organization_locations"),
+    ForeignKey("KnownLocation", "known_locations"),
+    ForeignKey("Paycode Event Set", "paycode_event_sets"),
+    ForeignKey("Shift Template Set", "shift_template_sets"),
+)
+
 PREFERRED_LEVEL_ORDER = [
     "Entity",
     "Cluster",
@@ -44,6 +66,7 @@ def file_hash(file_bytes):
 # ======================================================
 
 def to_int(value):
+    # For ids in API responses; uploaded sheets go through LOCATION_COLUMNS.
     if value is None or str(value).strip() == "":
         return None
     try:
@@ -72,6 +95,107 @@ def extract_list_payload(response_json):
     return []
 
 
+@metrics.timed("build")
+def _prepare_location_rows(df, level_columns):
+    """Coerce the sheet once: one item per row with its payload or error."""
+    # A level's column is headed with its name, or its id.
+    level_schema = [
+        Column(level["name"], "int", aliases=(str(level["id"]),) if level["id"] is not None else ())
+        for level in level_columns
+    ]
+    coerced = Schema(*LOCATION_COLUMNS, *level_schema).coerce(df)
+    row_errors = coerced.row_errors()
+    prepared = []
+    for row_no, record in zip(df.index, coerced.records()):
+        item = {"Row": row_no + 1, "Name": record["Name"] or ""}
+        if row_no in row_errors:
+            item["error"] = row_errors[row_no]
+            prepared.append(item)
+            continue
+
+        payload = {
+            "name": record["Name"],
+            "inactive": False,
+            "locked": False,
+            "properties": {},
+            "organizationEntries": [],
+        }
+        if record["Period Start Day"] is not None:
+            payload["properties"]["PERIOD_START_DAY"] = record["Period Start Day"]
+        if record["KnownLocation"] is not None:
+            payload["knownLocation"] = {"id": record["KnownLocation"]}
+        if record["Paycode Event Set"] is not None:
+            payload["paycodeEventSet"] = {"id": record["Paycode Event Set"]}
+        if record["Shift Template Set"] is not None:
+            payload["shiftTemplateSet"] = {"id": record["Shift Template Set"]}
+
+        for level in level_columns:
+            entry_id = record[level["name"]]
+            if entry_id is not None:
+                entry_payload = {"id": entry_id}
+                if level["id"] is not None:
+                    entry_payload["organizationLevelId"] = level["id"]
+                payload["organizationEntries"].append(entry_payload)
+
+        if record["Id"] is not None:
+            payload["id"] = record["Id"]
+        item["payload"] = payload
+        prepared.append(item)
+    return prepared
+
+
+def build_rows_from_locations(locations, level_columns):
+    rows = []
+    for location in locations:
+        row = {
+            "Id": location.get("id", ""),
+            "Name": location.get("name", ""),
+            "KnownLocation": "",
+            "Period Start Day": "",
+            "Paycode Event Set": "",
+            "Shift Template Set": "",
+        }
+        level_id_to_name = {item["id"]: item["name"] for item in level_columns}
+        for level in level_columns:
+            row[level["name"]] = ""
+
+        known_location = location.get("knownLocation") or {}
+        row["KnownLocation"] = known_location.get("id") or location.get("knownLocationId", "")
+        properties = location.get("properties") or {}
+        row["Period Start Day"] = properties.get("PERIOD_START_DAY", "")
+        paycode_event_set = location.get("paycodeEventSet") or {}
+        row["Paycode Event Set"] = paycode_event_set.get("id", "")
+        shift_template_set = location.get("shiftTemplateSet") or {}
+        row["Shift Template Set"] = shift_template_set.get("id", "")
+
+        for entry in location.get("organizationEntries", []) or []:
+            level_id = entry.get("organizationLevelId")
+            if not level_id:
+                level_id = (entry.get("organizationLevel") or {}).get("id")
+            level_name = level_id_to_name.get(to_int(level_id))
+            if not level_name:
+                continue
+
+            entry_id = entry.get("id")
+            if entry_id is None:
+                entry_id = entry.get("organizationEntryId")
+            if entry_id is None:
+                entry_id = (entry.get("organizationEntry") or {}).get("id")
+
+            row[level_name] = entry_id or ""
+
+        if not (location.get("organizationEntries") or []):
+            path_value = str(location.get("path") or "").strip()
+            path_entry_ids = [to_int(item) for item in path_value.split("/") if str(item).strip()]
+            for idx, entry_id in enumerate(path_entry_ids):
+                if entry_id is None or idx >= len(level_columns):
+                    continue
+                row[level_columns[idx]["name"]] = entry_id
+
+        rows.append(row)
+    return rows
+
+
 # ======================================================
 # MAIN UI
 # ======================================================
@@ -123,57 +247,6 @@ def organization_locations_ui():
 
         return ordered_level_columns, canonical_to_level
 
-    def build_rows_from_locations(locations, level_columns):
-        rows = []
-        for location in locations:
-            row = {
-                "Id": location.get("id", ""),
-                "Name": location.get("name", ""),
-                "KnownLocation": "",
-                "Period Start Day": "",
-                "Paycode Event Set": "",
-                "Shift Template Set": "",
-            }
-            level_id_to_name = {item["id"]: item["name"] for item in level_columns}
-            for level in level_columns:
-                row[level["name"]] = ""
-
-            known_location = location.get("knownLocation") or {}
-            row["KnownLocation"] = known_location.get("id") or location.get("knownLocationId", "")
-            properties = location.get("properties") or {}
-            row["Period Start Day"] = properties.get("PERIOD_START_DAY", "")
-            paycode_event_set = location.get("paycodeEventSet") or {}
-            row["Paycode Event Set"] = paycode_event_set.get("id", "")
-            shift_template_set = location.get("shiftTemplateSet") or {}
-            row["Shift Template Set"] = shift_template_set.get("id", "")
-
-            for entry in location.get("organizationEntries", []) or []:
-                level_id = entry.get("organizationLevelId")
-                if not level_id:
-                    level_id = (entry.get("organizationLevel") or {}).get("id")
-                level_name = level_id_to_name.get(to_int(level_id))
-                if not level_name:
-                    continue
-
-                entry_id = entry.get("id")
-                if entry_id is None:
-                    entry_id = entry.get("organizationEntryId")
-                if entry_id is None:
-                    entry_id = (entry.get("organizationEntry") or {}).get("id")
-
-                row[level_name] = entry_id or ""
-
-            if not (location.get("organizationEntries") or []):
-                path_value = str(location.get("path") or "").strip()
-                path_entry_ids = [to_int(item) for item in path_value.split("/") if str(item).strip()]
-                for idx, entry_id in enumerate(path_entry_ids):
-                    if entry_id is None or idx >= len(level_columns):
-                        continue
-                    row[level_columns[idx]["name"]] = entry_id
-
-            rows.append(row)
-        return rows
-
     # ==================================================
     # DOWNLOAD UPLOAD TEMPLATE
     # ==================================================
@@ -184,7 +257,7 @@ def organization_locations_ui():
         st.error("❌ Failed to fetch organization levels for template")
         return
 
-    level_columns, canonical_to_level = build_level_metadata(levels)
+    level_columns, _ = build_level_metadata(levels)
     level_names = [level["name"] for level in level_columns]
     template_columns = [
         "Id",
@@ -238,6 +311,7 @@ def organization_locations_ui():
         st.info(f"Rows detected: {len(df)}")
 
         if st.button("🚀 Process Upload", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
             with st.spinner("⏳ Uploading and processing organization locations... Please wait"):
                 if st.session_state.processed_org_locations_file_hash == current_hash:
                     st.warning("⚠ This file was already processed. Upload a new file to continue.")
@@ -245,72 +319,24 @@ def organization_locations_ui():
 
                 st.session_state.processed_org_locations_file_hash = current_hash
 
-                column_lookup = {col.lower(): col for col in df.columns}
-
-                name_col = column_lookup.get("name")
-                id_col = column_lookup.get("id")
-                known_col = column_lookup.get("knownlocation")
-                period_col = column_lookup.get("period start day")
-                paycode_event_col = column_lookup.get("paycode event set")
-                shift_template_col = column_lookup.get("shift template set")
-
-                missing = [label for label, col in (("Name", name_col),) if col is None]
-                if missing:
-                    st.error(f"Missing required column(s): {', '.join(missing)}")
+                if not any(str(col).lower() == "name" for col in df.columns):
+                    st.error("Missing required column(s): Name")
                     return
 
+                blocked = preflight_rows(df, ORG_LOCATION_REFERENCES, base_host, headers)
                 results = []
 
-                for row_no, row in df.iterrows():
+                for item in _prepare_location_rows(df, level_columns):
+                    row_no = item["Row"] - 1
                     try:
-                        name = str(row.get(name_col)).strip()
-                        if not name:
-                            raise ValueError("Organization location name is mandatory")
-
-                        payload = {
-                            "name": name,
-                            "inactive": False,
-                            "locked": False,
-                            "properties": {},
-                            "organizationEntries": [],
-                        }
-
-                        period_start_day = to_int(row.get(period_col)) if period_col else None
-                        if period_start_day is not None:
-                            payload["properties"]["PERIOD_START_DAY"] = period_start_day
-
-                        if known_col:
-                            known_id = to_int(row.get(known_col))
-                            if known_id is not None:
-                                payload["knownLocation"] = {"id": known_id}
-
-                        if paycode_event_col:
-                            paycode_event_set_id = to_int(row.get(paycode_event_col))
-                            if paycode_event_set_id is not None:
-                                payload["paycodeEventSet"] = {"id": paycode_event_set_id}
-
-                        if shift_template_col:
-                            shift_template_set_id = to_int(row.get(shift_template_col))
-                            if shift_template_set_id is not None:
-                                payload["shiftTemplateSet"] = {"id": shift_template_set_id}
-
-                        for level_name in level_names:
-                            level_info = canonical_to_level.get(canonical_name(level_name), {})
-                            level_col = column_lookup.get(canonical_name(level_name))
-                            if not level_col and level_info.get("id") is not None:
-                                level_col = column_lookup.get(canonical_name(level_info["id"]))
-                            if not level_col:
-                                continue
-                            entry_id = to_int(row.get(level_col))
-                            if entry_id is not None:
-                                entry_payload = {"id": entry_id}
-                                if level_info and level_info.get("id") is not None:
-                                    entry_payload["organizationLevelId"] = level_info["id"]
-                                payload["organizationEntries"].append(entry_payload)
-
-                        record_id = to_int(row.get(id_col)) if id_col else None
+                        if row_no in blocked:
+                            raise ValueError(f"Pre-flight: {blocked[row_no]}")
+                        if "error" in item:
+                            raise ValueError(item["error"])
+
+                        payload = item["payload"]
+                        record_id = payload.get("id")
                         if record_id is not None:
-                            payload["id"] = record_id
                             response = requests.put(
                                 f"{base_url}/{record_id}",
                                 headers=headers,
@@ -329,8 +355,8 @@ def organization_locations_ui():
 
                         results.append(
                             {
-                                "Row": row_no + 1,
-                                "Name": name,
+                                "Row": item["Row"],
+                                "Name": item["Name"],
                                 "Action": action,
                                 "HTTP Status": response.status_code,
                                 "Status": "Success" if response.status_code in (200, 201) else "Failed",
@@ -341,8 +367,8 @@ def organization_locations_ui():
                     except Exception as exc:  # pylint: disable=broad-except
                         results.append(
                             {
-                                "Row": row_no + 1,
-                                "Name": row.get(name_col) if name_col else "",
+                                "Row": item["Row"],
+                                "Name": item["Name"],
                                 "Action": "Error",
                                 "HTTP Status": "",
                                 "Status": "Failed",
@@ -350,6 +376,8 @@ def organization_locations_ui():
                             }
                         )
 
+                snapshot.invalidate(base_host, "organization_locations")
+
             section_header("📊 Upload Result")
             st.dataframe(pd.DataFrame(results), use_container_width=True)
 
@@ -358,22 +386,7 @@ def organization_locations_ui():
     # ==================================================
     # DELETE ORGANIZATION LOCATIONS
     # ==================================================
-    section_header("🗑️ Delete Organization Locations")
-
-    ids_input = st.text_input(
-        "Enter Organization Location IDs (comma-separated)",
-        placeholder="Example: 101,102,103",
-    )
-
-    if st.button("Delete Organization Locations"):
-        with st.spinner("⏳ Deleting organization locations..."):
-            ids = [item.strip() for item in ids_input.split(",") if item.strip().isdigit()]
-            for location_id in ids:
-                response = requests.delete(f"{base_url}/{location_id}", headers=headers, timeout=30)
-                if response.status_code in (200, 204):
-                    st.success(f"Deleted Organization Location ID {location_id}")
-                else:
-                    st.error(f"Failed to delete ID {location_id} → {response.text}")
+    bulk_delete_section("Organization Locations", base_url, headers, key="organization_locations")
 
     st.divider()
 
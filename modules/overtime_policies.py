@@ -4,9 +4,124 @@ import requests
 import io
 from openpyxl import Workbook
 from openpyxl.worksheet.datavalidation import DataValidation
-import re
 
+from modules.bulk_delete import bulk_delete_section
+from modules.tenant_fanout import fanout_targets, match_ids, render_fanout_results, run_fanout
 from modules.ui_helpers import module_header, section_header
+from services import metrics
+from services.activity_logger import annotate_job
+from services.bulk import session
+from services.reshape import NumberedGroup
+from services.schema import Column, Schema
+
+OVERTIME_MINUTE_FIELDS = [
+    "minMinute", "maxDailyMinute", "maxWeeklyMinute",
+    "maxMonthlyMinute", "maxQuarterlyMinute",
+    "weekoffMinMinute", "weekoffMaxDailyMinute",
+    "holidayMinMinute", "holidayMaxDailyMinute",
+]
+
+OVERTIME_POLICY_SCHEMA = Schema(
+    Column("id", "int"),
+    Column("name", "str", required=True),
+    Column("description", "str"),
+    Column("Applicability", "str"),
+    *(Column(field, "int") for field in OVERTIME_MINUTE_FIELDS),
+    Column("skipTotalizationRoundings", "bool"),
+)
+
+ROUNDING_GROUP = NumberedGroup(
+    {
+        "startMinute": "rounding_startMinute{n}",
+        "endMinute": "rounding_endMinute{n}",
+        "roundMinute": "rounding_roundMinute{n}",
+    },
+    Schema(Column("startMinute", "int"), Column("endMinute", "int"), Column("roundMinute", "int")),
+)
+
+HOLIDAY_GROUP_LIMITS = NumberedGroup(
+    {
+        "holidayGroup": "holidayGroup{n}",
+        "minMinute": "holidayGroup_minMinute{n}",
+        "maxDailyMinute": "holidayGroup_maxDailyMinute{n}",
+    },
+    Schema(Column("holidayGroup", "str"), Column("minMinute", "int"), Column("maxDailyMinute", "int")),
+)
+
+
+@metrics.timed("build")
+def _prepare_overtime_rows(df):
+    coerced = OVERTIME_POLICY_SCHEMA.coerce(df)
+    row_errors = coerced.row_errors()
+    roundings, rounding_errors = ROUNDING_GROUP.nest(df)
+    holiday_groups, holiday_group_errors = HOLIDAY_GROUP_LIMITS.nest(df)
+
+    prepared = []
+    for idx, record in zip(df.index, coerced.records()):
+        try:
+            errors = [
+                message
+                for message in (row_errors.get(idx), rounding_errors.get(idx), holiday_group_errors.get(idx))
+                if message
+            ]
+            if errors:
+                raise ValueError("; ".join(errors))
+
+            policy_id = record["id"]
+            payload = {
+                "name": record["name"],
+                "description": record["description"] or record["name"],
+                "mode": record["Applicability"] or "",
+                **{field: record[field] for field in OVERTIME_MINUTE_FIELDS},
+                "skipTotalizationRoundings": record["skipTotalizationRoundings"],
+                "roundings": [],
+                "holidayGroupLimits": []
+            }
+
+            for entry in roundings.get(idx, []):
+                if entry["startMinute"] is not None and entry["endMinute"] is not None and entry["roundMinute"] is not None:
+                    payload["roundings"].append({
+                        "startMinute": entry["startMinute"],
+                        "endMinute": entry["endMinute"],
+                        "roundMinute": entry["roundMinute"]
+                    })
+
+            for entry in holiday_groups.get(idx, []):
+                if entry["holidayGroup"]:
+                    payload["holidayGroupLimits"].append({
+                        "holidayGroup": entry["holidayGroup"],
+                        "minMinute": entry["minMinute"],
+                        "maxDailyMinute": entry["maxDailyMinute"]
+                    })
+
+            if policy_id:
+                payload["id"] = policy_id
+            prepared.append({"Row": idx + 1, "payload": payload})
+
+        except Exception as e:
+            prepared.append({"Row": idx + 1, "error": str(e)})
+    return prepared
+
+
+def _send_overtime_rows(prepared, base_url, headers):
+    results = []
+    for item in prepared:
+        if "error" in item:
+            results.append({"Row": item["Row"], "Status": item["error"]})
+            continue
+        try:
+            payload = item["payload"]
+            if payload.get("id"):
+                r = session().put(f"{base_url}/{payload['id']}", headers=headers, json=payload)
+            else:
+                r = session().post(base_url, headers=headers, json=payload)
+
+            results.append({"Row": item["Row"], "Status": r.status_code})
+
+        except Exception as e:
+            results.append({"Row": item["Row"], "Status": str(e)})
+    return results
+
 
 # ======================================================
 # OVERTIME POLICIES UI
@@ -93,105 +208,32 @@ def overtime_policies_ui():
         df = df.fillna("")
         st.dataframe(df, use_container_width=True)
 
-        def parse_int(v):
-            try:
-                return int(float(v))
-            except:
-                return None
-
-        def parse_bool(v):
-            if isinstance(v, bool):
-                return v
-            if v is None:
-                return False
-            val = str(v).strip().lower()
-            return val in {"true", "1", "yes", "y"}
+        targets = fanout_targets("overtime_policies")
 
         if st.button("🚀 Submit Overtime Policies", type="primary", use_container_width=True):
-            results = []
-
-            for idx, row in df.iterrows():
-                try:
-                    policy_id = parse_int(row.get("id"))
-                    payload = {
-                        "name": row["name"],
-                        "description": row.get("description") or row["name"],
-                        "mode": row.get("Applicability"),
-                        "minMinute": parse_int(row.get("minMinute")),
-                        "maxDailyMinute": parse_int(row.get("maxDailyMinute")),
-                        "maxWeeklyMinute": parse_int(row.get("maxWeeklyMinute")),
-                        "maxMonthlyMinute": parse_int(row.get("maxMonthlyMinute")),
-                        "maxQuarterlyMinute": parse_int(row.get("maxQuarterlyMinute")),
-                        "weekoffMinMinute": parse_int(row.get("weekoffMinMinute")),
-                        "weekoffMaxDailyMinute": parse_int(row.get("weekoffMaxDailyMinute")),
-                        "holidayMinMinute": parse_int(row.get("holidayMinMinute")),
-                        "holidayMaxDailyMinute": parse_int(row.get("holidayMaxDailyMinute")),
-                        "skipTotalizationRoundings": parse_bool(row.get("skipTotalizationRoundings")),
-                        "roundings": [],
-                        "holidayGroupLimits": []
-                    }
-
-                    rounding_indexes = sorted({
-                        int(m.group(1))
-                        for col in row.index
-                        for m in [re.match(r"rounding_startMinute(\d+)$", str(col))]
-                        if m
-                    })
-                    for i in rounding_indexes:
-                        sm = parse_int(row.get(f"rounding_startMinute{i}"))
-                        em = parse_int(row.get(f"rounding_endMinute{i}"))
-                        rm = parse_int(row.get(f"rounding_roundMinute{i}"))
-                        if sm is not None and em is not None and rm is not None:
-                            payload["roundings"].append({
-                                "startMinute": sm,
-                                "endMinute": em,
-                                "roundMinute": rm
-                            })
-
-                    holiday_group_indexes = sorted({
-                        int(m.group(1))
-                        for col in row.index
-                        for m in [re.match(r"holidayGroup(\d+)$", str(col))]
-                        if m
-                    })
-                    for i in holiday_group_indexes:
-                        hg = row.get(f"holidayGroup{i}")
-                        if hg:
-                            payload["holidayGroupLimits"].append({
-                                "holidayGroup": hg,
-                                "minMinute": parse_int(row.get(f"holidayGroup_minMinute{i}")),
-                                "maxDailyMinute": parse_int(row.get(f"holidayGroup_maxDailyMinute{i}"))
-                            })
-
-                    if policy_id:
-                        payload["id"] = policy_id
-                        r = requests.put(f"{BASE_URL}/{policy_id}", headers=headers, json=payload)
-                    else:
-                        r = requests.post(BASE_URL, headers=headers, json=payload)
-
-                    results.append({"Row": idx + 1, "Status": r.status_code})
-
-                except Exception as e:
-                    results.append({"Row": idx + 1, "Status": str(e)})
-
-            st.dataframe(pd.DataFrame(results), use_container_width=True)
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
+            prepared = _prepare_overtime_rows(df)
+
+            if len(targets) > 1:
+                outcomes = run_fanout(
+                    targets,
+                    lambda tenant: _send_overtime_rows(
+                        match_ids(prepared, tenant, "overtime_policies"),
+                        tenant.api_url("overtime_policies"),
+                        tenant.headers(),
+                    ),
+                )
+                render_fanout_results(outcomes, ["Row"], "overtime_policies")
+            else:
+                results = _send_overtime_rows(prepared, BASE_URL, headers)
+                st.dataframe(pd.DataFrame(results), use_container_width=True)
 
     st.divider()
 
     # ==================================================
     # 3️⃣ DELETE (UNCHANGED)
     # ==================================================
-    section_header("🗑️ Delete Overtime Policies")
-
-    ids_input = st.text_input("Enter IDs (comma-separated)", placeholder="51,52")
-
-    if st.button("Delete Overtime Policies", use_container_width=True):
-        for oid in [i.strip() for i in ids_input.split(",") if i.isdigit()]:
-            r = requests.delete(f"{BASE_URL}/{oid}", headers=headers)
-            if r.status_code in (200, 204):
-                st.success(f"Deleted {oid}")
-            else:
-                st.error(f"Failed {oid}")
+    bulk_delete_section("Overtime Policies", BASE_URL, headers, key="overtime_policies")
 
     st.divider()
 
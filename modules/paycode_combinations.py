@@ -3,7 +3,9 @@ import pandas as pd
 import requests
 import io
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
 
 # ======================================================
 # MAIN UI
@@ -77,6 +79,7 @@ def paycode_combinations_ui():
         st.info(f"Rows detected: {len(df)}")
 
         if st.button("🚀 Process Upload", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
             with st.spinner("⏳ Processing Paycode Combinations..."):
 
                 results = []
@@ -144,27 +147,7 @@ def paycode_combinations_ui():
     # ==================================================
     # HARD DELETE PAYCODE COMBINATIONS
     # ==================================================
-    section_header("🗑️ Delete Paycode Combinations")
-
-    ids_input = st.text_input(
-        "Enter Combination IDs (comma-separated)",
-        placeholder="Example: 924,925"
-    )
-
-    if st.button("Delete Combinations", type="primary"):
-        with st.spinner("⏳ Deleting combinations..."):
-            ids = [i.strip() for i in ids_input.split(",") if i.strip().isdigit()]
-
-            for cid in ids:
-                r = requests.delete(
-                    f"{COMBO_URL}/{cid}",
-                    headers=headers
-                )
-
-                if r.status_code in (200, 204):
-                    st.success(f"Deleted Combination ID {cid}")
-                else:
-                    st.error(f"Failed to delete ID {cid} → {r.text}")
+    bulk_delete_section("Paycode Combinations", COMBO_URL, headers, key="paycode_combinations")
 
     st.divider()
 
@@ -3,7 +3,37 @@ import pandas as pd
 import requests
 import io
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
+from services.reshape import NumberedGroup
+from services.schema import Column, Schema
+
+
+PAYCODE_EVENT_ENTRIES = NumberedGroup(
+    {"paycodeEvent": "PaycodeEvent{n}", "priority": "Priority{n}"},
+    Schema(Column("paycodeEvent", "int"), Column("priority", "int", default=1)),
+)
+
+
+def _set_entries(row_indexes, event_entries, entry_errors):
+    """Entries for one set from its rows, keeping the first of each paycode event."""
+    entries = []
+    seen = set()
+    for row_index in row_indexes:
+        if row_index in entry_errors:
+            raise ValueError(entry_errors[row_index])
+        for entry in event_entries.get(row_index, []):
+            if entry["paycodeEvent"] is None or entry["paycodeEvent"] in seen:
+                continue
+            seen.add(entry["paycodeEvent"])
+            entries.append({
+                "paycodeEvent": {"id": entry["paycodeEvent"]},
+                "priority": entry["priority"],
+                "overridable": False
+            })
+    return entries
+
 
 # ======================================================
 # PAYCODE EVENT SETS UI
@@ -103,6 +133,7 @@ def paycode_event_sets_ui():
         st.dataframe(df, use_container_width=True)
 
         if st.button("🚀 Process Upload", type="primary", use_container_width=True):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
 
             results = []
 
@@ -118,6 +149,8 @@ def paycode_event_sets_ui():
             df["id"] = df["id"].apply(parse_id)
             df["name"] = df["name"].astype(str).str.strip()
 
+            event_entries, entry_errors = PAYCODE_EVENT_ENTRIES.nest(df)
+
             id_groups = df[df["id"].notna()].groupby("id")
             name_groups = df[df["id"].isna()].groupby("name")
 
@@ -139,26 +172,7 @@ def paycode_event_sets_ui():
                             "entries": []
                         }
 
-                        seen = set()
-
-                        for _, row in group.iterrows():
-                            for i in range(1, 6):
-                                ev = row.get(f"PaycodeEvent{i}", "")
-                                pr = row.get(f"Priority{i}", "")
-
-                                if str(ev).strip() == "":
-                                    continue
-
-                                ev_id = int(float(ev))
-                                if ev_id in seen:
-                                    continue
-                                seen.add(ev_id)
-
-                                payload["entries"].append({
-                                    "paycodeEvent": {"id": ev_id},
-                                    "priority": int(float(pr)) if str(pr).strip() else 1,
-                                    "overridable": False
-                                })
+                        payload["entries"] = _set_entries(group.index, event_entries, entry_errors)
 
                         if not payload["entries"]:
                             raise Exception("No Paycode Events found")
@@ -203,26 +217,7 @@ def paycode_event_sets_ui():
                             "entries": []
                         }
 
-                        seen = set()
-
-                        for _, row in group.iterrows():
-                            for i in range(1, 6):
-                                ev = row.get(f"PaycodeEvent{i}", "")
-                                pr = row.get(f"Priority{i}", "")
-
-                                if str(ev).strip() == "":
-                                    continue
-
-                                ev_id = int(float(ev))
-                                if ev_id in seen:
-                                    continue
-                                seen.add(ev_id)
-
-                                payload["entries"].append({
-                                    "paycodeEvent": {"id": ev_id},
-                                    "priority": int(float(pr)) if str(pr).strip() else 1,
-                                    "overridable": False
-                                })
+                        payload["entries"] = _set_entries(group.index, event_entries, entry_errors)
 
                         if not payload["entries"]:
                             raise Exception("No Paycode Events found")
@@ -259,19 +254,7 @@ def paycode_event_sets_ui():
     # ==================================================
     # 3️⃣ DELETE
     # ==================================================
-    section_header("🗑️ Delete Paycode Event Sets")
-
-    ids_input = st.text_input("Enter IDs (comma-separated)", placeholder="392,390")
-
-    if st.button("Delete Paycode Event Sets", use_container_width=True):
-        ids = [i.strip() for i in ids_input.split(",") if i.strip().isdigit()]
-        with st.spinner("⏳ Deleting..."):
-            for sid in ids:
-                r = requests.delete(f"{SETS_URL}/{sid}", headers=headers)
-                if r.status_code in (200, 204):
-                    st.success(f"Deleted ID {sid}")
-                else:
-                    st.error(f"Failed to delete {sid}")
+    bulk_delete_section("Paycode Event Sets", SETS_URL, headers, key="paycode_event_sets")
 
     st.divider()
 
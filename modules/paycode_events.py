@@ -5,7 +5,9 @@ import io
 import re
 from datetime import datetime
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
 
 # ======================================================
 # DATE NORMALIZATION (STRICT YYYY-MM-DD)
@@ -175,6 +177,7 @@ def paycode_events_ui():
     section_header("🚀 Create / Update Paycode Events")
 
     if st.button("Submit Paycode Events"):
+        annotate_job(rows=len(st.session_state.get("final_body", [])))
         results = []
 
         for payload in st.session_state.get("final_body", []):
@@ -207,20 +210,7 @@ def paycode_events_ui():
     # ==================================================
     # DELETE
     # ==================================================
-    section_header("🗑️ Delete Paycode Events")
-
-    delete_ids = st.text_input(
-        "Enter Paycode Event IDs (comma-separated)",
-        placeholder="Example: 101,102"
-    )
-
-    if st.button("Delete Paycode Events"):
-        for pid in [x.strip() for x in delete_ids.split(",") if x.strip().isdigit()]:
-            r = requests.delete(f"{BASE_URL}/{pid}", headers=headers)
-            if r.status_code in (200, 204):
-                st.success(f"Deleted ID {pid}")
-            else:
-                st.error(f"Failed to delete ID {pid}")
+    bulk_delete_section("Paycode Events", BASE_URL, headers, key="paycode_events")
 
     st.divider()
 
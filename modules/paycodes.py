@@ -6,22 +6,54 @@ import hashlib
 import json
 import ast
 
+from modules.bulk_delete import bulk_delete_section
+from modules.preflight_check import checked_fanout_task, preflight_rows
+from modules.tenant_fanout import fanout_targets, render_fanout_results, run_fanout
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
+from services import fastjson, metrics, snapshot
+from services.bulk import MAX_WORKERS, RATE_PER_SECOND, run_steps
+from services.preflight import ForeignKey, block_rows
+from services.schema import Column, Schema
 
 # ======================================================
-# SAFE BOOLEAN PARSER
+# UPLOAD SCHEMA
 # ======================================================
-def to_bool(value, default=False):
-    if value is None or str(value).strip() == "":
-        return default
-    if isinstance(value, bool):
-        return value
-    v = str(value).strip().lower()
-    if v in ("true", "1", "yes", "y"):
-        return True
-    if v in ("false", "0", "no", "n"):
-        return False
-    return default
+PAYCODE_SCHEMA = Schema(
+    Column("id", "int"),
+    Column("code", "str", required=True),
+    Column("description", "str"),
+    Column("inactive", "bool"),
+    Column("absence", "bool"),
+    Column("schedule", "bool"),
+    Column("exception", "bool"),
+    Column("historical", "bool"),
+    Column("validateWithPaycodeEvent", "bool"),
+    Column("optionalHoliday", "bool", default=False),
+    Column("linkRegularizeInTimeCard", "bool"),
+    Column("linkTimeOffInTimeCard", "bool"),
+    Column("linkedPaycode", "int"),
+    Column("presentDays", "float", default=0.0),
+    Column("lopDays", "float", default=0.0),
+    Column("leaveDays", "float", default=0.0),
+    Column("woDays", "float", default=0.0),
+    Column("holDays", "float", default=0.0),
+    Column("payableDays", "float", default=0.0),
+    Column("otHours", "float", default=0.0),
+)
+
+PAYCODE_PAYLOAD_FIELDS = [
+    "code",
+    "inactive", "absence", "schedule", "exception", "historical",
+    "validateWithPaycodeEvent", "optionalHoliday",
+    "linkRegularizeInTimeCard", "linkTimeOffInTimeCard",
+    "presentDays", "lopDays", "leaveDays", "woDays", "holDays", "payableDays", "otHours",
+]
+
+PAYCODE_REFERENCES = (
+    ForeignKey("id", "paycodes"),
+    ForeignKey("linkedPaycode", "paycodes"),
+)
 
 
 # ======================================================
@@ -73,6 +105,115 @@ def _extract_linked_paycode_id(value):
     return value
 
 
+def _flatten_export(df):
+    """Linked paycode ids and one column per property key, for the export sheet."""
+    if "linkedPaycode" in df.columns:
+        df["linkedPaycode"] = df["linkedPaycode"].apply(_extract_linked_paycode_id)
+
+    property_columns = []
+    if "properties" in df.columns:
+        parsed_properties = df["properties"].apply(_parse_properties_cell)
+
+        all_property_keys = []
+        for props in parsed_properties:
+            all_property_keys.extend(list(props.keys()))
+
+        priority_keys = ["DAY_FLAG", "PAYDED_FLG", "HOLIDAY_OT_GROUP"]
+        dynamic_keys = [k for k in sorted(set(all_property_keys)) if k not in priority_keys]
+        property_columns = [k for k in priority_keys if k in all_property_keys] + dynamic_keys
+
+        for prop_key in property_columns:
+            df[prop_key] = parsed_properties.apply(lambda props: props.get(prop_key, ""))
+
+        # Hide raw JSON properties column from export after flattening
+        df = df.drop(columns=["properties"])
+
+    return df, property_columns
+
+
+@metrics.timed("build")
+def _prepare_paycode_rows(df):
+    """Coerce the sheet once; the result can be sent to any number of tenants."""
+    coerced = PAYCODE_SCHEMA.coerce(df)
+    row_errors = coerced.row_errors()
+    prepared = []
+    processed_codes = set()
+
+    for row_no, record in zip(df.index, coerced.records()):
+        code = record["code"] or ""
+        item = {"Row": row_no + 1, "Code": code}
+        if row_no in row_errors:
+            item["error"] = row_errors[row_no]
+        elif code in processed_codes:
+            item["duplicate"] = True
+        else:
+            processed_codes.add(code)
+            payload = {
+                field: record[field]
+                for field in PAYCODE_PAYLOAD_FIELDS
+            }
+            payload["description"] = record["description"] or ""
+            if record["linkedPaycode"] is not None:
+                payload["linkedPaycode"] = {"id": record["linkedPaycode"]}
+            if record["id"] is not None:
+                payload["id"] = record["id"]
+            item["payload"] = payload
+        prepared.append(item)
+    return prepared
+
+
+def _paycode_steps(item, base_url, headers):
+    row = {"Row": item["Row"], "Code": item["Code"]}
+    if item.get("duplicate"):
+        return {
+            **row,
+            "Action": "Skipped",
+            "HTTP Status": "",
+            "Status": "Duplicate in file",
+            "Message": "Duplicate code skipped"
+        }
+    try:
+        if "error" in item:
+            raise ValueError(item["error"])
+
+        payload = item["payload"]
+        if "id" in payload:
+            r = yield "PUT", f"{base_url}/{payload['id']}", {"headers": headers, "json": payload}
+            action = "Update"
+        else:
+            r = yield "POST", base_url, {"headers": headers, "json": payload}
+            action = "Create"
+
+        return {
+            **row,
+            "Action": action,
+            "HTTP Status": r.status_code,
+            "Status": "Success" if r.status_code in (200, 201) else "Failed",
+            "Message": r.text
+        }
+
+    except Exception as e:
+        return {
+            **row,
+            "Action": "Error",
+            "HTTP Status": "",
+            "Status": "Failed",
+            "Message": str(e)
+        }
+
+
+def _send_paycode_rows(prepared, base_url, headers, max_workers=MAX_WORKERS, rate_per_second=RATE_PER_SECOND, on_progress=None):
+    outcomes = run_steps(
+        prepared, lambda item: _paycode_steps(item, base_url, headers), max_workers, rate_per_second, on_progress
+    )
+    return [
+        outcome.value if outcome.error is None else
+        {"Row": outcome.item["Row"], "Code": outcome.item["Code"], "Action": "Error",
+         "HTTP Status": "", "Status": "Failed", "Message": outcome.error}
+        for outcome in outcomes
+    ]
+
+
 # ======================================================
 # MAIN UI
 # ======================================================
@@ -167,8 +308,10 @@ def paycodes_ui():
         df = df.fillna("")
 
         st.info(f"Rows detected: {len(df)}")
+        targets = fanout_targets("paycodes")
 
         if st.button("🚀 Process Upload", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
 
             with st.spinner("⏳ Uploading and processing paycodes... Please wait"):
 
@@ -179,128 +322,40 @@ def paycodes_ui():
 
                 st.session_state.processed_file_hash = current_hash
 
-                results = []
-                processed_codes = set()
-
-                for row_no, row in df.iterrows():
-                    try:
-                        code = str(row.get("code")).strip()
-                        if not code:
-                            raise ValueError("Paycode code is mandatory")
-
-                        # Deduplicate inside file
-                        if code in processed_codes:
-                            results.append({
-                                "Row": row_no + 1,
-                                "Code": code,
-                                "Action": "Skipped",
-                                "HTTP Status": "",
-                                "Status": "Duplicate in file",
-                                "Message": "Duplicate code skipped"
-                            })
-                            continue
-
-                        processed_codes.add(code)
-
-                        payload = {
-                            "code": code,
-                            "description": str(row.get("description")).strip(),
-
-                            "inactive": to_bool(row.get("inactive")),
-                            "absence": to_bool(row.get("absence")),
-                            "schedule": to_bool(row.get("schedule")),
-                            "exception": to_bool(row.get("exception")),
-                            "historical": to_bool(row.get("historical")),
-
-                            "validateWithPaycodeEvent": to_bool(row.get("validateWithPaycodeEvent")),
-                            "optionalHoliday": to_bool(row.get("optionalHoliday"), default=False),
-                            "linkRegularizeInTimeCard": to_bool(row.get("linkRegularizeInTimeCard")),
-                            "linkTimeOffInTimeCard": to_bool(row.get("linkTimeOffInTimeCard")),
-
-                            "presentDays": float(row.get("presentDays") or 0),
-                            "lopDays": float(row.get("lopDays") or 0),
-                            "leaveDays": float(row.get("leaveDays") or 0),
-                            "woDays": float(row.get("woDays") or 0),
-                            "holDays": float(row.get("holDays") or 0),
-                            "payableDays": float(row.get("payableDays") or 0),
-                            "otHours": float(row.get("otHours") or 0)
-                        }
-
-                        # ---------- FIXED linkedPaycode PARSING ----------
-                        linked_pc_raw = row.get("linkedPaycode")
-                        if linked_pc_raw not in ("", None):
-                            try:
-                                linked_pc_id = int(float(linked_pc_raw))
-                                payload["linkedPaycode"] = {"id": linked_pc_id}
-                            except ValueError:
-                                pass
-
-                        raw_id = str(row.get("id")).strip()
-
-                        if raw_id.isdigit():
-                            payload["id"] = int(raw_id)
-                            r = requests.put(
-                                f"{BASE_URL}/{int(raw_id)}",
-                                headers=headers,
-                                json=payload
-                            )
-                            action = "Update"
-                        else:
-                            r = requests.post(
-                                BASE_URL,
-                                headers=headers,
-                                json=payload
-                            )
-                            action = "Create"
-
-                        results.append({
-                            "Row": row_no + 1,
-                            "Code": code,
-                            "Action": action,
-                            "HTTP Status": r.status_code,
-                            "Status": "Success" if r.status_code in (200, 201) else "Failed",
-                            "Message": r.text
-                        })
-
-                    except Exception as e:
-                        results.append({
-                            "Row": row_no + 1,
-                            "Code": row.get("code"),
-                            "Action": "Error",
-                            "HTTP Status": "",
-                            "Status": "Failed",
-                            "Message": str(e)
-                        })
-
-            section_header("📊 Upload Result")
-            st.dataframe(pd.DataFrame(results), use_container_width=True)
+                prepared = _prepare_paycode_rows(df)
+                if len(targets) > 1:
+                    outcomes = run_fanout(
+                        targets,
+                        checked_fanout_task(df, PAYCODE_REFERENCES, prepared, _send_paycode_rows, "paycodes"),
+                    )
+                else:
+                    host = st.session_state.HOST.rstrip("/")
+                    blocked = preflight_rows(df, PAYCODE_REFERENCES, host, headers)
+                    results = _send_paycode_rows(block_rows(prepared, blocked), BASE_URL, headers)
+                    snapshot.invalidate(host, "paycodes")
+
+            if len(targets) > 1:
+                render_fanout_results(outcomes, ["Row", "Code"], "paycodes")
+            else:
+                section_header("📊 Upload Result")
+                st.dataframe(pd.DataFrame(results), use_container_width=True)
 
     st.divider()
 
     # ==================================================
     # DELETE PAYCODES
     # ==================================================
-    section_header("🗑️ Delete Paycodes")
-    st.warning(
-        "Deleting a paycode may fail if it is already used.\n"
-        "If deletion fails, consider setting `inactive = TRUE` instead."
-    )
-
-    ids_input = st.text_input(
-        "Enter Paycode IDs (comma-separated)",
-        placeholder="Example: 101,102,103"
+    bulk_delete_section(
+        "Paycodes",
+        BASE_URL,
+        headers,
+        key="paycodes",
+        note=(
+            "Deleting a paycode may fail if it is already used.\n"
+            "If deletion fails, consider setting `inactive = TRUE` instead."
+        ),
     )
 
-    if st.button("Delete Paycodes"):
-        with st.spinner("⏳ Deleting paycodes..."):
-            ids = [i.strip() for i in ids_input.split(",") if i.strip().isdigit()]
-            for pid in ids:
-                r = requests.delete(f"{BASE_URL}/{pid}", headers=headers)
-                if r.status_code in (200, 204):
-                    st.success(f"Deleted Paycode ID {pid}")
-                else:
-                    st.error(f"Failed to delete ID {pid} → {r.text}")
-
     st.divider()
 
     # ==================================================
@@ -309,32 +364,13 @@ def paycodes_ui():
     section_header("⬇️ Download Existing Paycodes")
 
     with st.spinner("⏳ Fetching paycodes..."):
-        r = requests.get(BASE_URL, headers=headers)
+        r = requests.get(BASE_URL, headers=headers, stream=True)
         if r.status_code != 200:
             st.error("❌ Failed to fetch paycodes")
             return
-        df = pd.DataFrame(r.json())
-
-    if "linkedPaycode" in df.columns:
-        df["linkedPaycode"] = df["linkedPaycode"].apply(_extract_linked_paycode_id)
-
-    property_columns = []
-    if "properties" in df.columns:
-        parsed_properties = df["properties"].apply(_parse_properties_cell)
+        df, _ = fastjson.read_frame(r, flat=False)
 
-        all_property_keys = []
-        for props in parsed_properties:
-            all_property_keys.extend(list(props.keys()))
-
-        priority_keys = ["DAY_FLAG", "PAYDED_FLG", "HOLIDAY_OT_GROUP"]
-        dynamic_keys = [k for k in sorted(set(all_property_keys)) if k not in priority_keys]
-        property_columns = [k for k in priority_keys if k in all_property_keys] + dynamic_keys
-
-        for prop_key in property_columns:
-            df[prop_key] = parsed_properties.apply(lambda props: props.get(prop_key, ""))
-
-        # Hide raw JSON properties column from export after flattening
-        df = df.drop(columns=["properties"])
+    df, property_columns = _flatten_export(df)
 
     export_output = io.BytesIO()
     with pd.ExcelWriter(export_output, engine="openpyxl") as writer:
@@ -0,0 +1,42 @@
+import streamlit as st
+
+from modules.tenant_fanout import match_ids
+from services import snapshot
+from services.preflight import block_rows, preflight
+
+
+def preflight_rows(df, foreign_keys, host, headers) -> dict[int, str]:
+    """Check df's references on the current tenant and show what was rejected."""
+    try:
+        result = preflight(df, foreign_keys, host, headers)
+    except Exception as e:
+        st.warning(f"⚠ Reference check skipped → {e}")
+        return {}
+
+    if result.unchecked:
+        st.warning(f"⚠ Could not load {', '.join(result.unchecked)}; those references were not checked.")
+
+    row_errors = result.row_errors()
+    if row_errors:
+        st.warning(
+            f"⚠ {len(row_errors)} row(s) reference ids that do not exist on this tenant and will not be sent."
+        )
+        with st.expander("Missing references", expanded=False):
+            st.dataframe(result.errors.drop(columns=["row_index"]), use_container_width=True)
+    else:
+        st.caption(f"✅ All references found ({result.elapsed_ms:.0f} ms)")
+    return row_errors
+
+
+def checked_fanout_task(df, foreign_keys, prepared, send, resource):
+    """Fan-out task that matches update ids and checks references on each tenant before sending to it."""
+    def task(tenant):
+        items = match_ids(prepared, tenant, resource)
+        keys = foreign_keys
+        if items is not prepared:  # the sheet's own ids were replaced by the tenant's
+            keys = [key for key in foreign_keys if key.column.strip().lower() != "id"]
+        checked = preflight(df, keys, tenant.host, tenant.headers())
+        results = send(block_rows(items, checked.row_errors()), tenant.api_url(resource), tenant.headers())
+        snapshot.invalidate(tenant.host, resource)
+        return results
+    return task
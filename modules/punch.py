@@ -5,6 +5,8 @@ from datetime import datetime
 from io import BytesIO
 
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
+from services.bulk import MAX_WORKERS, RATE_PER_SECOND, run_steps
 
 
 # ----------------- HELPERS -----------------
@@ -16,6 +18,59 @@ def normalize_datetime(val: str) -> str:
     return datetime.strptime(val, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d %H:%M:%S")
 
 
+def _prepare_punch_rows(df):
+    prepared = []
+    for index, row in df.iterrows():
+        item = {"Row": index + 2, "externalNumber": row.get("externalNumber")}
+        try:
+            item["punchTime"] = normalize_datetime(row["dateTime"])
+        except Exception as e:
+            item["punchTime"] = row.get("dateTime")
+            item["error"] = str(e)
+        prepared.append(item)
+    return prepared
+
+
+def _punch_steps(item, base_url, headers):
+    result = {"externalNumber": item["externalNumber"], "punchTime": item["punchTime"]}
+    if "error" in item:
+        return {**result, "status": item["error"]}
+    try:
+        payload = {
+            "action": "ADD_NO_TYPE",
+            "punch": {
+                "employee": {
+                    "externalNumber": str(item["externalNumber"])
+                },
+                "punchTime": item["punchTime"]
+            }
+        }
+
+        r = yield "POST", f"{base_url}/action/", {
+            "json": payload,
+            "headers": {**headers, "Content-Type": "application/vnd.api+json"},
+            "verify": False
+        }
+
+        if r.status_code == 200:
+            return {**result, "status": "SUCCESS"}
+        return {**result, "status": f"FAILED ({r.status_code})"}
+
+    except Exception as e:
+        return {**result, "status": str(e)}
+
+
+def _send_punch_rows(prepared, base_url, headers, max_workers=MAX_WORKERS, rate_per_second=RATE_PER_SECOND, on_progress=None):
+    outcomes = run_steps(
+        prepared, lambda item: _punch_steps(item, base_url, headers), max_workers, rate_per_second, on_progress
+    )
+    return [
+        outcome.value if outcome.error is None else
+        {"externalNumber": outcome.item["externalNumber"], "punchTime": outcome.item["punchTime"], "status": outcome.error}
+        for outcome in outcomes
+    ]
+
+
 # ----------------- UI -----------------
 def punch_ui():
     module_header("🕒 Punch Update", "Add or bulk upload employee punches")
@@ -29,7 +84,8 @@ def punch_ui():
         st.stop()
 
     HOST = st.session_state.HOST.rstrip("/")
-    BASE_URL = f"{HOST}/resource-server/api/punches/action/"
+    PUNCHES_URL = f"{HOST}/resource-server/api/punches"
+    BASE_URL = f"{PUNCHES_URL}/action/"
 
     headers = {
         "Authorization": f"Bearer {token}",
@@ -158,53 +214,11 @@ def punch_ui():
                 st.stop()
 
             if st.button("🚀 Upload Punches", use_container_width=True):
-                success, failed = 0, 0
-                results = []
-
+                annotate_job(file_name=file.name, rows=len(df))
                 with st.spinner("Uploading punches..."):
-                    for _, row in df.iterrows():
-                        try:
-                            punch_datetime = normalize_datetime(row["dateTime"])
-
-                            payload = {
-                                "action": "ADD_NO_TYPE",
-                                "punch": {
-                                    "employee": {
-                                        "externalNumber": str(row["externalNumber"])
-                                    },
-                                    "punchTime": punch_datetime
-                                }
-                            }
-
-                            r = requests.post(
-                                BASE_URL,
-                                json=payload,
-                                headers=headers,
-                                verify=False
-                            )
-
-                            if r.status_code == 200:
-                                success += 1
-                                results.append({
-                                    "externalNumber": row["externalNumber"],
-                                    "punchTime": punch_datetime,
-                                    "status": "SUCCESS"
-                                })
-                            else:
-                                failed += 1
-                                results.append({
-                                    "externalNumber": row["externalNumber"],
-                                    "punchTime": punch_datetime,
-                                    "status": f"FAILED ({r.status_code})"
-                                })
-
-                        except Exception as e:
-                            failed += 1
-                            results.append({
-                                "externalNumber": row.get("externalNumber"),
-                                "punchTime": row.get("dateTime"),
-                                "status": str(e)
-                            })
+                    results = _send_punch_rows(_prepare_punch_rows(df), PUNCHES_URL, headers)
+                success = sum(1 for result in results if result["status"] == "SUCCESS")
+                failed = len(results) - success
 
                 results_df = pd.DataFrame(results)
 
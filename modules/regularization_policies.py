@@ -7,7 +7,12 @@ import streamlit as st
 from openpyxl import Workbook
 from openpyxl.worksheet.datavalidation import DataValidation
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services import metrics
+from services.activity_logger import annotate_job
+from services.reshape import NumberedGroup
+from services.schema import Column, Schema
 
 
 BOOLEAN_OPTIONS = ["TRUE", "FALSE"]
@@ -49,22 +54,47 @@ TEMPLATE_COLUMNS = [
 ]
 
 
-def _safe_int(value: Any) -> int | None:
-    if value is None or str(value).strip() == "":
-        return None
-    try:
-        return int(float(value))
-    except (TypeError, ValueError):
-        return None
-
-
-
-def _normalize_text(value: Any) -> str:
-    if value is None:
-        return ""
-    if isinstance(value, float) and pd.isna(value):
-        return ""
-    return str(value).strip()
+POLICY_FIELDS = [
+    "numOfPastSignedOfPeriods", "approvalLevel", "approverType", "remarks",
+    "considerSignOff", "enableForEmployee", "remarksRequired", "usageApplicable",
+    "usageCount", "referenceDate", "period",
+]
+LEVEL_FIELDS = [
+    "level", "approver", "sendNotification", "reminderNotificationDurations",
+    "tatDuration", "tatAction", "sendEmployeeNotification", "pushNotification",
+]
+LEVEL_TEXT_FIELDS = ("approver", "reminderNotificationDurations", "tatDuration", "tatAction")
+
+# Flags are left out of the payload when blank, so they use nullable bool columns.
+POLICY_SCHEMA = Schema(
+    Column("id", "int"),
+    Column("name", "str", required=True),
+    Column("description", "str"),
+    Column("attendanceRegularizationTypeId", "int", required=True),
+    Column("numOfPastSignedOfPeriods", "int"),
+    Column("approvalLevel", "int"),
+    Column("approverType", "str"),
+    Column("remarks", "str"),
+    *(
+        Column(field, "bool", nullable=True)
+        for field in ("considerSignOff", "enableForEmployee", "remarksRequired", "usageApplicable")
+    ),
+    Column("usageCount", "int"),
+    Column("referenceDate", "str"),
+    Column("period", "str"),
+)
+
+APPROVAL_LEVELS = NumberedGroup(
+    {field: f"{field}{{n}}" for field in LEVEL_FIELDS},
+    Schema(
+        Column("level", "int"),
+        *(Column(field, "str") for field in LEVEL_TEXT_FIELDS),
+        *(
+            Column(field, "bool", nullable=True)
+            for field in ("sendNotification", "sendEmployeeNotification", "pushNotification")
+        ),
+    ),
+)
 
 
 
@@ -239,76 +269,42 @@ def _policy_to_row(policy: dict[str, Any]) -> dict[str, Any]:
 
 
 
-def _row_to_payload(row: pd.Series) -> tuple[dict[str, Any], list[str]]:
-    errors: list[str] = []
-    name = _normalize_text(row.get("name"))
-    description = _normalize_text(row.get("description")) or name
-    attendance_type_id = _safe_int(row.get("attendanceRegularizationTypeId"))
-
-    if not name:
-        errors.append("name is required")
-    if attendance_type_id is None:
-        errors.append("attendanceRegularizationTypeId is required")
-
+def _build_payload(record: dict[str, Any], levels: list[dict[str, Any]]) -> dict[str, Any]:
+    attendance_type_id = record["attendanceRegularizationTypeId"]
     payload: dict[str, Any] = {
-        "name": name,
-        "description": description,
-        "attendanceRegularizationType": {"id": attendance_type_id} if attendance_type_id is not None else None,
-        "numOfPastSignedOfPeriods": _safe_int(row.get("numOfPastSignedOfPeriods")),
-        "approvalLevel": _safe_int(row.get("approvalLevel")),
-        "approverType": _normalize_text(row.get("approverType")),
-        "remarks": _normalize_text(row.get("remarks")),
-        "considerSignOff": _to_bool(row.get("considerSignOff")),
-        "enableForEmployee": _to_bool(row.get("enableForEmployee")),
-        "remarksRequired": _to_bool(row.get("remarksRequired")),
-        "usageApplicable": _to_bool(row.get("usageApplicable")),
-        "usageCount": _safe_int(row.get("usageCount")),
-        "referenceDate": _normalize_text(row.get("referenceDate")),
-        "period": _normalize_text(row.get("period")),
+        "name": record["name"],
+        "description": record["description"] or record["name"],
+        "attendanceRegularizationType": {"id": attendance_type_id},
+        **{field: record[field] for field in POLICY_FIELDS},
     }
 
-    approval_levels = []
-    for index in (1, 2):
-        level_value = _safe_int(row.get(f"level{index}"))
-        approver_value = _normalize_text(row.get(f"approver{index}"))
-        reminder_value = _normalize_text(row.get(f"reminderNotificationDurations{index}"))
-        tat_duration = _normalize_text(row.get(f"tatDuration{index}"))
-        tat_action = _normalize_text(row.get(f"tatAction{index}"))
-        send_notification = _to_bool(row.get(f"sendNotification{index}"))
-        send_employee_notification = _to_bool(row.get(f"sendEmployeeNotification{index}"))
-        push_notification = _to_bool(row.get(f"pushNotification{index}"))
-
-        if any(
-            value not in (None, "")
-            for value in [
-                level_value,
-                approver_value,
-                reminder_value,
-                tat_duration,
-                tat_action,
-                send_notification,
-                send_employee_notification,
-                push_notification,
-            ]
-        ):
-            approval_levels.append(
-                {
-                    "level": level_value,
-                    "approver": approver_value,
-                    "sendNotification": send_notification,
-                    "reminderNotificationDurations": reminder_value,
-                    "tatDuration": tat_duration,
-                    "tatAction": tat_action,
-                    "sendEmployeeNotification": send_employee_notification,
-                    "pushNotification": push_notification,
-                }
-            )
-
-    if approval_levels:
-        payload["approvalLevels"] = approval_levels
-
-    payload = {key: value for key, value in payload.items() if value not in (None, "")}
-    return payload, errors
+    if levels:
+        payload["approvalLevels"] = [
+            {
+                field: "" if level[field] is None and field in LEVEL_TEXT_FIELDS else level[field]
+                for field in LEVEL_FIELDS
+            }
+            for level in levels
+        ]
+
+    return {key: value for key, value in payload.items() if value not in (None, "")}
+
+
+@metrics.timed("build")
+def _prepare_policy_rows(df: pd.DataFrame) -> list[dict[str, Any]]:
+    coerced = POLICY_SCHEMA.coerce(df)
+    row_errors = coerced.row_errors()
+    levels, level_errors = APPROVAL_LEVELS.nest(df)
+    prepared = []
+    for index, record in zip(df.index, coerced.records()):
+        item = {"Row": index + 1, "Name": record["name"] or "", "id": record["id"]}
+        errors = [message for message in (row_errors.get(index), level_errors.get(index)) if message]
+        if errors:
+            item["error"] = "; ".join(errors)
+        else:
+            item["payload"] = _build_payload(record, levels.get(index, []))
+        prepared.append(item)
+    return prepared
 
 
 
@@ -358,14 +354,12 @@ def regularization_policies_ui() -> None:
         st.dataframe(df, use_container_width=True)
 
         if st.button("🚀 Process Upload", type="primary", use_container_width=True):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
             results = []
             with st.spinner("⏳ Processing regularization policies..."):
-                for index, row in df.iterrows():
-                    payload, errors = _row_to_payload(row)
-                    row_id = _safe_int(row.get("id"))
-                    name = _normalize_text(row.get("name"))
-
-                    if errors:
+                for item in _prepare_policy_rows(df):
+                    index, name, row_id = item["Row"] - 1, item["Name"], item["id"]
+                    if "error" in item:
                         results.append(
                             {
                                 "Row": index + 1,
@@ -373,11 +367,12 @@ def regularization_policies_ui() -> None:
                                 "Action": "Skipped",
                                 "Status": "Failed",
                                 "HTTP Status": "",
-                                "Message": ", ".join(errors),
+                                "Message": item["error"],
                             }
                         )
                         continue
 
+                    payload = item["payload"]
                     try:
                         if row_id is not None:
                             payload["id"] = row_id
@@ -424,22 +419,7 @@ def regularization_policies_ui() -> None:
 
     st.divider()
 
-    section_header("🗑️ Delete Regularization Policies")
-    ids_input = st.text_input("Enter Regularization Policy IDs (comma-separated)", placeholder="101,102")
-    if st.button("Delete Regularization Policies", use_container_width=True):
-        ids = [item.strip() for item in ids_input.split(",") if item.strip().isdigit()]
-        if not ids:
-            st.warning("Please enter at least one numeric id")
-        else:
-            for policy_id in ids:
-                try:
-                    response = requests.delete(f"{base_url}/{policy_id}", headers=headers, timeout=30)
-                    if response.status_code in (200, 204):
-                        st.success(f"Deleted {policy_id}")
-                    else:
-                        st.error(f"Failed to delete {policy_id}: {response.status_code} {response.text[:200]}")
-                except requests.RequestException as exc:
-                    st.error(f"Failed to delete {policy_id}: {exc}")
+    bulk_delete_section("Regularization Policies", base_url, headers, key="regularization_policies")
 
     st.divider()
 
@@ -4,50 +4,76 @@ import pandas as pd
 import requests
 import streamlit as st
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
-
-
-def _safe_int(value):
-    try:
-        return int(float(value))
-    except (TypeError, ValueError):
-        return None
-
-
-def _extract_entries(row):
-    entries = []
-
-    for i in range(1, 7):
-        policy_id = _safe_int(row.get(f"RegularizationPolicyID{i}"))
-        attendance_type_id = _safe_int(row.get(f"AttendanceRegularizationTypeID{i}"))
-
-        if policy_id is None:
+from services import metrics
+from services.activity_logger import annotate_job
+from services.reshape import NumberedGroup
+from services.schema import Column, Schema
+
+
+SET_SCHEMA = Schema(
+    Column("id", "int"),
+    Column("name", "str", default=""),
+    Column("description", "str", default=""),
+    # single-entry columns from the original template
+    Column("regularization_policy_id", "int"),
+    Column("attendance_regularization_type_id", "int"),
+)
+
+SET_ENTRIES = NumberedGroup(
+    {"policy": "RegularizationPolicyID{n}", "type": "AttendanceRegularizationTypeID{n}"},
+    Schema(Column("policy", "int"), Column("type", "int")),
+)
+
+
+def _entry(policy_id, attendance_type_id):
+    entry = {"id": policy_id}
+    if attendance_type_id is not None:
+        entry["attendanceRegularizationType"] = {"id": attendance_type_id}
+    return entry
+
+
+@metrics.timed("build")
+def _group_set_rows(df):
+    """Sets keyed by id (or name when new) with de-duplicated entries, plus results for unreadable rows."""
+    coerced = SET_SCHEMA.coerce(df)
+    row_errors = coerced.row_errors()
+    nested, entry_errors = SET_ENTRIES.nest(df)
+    grouped, failed = {}, []
+
+    for index, record in zip(df.index, coerced.records()):
+        errors = [message for message in (row_errors.get(index), entry_errors.get(index)) if message]
+        if errors:
+            failed.append({
+                "Name": record["name"] or f"Row {index + 1}",
+                "Action": "Skipped",
+                "Entries": 0,
+                "Status": "Failed",
+                "Response": "; ".join(errors),
+            })
             continue
 
-        entry = {"id": policy_id}
-        if attendance_type_id is not None:
-            entry["attendanceRegularizationType"] = {"id": attendance_type_id}
-
-        entries.append(entry)
-
-    legacy_policy_id = _safe_int(row.get("regularization_policy_id"))
-    legacy_attendance_type_id = _safe_int(row.get("attendance_regularization_type_id"))
-
-    if legacy_policy_id is not None:
-        legacy_entry = {"id": legacy_policy_id}
-        if legacy_attendance_type_id is not None:
-            legacy_entry["attendanceRegularizationType"] = {"id": legacy_attendance_type_id}
-        entries.append(legacy_entry)
+        entries = [_entry(entry["policy"], entry["type"]) for entry in nested.get(index, []) if entry["policy"] is not None]
+        if record["regularization_policy_id"] is not None:
+            entries.append(_entry(record["regularization_policy_id"], record["attendance_regularization_type_id"]))
+        name = record["name"]
+        if not name or not entries:
+            continue
 
-    unique = {}
-    for entry in entries:
-        key = (
-            entry.get("id"),
-            (entry.get("attendanceRegularizationType") or {}).get("id"),
-        )
-        unique[key] = entry
+        group_key = record["id"] if record["id"] is not None else name
+        group = grouped.setdefault(group_key, {
+            "id": record["id"],
+            "name": name,
+            "description": record["description"] or name,
+            "entries": {},
+        })
+        for entry in entries:
+            group["entries"][(entry["id"], (entry.get("attendanceRegularizationType") or {}).get("id"))] = entry
 
-    return list(unique.values())
+    for group in grouped.values():
+        group["entries"] = list(group["entries"].values())
+    return list(grouped.values()), failed
 
 
 def _post_regularization_policy_set(base_url, headers, payload):
@@ -186,43 +212,11 @@ def regularization_policy_sets_ui():
         st.dataframe(df, use_container_width=True)
 
         if st.button("🚀 Process Upload", type="primary", use_container_width=True):
-            grouped = {}
-            results = []
-
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
             with st.spinner("⏳ Processing Regularization Policy Sets..."):
-                for _, row in df.iterrows():
-                    raw_id = row.get("id", "")
-                    name = str(row.get("name", "")).strip()
-                    description = str(row.get("description", "")).strip() or name
-                    entries = _extract_entries(row)
-
-                    if not name or not entries:
-                        continue
-
-                    set_id = _safe_int(raw_id)
-                    group_key = set_id if set_id is not None else name
-
-                    if group_key not in grouped:
-                        grouped[group_key] = {
-                            "id": set_id,
-                            "name": name,
-                            "description": description,
-                            "entries": [],
-                        }
+                grouped, results = _group_set_rows(df)
 
-                    grouped[group_key]["entries"].extend(entries)
-
-                for grouped_item in grouped.values():
-                    unique_entries = {}
-                    for entry in grouped_item["entries"]:
-                        key = (
-                            entry.get("id"),
-                            (entry.get("attendanceRegularizationType") or {}).get("id"),
-                        )
-                        unique_entries[key] = entry
-                    grouped_item["entries"] = list(unique_entries.values())
-
-                for item in grouped.values():
+                for item in grouped:
                     if item["id"] is not None:
                         update_payload = {
                             "id": item["id"],
@@ -256,21 +250,7 @@ def regularization_policy_sets_ui():
 
     st.divider()
 
-    section_header("🗑️ Delete Regularization Policy Sets")
-
-    delete_ids = st.text_input(
-        "Enter Regularization Policy Set IDs (comma separated)",
-        placeholder="Example: 39,40",
-    )
-
-    if st.button("Delete Regularization Policy Sets", use_container_width=True):
-        ids = [item.strip() for item in delete_ids.split(",") if item.strip().isdigit()]
-        for set_id in ids:
-            response = requests.delete(f"{base_url}/{set_id}", headers=headers)
-            if response.status_code in (200, 204):
-                st.success(f"Deleted ID {set_id}")
-            else:
-                st.error(f"Failed to delete {set_id} → {response.text}")
+    bulk_delete_section("Regularization Policy Sets", base_url, headers, key="regularization_policy_sets")
 
     st.divider()
 
@@ -2,10 +2,11 @@ import io
 from typing import Any
 
 import pandas as pd
-import requests
 import streamlit as st
 
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
+from services.bulk import MAX_WORKERS, run_steps
 
 
 SCHEDULE_PLANNER_PATH = "/resource-server/api/schedule_planner/"
@@ -68,20 +69,20 @@ def _normalize_upload(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def _fetch_schedule_details(
-    session: requests.Session,
     planner_url: str,
+    headers: dict[str, str],
     external_number: str,
     schedule_date: str,
-) -> dict[str, Any]:
-    response = session.get(
-        planner_url,
-        params={
+):
+    response = yield "GET", planner_url, {
+        "headers": headers,
+        "params": {
             "fromDate": schedule_date,
             "toDate": schedule_date,
             "externalNumber": external_number,
         },
-        timeout=60,
-    )
+        "timeout": 60,
+    }
 
     if response.status_code != 200:
         return {
@@ -132,13 +133,14 @@ def _fetch_schedule_details(
 
 
 def _delete_schedule(
-    session: requests.Session,
     planner_url: str,
     action_url: str,
+    headers: dict[str, str],
     external_number: str,
     schedule_date: str,
-) -> dict[str, Any]:
-    planner_result = _fetch_schedule_details(session, planner_url, external_number, schedule_date)
+):
+    """Step pipeline (services.bulk.drive): planner lookup, then the DELETE action."""
+    planner_result = yield from _fetch_schedule_details(planner_url, headers, external_number, schedule_date)
     if not planner_result.get("ok"):
         return {
             "externalNumber": external_number,
@@ -161,7 +163,7 @@ def _delete_schedule(
         ],
     }
 
-    response = session.post(action_url, json=body, timeout=60)
+    response = yield "POST", action_url, {"headers": headers, "json": body, "timeout": 60}
 
     result = {
         "externalNumber": external_number,
@@ -188,20 +190,34 @@ def _delete_schedule(
     return result
 
 
-def _run_delete_flow(df: pd.DataFrame, host: str, token: str) -> pd.DataFrame:
+def _run_delete_flow(
+    df: pd.DataFrame,
+    host: str,
+    token: str,
+    max_workers: int = MAX_WORKERS,
+    on_progress=None,
+) -> pd.DataFrame:
     planner_url = f"{host.rstrip('/')}{SCHEDULE_PLANNER_PATH}"
     action_url = f"{host.rstrip('/')}{SCHEDULE_ACTION_PATH}"
+    headers = _json_headers(token)
 
-    session = requests.Session()
-    session.headers.update(_json_headers(token))
-
-    results: list[dict[str, Any]] = []
-    for _, row in df.iterrows():
-        external_number = str(row["externalNumber"]).strip()
-        schedule_date = str(row["date"]).strip()
-        result = _delete_schedule(session, planner_url, action_url, external_number, schedule_date)
-        results.append(result)
-
+    outcomes = run_steps(
+        [(str(row["externalNumber"]).strip(), str(row["date"]).strip()) for _, row in df.iterrows()],
+        lambda item: _delete_schedule(planner_url, action_url, headers, *item),
+        max_workers, rate_per_second=0, on_progress=on_progress,
+    )
+    results: list[dict[str, Any]] = [
+        outcome.value if outcome.error is None else {
+            "externalNumber": outcome.item[0],
+            "date": outcome.item[1],
+            "status": "FAILED",
+            "message": outcome.error,
+            "scheduleId": None,
+            "employeeId": None,
+            "version": None,
+        }
+        for outcome in outcomes
+    ]
     return pd.DataFrame(results)
 
 
@@ -265,6 +281,7 @@ def schedule_delete_ui() -> None:
                 st.dataframe(prepared_df, use_container_width=True)
 
                 if st.button("🚀 Delete Uploaded Schedules", type="primary", use_container_width=True):
+                    annotate_job(file_name=uploaded_file.name, rows=len(prepared_df))
                     with st.spinner("Deleting schedules from uploaded file..."):
                         results_df = _run_delete_flow(prepared_df, host, token)
 
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 import calendar
 
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
 
 EMP_API = "/resource-server/api/employees"
 TIMECARD_API = "/web-client/restProxy/timecards/"
@@ -166,6 +167,7 @@ def schedule_pattern_mapper_ui():
 
     if file and st.button("🚀 Apply Schedule Mapping"):
         df = pd.read_excel(file)
+        annotate_job(file_name=file.name, rows=len(df))
 
         for _, row in df.iterrows():
             emp_no = str(row["Employee No."]).strip()
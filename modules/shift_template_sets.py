@@ -4,7 +4,9 @@ import requests
 import io
 import hashlib
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
 
 # ======================================================
 # FILE HASH (PREVENT REPROCESS)
@@ -117,6 +119,7 @@ def shift_template_sets_ui():
         st.info(f"Rows detected: {len(df)}")
 
         if st.button("🚀 Process Upload", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
 
             if st.session_state.processed_set_hash == current_hash:
                 st.warning("⚠ This file was already processed")
@@ -207,21 +210,7 @@ def shift_template_sets_ui():
     # ==================================================
     # DELETE
     # ==================================================
-    section_header("🗑️ Delete Shift Template Sets")
-
-    ids_input = st.text_input(
-        "Enter Shift Template Set IDs (comma-separated)",
-        placeholder="Example: 101,102,103"
-    )
-
-    if st.button("Delete"):
-        ids = [i.strip() for i in ids_input.split(",") if i.strip().isdigit()]
-        for sid in ids:
-            r = requests.delete(f"{BASE_URL}/{sid}", headers=headers)
-            if r.status_code in (200, 204):
-                st.success(f"Deleted ID {sid}")
-            else:
-                st.error(f"Failed to delete {sid} → {r.text}")
+    bulk_delete_section("Shift Template Sets", BASE_URL, headers, key="shift_template_sets")
 
     st.divider()
 
@@ -7,31 +7,27 @@ import datetime
 from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.utils import get_column_letter
 
+from modules.bulk_delete import bulk_delete_section
+from modules.tenant_fanout import fanout_targets, render_fanout_results, run_fanout
 from modules.ui_helpers import module_header, section_header
+from services import fastjson, metrics
+from services.activity_logger import annotate_job
+from services.bulk import MAX_WORKERS, RATE_PER_SECOND, run_steps
+from services.reshape import NumberedGroup
+from services.schema import Column, Schema
 
 # ======================================================
 # HELPERS
 # ======================================================
-def to_bool(value):
-    return str(value).strip().lower() == "true"
-
-
 def is_blank_or_null(value):
     return value is None or str(value).strip() == "" or str(value).lower() == "null"
 
 
-def parse_number(value):
-    if isinstance(value, (int, float)):
-        return int(value) if float(value).is_integer() else float(value)
-    v = str(value).strip()
-    n = float(v)
-    return int(n) if n.is_integer() else n
-
-
 def js_number(value):
-    if is_blank_or_null(value):
+    """Whole numbers as int, like JavaScript would serialise them."""
+    if value is None:
         return None
-    return parse_number(value)
+    return int(value) if float(value).is_integer() else value
 
 
 def normalize_time(value, date_prefix="1970-01-01"):
@@ -86,6 +82,145 @@ def file_hash(file_bytes):
     return hashlib.md5(file_bytes).hexdigest()
 
 
+DAY_FIELDS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+TOLERANCE_FIELDS = (
+    "beforeStartToleranceMinute",
+    "afterStartToleranceMinute",
+    "lateInToleranceMinute",
+    "earlyOutToleranceMinute",
+)
+
+SHIFT_SCHEMA = Schema(
+    Column("name", "str"),
+    Column("description", "str"),
+    Column("Night Shift", "bool"),
+    Column("report", "bool"),
+    *(Column(day, "bool") for day in DAY_FIELDS),
+    *(Column(field, "float") for field in TOLERANCE_FIELDS),
+)
+
+SHIFT_PAYCODES = NumberedGroup(
+    {"paycode": "paycode_id{n}", "start": "paycode_startMinute{n}", "end": "paycode_endMinute{n}"},
+    Schema(Column("paycode", "int"), Column("start", "float"), Column("end", "float")),
+)
+SHIFT_EXCEPTIONS = NumberedGroup(
+    {
+        "paycode": "exception_paycode_id{n}",
+        "type": "exception_type{n}",
+        "start": "exception_startMinute{n}",
+        "end": "exception_endMinute{n}",
+    },
+    Schema(Column("paycode", "int"), Column("type", "str"), Column("start", "float"), Column("end", "float")),
+)
+
+
+def _minutes(entry, extra=None):
+    item = {"paycode": {"id": entry["paycode"]}, **(extra or {}), "startMinute": js_number(entry["start"])}
+    if entry["end"] is not None:
+        item["endMinute"] = js_number(entry["end"])
+        item["max"] = False
+    else:
+        item["max"] = True
+    return item
+
+
+def _build_shift_payload(record, start_time, end_time, paycodes, exceptions):
+    paycodes = [
+        _minutes(entry) for entry in paycodes
+        if entry["n"] <= 10 and entry["paycode"] is not None and entry["start"] is not None
+    ]
+    if not paycodes:
+        raise Exception("At least one paycode is required")
+
+    # EXCEPTIONS (OPTIONAL)
+    exceptions = [
+        _minutes(entry, {"type": entry["type"]}) for entry in exceptions
+        if entry["n"] <= 10 and entry["paycode"] is not None and entry["type"] is not None and entry["start"] is not None
+    ]
+
+    start_dt, end_dt = normalize_shift_datetimes(start_time, end_time, record["Night Shift"])
+
+    payload = {
+        "name": record["name"],
+        "description": record["description"],
+        "startTime": start_dt,
+        "endTime": end_dt,
+        **{field: js_number(record[field]) for field in TOLERANCE_FIELDS},
+        "report": record["report"],
+        **{day: record[day] for day in DAY_FIELDS},
+        "paycodes": paycodes
+    }
+
+    if exceptions:
+        payload["exceptions"] = exceptions
+
+    return payload
+
+
+def _raw_column(df, name):
+    # Times stay raw: Excel hands over time, datetime and fraction-of-day cells.
+    return df[name].tolist() if name in df.columns else [None] * len(df)
+
+
+@metrics.timed("build")
+def _prepare_shift_rows(df):
+    coerced = SHIFT_SCHEMA.coerce(df)
+    row_errors = coerced.row_errors()
+    paycodes, paycode_errors = SHIFT_PAYCODES.nest(df)
+    exceptions, exception_errors = SHIFT_EXCEPTIONS.nest(df)
+
+    prepared = []
+    rows = zip(df.index, coerced.records(), _raw_column(df, "startTime"), _raw_column(df, "endTime"))
+    for i, record, start_time, end_time in rows:
+        item = {"Row": i + 1, "Name": record["name"]}
+        errors = [e for e in (row_errors.get(i), paycode_errors.get(i), exception_errors.get(i)) if e]
+        try:
+            if errors:
+                raise Exception("; ".join(errors))
+            item["payload"] = _build_shift_payload(
+                record, start_time, end_time, paycodes.get(i, []), exceptions.get(i, [])
+            )
+        except Exception as e:
+            item["error"] = str(e)
+        prepared.append(item)
+    return prepared
+
+
+def _shift_steps(item, base_url, headers):
+    try:
+        if "error" in item:
+            raise Exception(item["error"])
+
+        r = yield "POST", base_url, {"headers": headers, "json": item["payload"]}
+        if r.status_code not in (200, 201):
+            raise Exception(f"{r.status_code}: {r.text}")
+
+        return {
+            "Row": item["Row"],
+            "Name": item["Name"],
+            "Status": "Success"
+        }
+
+    except Exception as e:
+        return {
+            "Row": item["Row"],
+            "Name": item["Name"],
+            "Status": "Failed",
+            "Message": str(e)
+        }
+
+
+def _send_shift_rows(prepared, base_url, headers, max_workers=MAX_WORKERS, rate_per_second=RATE_PER_SECOND, on_progress=None):
+    outcomes = run_steps(
+        prepared, lambda item: _shift_steps(item, base_url, headers), max_workers, rate_per_second, on_progress
+    )
+    return [
+        outcome.value if outcome.error is None else
+        {"Row": outcome.item["Row"], "Name": outcome.item["Name"], "Status": "Failed", "Message": outcome.error}
+        for outcome in outcomes
+    ]
+
+
 # ======================================================
 # MAIN UI
 # ======================================================
@@ -205,139 +340,39 @@ def shift_templates_ui():
         ).fillna("")
 
         st.info(f"Rows detected: {len(df)}")
+        targets = fanout_targets("shift_templates")
 
         if st.button("🚀 Create Shifts", type="primary"):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
 
             if st.session_state.processed_shift_hash == current_hash:
                 st.warning("⚠ This file was already processed")
                 return
 
             st.session_state.processed_shift_hash = current_hash
-            results = []
-
-            for i, row in df.iterrows():
-                try:
-                    # PAYCODES
-                    paycodes = []
-
-                    for x in range(1, 11):
-                        pc_id = row.get(f"paycode_id{x}")
-                        start = row.get(f"paycode_startMinute{x}")
-                        end = row.get(f"paycode_endMinute{x}")
-
-                        if is_blank_or_null(pc_id) or is_blank_or_null(start):
-                            continue
-
-                        pc = {
-                            "paycode": {"id": parse_number(pc_id)},
-                            "startMinute": parse_number(start)
-                        }
-
-                        if not is_blank_or_null(end):
-                            pc["endMinute"] = parse_number(end)
-                            pc["max"] = False
-                        else:
-                            pc["max"] = True
-
-                        paycodes.append(pc)
-
-                    if not paycodes:
-                        raise Exception("At least one paycode is required")
-
-                    # EXCEPTIONS (OPTIONAL)
-                    exceptions = []
-
-                    for x in range(1, 11):
-                        pc_id = row.get(f"exception_paycode_id{x}")
-                        ex_type = row.get(f"exception_type{x}")
-                        start = row.get(f"exception_startMinute{x}")
-                        end = row.get(f"exception_endMinute{x}")
-
-                        if is_blank_or_null(pc_id) or is_blank_or_null(ex_type) or is_blank_or_null(start):
-                            continue
-
-                        ex = {
-                            "paycode": {"id": parse_number(pc_id)},
-                            "type": ex_type,
-                            "startMinute": parse_number(start)
-                        }
-
-                        if not is_blank_or_null(end):
-                            ex["endMinute"] = parse_number(end)
-                            ex["max"] = False
-                        else:
-                            ex["max"] = True
-
-                        exceptions.append(ex)
-
-                    start_dt, end_dt = normalize_shift_datetimes(
-                        row["startTime"],
-                        row["endTime"],
-                        to_bool(row.get("Night Shift", False))
-                    )
-
-                    payload = {
-                        "name": row["name"],
-                        "description": row["description"],
-                        "startTime": start_dt,
-                        "endTime": end_dt,
-                        "beforeStartToleranceMinute": js_number(row.get("beforeStartToleranceMinute")),
-                        "afterStartToleranceMinute": js_number(row.get("afterStartToleranceMinute")),
-                        "lateInToleranceMinute": js_number(row.get("lateInToleranceMinute")),
-                        "earlyOutToleranceMinute": js_number(row.get("earlyOutToleranceMinute")),
-                        "report": to_bool(row["report"]),
-                        "monday": to_bool(row["monday"]),
-                        "tuesday": to_bool(row["tuesday"]),
-                        "wednesday": to_bool(row["wednesday"]),
-                        "thursday": to_bool(row["thursday"]),
-                        "friday": to_bool(row["friday"]),
-                        "saturday": to_bool(row["saturday"]),
-                        "sunday": to_bool(row["sunday"]),
-                        "paycodes": paycodes
-                    }
-
-                    if exceptions:
-                        payload["exceptions"] = exceptions
-
-                    with st.expander(f"📄 JSON – Row {i + 1}"):
-                        st.json(payload)
-
-                    r = requests.post(BASE_URL, headers=headers, json=payload)
-                    if r.status_code not in (200, 201):
-                        raise Exception(f"{r.status_code}: {r.text}")
-
-                    results.append({
-                        "Row": i + 1,
-                        "Name": row["name"],
-                        "Status": "Success"
-                    })
-
-                except Exception as e:
-                    results.append({
-                        "Row": i + 1,
-                        "Name": row.get("name"),
-                        "Status": "Failed",
-                        "Message": str(e)
-                    })
-
-            st.dataframe(pd.DataFrame(results), use_container_width=True)
+            prepared = _prepare_shift_rows(df)
+
+            for item in prepared:
+                if "payload" in item:
+                    with st.expander(f"📄 JSON – Row {item['Row']}"):
+                        st.json(item["payload"])
+
+            if len(targets) > 1:
+                outcomes = run_fanout(
+                    targets,
+                    lambda tenant: _send_shift_rows(prepared, tenant.api_url("shift_templates"), tenant.headers()),
+                )
+                render_fanout_results(outcomes, ["Row", "Name"], "shift_templates")
+            else:
+                results = _send_shift_rows(prepared, BASE_URL, headers)
+                st.dataframe(pd.DataFrame(results), use_container_width=True)
 
     st.divider()
 
     # ==================================================
     # DELETE
     # ==================================================
-    section_header("🗑️ Delete Shift Templates")
-
-    ids_input = st.text_input("Enter Shift Template IDs", placeholder="165,166,167")
-
-    if st.button("Delete Shift Templates"):
-        for sid in [x.strip() for x in ids_input.split(",") if x.strip().isdigit()]:
-            r = requests.delete(f"{BASE_URL}/{sid}", headers=headers)
-            if r.status_code in (200, 204):
-                st.success(f"Deleted {sid}")
-            else:
-                st.error(f"Failed {sid}: {r.text}")
+    bulk_delete_section("Shift Templates", BASE_URL, headers, key="shift_templates")
 
     st.divider()
 
@@ -346,9 +381,9 @@ def shift_templates_ui():
     # ==================================================
     section_header("⬇️ Download Existing Shift Templates")
 
-    r = requests.get(BASE_URL, headers=headers)
+    r = requests.get(BASE_URL, headers=headers, stream=True)
     if r.status_code == 200:
-        df = pd.json_normalize(r.json())
+        df, _ = fastjson.read_frame(r)
         st.download_button(
             "⬇️ Download Existing Shift Templates",
             data=df.to_csv(index=False),
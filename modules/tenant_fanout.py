@@ -0,0 +1,146 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from modules.ui_helpers import section_header
+from services import throttle
+from services.resources import RESOURCES_BY_NAME, fetch_resource, natural_key
+from services.tenants import Tenant, fan_out, login_tenant, result_matrix
+
+CURRENT_TENANT = "Current"
+
+
+def current_tenant() -> Tenant:
+    return Tenant(
+        name=CURRENT_TENANT,
+        host=st.session_state.HOST.rstrip("/"),
+        username=st.session_state.get("username", ""),
+        token=st.session_state.token,
+        issued_at=st.session_state.get("token_issued_at", time.time()),
+    )
+
+
+def _registered() -> dict[str, Tenant]:
+    return st.session_state.setdefault("fanout_tenants", {})
+
+
+def tenant_registry_ui():
+    """Sidebar panel for registering extra tenants for fan-out uploads."""
+    tenants = _registered()
+    with st.expander(f"🌐 Fan-out tenants ({len(tenants)})", expanded=False):
+        for name, tenant in list(tenants.items()):
+            col1, col2 = st.columns([4, 1])
+            age_minutes = int((time.time() - tenant.issued_at) // 60)
+            col1.caption(f"**{name}** · {tenant.host} · {tenant.username} · {age_minutes} min")
+            if col2.button("✖", key=f"fanout_remove_{name}"):
+                tenants.pop(name)
+                st.rerun()
+
+        with st.form("fanout_add_tenant", clear_on_submit=True):
+            name = st.text_input("Label", placeholder="UAT")
+            host = st.text_input("Host", placeholder="https://uat.example.com")
+            username = st.text_input("Username")
+            password = st.text_input("Password", type="password")
+            if st.form_submit_button("Add tenant", use_container_width=True):
+                label = name.strip() or host.strip()
+                if not host.strip() or not username.strip():
+                    st.error("Host and username are required")
+                elif label == CURRENT_TENANT or label in tenants:
+                    st.error(f"A tenant named {label} already exists")
+                else:
+                    try:
+                        tenants[label] = login_tenant(label, host.strip(), username.strip(), password.strip())
+                        st.success(f"✅ Added {label}")
+                    except Exception as e:
+                        st.error(f"❌ {e}")
+
+
+def fanout_targets(key) -> list[Tenant]:
+    """Tenants an upload should be applied to; just the current one by default."""
+    tenants = _registered()
+    if not tenants:
+        return [current_tenant()]
+
+    options = [CURRENT_TENANT, *tenants]
+    selected = st.multiselect(
+        "Apply to tenants",
+        options,
+        default=[CURRENT_TENANT],
+        key=f"{key}_fanout_targets",
+        help=(
+            "Rows are sent to every selected tenant concurrently. Ids in the file are the current tenant's; "
+            "on the others, updates go to the object with the same code/name, and rows with no match are not sent."
+        ),
+    )
+    return [current_tenant() if name == CURRENT_TENANT else tenants[name] for name in selected]
+
+
+def match_ids(prepared, tenant, resource):
+    """Prepared items with update ids swapped for the tenant's own ids, matched by natural key.
+
+    Ids are assigned per tenant, so the file's id only means something on the
+    current tenant. Updates with no object of the same code/name on `tenant`
+    are marked as errors instead of being sent.
+    """
+    updates = [item for item in prepared if "error" not in item and (item.get("payload") or {}).get("id")]
+    if tenant.name == CURRENT_TENANT or not updates:
+        return prepared
+
+    spec = RESOURCES_BY_NAME[resource]
+    ids = {natural_key(obj, spec): obj.get("id") for obj in fetch_resource(tenant.host, tenant.headers(), spec)}
+    matched = []
+    for item in prepared:
+        payload = item.get("payload") or {}
+        if "error" in item or not payload.get("id"):
+            matched.append(item)
+            continue
+        target_id = ids.get(natural_key(payload, spec))
+        if target_id is None:
+            item = {**item, "error": f"No {spec.key} {payload.get(spec.key)!r} on {tenant.name} to update"}
+        else:
+            item = {**item, "payload": {**payload, "id": target_id}}
+        matched.append(item)
+    return matched
+
+
+def run_fanout(targets, send):
+    progress = st.progress(0.0, text=f"Applying to {len(targets)} tenants...")
+
+    def on_progress(done, total):
+        progress.progress(done / total, text=f"Finished {done} / {total} tenants")
+
+    outcomes = fan_out(targets, send, on_progress=on_progress)
+    progress.empty()
+    return outcomes
+
+
+def render_fanout_results(outcomes, key_columns, file_prefix, status_column="Status"):
+    section_header("📊 Upload Result by Tenant")
+
+    summary = []
+    for outcome in outcomes:
+        rows = pd.DataFrame(outcome.value or [])
+        statuses = rows[status_column].astype(str) if status_column in rows.columns else pd.Series(dtype=str)
+        control = throttle.controller(outcome.item.host).report()
+        summary.append({
+            "Tenant": outcome.item.name,
+            "Host": outcome.item.host,
+            "Rows": len(rows),
+            "Success": int(statuses.str.startswith(("Success", "SUCCESS", "2")).sum()),
+            "Seconds": round(outcome.elapsed_ms / 1000, 1),
+            "Concurrency": control["Concurrency"],
+            "Throttled": control["Throttled"],
+            "Error": outcome.error or "",
+        })
+    st.dataframe(pd.DataFrame(summary), use_container_width=True)
+
+    matrix = result_matrix(outcomes, key_columns, status_column)
+    st.dataframe(matrix, use_container_width=True)
+    st.download_button(
+        "⬇️ Download Result Matrix",
+        data=matrix.to_csv(index=False),
+        file_name=f"{file_prefix}_fanout_results.csv",
+        mime="text/csv",
+        use_container_width=True,
+    )
@@ -8,6 +8,7 @@ import requests
 import streamlit as st
 
 from modules.ui_helpers import module_header, section_header
+from services import fastjson
 from services.api import headers as api_headers
 
 TIMECARD_ATTRIBUTES = "attendancePunches(organizationLocation|shiftTemplate),schedule(shiftTemplate)"
@@ -32,7 +33,7 @@ def fetch_shift_templates(host: str, token: str) -> list[dict[str, Any]]:
         timeout=20,
     )
     response.raise_for_status()
-    payload = response.json()
+    payload = fastjson.loads(response.content)
     return payload if isinstance(payload, list) else payload.get("data", [])
 
 
@@ -47,7 +48,7 @@ def fetch_paycodes(host: str, token: str) -> list[dict[str, Any]]:
         timeout=20,
     )
     response.raise_for_status()
-    payload = response.json()
+    payload = fastjson.loads(response.content)
     return payload if isinstance(payload, list) else payload.get("data", [])
 
 
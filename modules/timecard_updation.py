@@ -2,7 +2,149 @@ import streamlit as st
 import pandas as pd
 import requests
 import io
+from modules.preflight_check import preflight_rows
 from modules.ui_helpers import module_header, section_header
+from services import snapshot
+from services.activity_logger import annotate_job
+from services.bulk import MAX_WORKERS, REQUEST_TIMEOUT_SECONDS, run_steps
+from services.preflight import ForeignKey
+
+TIMECARD_REFERENCES = (ForeignKey("paycode_id", "paycodes"),)
+TIMECARD_COLUMNS = {
+    "externalnumber": "externalNumber",
+    "attendancedate": "attendanceDate",
+    "paycodeid": "paycode_id"
+}
+
+
+def _normalize_timecard_upload(df):
+    """Canonical column names and ISO dates; returns (df, rows whose date could not be read)."""
+    df = df.copy()
+    df.columns = (
+        df.columns
+          .astype(str)
+          .str.strip()
+          .str.replace(" ", "")
+          .str.replace("_", "")
+          .str.lower()
+    )
+
+    missing = [v for k, v in TIMECARD_COLUMNS.items() if k not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    df = df.rename(columns=TIMECARD_COLUMNS).fillna("")
+    df["attendanceDate"] = pd.to_datetime(
+        df["attendanceDate"], errors="coerce"
+    )
+    bad_dates = df[df["attendanceDate"].isna()]
+    df["attendanceDate"] = df["attendanceDate"].dt.strftime("%Y-%m-%d")
+    return df, bad_dates
+
+
+def _timecard_steps(row, host, headers, paycode_map, blocked_reason=None):
+    """GET the day's timecard for one row and POST its new attendance paycode."""
+    external_number = str(row["externalNumber"]).strip()
+    attendance_date = row["attendanceDate"]
+    paycode_id = int(row["paycode_id"])
+    result = {
+        "externalNumber": external_number,
+        "attendanceDate": attendance_date,
+        "paycode_id": paycode_id,
+    }
+    if blocked_reason:
+        return {**result, "Status": f"FAILED - Pre-flight: {blocked_reason}"}
+
+    # -------------------------------
+    # STEP 1: GET TIMECARD
+    # -------------------------------
+    r = yield "GET", f"{host}/web-client/restProxy/timecards/", {
+        "headers": headers,
+        "params": {
+            "attributes": "attendancePaycode",
+            "startDate": attendance_date,
+            "endDate": attendance_date,
+            "externalNumber": external_number
+        },
+        "timeout": REQUEST_TIMEOUT_SECONDS
+    }
+
+    if r.status_code != 200:
+        return {**result, "Status": f"FAILED - GET {r.status_code}"}
+
+    data = r.json() if isinstance(r.json(), list) else r.json().get("data", [])
+    if not data:
+        return {**result, "Status": "FAILED - No timecard found"}
+
+    entries = data[0].get("entries", [])
+    if not entries:
+        return {**result, "Status": "FAILED - No entries"}
+
+    # ✅ correct entry
+    target = next(
+        (e for e in entries if e.get("attendancePaycode")), None
+    )
+
+    if not target:
+        return {**result, "Status": "FAILED - No attendancePaycode entry"}
+
+    employee_id = target["employee"]["id"]
+    entry_index = target["index"]
+    version = target["attendancePaycode"].get("version")
+
+    payload = {
+        "attendanceDate": attendance_date,
+        "entries": [
+            {
+                "index": entry_index,
+                "employee": {"id": employee_id},
+                "attendancePaycode": {
+                    "employee": {"id": employee_id},
+                    "attendanceDate": attendance_date,
+                    "paycode": {"id": paycode_id},
+                    **({"version": version} if version is not None else {})
+                }
+            }
+        ]
+    }
+
+    r2 = yield "POST", f"{host}/resource-server/api/timecards", {
+        "headers": {**headers, "Content-Type": "application/json"},
+        "json": payload,
+        "timeout": REQUEST_TIMEOUT_SECONDS
+    }
+
+    if r2.status_code in (200, 201):
+        return {**result, "paycode": paycode_map.get(paycode_id, ""), "Status": "SUCCESS"}
+    return {**result, "Status": f"FAILED - POST {r2.status_code}"}
+
+
+def _send_timecard_rows(df, host, headers, paycode_map, blocked, max_workers=MAX_WORKERS, on_progress=None):
+    outcomes = run_steps(
+        df.iterrows(),
+        lambda item: _timecard_steps(item[1], host, headers, paycode_map, blocked.get(item[0])),
+        max_workers, rate_per_second=0, on_progress=on_progress,
+    )
+    return [
+        outcome.value if outcome.error is None else {
+            "externalNumber": str(outcome.item[1]["externalNumber"]).strip(),
+            "attendanceDate": outcome.item[1]["attendanceDate"],
+            "paycode_id": outcome.item[1]["paycode_id"],
+            "Status": f"FAILED - {outcome.error}"
+        }
+        for outcome in outcomes
+    ]
+
+
+def _paycode_map(host, headers):
+    # The pre-flight check refreshes the paycode snapshot, so the map is
+    # usually read locally.
+    paycodes = snapshot.list_objects(host, "paycodes")
+    if paycodes is None:
+        r = requests.get(f"{host}/resource-server/api/paycodes", headers=headers)
+        paycodes = r.json() if r.status_code == 200 else []
+    return {p.get("id"): p.get("code") for p in paycodes}
+
 
 def timecard_updation_ui():
     module_header("🕒 Timecard Updation", "Bulk update attendance paycodes using External Number and Date")
@@ -20,8 +162,6 @@ def timecard_updation_ui():
 
     HOST = st.session_state.HOST.rstrip("/")
 
-    GET_URL = f"{HOST}/web-client/restProxy/timecards/"
-    POST_URL = f"{HOST}/resource-server/api/timecards"
     PAYCODES_URL = f"{HOST}/resource-server/api/paycodes"
 
     HEADERS_GET = {
@@ -29,11 +169,6 @@ def timecard_updation_ui():
         "Accept": "application/json"
     }
 
-    HEADERS_POST = {
-        "Authorization": f"Bearer {st.session_state.token}",
-        "Content-Type": "application/json"
-    }
-
     # --------------------------------------------------
     # DOWNLOAD TEMPLATE
     # --------------------------------------------------
@@ -96,25 +231,11 @@ def timecard_updation_ui():
     # --------------------------------------------------
     # NORMALIZE & VALIDATE COLUMNS  ✅ FIXES YOUR ERROR
     # --------------------------------------------------
-    df.columns = (
-        df.columns
-          .astype(str)
-          .str.strip()
-          .str.replace(" ", "")
-          .str.replace("_", "")
-          .str.lower()
-    )
-
-    required_map = {
-        "externalnumber": "externalNumber",
-        "attendancedate": "attendanceDate",
-        "paycodeid": "paycode_id"
-    }
-
-    missing = [v for k, v in required_map.items() if k not in df.columns]
-    if missing:
+    try:
+        df, bad_dates = _normalize_timecard_upload(df)
+    except ValueError as e:
         st.error(
-            f"❌ Missing required columns: {', '.join(missing)}\n\n"
+            f"❌ {e}\n\n"
             "Expected columns:\n"
             "- externalNumber\n"
             "- attendanceDate\n"
@@ -122,29 +243,11 @@ def timecard_updation_ui():
         )
         st.stop()
 
-    df = df.rename(columns={
-        "externalnumber": "externalNumber",
-        "attendancedate": "attendanceDate",
-        "paycodeid": "paycode_id"
-    })
-
-    # --------------------------------------------------
-    # CLEAN DATA
-    # --------------------------------------------------
-    df = df.fillna("")
-
-    df["attendanceDate"] = pd.to_datetime(
-        df["attendanceDate"], errors="coerce"
-    )
-
-    bad_dates = df[df["attendanceDate"].isna()]
     if not bad_dates.empty:
         st.error("❌ Invalid attendanceDate found")
         st.dataframe(bad_dates, use_container_width=True)
         st.stop()
 
-    df["attendanceDate"] = df["attendanceDate"].dt.strftime("%Y-%m-%d")
-
     st.success(f"File loaded successfully — {len(df)} rows")
     st.dataframe(df, use_container_width=True)
 
@@ -153,130 +256,21 @@ def timecard_updation_ui():
     # --------------------------------------------------
     if not st.button("🚀 Update Timecards", type="primary"):
         return
+    annotate_job(file_name=uploaded_file.name, rows=len(df))
 
     st.divider()
 
     # --------------------------------------------------
     # Fetch Paycode Map
     # --------------------------------------------------
-    paycode_map = {}
-    r = requests.get(PAYCODES_URL, headers=HEADERS_GET)
-    if r.status_code == 200:
-        for p in r.json():
-            paycode_map[p.get("id")] = p.get("code")
+    blocked = preflight_rows(df, TIMECARD_REFERENCES, HOST, HEADERS_GET)
+    paycode_map = _paycode_map(HOST, HEADERS_GET)
 
     # --------------------------------------------------
     # Processing
     # --------------------------------------------------
-    results = []
-
-    session = requests.Session()
-    session.headers.update(HEADERS_GET)
-
     with st.spinner("Updating timecards… please wait"):
-        for _, row in df.iterrows():
-
-            external_number = str(row["externalNumber"]).strip()
-            attendance_date = row["attendanceDate"]
-            paycode_id = int(row["paycode_id"])
-
-            # -------------------------------
-            # STEP 1: GET TIMECARD
-            # -------------------------------
-            r = session.get(
-                GET_URL,
-                params={
-                    "attributes": "attendancePaycode",
-                    "startDate": attendance_date,
-                    "endDate": attendance_date,
-                    "externalNumber": external_number
-                }
-            )
-
-            if r.status_code != 200:
-                results.append({
-                    "externalNumber": external_number,
-                    "attendanceDate": attendance_date,
-                    "paycode_id": paycode_id,
-                    "Status": f"FAILED - GET {r.status_code}"
-                })
-                continue
-
-            data = r.json() if isinstance(r.json(), list) else r.json().get("data", [])
-            if not data:
-                results.append({
-                    "externalNumber": external_number,
-                    "attendanceDate": attendance_date,
-                    "paycode_id": paycode_id,
-                    "Status": "FAILED - No timecard found"
-                })
-                continue
-
-            entries = data[0].get("entries", [])
-            if not entries:
-                results.append({
-                    "externalNumber": external_number,
-                    "attendanceDate": attendance_date,
-                    "paycode_id": paycode_id,
-                    "Status": "FAILED - No entries"
-                })
-                continue
-
-            # ✅ correct entry
-            target = next(
-                (e for e in entries if e.get("attendancePaycode")), None
-            )
-
-            if not target:
-                results.append({
-                    "externalNumber": external_number,
-                    "attendanceDate": attendance_date,
-                    "paycode_id": paycode_id,
-                    "Status": "FAILED - No attendancePaycode entry"
-                })
-                continue
-
-            employee_id = target["employee"]["id"]
-            entry_index = target["index"]
-            version = target["attendancePaycode"].get("version")
-
-            payload = {
-                "attendanceDate": attendance_date,
-                "entries": [
-                    {
-                        "index": entry_index,
-                        "employee": {"id": employee_id},
-                        "attendancePaycode": {
-                            "employee": {"id": employee_id},
-                            "attendanceDate": attendance_date,
-                            "paycode": {"id": paycode_id},
-                            **({"version": version} if version is not None else {})
-                        }
-                    }
-                ]
-            }
-
-            r2 = session.post(
-                POST_URL,
-                headers=HEADERS_POST,
-                json=payload
-            )
-
-            if r2.status_code in (200, 201):
-                results.append({
-                    "externalNumber": external_number,
-                    "attendanceDate": attendance_date,
-                    "paycode_id": paycode_id,
-                    "paycode": paycode_map.get(paycode_id, ""),
-                    "Status": "SUCCESS"
-                })
-            else:
-                results.append({
-                    "externalNumber": external_number,
-                    "attendanceDate": attendance_date,
-                    "paycode_id": paycode_id,
-                    "Status": f"FAILED - POST {r2.status_code}"
-                })
+        results = _send_timecard_rows(df, HOST, HEADERS_GET, paycode_map, blocked)
 
     # --------------------------------------------------
     # Results
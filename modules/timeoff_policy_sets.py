@@ -3,7 +3,9 @@ import pandas as pd
 import requests
 import io
 
+from modules.bulk_delete import bulk_delete_section
 from modules.ui_helpers import module_header, section_header
+from services.activity_logger import annotate_job
 
 def _flatten_timeoff_policy_sets(raw_sets):
     policies = raw_sets if isinstance(raw_sets, list) else [raw_sets]
@@ -148,6 +150,7 @@ def timeoff_policy_sets_ui():
         st.dataframe(df, use_container_width=True)
 
         if st.button("🚀 Process Upload", type="primary", use_container_width=True):
+            annotate_job(file_name=uploaded_file.name, rows=len(df))
             with st.spinner("⏳ Processing Time-off Policy Sets..."):
                 grouped = {}
                 results = []
@@ -251,21 +254,7 @@ def timeoff_policy_sets_ui():
     # ==================================================
     # 3️⃣ DELETE
     # ==================================================
-    section_header("🗑️ Delete Time-off Policy Sets")
-
-    delete_ids = st.text_input(
-        "Enter Time-off Policy Set IDs (comma separated)",
-        placeholder="Example: 16,18"
-    )
-
-    if st.button("Delete Time-off Policy Sets", use_container_width=True):
-        ids = [i.strip() for i in delete_ids.split(",") if i.strip().isdigit()]
-        for sid in ids:
-            r = requests.delete(f"{BASE_URL}/{sid}", headers=headers)
-            if r.status_code in (200, 204):
-                st.success(f"Deleted ID {sid}")
-            else:
-                st.error(f"Failed to delete {sid} → {r.text}")
+    bulk_delete_section("Time-off Policy Sets", BASE_URL, headers, key="timeoff_policy_sets")
 
     st.divider()
 
@@ -1,18 +1,48 @@
 import hashlib
+import logging
 import os
 import base64
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
 from urllib.parse import urlparse, quote
 
 import requests
 import streamlit as st
 
-SUPABASE_URL = "https://msyljqazsndtxpritfwy.supabase.co"
+from services import compression, metrics
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://msyljqazsndtxpritfwy.supabase.co").rstrip("/")
 SUPABASE_KEY = "sb_publishable_HXoFqNveyeQcaFrL8suM1A_UBvL2rpZ"
 SUPABASE_BUCKET = os.getenv("SUPABASE_LOG_BUCKET", "logs-files")
 
 _original_request = requests.sessions.Session.request
 
+# Detail-row policy for job logging: "all", "failed", "none" or "sample:<rate>"
+# (failed requests are always kept when sampling). Per-module overrides come
+# from JOB_LOG_DETAIL_POLICIES, e.g. "Paycodes=sample:0.05,Punch Update=failed".
+DEFAULT_DETAIL_POLICY = os.getenv("JOB_LOG_DETAIL_POLICY", "failed")
+MAX_DETAIL_ROWS = int(os.getenv("JOB_LOG_MAX_DETAIL_ROWS", "200"))
+
+
+def _parse_detail_policies(raw):
+    policies = {}
+    for item in (raw or "").split(","):
+        if "=" in item:
+            module, policy = item.split("=", 1)
+            policies[module.strip()] = policy.strip()
+    return policies
+
+
+MODULE_DETAIL_POLICIES = _parse_detail_policies(os.getenv("JOB_LOG_DETAIL_POLICIES"))
+
+_current_job: ContextVar["JobLog | None"] = ContextVar("activity_job", default=None)
+
 
 def _supabase_headers(json_mode=True, extra=None):
     headers = {
@@ -88,8 +118,8 @@ def _create_signed_file_url(encoded_path, expires_in=60 * 60 * 24 * 30):
     return f"{SUPABASE_URL}{signed_part}"
 
 
-def log_action(action, module_name=None, file_name=None, file_url=None):
-    username = st.session_state.get("username", "anonymous")
+def _log_payload(action, module_name=None, file_name=None, file_url=None, username=None):
+    username = username or st.session_state.get("username", "anonymous")
     module = module_name or st.session_state.get("active_module", "Unknown")
 
     if not file_name:
@@ -97,7 +127,7 @@ def log_action(action, module_name=None, file_name=None, file_url=None):
     if not file_url:
         file_url = st.session_state.get("last_uploaded_file_url")
 
-    payload = {
+    return {
         "username": username,
         "module": module,
         "action": action,
@@ -106,39 +136,190 @@ def log_action(action, module_name=None, file_name=None, file_url=None):
         "ip_address": "127.0.0.1",
     }
 
+
+def _insert_logs(payloads):
+    # PostgREST accepts a JSON array, so a whole job flushes in one insert.
     try:
         res = _original_request(
             requests.Session(),
             "POST",
             f"{SUPABASE_URL}/rest/v1/logs",
             headers=_supabase_headers(extra={"Prefer": "return=minimal"}),
-            json=payload,
+            json=payloads[0] if len(payloads) == 1 else payloads,
             timeout=10,
         )
         if res.status_code not in (200, 201):
             print(f"[Log Debug] log insert failed {res.status_code}: {res.text}")
         else:
-            print(f"[Log Debug] log inserted: {module} | {action}")
+            for payload in payloads:
+                logger.debug(f"log inserted: {payload['module']} | {payload['action']}")
     except Exception as ex:
         print(f"[Log Debug] log insert exception: {ex}")
 
 
-def _request_with_logging(self, method, url, **kwargs):
-    response = _original_request(self, method, url, **kwargs)
+def log_action(action, module_name=None, file_name=None, file_url=None):
+    _insert_logs([_log_payload(action, module_name, file_name, file_url)])
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class JobLog:
+    """Aggregates the HTTP calls made during one module run into a summary."""
+
+    def __init__(self, module, policy):
+        self.module = module
+        self.policy = policy
+        self.file_name = None
+        self.rows = None
+        self.ok = 0
+        self.failed = 0
+        self.statuses: dict[int | str, int] = {}  # "error": raised before a response
+        self.latencies_ms = []
+        self.details = []
+        self.dropped_details = 0
+        self.metrics = None
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _keep_detail(self, failed):
+        if self.policy == "all":
+            return True
+        if self.policy == "none":
+            return False
+        if failed:
+            return True
+        if self.policy.startswith("sample:"):
+            try:
+                return random.random() < float(self.policy.split(":", 1)[1])
+            except ValueError:
+                return False
+        return False
+
+    def record(self, method, path, status_code, elapsed_ms):
+        failed = status_code == "error" or status_code >= 400
+        with self._lock:
+            self.latencies_ms.append(elapsed_ms)
+            self.statuses[status_code] = self.statuses.get(status_code, 0) + 1
+            if failed:
+                self.failed += 1
+            else:
+                self.ok += 1
+            if self._keep_detail(failed):
+                if len(self.details) < MAX_DETAIL_ROWS:
+                    self.details.append(f"{method.upper()} {path} [{status_code}]")
+                else:
+                    self.dropped_details += 1
+
+    @property
+    def request_count(self):
+        return self.ok + self.failed
+
+    def summary_action(self):
+        latencies = sorted(self.latencies_ms)
+        duration = time.perf_counter() - self.started
+        parts = [
+            "JOB_SUMMARY",
+            f"requests={self.request_count}",
+            f"ok={self.ok}",
+            f"failed={self.failed}",
+            f"p50={_percentile(latencies, 50):.0f}ms",
+            f"p95={_percentile(latencies, 95):.0f}ms",
+            f"duration={duration:.1f}s",
+        ]
+        if self.statuses:
+            parts.append("statuses=" + ",".join(f"{code}:{count}" for code, count in sorted(self.statuses.items(), key=lambda item: str(item[0]))))
+        if self.rows is not None:
+            parts.insert(1, f"rows={self.rows}")
+        if self.dropped_details:
+            parts.append(f"details_dropped={self.dropped_details}")
+        return " ".join(parts)
+
+
+def annotate_job(file_name=None, rows=None):
+    """Attach the uploaded file and row count to the running job, if any."""
+    job = _current_job.get()
+    if job is None:
+        return
+    if file_name is not None:
+        job.file_name = file_name
+    if rows is not None:
+        job.rows = rows
+
+
+@contextmanager
+def job_logging(module_name=None, username=None):
+    """Collapse per-request log rows inside the block into one job summary.
+
+    Requests made while the block is active (including worker threads that
+    run inside a copied context) are timed and counted; on exit a single
+    JOB_SUMMARY row plus the detail rows selected by the module's policy are
+    written in one insert. username overrides the session's for jobs run
+    outside a Streamlit session.
+    """
+    module = module_name or st.session_state.get("active_module", "Unknown")
+    job = JobLog(module, MODULE_DETAIL_POLICIES.get(module, DEFAULT_DETAIL_POLICY))
+    token = _current_job.set(job)
     try:
-        if "supabase.co" in url:
-            return response
+        with metrics.job(module) as job_metrics:
+            job.metrics = job_metrics
+            yield job
+    finally:
+        _current_job.reset(token)
+        if job.request_count:
+            payloads = [_log_payload(job.summary_action(), module, job.file_name, username=username)]
+            payloads += [_log_payload(action, module, job.file_name, username=username) for action in job.details]
+            _insert_logs(payloads)
+
 
-        path = urlparse(url).path
-        module = st.session_state.get("active_module", "Unknown")
-        action = f"{method.upper()} {path} [{response.status_code}]"
-        log_action(action=action, module_name=module)
+def _request_with_logging(self, method, url, **kwargs):
+    host = metrics.host_of(url)
+    metrics.REGISTRY.request_started(host)
+    started = time.perf_counter()
+    try:
+        response = _original_request(self, method, url, **kwargs)
+    except Exception:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.REGISTRY.request_finished(host, method.upper(), metrics.endpoint_of(url), "error", elapsed_ms, 0, 0)
+        try:
+            record_request(method, url, "error", elapsed_ms)
+        except Exception as ex:
+            print(f"[Log Debug] request logging failed: {ex}")
+        raise
+    try:
+        received = 0 if kwargs.get("stream") else len(response.content or b"")
+        metrics.REGISTRY.request_finished(
+            host, method.upper(), metrics.endpoint_of(url), response.status_code,
+            (time.perf_counter() - started) * 1000, metrics.body_size(response.request.body), received,
+        )
+        record_request(method, url, response.status_code, (time.perf_counter() - started) * 1000)
     except Exception as ex:
         print(f"[Log Debug] request logging failed: {ex}")
     return response
 
 
+def record_request(method, url, status_code, elapsed_ms):
+    """Count a finished request in the running job, or log it on its own."""
+    if url.startswith(SUPABASE_URL):
+        return
+
+    path = urlparse(url).path
+    job = _current_job.get()
+    if job is not None:
+        job.record(method, path, status_code, elapsed_ms)
+        return
+
+    module = st.session_state.get("active_module", "Unknown")
+    action = f"{method.upper()} {path} [{status_code}]"
+    log_action(action=action, module_name=module)
+
+
 def install_requests_logging():
+    compression.install_transfer_compression()
     if getattr(requests.sessions.Session.request, "_logs_wrapped", False):
         return
 
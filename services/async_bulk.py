@@ -0,0 +1,255 @@
+"""Asyncio engine for step pipelines: many requests in flight on one thread.
+
+A step pipeline is a generator that yields `(method, url, kwargs)` and gets
+each response back (see services.bulk.drive). The threaded engine runs one
+generator per pool thread; this one runs every generator as a coroutine on a
+single event loop, so the number of rows in flight is no longer tied to OS
+threads. Requests still go through the host's throttle controller.
+
+AsyncClient sends through httpx.AsyncClient (services.http2.AsyncTransport):
+keep-alive pooling, TLS against the same CA bundle as requests, and the
+proxy environment variables. With BULK_HTTP2 the same clients also offer
+HTTP/2, multiplexing the rows' requests where the host supports it.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from services import compression, fastjson, http2, metrics, profiling, throttle
+from services.activity_logger import record_request
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT_SECONDS = 30
+USER_AGENT = f"python-requests/{requests.__version__} (asyncio)"
+
+
+# ======================================================
+# CLIENT
+# ======================================================
+class AsyncResponse:
+    """The parts of requests.Response the step pipelines read."""
+
+    def __init__(self, method, url, status_code, reason, headers, content, body_size):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.body_size = body_size
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def encoding(self) -> str:
+        _, _, charset = self.headers.get("Content-Type", "").partition("charset=")
+        return charset.split(";")[0].strip().strip('"') or "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return fastjson.loads(self.content)
+
+    def __repr__(self):
+        return f"<AsyncResponse [{self.status_code}]>"
+
+
+class AsyncClient:
+    """requests-style front for the rows' requests; one per event loop.
+
+    Connections, TLS and proxies are httpx's (http2.AsyncTransport); this
+    layer adds the JSON body, gzip, metrics and activity logging.
+    """
+
+    def __init__(self, transport: "http2.AsyncTransport | None" = None):
+        self._transport = transport or http2.AsyncTransport(http2=False)
+
+    async def request(
+        self, method, url, params=None, headers=None, json=None, data=None,
+        timeout=REQUEST_TIMEOUT_SECONDS, verify=True,
+    ) -> AsyncResponse:
+        method = method.upper()
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise requests.exceptions.InvalidURL(f"Unsupported URL {url!r}")
+        query = "&".join(filter(None, [parts.query, urlencode(params, doseq=True) if params else ""]))
+        full_url = urlunsplit(parts._replace(query=query, fragment=""))
+
+        request_headers = CaseInsensitiveDict({
+            "User-Agent": USER_AGENT,
+            "Accept-Encoding": compression.ACCEPT_ENCODING,
+            "Accept": "*/*",
+        })
+        request_headers.update(headers or {})
+        if json is not None:
+            data = fastjson.dumps(json)
+            request_headers.setdefault("Content-Type", "application/json")
+        elif isinstance(data, dict):
+            data = urlencode(data, doseq=True).encode()
+            request_headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        elif isinstance(data, str):
+            data = data.encode("utf-8")
+        body = data or b""
+        host = metrics.host_of(url)
+        if compression.compressible(host, request_headers, body):
+            compressed = compression.gzip_body(body)
+            response = await self._send(
+                method, url, full_url, CaseInsensitiveDict({**request_headers, "Content-Encoding": "gzip"}),
+                compressed, timeout, verify,
+            )
+            if not compression.retry_plain(host, response.status_code):
+                metrics.REGISTRY.transfer_finished("request", len(body), len(compressed))
+                return response
+            compressed_status = response.status_code
+            response = await self._send(method, url, full_url, request_headers, body, timeout, verify)
+            compression.plain_outcome(host, compressed_status, response.status_code)
+        else:
+            response = await self._send(method, url, full_url, request_headers, body, timeout, verify)
+        if body:
+            metrics.REGISTRY.transfer_finished("request", len(body), len(body))
+        return response
+
+    async def _send(self, method, url, full_url, request_headers, body, timeout, verify) -> AsyncResponse:
+        host = metrics.host_of(url)
+        metrics.REGISTRY.request_started(host)
+        started = time.perf_counter()
+        try:
+            # httpx applies the timeout per phase, as requests does.
+            status, reason, header_items, content = await self._transport.send(
+                method, full_url, request_headers, body, timeout, verify
+            )
+        except BaseException as exc:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metrics.REGISTRY.request_finished(host, method, metrics.endpoint_of(url), "error", elapsed_ms, 0, 0)
+            if isinstance(exc, Exception):
+                try:
+                    record_request(method, url, "error", elapsed_ms)
+                except Exception as ex:
+                    logger.warning(f"request logging failed: {ex}")
+            if isinstance(exc, TimeoutError):
+                raise requests.exceptions.Timeout(f"{method} {url} timed out after {timeout}s") from None
+            if isinstance(exc, OSError):
+                raise requests.exceptions.ConnectionError(f"{method} {url}: {exc}") from exc
+            raise
+        headers = CaseInsensitiveDict()
+        for name, value in header_items:
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        wire = len(content)
+        content = compression.decode(content, headers.get("Content-Encoding"))
+        response = AsyncResponse(method, url, status, reason, headers, content, len(body))
+        metrics.REGISTRY.transfer_finished("response", len(content), wire)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.REGISTRY.request_finished(
+            host, method, metrics.endpoint_of(url), status, elapsed_ms, len(body), len(content)
+        )
+        try:
+            record_request(method, url, status, elapsed_ms)
+        except Exception as ex:
+            logger.warning(f"request logging failed: {ex}")
+        return response
+
+    async def close(self):
+        await self._transport.close()
+
+
+# ======================================================
+# ENGINE
+# ======================================================
+async def drive_async(steps, client: AsyncClient):
+    """services.bulk.drive() on the event loop, through the host's throttle controller."""
+    try:
+        call = next(steps)
+        while True:
+            method, url, kwargs = call
+            try:
+                response = await throttle.send_async(client.request, method, url, **kwargs)
+            except Exception as exc:
+                call = steps.throw(exc)
+            else:
+                call = steps.send(response)
+    except StopIteration as stop:
+        return stop.value
+
+
+class AsyncRateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start_at = max(now, self._next_at)
+        self._next_at = start_at + self.interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+
+async def _run_steps(items, steps, max_in_flight, rate_per_second, on_progress):
+    from services.bulk import BulkOutcome
+
+    client = AsyncClient(http2.AsyncTransport(http2=http2.enabled(), shards=max_in_flight))
+    limiter = AsyncRateLimiter(rate_per_second)
+    outcomes: list[BulkOutcome | None] = [None] * len(items)
+    pending = iter(enumerate(items))
+    done = 0
+
+    async def worker():
+        nonlocal done
+        for position, item in pending:
+            await limiter.wait()
+            started = time.perf_counter()
+            try:
+                value = await drive_async(steps(item), client)
+                outcomes[position] = BulkOutcome(item, value=value, elapsed_ms=(time.perf_counter() - started) * 1000)
+            except Exception as exc:  # noqa: BLE001
+                outcomes[position] = BulkOutcome(item, error=str(exc), elapsed_ms=(time.perf_counter() - started) * 1000)
+            done += 1
+            if on_progress:
+                on_progress(done, len(items))
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, min(max_in_flight, len(items) or 1)))))
+    finally:
+        await client.close()
+    return outcomes
+
+
+def run_steps(
+    items: Iterable[Any],
+    steps: Callable[[Any], Any],
+    max_in_flight: int,
+    rate_per_second: float = 0,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> list:
+    """Synchronous facade: run steps(item) for every item on one event loop and wait.
+
+    Safe to call from Streamlit script code (on_progress runs on the calling
+    thread). Called from a running event loop, the run gets its own thread.
+    """
+    coroutine = _run_steps(list(items), steps, max_in_flight, rate_per_second, on_progress)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(contextvars.copy_context().run, _run_profiled, coroutine).result()
+
+
+def _run_profiled(coroutine):
+    with profiling.worker_thread():
+        return asyncio.run(coroutine)
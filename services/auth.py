@@ -1,8 +1,10 @@
 import streamlit as st
 import requests
+import threading
 import time
 import os
 from services.activity_logger import log_action
+from services.tenants import request_token
 
 # ======================================================
 # ENV
@@ -15,7 +17,7 @@ if not CLIENT_AUTH:
 DEFAULT_HOST = "https://saas-beeforce.labour.tech"
 ADMIN_USERNAME = "Logs@BT"
 ADMIN_PASSWORD = "8684##"
-SUPABASE_URL = "https://msyljqazsndtxpritfwy.supabase.co"
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://msyljqazsndtxpritfwy.supabase.co").rstrip("/")
 SUPABASE_KEY = "sb_publishable_HXoFqNveyeQcaFrL8suM1A_UBvL2rpZ"
 
 
@@ -26,14 +28,35 @@ def _supabase_headers():
     }
 
 
+ALLOWED_USERS_CACHE_TTL_SECONDS = 300
+
+# Process-wide allow-list cache: normalized username -> (allowed, cached_at).
+# access_control_ui clears it whenever it adds or deletes a user.
+_allowed_users_cache: dict[str, tuple[bool, float]] = {}
+_allowed_users_cache_lock = threading.Lock()
+
+
+def invalidate_allowed_users_cache():
+    with _allowed_users_cache_lock:
+        _allowed_users_cache.clear()
+
+
 def _is_allowed_user(username: str) -> bool:
-    normalized_username = (username or "").strip().casefold()
+    # Same normalisation as the indexed allowed_users.username_key column.
+    normalized_username = (username or "").strip().lower()
     if not normalized_username:
         return False
 
+    now = time.time()
+    with _allowed_users_cache_lock:
+        cached = _allowed_users_cache.get(normalized_username)
+    if cached and now - cached[1] < ALLOWED_USERS_CACHE_TTL_SECONDS:
+        return cached[0]
+
     params = {
         "select": "username",
-        "limit": 1000,
+        "username_key": f"eq.{normalized_username}",
+        "limit": 1,
     }
     response = requests.get(
         f"{SUPABASE_URL}/rest/v1/allowed_users",
@@ -42,11 +65,11 @@ def _is_allowed_user(username: str) -> bool:
         timeout=10,
     )
     response.raise_for_status()
-    rows = response.json()
-    return any(
-        (row.get("username") or "").strip().casefold() == normalized_username
-        for row in rows
-    )
+    allowed = bool(response.json())
+
+    with _allowed_users_cache_lock:
+        _allowed_users_cache[normalized_username] = (allowed, now)
+    return allowed
 
 # ======================================================
 # LOGIN UI
@@ -198,19 +221,7 @@ def login_ui():
                 st.rerun()
 
             try:
-                r = requests.post(
-                    host + "/authorization-server/oauth/token",
-                    data={
-                        "username": username_clean,
-                        "password": password_clean,
-                        "grant_type": "password"
-                    },
-                    headers={
-                        "Authorization": CLIENT_AUTH,
-                        "Content-Type": "application/x-www-form-urlencoded"
-                    },
-                    timeout=12
-                )
+                r = request_token(host, username_clean, password_clean)
             except requests.exceptions.RequestException as e:
                 st.error(f"❌ Cannot reach server: {e}")
                 st.stop()
@@ -0,0 +1,229 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from services import fastjson, http2, profiling, throttle
+
+MAX_WORKERS = int(os.getenv("BULK_MAX_WORKERS", str(throttle.MAX_IN_FLIGHT)))
+# Optional hard cap on top of the adaptive per-host limit; 0 leaves pacing to it.
+RATE_PER_SECOND = float(os.getenv("BULK_RATE_PER_SECOND", "0"))
+REQUEST_TIMEOUT_SECONDS = 30
+# "async" runs step pipelines (run_steps) on one event loop instead of a thread pool.
+ENGINE = os.getenv("BULK_ENGINE", "threads").strip().lower()
+
+_thread_local = threading.local()
+
+
+class ControlledSession(requests.Session):
+    """Session whose requests go through the per-host throttle controller.
+
+    json= bodies are encoded with fastjson (orjson when installed).
+    """
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("json") is not None and kwargs.get("data") is None:
+            headers = dict(kwargs.get("headers") or {})
+            if not any(name.lower() == "content-type" for name in headers):
+                headers["Content-Type"] = "application/json"
+            kwargs["headers"], kwargs["data"] = headers, fastjson.dumps(kwargs.pop("json"))
+        return throttle.send(super().request, method, url, **kwargs)
+
+
+def session() -> requests.Session:
+    """Pooled session per worker thread; requests.Session is not thread-safe."""
+    current = getattr(_thread_local, "session", None)
+    if current is None:
+        current = ControlledSession()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+        current.mount("https://", adapter)
+        current.mount("http://", adapter)
+        if http2.enabled():
+            for prefix in http2.schemes():
+                current.mount(prefix, http2.HTTP2Adapter())
+        _thread_local.session = current
+    return current
+
+
+class RateLimiter:
+    """Spaces call starts so at most `rate` begin per second across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+@dataclass
+class BulkOutcome:
+    item: Any
+    value: Any = None
+    error: str | None = None
+    elapsed_ms: float = 0.0
+
+
+def run_bulk(
+    items: Iterable[Any],
+    task: Callable[[Any], Any],
+    max_workers: int = MAX_WORKERS,
+    rate_per_second: float = RATE_PER_SECOND,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> list[BulkOutcome]:
+    """Run task(item) concurrently; outcomes come back in input order.
+
+    Each task runs in a copy of the caller's context so job logging and other
+    context variables follow the work onto the pool threads. on_progress is
+    called from the calling thread, so it may update Streamlit widgets.
+    """
+    items = list(items)
+    limiter = RateLimiter(rate_per_second)
+    outcomes: list[BulkOutcome | None] = [None] * len(items)
+
+    def timed(item):
+        with profiling.worker_thread():
+            limiter.wait()
+            started = time.perf_counter()
+            try:
+                return BulkOutcome(item, value=task(item), elapsed_ms=(time.perf_counter() - started) * 1000)
+            except Exception as exc:  # noqa: BLE001
+                return BulkOutcome(item, error=str(exc), elapsed_ms=(time.perf_counter() - started) * 1000)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items) or 1))) as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, timed, item): position
+            for position, item in enumerate(items)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            outcomes[futures[future]] = future.result()
+            if on_progress:
+                on_progress(done, len(items))
+
+    return outcomes
+
+
+def drive(steps, http: requests.Session | None = None):
+    """Run a step pipeline synchronously and return its result.
+
+    A step pipeline is a generator that yields `(method, url, kwargs)` for
+    each request and receives the response (or has the request's exception
+    thrown in), so the same row logic runs on threads or on the asyncio
+    engine in services.async_bulk.
+    """
+    http = http or session()
+    try:
+        call = next(steps)
+        while True:
+            method, url, kwargs = call
+            try:
+                response = http.request(method, url, **kwargs)
+            except Exception as exc:  # noqa: BLE001
+                call = steps.throw(exc)
+            else:
+                call = steps.send(response)
+    except StopIteration as stop:
+        return stop.value
+
+
+def run_steps(
+    items: Iterable[Any],
+    steps: Callable[[Any], Any],
+    max_workers: int = MAX_WORKERS,
+    rate_per_second: float = RATE_PER_SECOND,
+    on_progress: Callable[[int, int], None] | None = None,
+    engine: str | None = None,
+) -> list[BulkOutcome]:
+    """Run the step pipeline steps(item) for every item; outcomes in input order.
+
+    max_workers bounds the rows in flight: pool threads for the threaded
+    engine, coroutines on one thread for the async one. Either way each
+    host's throttle controller decides how many requests actually start.
+    """
+    if (engine or ENGINE) == "async":
+        from services import async_bulk
+
+        return async_bulk.run_steps(items, steps, max_workers, rate_per_second, on_progress)
+    return run_bulk(items, lambda item: drive(steps(item)), max_workers, rate_per_second, on_progress)
+
+
+def parse_ids(values) -> list[int]:
+    """Numeric ids in first-seen order, ignoring blanks and duplicates."""
+    seen = {}
+    for value in values:
+        text = str(value).strip()
+        if text.endswith(".0"):
+            text = text[:-2]
+        if text.isdigit():
+            seen.setdefault(int(text), None)
+    return list(seen)
+
+
+def delete_ids(
+    base_url: str,
+    ids: Iterable[Any],
+    headers: dict[str, str],
+    max_workers: int = MAX_WORKERS,
+    rate_per_second: float = RATE_PER_SECOND,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> pd.DataFrame:
+    """DELETE base_url/<id> for every id and return one result row per id."""
+    base_url = base_url.rstrip("/")
+
+    def delete(resource_id):
+        return session().delete(f"{base_url}/{resource_id}", headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+
+    outcomes = run_bulk(ids, delete, max_workers, rate_per_second, on_progress)
+
+    rows = []
+    for outcome in outcomes:
+        response = outcome.value
+        rows.append(
+            {
+                "ID": outcome.item,
+                "Status": "Deleted" if response is not None and response.status_code in (200, 204) else "Failed",
+                "HTTP Status": response.status_code if response is not None else "",
+                "Message": response.text[:300] if response is not None else outcome.error,
+                "Elapsed (ms)": round(outcome.elapsed_ms),
+            }
+        )
+    return pd.DataFrame(rows, columns=["ID", "Status", "HTTP Status", "Message", "Elapsed (ms)"])
+
+
+def send_rows(
+    prepared: list[dict],
+    send: Callable[[list[dict]], list[dict]],
+    max_workers: int = MAX_WORKERS,
+    rate_per_second: float = RATE_PER_SECOND,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> list[dict]:
+    """Run a module's send(prepared) one row at a time across the pool.
+
+    The module send functions handle each prepared row independently, so
+    calling them with single-row lists keeps their result rows unchanged;
+    results come back in row order.
+    """
+    outcomes = run_bulk(prepared, lambda item: send([item]), max_workers, rate_per_second, on_progress)
+    results = []
+    for outcome in outcomes:
+        if outcome.error:
+            results.append({"Row": outcome.item.get("Row"), "Status": "Failed", "Message": outcome.error})
+        else:
+            results.extend(outcome.value)
+    return results
@@ -0,0 +1,287 @@
+"""Versioned configuration bundles for moving setups between tenants.
+
+A bundle is a zip with a manifest and one JSON list per resource type. Import
+matches existing objects on the target by their natural key (code or name),
+orders every object after the objects it references, remaps source ids to
+target ids as it goes and applies each dependency level concurrently.
+"""
+
+import copy
+import io
+import json
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import pandas as pd
+
+from services.bulk import REQUEST_TIMEOUT_SECONDS, run_bulk, session
+from services.resources import (
+    BUNDLE_RESOURCES,
+    RESOURCES_BY_NAME,
+    Resource,
+    fetch_resources,
+    natural_key,
+    ref_id,
+    ref_slots,
+)
+
+BUNDLE_FORMAT = "configuration-portal-bundle"
+BUNDLE_VERSION = 1
+
+MODE_UPDATE = "update"
+MODE_SKIP = "skip"
+
+
+# ======================================================
+# EXPORT
+# ======================================================
+def export_bundle(host, headers, names=None, on_progress=None) -> bytes:
+    names = list(names or BUNDLE_RESOURCES)
+    data = fetch_resources(host, headers, names, on_progress)
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "source_host": host,
+        "resources": {name: len(data[name]) for name in names},
+    }
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        for name in names:
+            archive.writestr(f"resources/{name}.json", json.dumps(data[name]))
+    return output.getvalue()
+
+
+def read_bundle(data: bytes) -> tuple[dict, dict[str, list[dict]]]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError("Not a configuration bundle")
+        if manifest.get("version", 0) > BUNDLE_VERSION:
+            raise ValueError(f"Bundle version {manifest['version']} is newer than this portal supports")
+        items = {
+            name: json.loads(archive.read(f"resources/{name}.json"))
+            for name in manifest.get("resources", {})
+            if name in BUNDLE_RESOURCES
+        }
+    return manifest, items
+
+
+# ======================================================
+# IMPORT
+# ======================================================
+@dataclass
+class PlannedItem:
+    resource: Resource
+    source_id: Any
+    item: dict
+    key: str
+    target_id: Any = None
+    level: int = 0
+    depends_on: tuple = ()
+
+
+def _dependency_levels(nodes: dict[tuple, PlannedItem]) -> list[list[tuple]]:
+    """Kahn's algorithm: each level only references earlier levels."""
+    remaining = {node: set(planned.depends_on) for node, planned in nodes.items()}
+    levels = []
+    while remaining:
+        ready = sorted((node for node, deps in remaining.items() if not deps), key=str)
+        if not ready:
+            raise ValueError(f"Reference cycle between {len(remaining)} objects, e.g. {next(iter(remaining))}")
+        levels.append(ready)
+        for node in ready:
+            del remaining[node]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
+
+
+def plan_import(items: dict[str, list[dict]], existing: dict[str, list[dict]]) -> list[list[PlannedItem]]:
+    """Order bundle objects by dependency and match them to target objects."""
+    nodes: dict[tuple, PlannedItem] = {}
+    for name, objects in items.items():
+        resource = RESOURCES_BY_NAME[name]
+        target_ids = {
+            natural_key(obj, resource): obj.get("id")
+            for obj in existing.get(name, [])
+            if natural_key(obj, resource)
+        }
+        for obj in objects:
+            key = natural_key(obj, resource)
+            nodes[(name, obj.get("id"))] = PlannedItem(resource, obj.get("id"), obj, key, target_ids.get(key))
+
+    for node, planned in nodes.items():
+        depends_on = set()
+        for ref in planned.resource.refs:
+            if ref.target is None:
+                continue
+            for container, slot in ref_slots(planned.item, ref.path):
+                dependency = (ref.target, ref_id(container[slot]))
+                if dependency in nodes and dependency != node:
+                    depends_on.add(dependency)
+        planned.depends_on = tuple(depends_on)
+
+    levels = []
+    for level_no, level in enumerate(_dependency_levels(nodes)):
+        for node in level:
+            nodes[node].level = level_no
+        levels.append([nodes[node] for node in level])
+    return levels
+
+
+def _strip_ids(node, keep: set[int], top=True):
+    if isinstance(node, dict):
+        if id(node) in keep:
+            return
+        if not top:
+            node.pop("id", None)
+        for value in node.values():
+            _strip_ids(value, keep, top=False)
+    elif isinstance(node, list):
+        for value in node:
+            _strip_ids(value, keep, top=False)
+
+
+def _prepare_payload(planned: PlannedItem, id_map: dict[tuple, Any]) -> tuple[dict, list[str]]:
+    payload = copy.deepcopy(planned.item)
+    payload.pop("id", None)
+    keep: set[int] = set()
+    warnings = []
+
+    for ref in planned.resource.refs:
+        for container, slot in ref_slots(payload, ref.path):
+            if ref.target is None:
+                keep.add(id(container[slot]))
+                continue
+            source_id = ref_id(container[slot])
+            if (ref.target, source_id) in id_map:
+                container[slot] = {"id": id_map[(ref.target, source_id)]}
+            else:
+                container[slot] = {"id": source_id}
+                warnings.append(f"{ref.target} {source_id} is not in the bundle; id kept as-is")
+            keep.add(id(container[slot]))
+
+    _strip_ids(payload, keep)
+    return payload, warnings
+
+
+def import_bundle(
+    host,
+    headers,
+    items: dict[str, list[dict]],
+    mode=MODE_UPDATE,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> pd.DataFrame:
+    """Apply a bundle to the target host, one dependency level at a time."""
+    existing = fetch_resources(host, headers, list(items))
+    levels = plan_import(items, existing)
+    total = sum(len(level) for level in levels)
+
+    id_map: dict[tuple, Any] = {}
+    failed: set[tuple] = set()
+    rows = []
+    done = 0
+
+    def apply(planned: PlannedItem):
+        payload, warnings = _prepare_payload(planned, id_map)
+        url = planned.resource.url(host)
+        if planned.target_id is not None:
+            payload["id"] = planned.target_id
+            response = session().put(
+                f"{url}/{planned.target_id}", headers=headers, json=payload, timeout=REQUEST_TIMEOUT_SECONDS
+            )
+            action = "Update"
+        else:
+            response = session().post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT_SECONDS)
+            action = "Create"
+        target_id = planned.target_id
+        if response.status_code in (200, 201) and target_id is None:
+            try:
+                target_id = response.json().get("id")
+            except ValueError:
+                target_id = None
+        return action, response, target_id, warnings
+
+    for level_no, level in enumerate(levels):
+        runnable = []
+        for planned in level:
+            node = (planned.resource.name, planned.source_id)
+            row = {
+                "Level": level_no,
+                "Resource": planned.resource.name,
+                "Key": planned.item.get(planned.resource.key, ""),
+                "Source ID": planned.source_id,
+                "Target ID": planned.target_id,
+            }
+            blocked = [dependency for dependency in planned.depends_on if dependency in failed]
+            if blocked:
+                failed.add(node)
+                rows.append({**row, "Action": "Skipped", "Status": "Failed", "HTTP Status": "",
+                             "Message": f"Depends on failed {blocked[0][0]} {blocked[0][1]}"})
+            elif mode == MODE_SKIP and planned.target_id is not None:
+                id_map[node] = planned.target_id
+                rows.append({**row, "Action": "Skipped", "Status": "Exists", "HTTP Status": "", "Message": ""})
+            else:
+                runnable.append(planned)
+
+        def level_progress(count, _total, offset=done + len(level) - len(runnable)):
+            if on_progress:
+                on_progress(offset + count, total)
+
+        outcomes = run_bulk(runnable, apply, on_progress=level_progress)
+        done += len(level)
+
+        for outcome in outcomes:
+            planned = outcome.item
+            node = (planned.resource.name, planned.source_id)
+            row = {
+                "Level": level_no,
+                "Resource": planned.resource.name,
+                "Key": planned.item.get(planned.resource.key, ""),
+                "Source ID": planned.source_id,
+            }
+            if outcome.error:
+                failed.add(node)
+                rows.append({**row, "Target ID": planned.target_id, "Action": "Error", "Status": "Failed",
+                             "HTTP Status": "", "Message": outcome.error})
+                continue
+            action, response, target_id, warnings = outcome.value
+            ok = response.status_code in (200, 201) and target_id is not None
+            if ok:
+                id_map[node] = target_id
+            else:
+                failed.add(node)
+            rows.append({
+                **row,
+                "Target ID": target_id,
+                "Action": action,
+                "Status": "Success" if ok else "Failed",
+                "HTTP Status": response.status_code,
+                "Message": "; ".join(warnings) if ok else response.text[:300],
+            })
+
+    return pd.DataFrame(rows)
+
+
+def plan_summary(levels: list[list[PlannedItem]], mode=MODE_UPDATE) -> pd.DataFrame:
+    rows = []
+    for level_no, level in enumerate(levels):
+        for planned in level:
+            if planned.target_id is None:
+                action = "Create"
+            else:
+                action = "Skip" if mode == MODE_SKIP else "Update"
+            rows.append({"Level": level_no, "Resource": planned.resource.name, "Action": action})
+    if not rows:
+        return pd.DataFrame(columns=["Level", "Resource", "Action", "Objects"])
+    return (
+        pd.DataFrame(rows)
+        .groupby(["Level", "Resource", "Action"], as_index=False)
+        .size()
+        .rename(columns={"size": "Objects"})
+    )
@@ -0,0 +1,192 @@
+"""Compressed transfer: gzip/brotli responses and optional gzip request bodies.
+
+Responses: requests sessions already advertise gzip/deflate (plus br when
+brotli is installed) and urllib3 decodes them; the async client sends
+ACCEPT_ENCODING and decodes with `decode()`.
+
+Request bodies: with HTTP_COMPRESS_REQUESTS=1, JSON/text bodies of at least
+HTTP_COMPRESS_MIN_BYTES go out gzip-encoded. Servers are not obliged to
+accept Content-Encoding on requests, so a host that answers 400/415 to the
+first compressed body gets it again uncompressed. If that works the host is
+sent plain bodies from then on; if it fails the same way, gzip was not the
+problem and the host stays on gzip without further resends.
+
+Payload vs wire bytes for both directions are recorded per module in
+services.metrics (bytes saved in the developer panel and Prometheus text).
+"""
+
+import gzip
+import logging
+import os
+import threading
+import zlib
+
+import requests
+
+from services import metrics
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+logger = logging.getLogger(__name__)
+
+MODE = os.getenv("HTTP_COMPRESS_REQUESTS", "0").strip().lower()  # "1" gzips large request bodies
+MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", str(16 * 1024)))
+LEVEL = int(os.getenv("HTTP_COMPRESS_LEVEL", "6"))
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+COMPRESSIBLE_TYPES = ("json", "text/", "xml", "csv", "x-www-form-urlencoded")
+REJECTED_STATUSES = (400, 415)
+
+_accepts: dict[str, bool] = {}  # host -> took a gzip body / refused one
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return MODE in ("1", "true", "yes", "on")
+
+
+def compressible(host: str, headers, body) -> bool:
+    if not enabled() or not isinstance(body, (bytes, bytearray)) or len(body) < MIN_BYTES:
+        return False
+    if headers.get("Content-Encoding") or _accepts.get(host) is False:
+        return False
+    content_type = (headers.get("Content-Type") or "").lower()
+    return any(kind in content_type for kind in COMPRESSIBLE_TYPES)
+
+
+def gzip_body(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=LEVEL, mtime=0)
+
+
+def retry_plain(host: str, status) -> bool:
+    """After a compressed body: True when it should be sent again uncompressed."""
+    if status in REJECTED_STATUSES:
+        return _accepts.get(host) is None
+    if isinstance(status, int) and status < 400:
+        with _lock:
+            if host not in _accepts:
+                _accepts[host] = True
+                logger.info(f"{host} accepts gzip request bodies")
+    return False
+
+
+def plain_outcome(host: str, compressed_status, status) -> None:
+    """After the uncompressed retry: a different answer means compression was the problem.
+
+    The same answer means the request itself was bad, so the host is taken to
+    accept gzip and later 400s are not resent.
+    """
+    if status == compressed_status:
+        accepted = True
+    elif status not in REJECTED_STATUSES:
+        accepted = False
+    else:
+        return
+    with _lock:
+        if host in _accepts:
+            return
+        _accepts[host] = accepted
+    if accepted:
+        logger.info(f"{host} accepts gzip request bodies")
+    else:
+        logger.warning(f"{host} refused a gzip request body; sending plain bodies")
+
+
+def decode(content: bytes, encoding: str | None) -> bytes:
+    """Undo Content-Encoding (applied in order, so decoded last to first)."""
+    for coding in reversed([c.strip().lower() for c in (encoding or "").split(",") if c.strip()]):
+        if coding == "identity":
+            continue
+        if coding not in _DECODERS or (coding == "br" and brotli is None):
+            raise requests.exceptions.ContentDecodingError(f"Unsupported Content-Encoding {coding!r}")
+        try:
+            content = _DECODERS[coding](content)
+        except Exception as exc:
+            raise requests.exceptions.ContentDecodingError(f"Could not decode {coding} body: {exc}") from exc
+    return content
+
+
+def _gunzip(content: bytes) -> bytes:
+    parts = []
+    while content:
+        stream = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        parts.append(stream.decompress(content))
+        parts.append(stream.flush())
+        content = stream.unused_data  # concatenated gzip members
+    return b"".join(parts)
+
+
+def _inflate(content: bytes) -> bytes:
+    try:
+        return zlib.decompress(content)
+    except zlib.error:
+        return zlib.decompress(content, -zlib.MAX_WBITS)  # raw deflate, as some servers send
+
+
+_DECODERS = {
+    "gzip": _gunzip,
+    "x-gzip": _gunzip,
+    "deflate": _inflate,
+    "br": lambda content: brotli.decompress(content),
+}
+
+
+# ======================================================
+# REQUESTS SESSIONS
+# ======================================================
+_original_send = requests.sessions.Session.send
+
+
+def note_response(response, payload_bytes=None) -> None:
+    """Record a requests response's decoded vs wire size once its body has been read."""
+    raw = getattr(response, "raw", None)
+    tell = getattr(raw, "tell", None)
+    if tell is None:
+        return
+    try:
+        wire = tell()
+    except (OSError, ValueError):
+        return
+    if payload_bytes is None:
+        payload_bytes = len(response.content or b"")
+    metrics.REGISTRY.transfer_finished("response", payload_bytes, wire)
+
+
+def _send(self, request, **kwargs):
+    host = metrics.host_of(request.url)
+    body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+    if not compressible(host, request.headers, body):
+        response = _original_send(self, request, **kwargs)
+        if request.body is not None:
+            size = metrics.body_size(request.body)
+            metrics.REGISTRY.transfer_finished("request", size, size)
+    else:
+        compressed = request.copy()
+        compressed.body = gzip_body(body)
+        compressed.headers["Content-Encoding"] = "gzip"
+        compressed.headers["Content-Length"] = str(len(compressed.body))
+        response = _original_send(self, compressed, **kwargs)
+        if retry_plain(host, response.status_code):
+            compressed_status = response.status_code
+            response.close()
+            response = _original_send(self, request, **kwargs)
+            plain_outcome(host, compressed_status, response.status_code)
+            metrics.REGISTRY.transfer_finished("request", len(body), len(body))
+        else:
+            metrics.REGISTRY.transfer_finished("request", len(body), len(compressed.body))
+    if not kwargs.get("stream"):
+        note_response(response)
+    return response
+
+
+def install_transfer_compression():
+    """Patch requests sessions to gzip large bodies (when enabled) and count bytes saved."""
+    if getattr(requests.sessions.Session.send, "_compression_wrapped", False):
+        return
+    requests.sessions.Session.send = _send
+    requests.sessions.Session.send._compression_wrapped = True
@@ -0,0 +1,311 @@
+"""JSON encoding and decoding for request payloads and large responses.
+
+dumps/loads use orjson when it is installed and fall back to the json module.
+orjson writes NaN as null where json would write an invalid NaN literal.
+
+For big listings, `read_frame` parses a streamed response one record at a
+time into per-column lists and builds the DataFrame from those. The raw
+body, the decoded list of dicts and the DataFrame are never all in memory
+at once, and nested objects are flattened without pd.json_normalize.
+"""
+
+import codecs
+import json
+
+import pandas as pd
+
+from services import compression
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_BYTES = 256 * 1024
+ARRAY_KEYS = ("content", "data")  # paged listings and lookup tables wrap their rows in one of these
+
+_decoder = json.JSONDecoder()
+
+
+def dumps(obj, sort_keys=False, default=None) -> bytes:
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, sort_keys=sort_keys, default=default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def response_json(response):
+    """response.json(), decoded with the fast codec."""
+    return loads(response.content)
+
+
+# ======================================================
+# STREAMING
+# ======================================================
+class _Reader:
+    """Text cursor over a byte stream that keeps only the unparsed tail in memory."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.reads = 0  # bumped whenever buf gets new text
+
+    def more(self) -> bool:
+        while not self.eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.eof = True
+                text = self._utf8.decode(b"", final=True)
+            else:
+                text = self._utf8.decode(chunk)
+            if text:
+                self.buf = self.buf[self.pos:] + text
+                self.pos = 0
+                self.reads += 1
+                return True
+        return False
+
+    def finish(self) -> None:
+        """Read to the end of the stream (trailing whitespace) so the response is fully consumed."""
+        while self.more():
+            self.buf, self.pos = "", 0
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at the end), without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.more():
+                    continue
+                raise
+            # A number that ends the buffer may continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self.more():
+                continue
+            self.pos = end
+            return obj
+
+
+class ArrayStream:
+    """Items of a JSON array body, or of the array under one of `keys` in an object body.
+
+    Other top-level fields of an object body are collected in `meta` as they
+    are passed (all of them once iteration finishes).
+    """
+
+    def __init__(self, chunks, keys=ARRAY_KEYS):
+        self.chunks = chunks
+        self.keys = keys
+        self.key = None
+        self.meta = {}
+
+    def __iter__(self):
+        reader = _Reader(self.chunks)
+        first = reader.peek()
+        if first == "[":
+            yield from self._items(reader)
+        elif first == "{":
+            reader.pos += 1
+            while True:
+                char = reader.peek()
+                if char == "}":
+                    reader.pos += 1
+                    break
+                if char == ",":
+                    reader.pos += 1
+                    continue
+                name = reader.value()
+                if reader.peek() != ":":
+                    raise ValueError(f"Malformed JSON object near {name!r}")
+                reader.pos += 1
+                if self.key is None and name in self.keys and reader.peek() == "[":
+                    self.key = name
+                    yield from self._items(reader)
+                else:
+                    self.meta[name] = reader.value()
+        elif first:
+            raise ValueError("Expected a JSON array or object")
+        reader.finish()
+
+    @staticmethod
+    def _items(reader):
+        reader.pos += 1
+        batch_after = 0  # after a failed batch, wait for new text before trying again
+        while True:
+            char = reader.peek()
+            if char == "]":
+                reader.pos += 1
+                return
+            if char == ",":
+                reader.pos += 1
+                continue
+            if not char:
+                raise ValueError("JSON array ended early")
+            batch = None
+            if char == "{" and orjson is not None and reader.reads >= batch_after:
+                batch = _complete_records(reader)
+                if not batch:
+                    batch_after = reader.reads + 1
+            if batch:
+                yield from batch
+            else:
+                yield reader.value()
+
+
+def _complete_records(reader, max_cuts=256, max_parses=3) -> list | None:
+    """Every whole record left in the buffer, decoded in one orjson call.
+
+    The cut is the last "}" that leaves braces and brackets balanced; a cut
+    inside a string or a nested value cannot parse as an array, so orjson
+    confirms it. None sends the caller to the one-record-at-a-time path.
+    """
+    buf, start = reader.buf, reader.pos
+    end = buf.rfind("}", start)
+    if end <= start:
+        return None
+    segment = buf[start:end + 1]
+    opened, closed = segment.count("{"), segment.count("}")
+    brackets = segment.count("[") - segment.count("]")
+    del segment
+    for _ in range(max_cuts):
+        if opened == closed and brackets == 0:
+            try:
+                records = orjson.loads(f"[{buf[start:end + 1]}]")
+            except orjson.JSONDecodeError:
+                max_parses -= 1
+                if not max_parses:
+                    return None
+            else:
+                reader.pos = end + 1
+                return records
+        previous = buf.rfind("}", start, end)
+        if previous <= start:
+            return None
+        tail = buf[previous + 1:end + 1]
+        opened -= tail.count("{")
+        closed -= tail.count("}")
+        brackets -= tail.count("[") - tail.count("]")
+        end = previous
+    return None
+
+
+def _chunks(response):
+    size = 0
+    for chunk in response.iter_content(CHUNK_BYTES):
+        size += len(chunk)
+        yield chunk
+    compression.note_response(response, size)
+
+
+def iter_records(response, keys=ARRAY_KEYS) -> ArrayStream:
+    """Stream the records of a listing response; request it with stream=True to keep memory flat."""
+    return ArrayStream(_chunks(response), keys)
+
+
+def flatten(record: dict, prefix="") -> dict:
+    """Nested objects as dotted columns in pd.json_normalize's order (lists kept, empty objects dropped)."""
+    out, nested = {}, None
+    for key, value in record.items():
+        if value.__class__ is dict:
+            if nested is None:
+                nested = []
+            nested.append((key, value))
+        else:
+            out[prefix + key] = value
+    if nested is None:
+        return record if not prefix else out
+    for key, value in nested:
+        out.update(flatten(value, f"{prefix}{key}."))
+    return out
+
+
+class Columns:
+    """Records gathered column by column; `frame()` builds the DataFrame from the lists.
+
+    Consecutive records with the same keys (most of a listing) are buffered
+    as value tuples and transposed into their columns a run at a time.
+    """
+
+    def __init__(self, flat=True):
+        self.flat = flat
+        self.data: dict[str, list] = {}
+        self.rows = 0
+
+    def _add_run(self, keys, run) -> None:
+        rows, data = self.rows, self.data
+        for key, values in zip(keys, zip(*run)):
+            column = data.get(key)
+            if column is None:
+                column = data[key] = [None] * rows
+            elif len(column) != rows:
+                column.extend([None] * (rows - len(column)))
+            column.extend(values)
+        self.rows = rows + len(run)
+
+    def extend(self, records) -> "Columns":
+        keys, run = None, []
+        for record in records:
+            if record.__class__ is not dict:
+                record = {"value": record}
+            elif self.flat:
+                record = flatten(record)
+            shape = tuple(record)
+            if shape != keys:
+                if run:
+                    self._add_run(keys, run)
+                keys, run = shape, []
+            run.append(tuple(record.values()))
+        if run:
+            self._add_run(keys, run)
+        return self
+
+    def append(self, record) -> None:
+        self.extend((record,))
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        for column in self.data.values():
+            if len(column) < self.rows:
+                column.extend([None] * (self.rows - len(column)))
+        if columns is not None:
+            return pd.DataFrame({name: self.data.get(name, [None] * self.rows) for name in columns}, columns=columns)
+        return pd.DataFrame(self.data)
+
+    def __len__(self):
+        return self.rows
+
+
+def read_columns(response, flat=True, keys=ARRAY_KEYS) -> tuple[Columns, dict]:
+    """Records of a listing response plus the body's other top-level fields.
+
+    For bodies whose column list is in a field that may follow the rows.
+    """
+    stream = iter_records(response, keys)
+    rows = Columns(flat).extend(stream)
+    return rows, stream.meta
+
+
+def read_frame(response, flat=True, columns=None, keys=ARRAY_KEYS) -> tuple[pd.DataFrame, dict]:
+    """DataFrame of a listing response plus the body's other top-level fields."""
+    rows, meta = read_columns(response, flat, keys)
+    return rows.frame(columns), meta
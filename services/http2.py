@@ -0,0 +1,213 @@
+"""httpx transport for the asyncio engine, and optional HTTP/2 for bulk sessions.
+
+services.async_bulk always sends through AsyncTransport (httpx over
+HTTP/1.1 keep-alive, honouring the proxy environment). With BULK_HTTP2=1 and
+h2 installed (`pip install "httpx[http2]"`), https requests from
+services.bulk.session() also go through it instead of urllib3's connection
+pool, and both offer HTTP/2. The protocol is
+negotiated per connection (TLS ALPN): hosts that offer h2 get every
+concurrent request multiplexed as a stream over a few connections, so a bulk
+run opens a handful of sockets and TLS handshakes instead of one per worker;
+anything else stays on HTTP/1.1 keep-alive as before.
+
+BULK_HTTP2=h2c additionally speaks HTTP/2 with prior knowledge to plain
+http:// hosts (the local mock server), which has no fallback.
+
+Requests keep their requests-level API: the adapter hands the undecoded body
+to the usual requests response machinery, so throttling, logging, metrics
+and content decoding are unchanged. Sessions on pool threads share one
+transport running on a background event loop.
+"""
+
+import asyncio
+import functools
+import io
+import logging
+import os
+import ssl
+import threading
+import weakref
+
+import certifi
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates h2 when it is installed)
+except ImportError:
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+MODE = os.getenv("BULK_HTTP2", "0").strip().lower()  # "0", "1" (ALPN on https) or "h2c"
+MAX_KEEPALIVE = int(os.getenv("BULK_HTTP2_MAX_KEEPALIVE", "64"))  # idle HTTP/1.1 fallback connections
+# Connection-specific headers are not allowed on HTTP/2 streams.
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade", "host"}
+
+_loop: asyncio.AbstractEventLoop | None = None
+_shared: "AsyncTransport | None" = None
+_loop_lock = threading.Lock()
+_negotiated: dict[str, str] = {}
+_warned = False
+
+
+def enabled() -> bool:
+    global _warned
+    if MODE in ("", "0", "false", "off"):
+        return False
+    if h2 is None:
+        if not _warned:
+            _warned = True
+            logger.warning("BULK_HTTP2 is set but h2 is not installed; staying on HTTP/1.1")
+        return False
+    return True
+
+
+def schemes() -> tuple[str, ...]:
+    """URL prefixes the HTTP/2 transport should be mounted on."""
+    return ("https://", "http://") if MODE == "h2c" else ("https://",)
+
+
+def negotiated() -> dict[str, str]:
+    """Protocol in use per host, as seen on the latest response."""
+    return dict(_negotiated)
+
+
+def _note_protocol(url, version: str) -> None:
+    from services.metrics import host_of
+
+    host = host_of(str(url))
+    if _negotiated.get(host) != version:
+        _negotiated[host] = version
+        logger.info(f"{host} negotiated {version}")
+
+
+def _strip(headers) -> dict:
+    return {name: value for name, value in headers.items() if value is not None and name.lower() not in HOP_BY_HOP}
+
+
+def _timeout(timeout) -> "httpx.Timeout":
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect, pool=None)
+    return httpx.Timeout(timeout, pool=None)
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context(verify) -> ssl.SSLContext:
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return context
+    cafile = verify if isinstance(verify, str) else os.getenv("REQUESTS_CA_BUNDLE") or certifi.where()
+    return ssl.create_default_context(cafile=cafile)
+
+
+def _transport() -> tuple[asyncio.AbstractEventLoop, "AsyncTransport"]:
+    """Event loop thread that owns the shared transport for the sync adapter.
+
+    httpx's synchronous HTTP/2 connection is not safe when several threads
+    open streams at once (stream ids reach the server out of order), so pool
+    threads hand their requests to this loop instead.
+    """
+    global _loop, _shared
+    with _loop_lock:
+        if _loop is None:
+            _loop, _shared = asyncio.new_event_loop(), AsyncTransport()
+            threading.Thread(target=_loop.run_forever, name="http2-transport", daemon=True).start()
+        return _loop, _shared
+
+
+class HTTP2Adapter(HTTPAdapter):
+    """requests transport adapter that sends through the shared httpx transport."""
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        loop, transport = _transport()
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        future = asyncio.run_coroutine_threadsafe(
+            transport.send(request.method, request.url, request.headers, body, timeout, verify), loop
+        )
+        try:
+            status, reason, headers, content = future.result()
+        except TimeoutError as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except ConnectionError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        raw = HTTPResponse(
+            body=io.BytesIO(content),
+            headers=headers,
+            status=status,
+            reason=reason,
+            preload_content=False,
+            decode_content=True,
+            request_method=request.method,
+            request_url=request.url,
+        )
+        return self.build_response(request, raw)
+
+    def close(self):
+        pass  # the transport is shared by every session
+
+
+# ======================================================
+# ASYNCIO ENGINE
+# ======================================================
+class AsyncTransport:
+    """httpx.AsyncClient per (verify, h2c) pair; one transport per event loop.
+
+    trust_env picks up HTTP(S)_PROXY/NO_PROXY the way requests does.
+    httpcore rescans its whole pool on every request, which turns quadratic
+    with many HTTP/1.1 connections, so without HTTP/2 each pair is split
+    into `shards` clients and every task keeps to one of them (the async
+    engine passes one per worker).
+    """
+
+    def __init__(self, http2: bool = True, shards: int = 1):
+        self._http2 = http2
+        self._shards = 1 if http2 else max(1, shards)
+        self._task_shards: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self._clients: dict[tuple, "httpx.AsyncClient"] = {}
+
+    def _client(self, verify, cleartext) -> "httpx.AsyncClient":
+        task = asyncio.current_task()
+        shard = self._task_shards.setdefault(task, len(self._task_shards) % self._shards) if task else 0
+        key = (verify, cleartext, shard)
+        if key not in self._clients:
+            # No cap on connections: with h2 the pool puts every stream it can
+            # on one connection, and on an HTTP/1.1 fallback the throttle
+            # controller already bounds concurrency.
+            self._clients[key] = httpx.AsyncClient(
+                http1=not cleartext, http2=self._http2, verify=_ssl_context(verify), trust_env=True,
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=MAX_KEEPALIVE),
+            )
+        return self._clients[key]
+
+    async def send(self, method, url, headers, body, timeout, verify):
+        """(status, reason, headers, raw body) for one request; raises OSError/TimeoutError like a socket."""
+        cleartext = self._http2 and MODE == "h2c" and url.startswith("http://")
+        http = self._client(verify, cleartext)
+        try:
+            response = await http.send(
+                http.build_request(method, url, headers=_strip(headers), content=body, timeout=_timeout(timeout)),
+                stream=True,
+            )
+            try:
+                content = b"".join([chunk async for chunk in response.aiter_raw()])
+            finally:
+                await response.aclose()
+        except httpx.TimeoutException as e:
+            raise TimeoutError(str(e) or "timed out") from e
+        except httpx.TransportError as e:
+            raise ConnectionError(str(e) or type(e).__name__) from e
+        if self._http2:
+            _note_protocol(url, response.http_version)
+        return response.status_code, response.reason_phrase, list(response.headers.multi_items()), content
+
+    async def close(self):
+        for http in self._clients.values():
+            await http.aclose()
+        self._clients.clear()
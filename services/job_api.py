@@ -0,0 +1,255 @@
+"""Local HTTP API for submitting module pipeline jobs and collecting results.
+
+Started next to the UI when PORTAL_API_PORT is set (app.py, the Electron
+backend), or on its own with `python -m services.job_api`. It binds to
+127.0.0.1 unless PORTAL_API_BIND says otherwise; when PORTAL_API_KEY is set
+every request must send it as X-API-Key.
+
+Tenant credentials travel with each submission: `Authorization: Bearer
+<portal token>` plus `X-Portal-Host`, or `Authorization: Basic` with the
+portal username and password (a token is requested for the job).
+
+    POST   /jobs/upload/<pipeline>      rows to create/update
+    POST   /jobs/delete/<resource>      ids to delete ("schedules": rows)
+    POST   /jobs/timecards              timecard paycode updates
+    POST   /jobs/export                 {"resources": [...]}
+    GET    /jobs/<id>                   status and progress
+    GET    /jobs/<id>/results           JSONL, or CSV with ?format=csv
+    DELETE /jobs/<id>                   cancel a queued job
+    GET    /pipelines, /health
+
+Bodies are JSON ({"rows": [...], "ids": [...], "workers": 8, "rate": 0}) or
+a CSV/Excel sheet with options in the query string (?workers=8&column=id).
+"""
+
+import base64
+import hmac
+import io
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from services import fastjson, jobs
+from services.resources import RESOURCES_BY_NAME
+from services.tenants import DEFAULT_CLIENT_AUTH, Tenant, login_tenant
+
+logger = logging.getLogger(__name__)
+
+API_PORT = int(os.getenv("PORTAL_API_PORT", "0"))  # 0 disables the API
+API_BIND = os.getenv("PORTAL_API_BIND", "127.0.0.1")
+API_KEY = os.getenv("PORTAL_API_KEY", "")
+MAX_BODY_BYTES = 64 * 1024 * 1024
+EXCEL_TYPES = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-excel",
+)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def tenant_from_headers(headers) -> Tenant:
+    scheme, _, credentials = headers.get("Authorization", "").partition(" ")
+    host = headers.get("X-Portal-Host", "").strip().rstrip("/")
+    if scheme.lower() == "basic":
+        try:
+            username, _, password = base64.b64decode(credentials).decode().partition(":")
+        except ValueError:
+            raise ApiError(401, "Malformed Basic credentials")
+        if not host:
+            raise ApiError(400, "X-Portal-Host header is required")
+        try:
+            return login_tenant(host, host, username, password)
+        except Exception as e:
+            raise ApiError(401, str(e))
+    if scheme.lower() == "bearer" and credentials.strip():
+        if not host:
+            raise ApiError(400, "X-Portal-Host header is required")
+        username = headers.get("X-Portal-Username", "").strip() or "api"
+        return Tenant(name=host, host=host, username=username, token=credentials.strip())
+    raise ApiError(401, "Send the portal token as Authorization: Bearer, or Basic credentials")
+
+
+def read_payload(body: bytes, content_type: str, query: dict, kind: str, target: str) -> tuple[dict, str | None]:
+    """Job payload from a JSON body or an uploaded sheet, plus the file name if any."""
+    options = {key: values[-1] for key, values in query.items()}
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type == "application/json" or not body:
+        try:
+            payload = fastjson.loads(body or b"{}")
+        except ValueError as e:
+            raise ApiError(400, f"Invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise ApiError(400, "JSON body must be an object")
+        return {**options, **payload}, payload.get("file_name")
+
+    try:
+        if content_type in EXCEL_TYPES:
+            frame = pd.read_excel(io.BytesIO(body), dtype=str if kind == "delete" else None)
+        else:
+            frame = pd.read_csv(io.BytesIO(body), dtype=str if kind == "delete" else None)
+    except Exception as e:
+        raise ApiError(400, f"Could not read the uploaded sheet: {e}")
+    frame = frame.fillna("")
+
+    payload = dict(options)
+    if kind == "delete" and target != "schedules":
+        column = options.get("column") or next(
+            (c for c in frame.columns if str(c).strip().lower() == "id"), frame.columns[0]
+        )
+        if column not in frame.columns:
+            raise ApiError(400, f"Column {column!r} not in the sheet")
+        payload["ids"] = frame[column].tolist()
+    else:
+        payload["rows"] = frame
+    return payload, options.get("file_name")
+
+
+class JobApiHandler(BaseHTTPRequestHandler):
+    server_version = "PortalJobAPI/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    # ---------- responses ----------
+    def _send(self, status, data: bytes, content_type="application/json", extra=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, status, obj, extra=None):
+        self._send(status, fastjson.dumps(obj, default=str), extra=extra)
+
+    def _dispatch(self, handler):
+        try:
+            if API_KEY and not hmac.compare_digest(self.headers.get("X-API-Key", ""), API_KEY):
+                raise ApiError(401, "Missing or wrong X-API-Key")
+            url = urlsplit(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            handler(parts, parse_qs(url.query))
+        except ApiError as e:
+            self._json(e.status, {"error": str(e)})
+        except Exception as e:
+            logger.exception(f"job API error on {self.command} {self.path}")
+            self._json(500, {"error": str(e)})
+
+    def _job(self, job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            raise ApiError(404, f"No job {job_id}")
+        return job
+
+    # ---------- routes ----------
+    def do_GET(self):
+        self._dispatch(self._get)
+
+    def do_POST(self):
+        self._dispatch(self._post)
+
+    def do_DELETE(self):
+        self._dispatch(self._delete)
+
+    def _get(self, parts, query):
+        if parts == ["health"]:
+            running = sum(job.status == "running" for job in jobs.recent())
+            self._json(200, {"status": "ok", "running": running, "workers": jobs.JOB_WORKERS})
+        elif parts == ["pipelines"]:
+            self._json(200, {
+                "upload": jobs.targets("upload"),
+                "delete": jobs.targets("delete"),
+                "timecards": [],
+                "export": sorted(RESOURCES_BY_NAME),
+            })
+        elif len(parts) == 2 and parts[0] == "jobs":
+            self._json(200, self._job(parts[1]).to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "results":
+            job = self._job(parts[1])
+            if job.results_path is None:
+                raise ApiError(409, f"Job is {job.status}; results are not available")
+            fmt = query.get("format", ["jsonl"])[-1]
+            if fmt not in ("jsonl", "csv"):
+                raise ApiError(400, "format must be jsonl or csv")
+            self._send(
+                200, jobs.read_results(job, fmt),
+                "text/csv" if fmt == "csv" else "application/x-ndjson",
+                {"Content-Disposition": f'attachment; filename="{job.id}.{fmt}"'},
+            )
+        else:
+            raise ApiError(404, "Not found")
+
+    def _post(self, parts, query):
+        if not parts or parts[0] != "jobs" or len(parts) not in (2, 3):
+            raise ApiError(404, "Not found")
+        kind, target = parts[1], parts[2] if len(parts) == 3 else ""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, f"Body larger than {MAX_BODY_BYTES // (1024 * 1024)} MB")
+        body = self.rfile.read(length)
+
+        tenant = tenant_from_headers(self.headers)
+        payload, file_name = read_payload(body, self.headers.get("Content-Type", ""), query, kind, target)
+        try:
+            job = jobs.submit(kind, target, tenant, payload, file_name)
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        self._json(202, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+
+    def _delete(self, parts, query):
+        if len(parts) != 2 or parts[0] != "jobs":
+            raise ApiError(404, "Not found")
+        job = self._job(parts[1])
+        if not jobs.cancel(job):
+            raise ApiError(409, f"Job is {job.status} and can no longer be cancelled")
+        self._json(200, job.to_dict())
+
+
+_server: ThreadingHTTPServer | None = None
+_server_lock = threading.Lock()
+
+
+def start_api(port: int = API_PORT, host: str = API_BIND) -> ThreadingHTTPServer | None:
+    """Serve the job API on http://host:port once per process."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), JobApiHandler)
+        except OSError as e:
+            logger.warning(f"job API not started on {host}:{port}: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="job-api", daemon=True).start()
+        logger.info(f"job API listening on http://{host}:{port}")
+        return _server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from services.activity_logger import install_requests_logging
+
+    parser = argparse.ArgumentParser(description="Run the portal job API without the UI.")
+    parser.add_argument("--port", type=int, default=API_PORT or 8502)
+    parser.add_argument("--bind", default=API_BIND)
+    args = parser.parse_args()
+
+    os.environ.setdefault("CLIENT_AUTH", DEFAULT_CLIENT_AUTH)
+    install_requests_logging()
+    server = start_api(args.port, args.bind)
+    if server is None:
+        raise SystemExit(2)
+    threading.Event().wait()
@@ -0,0 +1,262 @@
+"""Queued pipeline jobs for the job API.
+
+Jobs run on one process-wide pool of JOB_WORKERS threads. Their requests go
+through services.bulk sessions like the UI's, so API jobs and module runs
+against the same host share its throttle controller (in-flight limit,
+back-off and circuit breaker) instead of competing with each other.
+
+Results are written to data_dir("jobs") as JSONL when a job finishes; job
+records themselves live in memory, the newest MAX_JOBS kept.
+"""
+
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from services import fastjson, pipelines
+from services.activity_logger import job_logging
+from services.bulk import MAX_WORKERS, RATE_PER_SECOND, parse_ids
+from services.local_store import data_dir
+from services.resources import RESOURCES_BY_NAME
+from services.tenants import Tenant
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("PORTAL_JOB_WORKERS", "2"))
+MAX_JOBS = int(os.getenv("PORTAL_MAX_JOBS", "200"))
+KINDS = ("upload", "delete", "timecards", "export")
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="portal-job")
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    target: str
+    tenant: Tenant = field(repr=False)
+    payload: dict = field(repr=False)
+    file_name: str | None = None
+    status: str = "queued"  # queued → running → succeeded | failed | cancelled
+    submitted_at: datetime = field(default_factory=datetime.now)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    done: int = 0
+    total: int = 0
+    ok: int = 0
+    failed: int = 0
+    error: str | None = None
+    results_path: Path | None = None
+    future: object = field(default=None, repr=False)
+
+    @property
+    def label(self) -> str:
+        return " ".join(filter(None, ["API", self.kind, self.target]))
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "host": self.tenant.host,
+            "file_name": self.file_name,
+            "status": self.status,
+            "submitted_at": self.submitted_at.isoformat(timespec="seconds"),
+            "started_at": self.started_at and self.started_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at and self.finished_at.isoformat(timespec="seconds"),
+            "progress": {"done": self.done, "total": self.total},
+            "ok": self.ok,
+            "failed": self.failed,
+            "error": self.error,
+            "results": self.results_path is not None,
+        }
+
+
+def targets(kind: str) -> list[str]:
+    if kind == "upload":
+        return sorted(pipelines.UPLOADS)
+    if kind == "delete":
+        return sorted([*RESOURCES_BY_NAME, "schedules"])
+    return []
+
+
+def _number(payload: dict, key: str, cast, default, minimum):
+    value = payload.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number, got {value!r}")
+    if number < minimum:
+        raise ValueError(f"{key} must be at least {minimum}")
+    return number
+
+
+def _rows(payload: dict) -> pd.DataFrame:
+    rows = payload.get("rows")
+    if isinstance(rows, pd.DataFrame):
+        return rows
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("rows must be a list of objects")
+    return _frame(rows)
+
+
+def submit(kind: str, target: str, tenant: Tenant, payload: dict, file_name: str | None = None) -> Job:
+    """Validate and queue a job; raises ValueError for an unknown kind or target, or input the pipeline would reject.
+
+    Rows are normalised here as the pipeline does, so a sheet with missing
+    columns or unreadable dates is refused before it is queued.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(KINDS)}")
+    if targets(kind) and target not in targets(kind):
+        raise ValueError(f"Unknown {kind} target {target!r}; expected one of {', '.join(targets(kind))}")
+    payload = {
+        **payload,
+        "workers": _number(payload, "workers", int, MAX_WORKERS, 1),
+        "rate": _number(payload, "rate", float, RATE_PER_SECOND, 0),
+    }
+    if kind == "export":
+        resources = payload.get("resources")
+        if not resources:
+            raise ValueError("Name the resources to export")
+        if not isinstance(resources, list):
+            raise ValueError("resources must be a list of resource names")
+        unknown = [name for name in resources if not isinstance(name, str) or name not in RESOURCES_BY_NAME]
+        if unknown:
+            raise ValueError(f"Unknown resource(s): {', '.join(map(str, unknown))}")
+    elif kind == "delete" and target != "schedules":
+        ids = payload.get("ids")
+        if not isinstance(ids, list) or not parse_ids(ids):
+            raise ValueError("ids must be a list of numeric ids")
+    else:
+        rows = _rows(payload)
+        if rows.empty:
+            raise ValueError("No rows in the request")
+        if kind == "upload":
+            pipelines.check_upload(target, rows)
+        elif kind == "timecards":
+            pipelines.normalize_timecards(rows)
+        else:
+            pipelines.normalize_schedule_rows(rows)
+        payload["rows"] = rows
+
+    job = Job(secrets.token_urlsafe(12), kind, target, tenant, payload, file_name)
+    with _lock:
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _, old = _jobs.popitem(last=False)
+            if old.results_path is not None:
+                old.results_path.unlink(missing_ok=True)
+    job.future = _executor.submit(_run, job)
+    logger.info(f"job {job.id} queued: {job.label} host={tenant.host}")
+    return job
+
+
+def get(job_id: str) -> Job | None:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def recent(host: str | None = None) -> list[Job]:
+    with _lock:
+        return [job for job in reversed(_jobs.values()) if host is None or job.tenant.host == host]
+
+
+def cancel(job: Job) -> bool:
+    """Cancel a job that has not started; running jobs finish their rows."""
+    if job.future is not None and job.future.cancel():
+        job.status = "cancelled"
+        job.finished_at = datetime.now()
+        return True
+    return False
+
+
+# ======================================================
+# RUNNING
+# ======================================================
+def _progress(job: Job):
+    def report(done, total):
+        job.done, job.total = done, total
+    return report
+
+
+def _frame(rows) -> pd.DataFrame:
+    return rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows).fillna("")
+
+
+def _execute(job: Job) -> pipelines.PipelineResult | dict:
+    payload, tenant = job.payload, job.tenant
+    workers, rate = payload["workers"], payload["rate"]
+    progress = _progress(job)
+
+    if job.kind == "upload":
+        return pipelines.run_upload(job.target, payload["rows"], tenant, workers, rate, progress)
+    if job.kind == "timecards":
+        return pipelines.run_timecard_update(payload["rows"], tenant, workers, progress)
+    if job.kind == "export":
+        return pipelines.run_export(payload["resources"], tenant, progress)
+    if job.target == "schedules":
+        return pipelines.run_schedule_delete(payload["rows"], tenant, workers, progress)
+    return pipelines.run_delete(job.target, parse_ids(payload["ids"]), tenant, workers, rate, progress)
+
+
+def _run(job: Job) -> None:
+    job.status = "running"
+    job.started_at = datetime.now()
+    started = time.perf_counter()
+    try:
+        with job_logging(job.label, username=job.tenant.username) as log:
+            log.file_name = job.file_name
+            outcome = _execute(job)
+            if isinstance(outcome, dict):
+                records = [{"resource": name, "object": item} for name, items in outcome.items() for item in items]
+                job.ok, job.failed = len(outcome), 0
+            else:
+                records = outcome.results.to_dict("records")
+                job.ok, job.failed = outcome.ok, outcome.failed
+            log.rows = len(records)
+        job.results_path = _save_results(job, records)
+        job.status = "succeeded"
+    except Exception as e:
+        job.error = str(e)
+        job.status = "failed"
+    finally:
+        job.payload = {}  # rows are not needed once the job has run
+        job.finished_at = datetime.now()
+        logger.info(
+            f"job {job.id} {job.status} in {time.perf_counter() - started:.1f}s: "
+            f"{job.ok} ok, {job.failed} failed{f' ({job.error})' if job.error else ''}"
+        )
+
+
+def _save_results(job: Job, records: list[dict]) -> Path:
+    path = data_dir("jobs") / f"{job.id}.jsonl"
+    with path.open("wb") as handle:
+        for record in records:
+            handle.write(fastjson.dumps(record, default=str) + b"\n")
+    return path
+
+
+def read_results(job: Job, fmt: str = "jsonl") -> bytes:
+    """The job's results as JSONL, or CSV (export objects flattened one per row)."""
+    data = job.results_path.read_bytes()
+    if fmt == "jsonl":
+        return data
+    records = (fastjson.loads(line) for line in data.splitlines() if line)
+    if job.kind == "export":
+        records = ({"resource": record["resource"], **record["object"]} for record in records)
+    frame = fastjson.Columns(flat=job.kind == "export").extend(records).frame()
+    return frame.to_csv(index=False).encode("utf-8")
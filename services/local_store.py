@@ -0,0 +1,27 @@
+import os
+import sqlite3
+from pathlib import Path
+
+# Local caches and mirrors live outside the repo / PyInstaller bundle so they
+# survive app restarts and desktop upgrades.
+DATA_DIR = Path(os.getenv("CONFIG_PORTAL_DATA_DIR", Path.home() / ".configuration-portal"))
+
+
+def data_path(*parts: str) -> Path:
+    path = DATA_DIR.joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_dir(*parts: str) -> Path:
+    path = DATA_DIR.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
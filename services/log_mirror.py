@@ -0,0 +1,316 @@
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+import requests
+
+from services.local_store import connect, data_path
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://msyljqazsndtxpritfwy.supabase.co").rstrip("/")
+SUPABASE_KEY = "sb_publishable_HXoFqNveyeQcaFrL8suM1A_UBvL2rpZ"
+
+MIRROR_PATH = data_path("logs_mirror.sqlite")
+SYNC_PAGE_SIZE = 1000
+MIN_SYNC_INTERVAL_SECONDS = 60
+
+HTTP_ACTION_PATTERN = re.compile(r"^(GET|POST|PUT|PATCH|DELETE) (\S+) \[(\d{3}|error)\]$")
+SUMMARY_FIELD_PATTERN = re.compile(r"(\w+)=(\S+)")
+NO_RESPONSE = 0  # status_code for requests logged as [error]: they raised before a response
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id TEXT PRIMARY KEY,
+    username TEXT,
+    module TEXT,
+    action TEXT,
+    file_name TEXT,
+    created_at TEXT NOT NULL,
+    day TEXT NOT NULL,
+    method TEXT,
+    path TEXT,
+    status_code INTEGER
+);
+CREATE INDEX IF NOT EXISTS logs_created_at ON logs (created_at);
+CREATE INDEX IF NOT EXISTS logs_day ON logs (day);
+
+CREATE TABLE IF NOT EXISTS log_daily_rollups (
+    day TEXT NOT NULL,
+    module TEXT NOT NULL,
+    username TEXT NOT NULL,
+    action_kind TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, module, username, action_kind, status_code)
+);
+
+-- Request counts parsed from JOB_SUMMARY rows (their detail rows are only a sample).
+CREATE TABLE IF NOT EXISTS log_job_requests (
+    log_id TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    requests INTEGER NOT NULL,
+    PRIMARY KEY (log_id, status_code)
+);
+
+-- HTTP requests per status: job summary counts plus request rows logged outside a job.
+CREATE TABLE IF NOT EXISTS log_daily_requests (
+    day TEXT NOT NULL,
+    module TEXT NOT NULL,
+    username TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    requests INTEGER NOT NULL,
+    PRIMARY KEY (day, module, username, status_code)
+);
+"""
+
+_sync_lock = threading.Lock()
+_last_sync_at = 0.0
+
+
+def _supabase_headers():
+    return {
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+    }
+
+
+def _open():
+    conn = connect(MIRROR_PATH)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _to_mirror_row(row):
+    created_at = row.get("created_at") or ""
+    action = row.get("action") or ""
+    match = HTTP_ACTION_PATTERN.match(action)
+    return (
+        str(row.get("id")),
+        row.get("username") or "",
+        row.get("module") or "",
+        action,
+        row.get("file_name"),
+        created_at,
+        created_at[:10],
+        match.group(1) if match else None,
+        match.group(2) if match else None,
+        _status_code(match.group(3)) if match else None,
+    )
+
+
+def _status_code(text):
+    return NO_RESPONSE if text == "error" else int(text)
+
+
+def summary_requests(action):
+    """{status_code: requests} from a JOB_SUMMARY action; {} for other actions."""
+    if not action.startswith("JOB_SUMMARY"):
+        return {}
+    fields = dict(SUMMARY_FIELD_PATTERN.findall(action))
+    counts = {}
+    try:
+        for item in fields.get("statuses", "").split(","):
+            if item:
+                code, _, count = item.partition(":")
+                counts[_status_code(code)] = counts.get(_status_code(code), 0) + int(count)
+    except ValueError:
+        return {}
+    return {code: count for code, count in counts.items() if count}
+
+
+def _job_request_rows(rows):
+    return [
+        (log_id, code, count)
+        for log_id, action in rows
+        for code, count in summary_requests(action or "").items()
+    ]
+
+
+def _watermark(conn):
+    value = conn.execute("SELECT MAX(created_at) FROM logs").fetchone()[0]
+    return value
+
+
+def _fetch_page(since, offset):
+    params = {
+        "select": "id,username,module,action,file_name,created_at",
+        "order": "created_at.asc,id.asc",
+    }
+    if since:
+        # gte, not gt: rows sharing the watermark timestamp may have landed
+        # after the previous sync. Duplicates are dropped by the primary key.
+        params["created_at"] = f"gte.{since}"
+    headers = _supabase_headers()
+    headers["Range"] = f"{offset}-{offset + SYNC_PAGE_SIZE - 1}"
+    response = requests.get(f"{SUPABASE_URL}/rest/v1/logs", headers=headers, params=params, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def _refresh_rollups(conn, days):
+    for day in days:
+        conn.execute("DELETE FROM log_daily_rollups WHERE day = ?", (day,))
+        conn.execute("DELETE FROM log_daily_requests WHERE day = ?", (day,))
+        # A job's detail rows go out in the same insert as its summary and so
+        # share its created_at; those are already in the summary's counts.
+        conn.execute(
+            """
+            INSERT INTO log_daily_requests (day, module, username, status_code, requests)
+            SELECT day, module, username, status_code, SUM(requests)
+            FROM (
+                SELECT l.day, l.module, l.username, l.status_code, 1 AS requests
+                FROM logs l
+                WHERE l.day = ? AND l.method IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM logs s
+                      WHERE s.created_at = l.created_at AND s.module = l.module
+                        AND s.username = l.username AND s.action LIKE 'JOB_SUMMARY%'
+                  )
+                UNION ALL
+                SELECT l.day, l.module, l.username, j.status_code, j.requests
+                FROM log_job_requests j JOIN logs l ON l.id = j.log_id
+                WHERE l.day = ?
+            )
+            GROUP BY 1, 2, 3, 4
+            """,
+            (day, day),
+        )
+        conn.execute(
+            """
+            INSERT INTO log_daily_rollups (day, module, username, action_kind, status_code, count)
+            SELECT day, module, username,
+                   CASE
+                       WHEN method IS NOT NULL THEN 'HTTP'
+                       WHEN instr(action, ' ') > 0 THEN substr(action, 1, instr(action, ' ') - 1)
+                       ELSE action
+                   END,
+                   COALESCE(status_code, 0),
+                   COUNT(*)
+            FROM logs
+            WHERE day = ?
+            GROUP BY 1, 2, 3, 4, 5
+            """,
+            (day,),
+        )
+
+
+def sync(force=False):
+    """Pull log rows newer than the local watermark. Returns rows added."""
+    global _last_sync_at
+
+    with _sync_lock:
+        if not force and time.time() - _last_sync_at < MIN_SYNC_INTERVAL_SECONDS:
+            return 0
+
+        conn = _open()
+        try:
+            since = _watermark(conn)
+            added = 0
+            touched_days = set()
+            offset = 0
+            while True:
+                rows = _fetch_page(since, offset)
+                if not rows:
+                    break
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO logs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [_to_mirror_row(row) for row in rows],
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO log_job_requests VALUES (?, ?, ?)",
+                    _job_request_rows((str(row.get("id")), row.get("action")) for row in rows),
+                )
+                added += conn.total_changes - before
+                touched_days.update((row.get("created_at") or "")[:10] for row in rows)
+                if len(rows) < SYNC_PAGE_SIZE:
+                    break
+                offset += SYNC_PAGE_SIZE
+
+            if added:
+                _refresh_rollups(conn, sorted(touched_days))
+            conn.commit()
+        finally:
+            conn.close()
+
+        _last_sync_at = time.time()
+        return added
+
+
+def mirror_status():
+    conn = _open()
+    try:
+        count, first, last = conn.execute(
+            "SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM logs"
+        ).fetchone()
+    finally:
+        conn.close()
+    return {"rows": count, "first": first, "last": last, "last_sync_at": _last_sync_at or None}
+
+
+def query_rollups(sql, params=()):
+    conn = _open()
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def _date_clause(start_day, end_day):
+    clauses, params = [], []
+    if start_day:
+        clauses.append("day >= ?")
+        params.append(str(start_day))
+    if end_day:
+        clauses.append("day <= ?")
+        params.append(str(end_day))
+    return (" AND " + " AND ".join(clauses)) if clauses else "", params
+
+
+def errors_by_module(start_day=None, end_day=None):
+    where, params = _date_clause(start_day, end_day)
+    return query_rollups(
+        f"""
+        SELECT module,
+               SUM(CASE WHEN status_code BETWEEN 400 AND 499 THEN requests ELSE 0 END) AS "4xx",
+               SUM(CASE WHEN status_code >= 500 THEN requests ELSE 0 END) AS "5xx",
+               SUM(CASE WHEN status_code = {NO_RESPONSE} THEN requests ELSE 0 END) AS "no response",
+               SUM(requests) AS total
+        FROM log_daily_requests
+        WHERE 1 = 1{where}
+        GROUP BY module
+        ORDER BY "4xx" + "5xx" + "no response" DESC, total DESC
+        """,
+        params,
+    )
+
+
+def daily_activity(start_day=None, end_day=None, group_by="module"):
+    if group_by not in ("module", "username"):
+        raise ValueError("group_by must be 'module' or 'username'")
+    where, params = _date_clause(start_day, end_day)
+    return query_rollups(
+        f"""
+        SELECT day, {group_by}, SUM(count) AS events
+        FROM log_daily_rollups
+        WHERE 1 = 1{where}
+        GROUP BY day, {group_by}
+        ORDER BY day
+        """,
+        params,
+    )
+
+
+def status_distribution(start_day=None, end_day=None):
+    where, params = _date_clause(start_day, end_day)
+    return query_rollups(
+        f"""
+        SELECT status_code, SUM(requests) AS requests
+        FROM log_daily_requests
+        WHERE 1 = 1{where}
+        GROUP BY status_code
+        ORDER BY status_code
+        """,
+        params,
+    )
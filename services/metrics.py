@@ -0,0 +1,416 @@
+"""Process-wide request and stage metrics.
+
+HTTP calls are recorded by the requests wrapper in services.activity_logger;
+CPU stages are timed with `stage("parse" | "validate" | "build" | "render")`.
+Everything is tagged with the module (and job) running in the current
+context, shown in the sidebar developer panel and exported as Prometheus
+text by `prometheus_text()` / `start_exporter()`.
+"""
+
+import bisect
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+STAGE_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 60000)
+MAX_JOBS = int(os.getenv("METRICS_MAX_JOBS", "20"))  # recent jobs kept with per-job labels
+METRICS_PORT = int(os.getenv("PORTAL_METRICS_PORT", "0"))  # 0 disables the exporter
+STAGES = ("parse", "validate", "build", "render")
+
+_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-f]{8}-[0-9a-f-]{27,})(?=/|$)")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th value (approximate)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return float(self.buckets[-1])
+
+
+class JobMetrics:
+    """Totals for one module run."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, module):
+        self.module = module
+        self.job_id = f"{next(self._ids):06d}"
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.http_ms = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.bytes_saved = 0  # by Content-Encoding, both directions
+        self.stage_ms: dict[str, float] = {}
+
+    @property
+    def duration_ms(self):
+        return ((self.finished or time.perf_counter()) - self.started) * 1000
+
+    def summary(self) -> dict:
+        return {
+            "Job": self.job_id,
+            "Module": self.module,
+            "Duration (ms)": round(self.duration_ms),
+            "Requests": self.requests,
+            "Errors": self.errors,
+            "Retries": self.retries,
+            "HTTP time (ms)": round(self.http_ms),
+            "Sent (KB)": round(self.bytes_out / 1024, 1),
+            "Received (KB)": round(self.bytes_in / 1024, 1),
+            "Saved (KB)": round(self.bytes_saved / 1024, 1),
+            **{f"{name} (ms)": round(ms) for name, ms in self.stage_ms.items()},
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: dict[tuple, Histogram] = {}
+        self.statuses: dict[tuple, int] = {}
+        self.bytes_out: dict[tuple, int] = {}
+        self.bytes_in: dict[tuple, int] = {}
+        self.retries: dict[tuple, int] = {}
+        self.transfer: dict[tuple, list[int]] = {}  # (module, direction) -> [payload, wire] bytes
+        self.in_flight: dict[str, int] = {}
+        self.stages: dict[tuple, Histogram] = {}
+        self.jobs: OrderedDict[str, JobMetrics] = OrderedDict()
+
+    def request_started(self, host):
+        with self._lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+
+    def request_finished(self, host, method, endpoint, status, elapsed_ms, sent, received):
+        job = _current_job.get()
+        module = job.module if job else "none"
+        key = (module, method, endpoint)
+        with self._lock:
+            self.in_flight[host] = max(0, self.in_flight.get(host, 1) - 1)
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS_MS)
+            self.latency[key].observe(elapsed_ms)
+            self.statuses[key + (str(status),)] = self.statuses.get(key + (str(status),), 0) + 1
+            self.bytes_out[key] = self.bytes_out.get(key, 0) + sent
+            self.bytes_in[key] = self.bytes_in.get(key, 0) + received
+            if job is not None:
+                job.requests += 1
+                job.errors += status == "error" or int(status) >= 400
+                job.http_ms += elapsed_ms
+                job.bytes_out += sent
+                job.bytes_in += received
+
+    def retry(self, host):
+        job = _current_job.get()
+        key = (job.module if job else "none", host)
+        with self._lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+            if job is not None:
+                job.retries += 1
+
+    def transfer_finished(self, direction, payload, wire):
+        """Body bytes before and after Content-Encoding for one request or response."""
+        job = _current_job.get()
+        key = (job.module if job else "none", direction)
+        with self._lock:
+            totals = self.transfer.setdefault(key, [0, 0])
+            totals[0] += payload
+            totals[1] += wire
+            if job is not None:
+                job.bytes_saved += payload - wire
+
+    def stage_finished(self, name, elapsed_ms):
+        job = _current_job.get()
+        key = (job.module if job else "none", name)
+        with self._lock:
+            if key not in self.stages:
+                self.stages[key] = Histogram(STAGE_BUCKETS_MS)
+            self.stages[key].observe(elapsed_ms)
+            if job is not None:
+                job.stage_ms[name] = job.stage_ms.get(name, 0.0) + elapsed_ms
+
+    def add_job(self, job):
+        with self._lock:
+            self.jobs[job.job_id] = job
+            while len(self.jobs) > MAX_JOBS:
+                self.jobs.popitem(last=False)
+
+    def endpoint_rows(self, module=None) -> list[dict]:
+        with self._lock:
+            rows = []
+            for (mod, method, endpoint), hist in self.latency.items():
+                if module and mod != module:
+                    continue
+                errors = sum(
+                    count for (m, me, ep, status), count in self.statuses.items()
+                    if (m, me, ep) == (mod, method, endpoint) and (status == "error" or int(status) >= 400)
+                )
+                rows.append({
+                    "Endpoint": f"{method} {endpoint}",
+                    "Calls": hist.count,
+                    "Errors": errors,
+                    "Avg (ms)": round(hist.total / hist.count),
+                    "p50 ≤ (ms)": hist.quantile(0.5),
+                    "p95 ≤ (ms)": hist.quantile(0.95),
+                    "Sent (KB)": round(self.bytes_out.get((mod, method, endpoint), 0) / 1024, 1),
+                    "Received (KB)": round(self.bytes_in.get((mod, method, endpoint), 0) / 1024, 1),
+                })
+        return sorted(rows, key=lambda row: -row["Calls"])
+
+    def transfer_rows(self, module=None) -> list[dict]:
+        with self._lock:
+            items = [(key, list(totals)) for key, totals in self.transfer.items() if not module or key[0] == module]
+        return [
+            {
+                "Module": mod,
+                "Direction": direction,
+                "Payload (KB)": round(payload / 1024, 1),
+                "Wire (KB)": round(wire / 1024, 1),
+                "Saved (KB)": round((payload - wire) / 1024, 1),
+                "Saved %": round(100 * (payload - wire) / payload, 1) if payload else 0.0,
+            }
+            for (mod, direction), (payload, wire) in sorted(items)
+        ]
+
+    def recent_jobs(self, module=None) -> list[dict]:
+        with self._lock:
+            jobs = [job for job in self.jobs.values() if not module or job.module == module]
+        return [job.summary() for job in reversed(jobs)]
+
+
+REGISTRY = Registry()
+_current_job: ContextVar[JobMetrics | None] = ContextVar("metrics_job", default=None)
+
+
+@lru_cache(maxsize=4096)
+def endpoint_of(url: str) -> str:
+    """URL path with ids replaced, so /paycodes/12 and /paycodes/13 share a series."""
+    return _ID_SEGMENT.sub("/{id}", urlsplit(url).path.rstrip("/")) or "/"
+
+
+def host_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def current_job() -> JobMetrics | None:
+    return _current_job.get()
+
+
+@contextmanager
+def job(module: str):
+    """Tag requests and stages in the block with module and a fresh job id."""
+    metrics = JobMetrics(module)
+    token = _current_job.set(metrics)
+    REGISTRY.add_job(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.finished = time.perf_counter()
+        _current_job.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.stage_finished(name, (time.perf_counter() - started) * 1000)
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapped
+    return decorate
+
+
+def install_parse_timing():
+    """Time every pandas sheet read as the parse stage."""
+    import pandas as pd
+
+    for name in ("read_excel", "read_csv"):
+        reader = getattr(pd, name)
+        if getattr(reader, "_stage_timed", False):
+            continue
+        wrapped = timed("parse")(reader)
+        wrapped._stage_timed = True
+        setattr(pd, name, wrapped)
+
+
+def install_render_timing():
+    """Time Streamlit's table elements, where rendering results costs CPU, as the render stage."""
+    import streamlit as st
+
+    for name in ("dataframe", "data_editor", "table"):
+        element = getattr(st, name)
+        if getattr(element, "_stage_timed", False):
+            continue
+        wrapped = timed("render")(element)
+        wrapped._stage_timed = True
+        setattr(st, name, wrapped)
+
+
+def body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode())
+    return 0  # streamed/file bodies are not read just to be counted
+
+
+# ======================================================
+# PROMETHEUS TEXT
+# ======================================================
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name, hist, **labels):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(hist.buckets, hist.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound / 1000)} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {hist.total / 1000:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+    return lines
+
+
+def prometheus_text() -> str:
+    registry = REGISTRY
+    with registry._lock:
+        lines = [
+            "# HELP portal_http_request_duration_seconds HTTP request latency.",
+            "# TYPE portal_http_request_duration_seconds histogram",
+        ]
+        for (module, method, endpoint), hist in registry.latency.items():
+            lines += _histogram_lines("portal_http_request_duration_seconds", hist, module=module, method=method, endpoint=endpoint)
+
+        lines += ["# HELP portal_http_responses_total Responses by status.", "# TYPE portal_http_responses_total counter"]
+        for (module, method, endpoint, status), count in registry.statuses.items():
+            lines.append(f"portal_http_responses_total{_labels(module=module, method=method, endpoint=endpoint, status=status)} {count}")
+
+        for metric, values, help_text in (
+            ("portal_http_request_bytes_total", registry.bytes_out, "Request body bytes sent."),
+            ("portal_http_response_bytes_total", registry.bytes_in, "Response body bytes received."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for (module, method, endpoint), total in values.items():
+                lines.append(f"{metric}{_labels(module=module, method=method, endpoint=endpoint)} {total}")
+
+        lines += [
+            "# HELP portal_http_wire_bytes_total Body bytes on the wire after Content-Encoding.",
+            "# TYPE portal_http_wire_bytes_total counter",
+        ]
+        for (module, direction), (_, wire) in registry.transfer.items():
+            lines.append(f"portal_http_wire_bytes_total{_labels(module=module, direction=direction)} {wire}")
+        lines += [
+            "# HELP portal_http_compression_saved_bytes_total Body bytes saved by Content-Encoding.",
+            "# TYPE portal_http_compression_saved_bytes_total counter",
+        ]
+        for (module, direction), (payload, wire) in registry.transfer.items():
+            lines.append(f"portal_http_compression_saved_bytes_total{_labels(module=module, direction=direction)} {payload - wire}")
+
+        lines += ["# HELP portal_http_retries_total Requests retried after 429/503.", "# TYPE portal_http_retries_total counter"]
+        for (module, host), count in registry.retries.items():
+            lines.append(f"portal_http_retries_total{_labels(module=module, host=host)} {count}")
+
+        lines += ["# HELP portal_http_in_flight Requests currently in flight.", "# TYPE portal_http_in_flight gauge"]
+        for host, count in registry.in_flight.items():
+            lines.append(f"portal_http_in_flight{_labels(host=host)} {count}")
+
+        lines += ["# HELP portal_stage_duration_seconds CPU stage duration.", "# TYPE portal_stage_duration_seconds histogram"]
+        for (module, name), hist in registry.stages.items():
+            lines += _histogram_lines("portal_stage_duration_seconds", hist, module=module, stage=name)
+
+        lines += ["# HELP portal_job_duration_seconds Duration of recent module runs.", "# TYPE portal_job_duration_seconds gauge"]
+        for metrics in registry.jobs.values():
+            lines.append(f"portal_job_duration_seconds{_labels(module=metrics.module, job=metrics.job_id)} {metrics.duration_ms / 1000:.3f}")
+        lines += ["# HELP portal_job_requests Requests made by recent module runs.", "# TYPE portal_job_requests gauge"]
+        for metrics in registry.jobs.values():
+            lines.append(f"portal_job_requests{_labels(module=metrics.module, job=metrics.job_id)} {metrics.requests}")
+    return "\n".join(lines) + "\n"
+
+
+_exporter: ThreadingHTTPServer | None = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(port: int = METRICS_PORT, host: str = "127.0.0.1") -> ThreadingHTTPServer | None:
+    """Serve prometheus_text() on http://host:port/metrics once per process."""
+    global _exporter
+    if not port:
+        return None
+    with _exporter_lock:
+        if _exporter is not None:
+            return _exporter
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                data = prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        try:
+            _exporter = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            logger.warning(f"metrics exporter not started on {host}:{port}: {e}")
+            return None
+        _exporter.daemon_threads = True
+        threading.Thread(target=_exporter.serve_forever, daemon=True).start()
+        logger.info(f"metrics exporter listening on http://{host}:{port}/metrics")
+        return _exporter
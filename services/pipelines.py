@@ -0,0 +1,189 @@
+"""Module upload, delete and export pipelines without the Streamlit UI.
+
+Each pipeline reuses the module's own prepare/send functions (or the shared
+bulk delete and resource listing), so a run from the command line or the job
+API builds exactly the payloads the UI would.
+"""
+
+import importlib
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+import pandas as pd
+
+from services import snapshot
+from services.bulk import MAX_WORKERS, RATE_PER_SECOND, delete_ids, send_rows
+from services.preflight import block_rows, preflight
+from services.resources import RESOURCES_BY_NAME, fetch_resources
+from services.tenants import Tenant
+
+
+@dataclass(frozen=True)
+class UploadPipeline:
+    name: str
+    module: str
+    prepare: str
+    send: str
+    resource: str
+    references: str | None = None  # module attribute holding its ForeignKeys
+    ok_column: str = "Status"
+    ok_values: tuple = ("Success",)
+    concurrent: bool = False  # send() runs its rows through bulk.run_steps itself
+    columns: tuple = ()  # sheet columns prepare() reads directly rather than through a Schema
+
+    def load(self):
+        module = importlib.import_module(self.module)
+        references = getattr(module, self.references) if self.references else ()
+        return getattr(module, self.prepare), getattr(module, self.send), references
+
+
+UPLOADS = {
+    pipeline.name: pipeline
+    for pipeline in (
+        UploadPipeline(
+            "paycodes", "modules.paycodes", "_prepare_paycode_rows", "_send_paycode_rows", "paycodes",
+            references="PAYCODE_REFERENCES", concurrent=True,
+        ),
+        UploadPipeline(
+            "shift_templates", "modules.shift_templates", "_prepare_shift_rows", "_send_shift_rows", "shift_templates",
+            concurrent=True,
+        ),
+        UploadPipeline(
+            "overtime_policies", "modules.overtime_policies", "_prepare_overtime_rows", "_send_overtime_rows",
+            "overtime_policies", ok_values=(200, 201),
+        ),
+        UploadPipeline(
+            "accrual_policies", "modules.accrual_policies", "_prepare_policy_rows", "_send_policy_rows",
+            "accrual_policies", references="POLICY_REFERENCES", ok_values=("SUCCESS",),
+        ),
+        UploadPipeline(
+            "punches", "modules.punch", "_prepare_punch_rows", "_send_punch_rows", "punches",
+            ok_column="status", ok_values=("SUCCESS",), concurrent=True, columns=("externalNumber", "dateTime"),
+        ),
+    )
+}
+
+
+@dataclass
+class PipelineResult:
+    results: pd.DataFrame
+    ok_column: str
+    ok_values: tuple
+
+    @property
+    def ok(self) -> int:
+        if self.results.empty or self.ok_column not in self.results:
+            return 0
+        return int(self.results[self.ok_column].isin(self.ok_values).sum())
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.ok
+
+
+def check_upload(name: str, df: pd.DataFrame) -> None:
+    missing = [column for column in UPLOADS[name].columns if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+
+def normalize_schedule_rows(df: pd.DataFrame) -> pd.DataFrame:
+    from modules.schedule_delete import _normalize_upload
+
+    return _normalize_upload(df)
+
+
+def normalize_timecards(df: pd.DataFrame) -> pd.DataFrame:
+    """Timecard Updation's column names and ISO dates; raises ValueError for missing columns or bad dates."""
+    from modules.timecard_updation import _normalize_timecard_upload
+
+    df, bad_dates = _normalize_timecard_upload(df)
+    if not bad_dates.empty:
+        raise ValueError(f"Invalid attendanceDate in row(s): {', '.join(str(i + 2) for i in bad_dates.index[:20])}")
+    return df
+
+
+def prepare_upload(name: str, df: pd.DataFrame, tenant: Tenant | None = None) -> list[dict]:
+    """Module payloads for df; with a tenant, rows with missing references are blocked."""
+    check_upload(name, df)
+    prepare, _, references = UPLOADS[name].load()
+    prepared = prepare(df)
+    if tenant is not None and references:
+        checked = preflight(df, references, tenant.host, tenant.headers())
+        prepared = block_rows(prepared, checked.row_errors())
+    return prepared
+
+
+def send_upload(
+    name: str,
+    prepared: list[dict],
+    tenant: Tenant,
+    max_workers: int = MAX_WORKERS,
+    rate_per_second: float = RATE_PER_SECOND,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> PipelineResult:
+    pipeline = UPLOADS[name]
+    _, send, _ = pipeline.load()
+    send = partial(send, base_url=tenant.api_url(pipeline.resource), headers=tenant.headers())
+    if pipeline.concurrent:
+        results = send(prepared, max_workers=max_workers, rate_per_second=rate_per_second, on_progress=on_progress)
+    else:
+        results = send_rows(prepared, send, max_workers, rate_per_second, on_progress)
+    snapshot.invalidate(tenant.host, pipeline.resource)
+    return PipelineResult(pd.DataFrame(results), pipeline.ok_column, pipeline.ok_values)
+
+
+def run_upload(name, df, tenant, max_workers=MAX_WORKERS, rate_per_second=RATE_PER_SECOND, on_progress=None):
+    return send_upload(name, prepare_upload(name, df, tenant), tenant, max_workers, rate_per_second, on_progress)
+
+
+def run_delete(
+    resource: str,
+    ids,
+    tenant: Tenant,
+    max_workers: int = MAX_WORKERS,
+    rate_per_second: float = RATE_PER_SECOND,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> PipelineResult:
+    results = delete_ids(tenant.api_url(resource), ids, tenant.headers(), max_workers, rate_per_second, on_progress)
+    snapshot.invalidate(tenant.host, resource)
+    return PipelineResult(results, "Status", ("Deleted",))
+
+
+def run_schedule_delete(
+    df: pd.DataFrame,
+    tenant: Tenant,
+    max_workers: int = MAX_WORKERS,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> PipelineResult:
+    """Schedule Delete's planner lookup + delete flow, max_workers rows at a time."""
+    from modules.schedule_delete import _run_delete_flow
+
+    results = _run_delete_flow(normalize_schedule_rows(df), tenant.host, tenant.token, max_workers, on_progress)
+    return PipelineResult(results, "status", ("SUCCESS",))
+
+
+def run_timecard_update(
+    df: pd.DataFrame,
+    tenant: Tenant,
+    max_workers: int = MAX_WORKERS,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> PipelineResult:
+    """Timecard Updation's per-row GET + POST, max_workers rows at a time."""
+    from modules.timecard_updation import TIMECARD_REFERENCES, _paycode_map, _send_timecard_rows
+
+    df = normalize_timecards(df)
+    headers = tenant.headers()
+    blocked = preflight(df, TIMECARD_REFERENCES, tenant.host, headers).row_errors()
+    results = _send_timecard_rows(
+        df, tenant.host, headers, _paycode_map(tenant.host, headers), blocked, max_workers, on_progress,
+    )
+    return PipelineResult(pd.DataFrame(results), "Status", ("SUCCESS",))
+
+
+def run_export(names, tenant: Tenant, on_progress=None) -> dict[str, list[dict]]:
+    unknown = [name for name in names if name not in RESOURCES_BY_NAME]
+    if unknown:
+        raise ValueError(f"Unknown resource(s): {', '.join(unknown)}")
+    return fetch_resources(tenant.host, tenant.headers(), names, on_progress)
@@ -0,0 +1,140 @@
+"""Referential checks for uploads before anything is written.
+
+Modules declare which upload columns hold ids of other resources. Those ids are
+checked against the configuration snapshot in one vectorised pass, so rows that
+reference something missing on the tenant are rejected without an API call.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from services import metrics, snapshot
+from services.schema import BLANK_VALUES, join_row_errors
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    column: str  # exact header, or a pattern such as "takingPaycodeID{n}"
+    resource: str
+
+    def columns(self, df: pd.DataFrame) -> list:
+        if "{n}" in self.column:
+            pattern = re.compile(re.escape(self.column.strip()).replace(r"\{n\}", r"\d+"), re.IGNORECASE)
+            return [name for name in df.columns if pattern.fullmatch(str(name).strip())]
+        wanted = self.column.strip().lower()
+        return [name for name in df.columns if str(name).strip().lower() == wanted]
+
+
+@dataclass
+class PreflightResult:
+    errors: pd.DataFrame
+    unchecked: list[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    def row_errors(self) -> dict[int, str]:
+        return join_row_errors(self.errors)
+
+
+def _references(df: pd.DataFrame, foreign_keys) -> pd.DataFrame:
+    """Every non-blank integer id in the foreign-key columns, one row per cell."""
+    frames = []
+    for fk in foreign_keys:
+        for column in fk.columns(df):
+            frames.append(pd.DataFrame({
+                "row_index": df.index,
+                "Column": str(column).strip(),
+                "resource": fk.resource,
+                "Value": df[column].to_numpy(),
+            }))
+    if not frames:
+        return pd.DataFrame(columns=["row_index", "Column", "resource", "Value", "id"])
+
+    refs = pd.concat(frames, ignore_index=True)
+    text = refs["Value"].astype("string").str.strip()
+    numbers = pd.to_numeric(text.mask(text.str.lower().isin(BLANK_VALUES), pd.NA), errors="coerce")
+    # Blanks and malformed numbers are left to the module's schema.
+    keep = (numbers.notna() & (numbers % 1 == 0)).fillna(False).to_numpy(dtype=bool)
+    refs = refs[keep].copy()
+    refs["id"] = numbers[keep].astype("int64").to_numpy()
+    return refs
+
+
+def _missing(refs: pd.DataFrame, ids: dict[str, set[int]]) -> pd.Series:
+    pairs = [(resource, object_id) for resource, values in ids.items() for object_id in values]
+    known = pd.MultiIndex.from_arrays(
+        [[pair[0] for pair in pairs], [pair[1] for pair in pairs]], names=["resource", "id"]
+    )
+    checked = refs["resource"].isin(list(ids)).to_numpy()
+    found = pd.MultiIndex.from_frame(refs[["resource", "id"]]).isin(known)
+    return pd.Series(checked & ~found, index=refs.index)
+
+
+def _load_ids(host, headers, names, refresh_all=False) -> tuple[dict[str, set[int]], list[str], set[str]]:
+    """Snapshot id sets for names; returns (ids, unavailable, refreshed)."""
+    stale = list(names) if refresh_all else snapshot.stale_resources(host, names=names)
+    failed = []
+    if stale:
+        report = snapshot.refresh(host, headers, stale)
+        failed = report.loc[report["Status"] != "OK", "Resource"].tolist()
+    ids = {name: snapshot.object_ids(host, name) for name in names if name not in failed}
+    return ids, failed, set(stale) - set(failed)
+
+
+@metrics.timed("validate")
+def preflight(df: pd.DataFrame, foreign_keys, host, headers) -> PreflightResult:
+    """Check every referenced id in df exists on host.
+
+    Ids come from the snapshot; stale resources are refreshed first. If a
+    cached set misses something, that resource is re-listed once before the
+    row is rejected, so objects created elsewhere a minute ago still pass.
+    """
+    started = time.perf_counter()
+    refs = _references(df, foreign_keys)
+    names = sorted(set(refs["resource"]))
+    if not names:
+        return PreflightResult(pd.DataFrame(columns=["Row", "row_index", "Column", "Value", "Error"]))
+
+    ids, unchecked, refreshed = _load_ids(host, headers, names)
+    missing = _missing(refs, ids)
+
+    retry = sorted(set(refs.loc[missing, "resource"]) - refreshed)
+    if retry:
+        retried, failed, _ = _load_ids(host, headers, retry, refresh_all=True)
+        ids.update(retried)
+        for name in failed:
+            ids.pop(name, None)
+        unchecked += failed
+        missing = _missing(refs, ids)
+
+    errors = refs.loc[missing, ["row_index", "Column", "Value"]].copy()
+    errors["Error"] = (
+        errors["Column"] + " " + refs.loc[missing, "id"].astype(str) + " not found in " + refs.loc[missing, "resource"]
+    )
+    errors = errors.sort_values("row_index", kind="stable", ignore_index=True)
+    errors.insert(0, "Row", errors["row_index"] + 1)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        f"preflight host={host} references={len(refs)} missing={len(errors)} "
+        f"unchecked={unchecked} ms={elapsed_ms:.0f}"
+    )
+    return PreflightResult(errors, unchecked, elapsed_ms)
+
+
+def block_rows(prepared: list[dict], row_errors: dict[int, str]) -> list[dict]:
+    """Copy of prepared upload items with pre-flight failures marked as errors."""
+    if not row_errors:
+        return prepared
+    blocked = []
+    for item in prepared:
+        message = row_errors.get(item["Row"] - 1)
+        if message and "error" not in item:
+            item = {**item, "error": f"Pre-flight: {message}"}
+        blocked.append(item)
+    return blocked
@@ -0,0 +1,314 @@
+"""On-demand sampling profiler and allocation report for one module run.
+
+Off unless PORTAL_PROFILE names the module ("Org Locations,Paycodes" or
+"all") or an admin enables it from the sidebar; when off, profile_run() is a
+set lookup and nothing else. A profiled run samples the script thread and the
+bulk pool threads while they work for it every PROFILE_INTERVAL_MS (other
+sessions' threads are left out), traces allocations with
+tracemalloc, and saves an HTML report (flame graph + top allocation sites)
+and a collapsed-stack file for flamegraph.pl / speedscope.
+
+Sampling costs a few percent; tracemalloc slows allocation-heavy code several
+times over, so PROFILE_TRACEMALLOC=0 leaves it out when only timings matter.
+"""
+
+import html
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from services.local_store import data_dir
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+TRACE_ALLOCATIONS = os.getenv("PROFILE_TRACEMALLOC", "1").lower() not in ("0", "false", "no")
+TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+PEAK_SNAPSHOT_GROWTH = 1.2  # re-snapshot when traced memory passes the last snapshot by this factor
+PEAK_SNAPSHOT_MIN_BYTES = 1 << 20
+PEAK_SNAPSHOT_INTERVAL_SECONDS = 1.0
+TOP_ALLOCATIONS = 25
+MAX_REPORTS = 20
+MIN_FLAME_SHARE = 0.002  # frames below this share of samples are not drawn
+
+ENV_MODULES = {item.strip() for item in os.getenv("PORTAL_PROFILE", "").split(",") if item.strip()}
+_enabled_modules: set[str] = set()
+_reports: list["ProfileReport"] = []
+_lock = threading.Lock()
+_active_sampler: ContextVar["Sampler | None"] = ContextVar("profile_sampler", default=None)
+
+
+@dataclass
+class ProfileReport:
+    module: str
+    started_at: datetime
+    duration_s: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    allocations: list[dict] = field(default_factory=list)
+    peak_kb: float = 0.0
+    html_path: Path | None = None
+    collapsed_path: Path | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.started_at:%Y%m%d_%H%M%S}_{self.module.lower().replace(' ', '-')}"
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+    def to_html(self) -> str:
+        return _render_html(self)
+
+
+def should_profile(module: str) -> bool:
+    if not ENV_MODULES and not _enabled_modules:
+        return False
+    return "all" in ENV_MODULES or module in ENV_MODULES or "all" in _enabled_modules or module in _enabled_modules
+
+
+def set_enabled(modules) -> None:
+    """Profile the next runs of modules in every session (admin switch)."""
+    with _lock:
+        _enabled_modules.clear()
+        _enabled_modules.update(modules)
+
+
+def enabled_modules() -> set[str]:
+    return set(ENV_MODULES) | set(_enabled_modules)
+
+
+def recent_reports(module=None) -> list[ProfileReport]:
+    with _lock:
+        return [report for report in reversed(_reports) if module is None or report.module == module]
+
+
+# ======================================================
+# SAMPLER
+# ======================================================
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+class Sampler(threading.Thread):
+    """Samples the target thread and the worker threads registered with it."""
+
+    def __init__(self, target_id: int, interval: float, skip: int = 0):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target_id = target_id
+        self.skip = skip  # outer frames of the target thread (the Streamlit runtime) left out
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.peak_snapshot: tracemalloc.Snapshot | None = None
+        self._snapshot_bytes = PEAK_SNAPSHOT_MIN_BYTES
+        self._snapshot_at = 0.0
+        self._workers: dict[int, str] = {}  # thread id -> name prefix, while working for this run
+        self._stopped = threading.Event()
+
+    def add_worker(self, thread_id: int, name: str) -> None:
+        self._workers[thread_id] = name.split("_")[0]
+
+    def remove_worker(self, thread_id: int) -> None:
+        self._workers.pop(thread_id, None)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in (self.target_id, *list(self._workers)):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                if thread_id == self.target_id:
+                    self.stacks[("script", *stack[self.skip:])] += 1
+                else:
+                    self.stacks[(self._workers.get(thread_id, "thread"), *stack)] += 1
+            self.samples += 1
+            if tracemalloc.is_tracing():
+                self._snapshot_if_peak()
+
+    def _snapshot_if_peak(self):
+        # Allocations freed before the run ends would never show in the final
+        # snapshot, so keep one taken near the high-water mark as well.
+        current = tracemalloc.get_traced_memory()[0]
+        now = time.monotonic()
+        if current >= self._snapshot_bytes and now - self._snapshot_at >= PEAK_SNAPSHOT_INTERVAL_SECONDS:
+            self.peak_snapshot = tracemalloc.take_snapshot()
+            self._snapshot_bytes = current * PEAK_SNAPSHOT_GROWTH
+            self._snapshot_at = now
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+@contextmanager
+def profile_run(module: str):
+    """Profile the block when module is enabled; yields the report or None."""
+    if not should_profile(module):
+        yield None
+        return
+
+    report = ProfileReport(module, datetime.now())
+    started_tracing = TRACE_ALLOCATIONS and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+    caller = sys._getframe(2)  # past contextmanager.__enter__
+    depth = 0
+    while caller is not None:
+        depth += 1
+        caller = caller.f_back
+    sampler = Sampler(threading.get_ident(), SAMPLE_INTERVAL_SECONDS, skip=depth - 1)
+    started = time.perf_counter()
+    sampler.start()
+    token = _active_sampler.set(sampler)
+    try:
+        yield report
+    finally:
+        _active_sampler.reset(token)
+        sampler.stop()
+        report.duration_s = time.perf_counter() - started
+        report.samples = sampler.samples
+        report.stacks = sampler.stacks
+        if started_tracing:
+            report.peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            final = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report.allocations = _top_allocations(final, "end")
+            if sampler.peak_snapshot is not None:
+                report.allocations = _top_allocations(sampler.peak_snapshot, "peak") + report.allocations
+        _save(report)
+
+
+@contextmanager
+def worker_thread():
+    """Sample the current thread for the profiled run in this context, if any.
+
+    Pool threads run tasks in a copy of the caller's context, so they find
+    the sampler of the run that submitted the task.
+    """
+    sampler = _active_sampler.get()
+    if sampler is None:
+        yield
+        return
+    thread = threading.current_thread()
+    sampler.add_worker(thread.ident, thread.name)
+    try:
+        yield
+    finally:
+        sampler.remove_worker(thread.ident)
+
+
+def _top_allocations(snapshot, when) -> list[dict]:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, __file__),
+    ))
+    return [
+        {
+            "When": when,
+            "Site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "Size (KB)": round(stat.size / 1024, 1),
+            "Blocks": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    ]
+
+
+def _save(report: ProfileReport) -> None:
+    folder = data_dir("profiles")
+    try:
+        report.html_path = folder / f"{report.name}.html"
+        report.html_path.write_text(report.to_html(), encoding="utf-8")
+        report.collapsed_path = folder / f"{report.name}.collapsed"
+        report.collapsed_path.write_text(report.collapsed(), encoding="utf-8")
+    except OSError as e:
+        logger.warning(f"profile report not saved: {e}")
+    with _lock:
+        _reports.append(report)
+        del _reports[:-MAX_REPORTS]
+    logger.info(
+        f"profiled {report.module} duration={report.duration_s:.2f}s "
+        f"samples={report.samples} peak={report.peak_kb:.0f}KB report={report.html_path}"
+    )
+
+
+# ======================================================
+# HTML REPORT
+# ======================================================
+def _tree(stacks: Counter) -> dict:
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["value"] += count
+        node = root
+        for label in stack:
+            node = node["children"].setdefault(label, {"name": label, "value": 0, "children": {}})
+            node["value"] += count
+    return root
+
+
+def _flame_rows(node, total, depth=0, left=0.0, rows=None):
+    rows = [] if rows is None else rows
+    width = node["value"] / total
+    if width < MIN_FLAME_SHARE:
+        return rows
+    rows.append((depth, left, width, node["name"], node["value"]))
+    offset = left
+    for child in sorted(node["children"].values(), key=lambda child: -child["value"]):
+        _flame_rows(child, total, depth + 1, offset, rows)
+        offset += child["value"] / total
+    return rows
+
+
+def _render_html(report: ProfileReport) -> str:
+    total = max(sum(report.stacks.values()), 1)
+    rows = _flame_rows(_tree(report.stacks), total)
+    depth = max((row[0] for row in rows), default=0) + 1
+    bars = []
+    for level, left, width, name, count in rows:
+        hue = 20 + (hash(name.split(" (")[0]) % 40)
+        label = html.escape(name)
+        bars.append(
+            f'<div class="f" style="left:{left * 100:.3f}%;width:{width * 100:.3f}%;top:{level * 18}px;'
+            f'background:hsl({hue},85%,62%)" title="{label} — {count} samples ({count / total:.1%})">{label}</div>'
+        )
+    allocations = "".join(
+        f"<tr><td>{item['When']}</td><td>{html.escape(item['Site'])}</td><td>{item['Size (KB)']}</td><td>{item['Blocks']}</td></tr>"
+        for item in report.allocations
+    )
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>{html.escape(report.module)} profile</title>
+<style>
+body {{ font-family: sans-serif; margin: 20px; }}
+.flame {{ position: relative; height: {depth * 18}px; }}
+.f {{ position: absolute; height: 17px; overflow: hidden; white-space: nowrap; font: 11px monospace;
+      border-radius: 2px; box-sizing: border-box; padding-left: 2px; cursor: default; }}
+.f:hover {{ outline: 1px solid #333; }}
+table {{ border-collapse: collapse; }} td, th {{ border: 1px solid #ddd; padding: 4px 8px; font: 12px monospace; }}
+</style></head><body>
+<h2>{html.escape(report.module)} · {report.started_at:%Y-%m-%d %H:%M:%S}</h2>
+<p>{report.duration_s:.2f}s · {report.samples} samples every {SAMPLE_INTERVAL_SECONDS * 1000:g} ms ·
+peak traced memory {f"{report.peak_kb:,.0f} KB" if report.allocations else "not traced"}</p>
+<h3>Flame graph</h3><p>Root at the top; width is the share of samples. Hover for counts.</p>
+<div class="flame">{''.join(bars)}</div>
+<h3>Top allocation sites</h3><p>Live memory by line near the run's peak and at its end.</p>
+<table><tr><th>When</th><th>Site</th><th>Size (KB)</th><th>Blocks</th></tr>{allocations}</table>
+</body></html>
+"""
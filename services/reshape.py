@@ -0,0 +1,84 @@
+"""Wide-to-nested reshaping for templates with numbered column groups.
+
+Templates encode lists as repeated columns (amount1, amount2, ...). A
+NumberedGroup detects which of those columns an upload actually has, melts
+them into one long frame, coerces the long frame with a Schema and groups the
+entries back per source row, so the cost follows the data present rather than
+the widest possible template.
+"""
+
+import re
+from dataclasses import dataclass
+
+import pandas as pd
+
+from services.schema import BLANK_VALUES, Schema
+
+
+def _pattern_regex(pattern: str) -> re.Pattern:
+    return re.compile("^" + re.escape(pattern).replace(re.escape("{n}"), r"(\d+)") + "$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class NumberedGroup:
+    # field name -> column pattern with an "{n}" placeholder, e.g. "amount{n}"
+    fields: dict[str, str]
+    schema: Schema
+
+    def columns(self, df: pd.DataFrame) -> dict[str, dict[int, str]]:
+        """Map each field to the {n: column} pairs present in the frame."""
+        found: dict[str, dict[int, str]] = {field: {} for field in self.fields}
+        for field, pattern in self.fields.items():
+            regex = _pattern_regex(pattern)
+            for column in df.columns:
+                match = regex.match(str(column).strip())
+                if match:
+                    found[field][int(match.group(1))] = column
+        return found
+
+    def melt(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Long frame of non-blank entries: row_index, n and one column per field."""
+        found = self.columns(df)
+        indexes = sorted(set().union(*(columns.keys() for columns in found.values())))
+        if not indexes:
+            return pd.DataFrame(columns=["row_index", "n", *self.fields])
+
+        parts = []
+        for n in indexes:
+            part = pd.DataFrame(
+                {
+                    field: df[columns[n]] if n in columns else pd.Series(pd.NA, index=df.index, dtype="object")
+                    for field, columns in found.items()
+                },
+                index=df.index,
+            )
+            part.insert(0, "n", n)
+            part.insert(0, "row_index", df.index)
+            parts.append(part)
+        long = pd.concat(parts, ignore_index=True)
+
+        text = long[list(self.fields)].astype("string").apply(lambda column: column.str.strip().str.lower())
+        present = ~(text.isna() | text.isin(BLANK_VALUES)).all(axis=1)
+        long = long[present.to_numpy()]
+        return long.sort_values(["row_index", "n"], kind="stable", ignore_index=True)
+
+    def nest(self, df: pd.DataFrame) -> tuple[dict[int, list[dict]], dict[int, str]]:
+        """Typed entries per source row, plus coercion errors per source row."""
+        long = self.melt(df)
+        if long.empty:
+            return {}, {}
+
+        coerced = self.schema.coerce(long)
+        row_indexes = long["row_index"].tolist()
+        numbers = long["n"].tolist()
+        entries: dict[int, list[dict]] = {}
+        for row_index, n, record in zip(row_indexes, numbers, coerced.records()):
+            entries.setdefault(row_index, []).append({"n": n, **record})
+
+        errors: dict[int, list[str]] = {}
+        for position, field, message in coerced.errors[["row_index", "Column", "Error"]].itertuples(index=False):
+            column = self.fields[field].format(n=numbers[position])
+            errors.setdefault(row_indexes[position], []).append(
+                message.replace(field, column, 1)
+            )
+        return entries, {row_index: "; ".join(items) for row_index, items in errors.items()}
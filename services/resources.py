@@ -0,0 +1,147 @@
+"""Catalogue of resource-server list endpoints and the references between them.
+
+Shared by configuration bundles and the offline snapshot store so each
+resource's key and reference paths are declared once.
+"""
+
+from dataclasses import dataclass
+
+from services import fastjson
+from services.bulk import REQUEST_TIMEOUT_SECONDS, run_bulk, session
+
+API_PREFIX = "/resource-server/api"
+
+
+@dataclass(frozen=True)
+class Ref:
+    # Keys into the object; "*" steps into every element of a list.
+    path: tuple[str, ...]
+    # Referenced resource, or None for tenant lookups that are copied as-is.
+    target: str | None
+
+
+@dataclass(frozen=True)
+class Resource:
+    name: str
+    key: str = "name"
+    list_query: str = ""
+    refs: tuple[Ref, ...] = ()
+    # False for types the bundle importer cannot rebuild (entries that are
+    # themselves references with nested references).
+    bundle: bool = True
+
+    def url(self, host: str) -> str:
+        return f"{host.rstrip('/')}{API_PREFIX}/{self.name}"
+
+
+RESOURCES = (
+    Resource("paycodes", key="code", refs=(Ref(("linkedPaycode",), "paycodes"),)),
+    Resource("paycode_events", refs=(Ref(("paycode",), "paycodes"),)),
+    Resource(
+        "paycode_event_sets",
+        list_query="?projection=FULL",
+        refs=(Ref(("entries", "*", "paycodeEvent"), "paycode_events"),),
+    ),
+    Resource(
+        "shift_templates",
+        refs=(Ref(("paycodes", "*", "paycode"), "paycodes"), Ref(("exceptions", "*", "paycode"), "paycodes")),
+    ),
+    Resource("shift_template_sets", list_query="?projection=FULL", refs=(Ref(("entries", "*"), "shift_templates"),)),
+    Resource("accruals"),
+    Resource(
+        "accrual_policies",
+        refs=(Ref(("accrual",), "accruals"), Ref(("paycodes", "*", "paycode"), "paycodes")),
+    ),
+    Resource("accrual_policy_sets", list_query="?projection=FULL", refs=(Ref(("entries", "*"), "accrual_policies"),)),
+    Resource("known_locations"),
+    Resource(
+        "organization_locations",
+        refs=(
+            Ref(("knownLocation",), "known_locations"),
+            Ref(("paycodeEventSet",), "paycode_event_sets"),
+            Ref(("shiftTemplateSet",), "shift_template_sets"),
+            Ref(("organizationEntries", "*"), None),
+        ),
+    ),
+    Resource(
+        "paycode_combinations",
+        refs=(
+            Ref(("firstPaycode",), "paycodes"),
+            Ref(("secondPaycode",), "paycodes"),
+            Ref(("combinedPaycode",), "paycodes"),
+        ),
+        bundle=False,
+    ),
+    Resource("overtime_policies", bundle=False),
+    Resource("regularization_policies", refs=(Ref(("attendanceRegularizationType",), None),), bundle=False),
+    Resource(
+        "regularization_policy_sets",
+        list_query="?projection=FULL",
+        refs=(Ref(("entries", "*"), "regularization_policies"),),
+        bundle=False,
+    ),
+    Resource("time_off_policies", bundle=False),
+    Resource(
+        "time_off_policy_sets",
+        list_query="?projection=FULL",
+        refs=(Ref(("entries", "*"), "time_off_policies"), Ref(("entries", "*", "paycode"), "paycodes")),
+        bundle=False,
+    ),
+)
+RESOURCES_BY_NAME = {resource.name: resource for resource in RESOURCES}
+BUNDLE_RESOURCES = [resource.name for resource in RESOURCES if resource.bundle]
+
+
+def ref_slots(node, path):
+    """Yield (container, key) pairs whose value sits at path."""
+    head, rest = path[0], path[1:]
+    if head == "*":
+        children = enumerate(node) if isinstance(node, list) else ()
+    elif isinstance(node, dict) and node.get(head) is not None:
+        children = [(head, node[head])]
+    else:
+        children = ()
+    for key, child in children:
+        if rest:
+            yield from ref_slots(child, rest)
+        else:
+            yield node, key
+
+
+def ref_id(value):
+    return value.get("id") if isinstance(value, dict) else value
+
+
+def natural_key(item, resource):
+    return str(item.get(resource.key) or "").strip().casefold()
+
+
+def as_list(data):
+    if isinstance(data, dict):
+        return data.get("content") or []
+    return data or []
+
+
+def fetch_resource(host, headers, resource: Resource) -> list[dict]:
+    response = session().get(
+        f"{resource.url(host)}{resource.list_query}", headers=headers, timeout=REQUEST_TIMEOUT_SECONDS * 4
+    )
+    response.raise_for_status()
+    return as_list(fastjson.loads(response.content))
+
+
+def fetch_many(host, headers, names, on_progress=None):
+    """List every resource in names concurrently; one BulkOutcome per resource."""
+    resources = [RESOURCES_BY_NAME[name] for name in names]
+    return run_bulk(
+        resources, lambda resource: fetch_resource(host, headers, resource), rate_per_second=0, on_progress=on_progress
+    )
+
+
+def fetch_resources(host, headers, names, on_progress=None) -> dict[str, list[dict]]:
+    """Like fetch_many, but all-or-nothing."""
+    outcomes = fetch_many(host, headers, names, on_progress)
+    failed = [f"{outcome.item.name}: {outcome.error}" for outcome in outcomes if outcome.error]
+    if failed:
+        raise RuntimeError("Could not fetch " + "; ".join(failed))
+    return {outcome.item.name: outcome.value for outcome in outcomes}
@@ -0,0 +1,171 @@
+"""Column-wise coercion of uploaded sheets into typed records.
+
+Modules describe their upload columns once with a Schema; coercion runs as
+whole-column pandas operations and gathers every validation error in a single
+pass, instead of calling scalar parsers cell by cell inside iterrows().
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from services import metrics
+
+TRUE_VALUES = ("true", "1", "1.0", "yes", "y")
+FALSE_VALUES = ("false", "0", "0.0", "no", "n")
+BLANK_VALUES = ("", "nan", "none", "null", "<na>")
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    kind: str = "str"  # str | int | float | bool
+    required: bool = False
+    default: Any = None
+    aliases: tuple[str, ...] = ()
+    nullable: bool = False  # bool only: blank or unrecognised cells stay None instead of falling back
+
+
+@dataclass
+class CoercionResult:
+    frame: pd.DataFrame
+    errors: pd.DataFrame
+    error_rows: set[int] = field(default_factory=set)
+
+    @property
+    def ok(self) -> bool:
+        return self.errors.empty
+
+    def records(self) -> list[dict[str, Any]]:
+        """Typed rows as plain Python values, with None for blanks."""
+        columns = {
+            name: self.frame[name].to_numpy(dtype=object, na_value=None).tolist()
+            for name in self.frame.columns
+        }
+        names = list(columns)
+        if not names:
+            return [{} for _ in range(len(self.frame))]
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+    def row_errors(self) -> dict[int, str]:
+        return join_row_errors(self.errors)
+
+
+def join_row_errors(errors: pd.DataFrame) -> dict[int, str]:
+    """Errors joined per source row index."""
+    if errors.empty:
+        return {}
+    grouped = errors.groupby("row_index")["Error"].apply(lambda items: "; ".join(items))
+    return grouped.to_dict()
+
+
+def _blank_mask(text: pd.Series) -> pd.Series:
+    return text.isna() | text.str.lower().isin(BLANK_VALUES)
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    return series.astype("string").str.strip()
+
+
+def _coerce_column(series: pd.Series, column: Column) -> tuple[pd.Series, pd.Series, str]:
+    """Return (typed values, invalid mask, error message)."""
+    text = _as_text(series)
+    blank = _blank_mask(text)
+
+    if column.kind == "str":
+        values = text.mask(blank, pd.NA)
+        if column.default is not None:
+            values = values.fillna(column.default)
+        return values, pd.Series(False, index=series.index), ""
+
+    if column.kind in ("int", "float"):
+        numbers = pd.to_numeric(text.mask(blank, pd.NA), errors="coerce")
+        invalid = numbers.isna() & ~blank
+        if column.kind == "int":
+            values = pd.Series(np.trunc(numbers.to_numpy(dtype="float64", na_value=np.nan)), index=series.index)
+            values = values.astype("Int64")
+        else:
+            values = numbers.astype("Float64")
+        if column.default is not None:
+            values = values.fillna(column.default)
+        return values, invalid, f"{column.name} is not a valid number"
+
+    if column.kind == "bool":
+        lowered = text.str.lower()
+        values = pd.Series(pd.NA, index=series.index, dtype="boolean")
+        values = values.mask(lowered.isin(TRUE_VALUES).fillna(False), True)
+        values = values.mask(lowered.isin(FALSE_VALUES).fillna(False), False)
+        rest = values.isna() & ~blank
+        if rest.any():  # numbers are rare in flag columns; parse only the leftovers
+            numbers = pd.to_numeric(lowered[rest], errors="coerce").dropna()
+            values[numbers.index] = numbers != 0
+        # Unrecognised text falls back to the default, like the old to_bool().
+        if not column.nullable:
+            values = values.fillna(bool(column.default) if column.default is not None else False)
+        return values.astype("boolean"), pd.Series(False, index=series.index), ""
+
+    raise ValueError(f"Unsupported column kind: {column.kind}")
+
+
+class Schema:
+    def __init__(self, *columns: Column):
+        self.columns = columns
+
+    def _source_column(self, df: pd.DataFrame, column: Column) -> str | None:
+        lookup = {str(name).strip().lower(): name for name in df.columns}
+        for candidate in (column.name, *column.aliases):
+            match = lookup.get(candidate.strip().lower())
+            if match is not None:
+                return match
+        return None
+
+    @metrics.timed("validate")
+    def coerce(self, df: pd.DataFrame) -> CoercionResult:
+        typed: dict[str, pd.Series] = {}
+        error_frames = []
+
+        for column in self.columns:
+            source = self._source_column(df, column)
+            series = df[source] if source is not None else pd.Series(pd.NA, index=df.index, dtype="object")
+            values, invalid, message = _coerce_column(series, column)
+            typed[column.name] = values
+
+            if invalid.any():
+                error_frames.append(
+                    pd.DataFrame(
+                        {
+                            "row_index": df.index[invalid.to_numpy()],
+                            "Column": column.name,
+                            "Value": series[invalid].astype(str).to_numpy(),
+                            "Error": message,
+                        }
+                    )
+                )
+            if column.required:
+                missing = values.isna()
+                if missing.any():
+                    error_frames.append(
+                        pd.DataFrame(
+                            {
+                                "row_index": df.index[missing.to_numpy()],
+                                "Column": column.name,
+                                "Value": "",
+                                "Error": f"{column.name} is required",
+                            }
+                        )
+                    )
+
+        if error_frames:
+            errors = pd.concat(error_frames, ignore_index=True)
+            errors = errors.sort_values("row_index", kind="stable", ignore_index=True)
+        else:
+            errors = pd.DataFrame(columns=["row_index", "Column", "Value", "Error"])
+        errors.insert(0, "Row", errors["row_index"] + 1)
+
+        return CoercionResult(
+            frame=pd.DataFrame(typed, index=df.index),
+            errors=errors,
+            error_rows=set(errors["row_index"].tolist()),
+        )
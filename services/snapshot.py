@@ -0,0 +1,294 @@
+"""Local SQLite snapshot of tenant configuration for search and cross-references.
+
+Every resource in the catalogue is listed in parallel and stored per host. A
+refresh compares content hashes, so only new, changed or removed objects touch
+the database and the reference index.
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+import pandas as pd
+
+from services.local_store import connect, data_path
+from services.resources import RESOURCES_BY_NAME, fetch_many, ref_id, ref_slots
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = data_path("config_snapshot.sqlite")
+DEFAULT_MAX_AGE_SECONDS = 15 * 60
+SEARCH_LIMIT = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot_objects (
+    host TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    key TEXT,
+    name TEXT,
+    description TEXT,
+    body TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    PRIMARY KEY (host, resource, id)
+);
+CREATE INDEX IF NOT EXISTS snapshot_objects_key ON snapshot_objects (host, key);
+
+CREATE TABLE IF NOT EXISTS snapshot_refs (
+    host TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    target TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshot_refs_source ON snapshot_refs (host, resource, id);
+CREATE INDEX IF NOT EXISTS snapshot_refs_target ON snapshot_refs (host, target, target_id);
+
+CREATE TABLE IF NOT EXISTS snapshot_resources (
+    host TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    objects INTEGER NOT NULL,
+    PRIMARY KEY (host, resource)
+);
+"""
+
+
+def _open():
+    conn = connect(SNAPSHOT_PATH)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _host(host):
+    return host.rstrip("/")
+
+
+def _body_hash(body):
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+def _refs(resource, obj):
+    for ref in resource.refs:
+        if ref.target is None:
+            continue
+        for container, slot in ref_slots(obj, ref.path):
+            target_id = ref_id(container[slot])
+            if isinstance(target_id, int):
+                yield ref.target, target_id, ".".join(ref.path)
+
+
+def _store_resource(conn, host, resource, objects):
+    """Apply one listing; returns (added, changed, removed)."""
+    existing = dict(
+        conn.execute(
+            "SELECT id, body_hash FROM snapshot_objects WHERE host = ? AND resource = ?", (host, resource.name)
+        ).fetchall()
+    )
+
+    upserts, seen = [], set()
+    for obj in objects:
+        object_id = obj.get("id")
+        if not isinstance(object_id, int):
+            continue
+        seen.add(object_id)
+        body = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+        body_hash = _body_hash(body)
+        if existing.get(object_id) == body_hash:
+            continue
+        upserts.append((
+            host, resource.name, object_id,
+            str(obj.get(resource.key) or ""), str(obj.get("name") or ""), str(obj.get("description") or ""),
+            body, body_hash,
+        ))
+
+    removed = [object_id for object_id in existing if object_id not in seen]
+    touched = [row[2] for row in upserts] + removed
+
+    conn.executemany(
+        "DELETE FROM snapshot_refs WHERE host = ? AND resource = ? AND id = ?",
+        [(host, resource.name, object_id) for object_id in touched],
+    )
+    conn.executemany(
+        "DELETE FROM snapshot_objects WHERE host = ? AND resource = ? AND id = ?",
+        [(host, resource.name, object_id) for object_id in removed],
+    )
+    conn.executemany("INSERT OR REPLACE INTO snapshot_objects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+
+    by_id = {obj.get("id"): obj for obj in objects}
+    conn.executemany(
+        "INSERT INTO snapshot_refs VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (host, resource.name, row[2], target, target_id, path)
+            for row in upserts
+            for target, target_id, path in _refs(resource, by_id[row[2]])
+        ],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO snapshot_resources VALUES (?, ?, ?, ?)",
+        (host, resource.name, time.time(), len(seen)),
+    )
+
+    added = sum(1 for row in upserts if row[2] not in existing)
+    return added, len(upserts) - added, len(removed)
+
+
+def stale_resources(host, max_age_seconds=DEFAULT_MAX_AGE_SECONDS, names=None):
+    names = list(names or RESOURCES_BY_NAME)
+    conn = _open()
+    try:
+        fetched = dict(
+            conn.execute("SELECT resource, fetched_at FROM snapshot_resources WHERE host = ?", (_host(host),)).fetchall()
+        )
+    finally:
+        conn.close()
+    cutoff = time.time() - max_age_seconds
+    return [name for name in names if fetched.get(name, 0) < cutoff]
+
+
+def refresh(host, headers, names=None, on_progress=None) -> pd.DataFrame:
+    """Re-list resources in parallel and store what changed."""
+    host = _host(host)
+    names = list(names or RESOURCES_BY_NAME)
+    started = time.perf_counter()
+    outcomes = fetch_many(host, headers, names, on_progress)
+
+    rows = []
+    conn = _open()
+    try:
+        for outcome in outcomes:
+            resource = outcome.item
+            if outcome.error:
+                rows.append({"Resource": resource.name, "Status": "Failed", "Message": outcome.error})
+                continue
+            added, changed, removed = _store_resource(conn, host, resource, outcome.value)
+            rows.append({
+                "Resource": resource.name,
+                "Status": "OK",
+                "Objects": len(outcome.value),
+                "Added": added,
+                "Changed": changed,
+                "Removed": removed,
+                "Fetch (ms)": round(outcome.elapsed_ms),
+            })
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info(f"snapshot refresh host={host} resources={len(names)} seconds={time.perf_counter() - started:.2f}")
+    return pd.DataFrame(rows)
+
+
+def invalidate(host, resource):
+    """Mark a resource stale after the portal itself changed it."""
+    conn = _open()
+    try:
+        conn.execute("DELETE FROM snapshot_resources WHERE host = ? AND resource = ?", (_host(host), resource))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def status(host) -> pd.DataFrame:
+    conn = _open()
+    try:
+        frame = pd.read_sql_query(
+            "SELECT resource AS Resource, objects AS Objects, fetched_at FROM snapshot_resources WHERE host = ? ORDER BY resource",
+            conn,
+            params=(_host(host),),
+        )
+    finally:
+        conn.close()
+    frame["Refreshed"] = pd.to_datetime(frame.pop("fetched_at"), unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+    return frame
+
+
+def list_objects(host, resource, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+    """Cached listing for a resource, or None when the snapshot is missing or stale."""
+    if stale_resources(host, max_age_seconds, [resource]):
+        return None
+    conn = _open()
+    try:
+        rows = conn.execute(
+            "SELECT body FROM snapshot_objects WHERE host = ? AND resource = ? ORDER BY id", (_host(host), resource)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [json.loads(row[0]) for row in rows]
+
+
+def object_ids(host, resource) -> set[int]:
+    conn = _open()
+    try:
+        rows = conn.execute(
+            "SELECT id FROM snapshot_objects WHERE host = ? AND resource = ?", (_host(host), resource)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row[0] for row in rows}
+
+
+def search(host, text, resources=None, limit=SEARCH_LIMIT) -> pd.DataFrame:
+    """Objects whose id, key, name or description matches text."""
+    text = text.strip()
+    clauses = ["host = ?"]
+    params: list = [_host(host)]
+    if resources:
+        clauses.append(f"resource IN ({', '.join('?' for _ in resources)})")
+        params.extend(resources)
+    if text:
+        if text.isdigit():
+            clauses.append("(id = ? OR key LIKE ? OR name LIKE ?)")
+            params.extend([int(text), f"%{text}%", f"%{text}%"])
+        else:
+            clauses.append("(key LIKE ? OR name LIKE ? OR description LIKE ?)")
+            params.extend([f"%{text}%"] * 3)
+    conn = _open()
+    try:
+        return pd.read_sql_query(
+            f"""
+            SELECT resource AS Resource, id AS ID, key AS Key, name AS Name, description AS Description
+            FROM snapshot_objects
+            WHERE {' AND '.join(clauses)}
+            ORDER BY resource, key
+            LIMIT ?
+            """,
+            conn,
+            params=(*params, limit),
+        )
+    finally:
+        conn.close()
+
+
+def references(host, resource, object_id) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(objects this one points at, objects pointing at this one)."""
+    host = _host(host)
+    conn = _open()
+    try:
+        outgoing = pd.read_sql_query(
+            """
+            SELECT r.target AS Resource, r.target_id AS ID, o.key AS Key, o.name AS Name, r.path AS Via
+            FROM snapshot_refs r
+            LEFT JOIN snapshot_objects o ON o.host = r.host AND o.resource = r.target AND o.id = r.target_id
+            WHERE r.host = ? AND r.resource = ? AND r.id = ?
+            ORDER BY r.target, r.target_id
+            """,
+            conn,
+            params=(host, resource, int(object_id)),
+        )
+        incoming = pd.read_sql_query(
+            """
+            SELECT r.resource AS Resource, r.id AS ID, o.key AS Key, o.name AS Name, r.path AS Via
+            FROM snapshot_refs r
+            LEFT JOIN snapshot_objects o ON o.host = r.host AND o.resource = r.resource AND o.id = r.id
+            WHERE r.host = ? AND r.target = ? AND r.target_id = ?
+            ORDER BY r.resource, r.id
+            """,
+            conn,
+            params=(host, resource, int(object_id)),
+        )
+    finally:
+        conn.close()
+    return outgoing.drop_duplicates(), incoming.drop_duplicates()
@@ -0,0 +1,342 @@
+"""Per-host adaptive concurrency for the pooled bulk sessions.
+
+Every request made through services.bulk.session() or the asyncio engine
+(services.async_bulk, via send_async) passes through the controller of its
+host:
+
+- In-flight requests are capped by a limit that grows by one per round of
+  fast, successful responses and halves on 429, 502-504 or a latency spike
+  (AIMD). The latency baseline is a low percentile of recent response times,
+  so it follows the host when its normal latency moves up.
+- 429 and 503 responses are retried; Retry-After pauses every request to that
+  host, otherwise retries back off exponentially with jitter.
+- After BREAKER_FAILURES consecutive gateway errors (502-504) or connection
+  failures the circuit opens and
+  requests fail immediately for BREAKER_COOLDOWN_SECONDS; a single probe then
+  decides whether it closes again.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+MIN_IN_FLIGHT = 1
+MAX_IN_FLIGHT = int(os.getenv("BULK_MAX_IN_FLIGHT", "16"))
+INITIAL_IN_FLIGHT = int(os.getenv("BULK_INITIAL_IN_FLIGHT", "4"))
+LATENCY_TOLERANCE = 2.5  # responses slower than baseline x this count as congestion
+LATENCY_WINDOW = 50  # recent response times the baseline is taken from
+LATENCY_PERCENTILE = 0.1
+DECREASE_FACTOR = 0.5
+DECREASE_INTERVAL_SECONDS = 1.0
+
+MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", "3"))
+RETRY_STATUSES = (429, 503)
+BACKOFF_SECONDS = 0.5
+MAX_RETRY_AFTER_SECONDS = 60
+
+FAILURE_STATUSES = (502, 503, 504)  # not 500: the tenant API answers 500 for payloads it rejects
+BREAKER_FAILURES = int(os.getenv("BULK_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BULK_BREAKER_COOLDOWN_SECONDS", "30"))
+
+THROUGHPUT_WINDOW_SECONDS = 10.0
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def _set_ready(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def parse_retry_after(value) -> float | None:
+    """Retry-After as seconds from now; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+
+class HostController:
+    def __init__(self, host: str):
+        self.host = host
+        self.limit = float(min(INITIAL_IN_FLIGHT, MAX_IN_FLIGHT))
+        self.in_flight = 0
+        self.baseline_ms: float | None = None
+        self.requests = 0
+        self.throttled = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._completed: deque[float] = deque()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._async_waiters: deque = deque()
+
+    # --------------------------------------------------
+    # Slots
+    # --------------------------------------------------
+    def _claim(self):
+        """(probe, None) when a request may start, else (False, seconds to wait); hold _cond."""
+        now = time.monotonic()
+        if self._opened_at is not None:
+            remaining = BREAKER_COOLDOWN_SECONDS - (now - self._opened_at)
+            if remaining > 0 or self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    f"{self.host} is unhealthy; requests paused for {max(remaining, 0):.0f}s"
+                )
+            self._probing = True
+            self.in_flight += 1
+            return True, None
+        pause = self._paused_until - now
+        if pause > 0:
+            return False, pause
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return False, None
+        return False, 1.0
+
+    def acquire(self) -> bool:
+        """Block until a request may start; True when it is the half-open probe."""
+        with self._cond:
+            while True:
+                probe, wait = self._claim()
+                if wait is None:
+                    return probe
+                self._cond.wait(wait)
+
+    async def acquire_async(self) -> bool:
+        """acquire() for coroutines: waits on the event loop instead of blocking it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                probe, wait = self._claim()
+                if wait is None:
+                    return probe
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _wake_async(self):
+        # One freed slot, one waiter; the rest keep waiting (or time out and look again).
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if waiter.done():
+                continue
+            try:
+                loop.call_soon_threadsafe(_set_ready, waiter)
+            except RuntimeError:  # loop already closed
+                continue
+            return
+
+    def release(self, status_code, elapsed_ms, retry_after=None, probe=False, counted=True) -> None:
+        """Feed one finished request back; status_code is None for connection errors.
+
+        counted=False only frees the slot (cancellation, errors outside the transport).
+        """
+        with self._cond:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if not counted:
+                if probe:
+                    self._probing = False
+                self._cond.notify_all()
+                self._wake_async()
+                return
+            self.requests += 1
+            self._completed.append(now)
+            while self._completed and now - self._completed[0] > THROUGHPUT_WINDOW_SECONDS:
+                self._completed.popleft()
+
+            failed = status_code is None or status_code in FAILURE_STATUSES
+            if status_code == 429:
+                self.throttled += 1
+            if failed:
+                self.failures += 1
+
+            if status_code == 429 or failed:
+                self._decrease(now)
+            else:
+                slow = self.baseline_ms is not None and elapsed_ms > self.baseline_ms * LATENCY_TOLERANCE
+                # Slow responses count too: once they are the norm the baseline moves up to them.
+                self._latencies.append(elapsed_ms)
+                self.baseline_ms = sorted(self._latencies)[int(len(self._latencies) * LATENCY_PERCENTILE)]
+                if slow:
+                    self._decrease(now)
+                else:
+                    self.limit = min(MAX_IN_FLIGHT, self.limit + 1.0 / self.limit)
+
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+            if failed:
+                self._consecutive_failures += 1
+                if probe or self._consecutive_failures >= BREAKER_FAILURES:
+                    if self._opened_at is None or probe:
+                        logger.warning(f"circuit open host={self.host} failures={self._consecutive_failures}")
+                    self._opened_at = now
+            else:
+                self._consecutive_failures = 0
+                if self._opened_at is not None and probe:
+                    logger.info(f"circuit closed host={self.host}")
+                    self._opened_at = None
+            if probe:
+                self._probing = False
+            self._cond.notify_all()
+            self._wake_async()
+
+    def note_retry(self) -> None:
+        with self._cond:
+            self.retries += 1
+
+    def _decrease(self, now):
+        # One cut per interval, so a burst of 429s from one wave halves once.
+        if now - self._last_decrease >= DECREASE_INTERVAL_SECONDS:
+            self.limit = max(MIN_IN_FLIGHT, self.limit * DECREASE_FACTOR)
+            self._last_decrease = now
+
+    # --------------------------------------------------
+    # Reporting
+    # --------------------------------------------------
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self._probing else "open"
+
+    def throughput(self) -> float:
+        """Completed requests per second over the recent window."""
+        with self._cond:
+            if len(self._completed) < 2:
+                return 0.0
+            span = max(time.monotonic() - self._completed[0], 1e-3)
+            return len(self._completed) / min(span, THROUGHPUT_WINDOW_SECONDS)
+
+    def report(self) -> dict:
+        return {
+            "Host": self.host,
+            "Concurrency": int(self.limit),
+            "Req/s": round(self.throughput(), 1),
+            "Baseline (ms)": round(self.baseline_ms or 0),
+            "Requests": self.requests,
+            "Throttled": self.throttled,
+            "Retries": self.retries,
+            "Failures": self.failures,
+            "Rejected": self.rejected,
+            "Circuit": self.state,
+        }
+
+
+_controllers: dict[str, HostController] = {}
+_controllers_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def controller(host_or_url: str) -> HostController:
+    host = host_of(host_or_url)
+    with _controllers_lock:
+        if host not in _controllers:
+            _controllers[host] = HostController(host)
+        return _controllers[host]
+
+
+def reports() -> list[dict]:
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return [ctl.report() for ctl in controllers]
+
+
+def describe(host_or_url: str) -> str:
+    info = controller(host_or_url).report()
+    text = f"Settled at {info['Concurrency']} concurrent requests, {info['Req/s']} req/s"
+    if info["Throttled"] or info["Retries"]:
+        text += f" · {info['Throttled']} throttled, {info['Retries']} retried"
+    if info["Circuit"] != "closed":
+        text += f" · circuit {info['Circuit']}"
+    return text
+
+
+def send(request, method, url, **kwargs) -> requests.Response:
+    """Run request(method, url, **kwargs) under the host's controller."""
+    ctl = controller(url)
+    for attempt in range(MAX_RETRIES + 1):
+        probe = ctl.acquire()
+        started = time.perf_counter()
+        try:
+            response = request(method, url, **kwargs)
+        except requests.RequestException:
+            ctl.release(None, (time.perf_counter() - started) * 1000, probe=probe)
+            raise
+        except BaseException:  # anything else still has to give the slot back
+            ctl.release(None, 0, probe=probe, counted=False)
+            raise
+        retryable = response.status_code in RETRY_STATUSES
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if retryable else None
+        ctl.release(response.status_code, (time.perf_counter() - started) * 1000, retry_after, probe)
+
+        if not retryable or attempt == MAX_RETRIES:
+            return response
+        ctl.note_retry()
+        metrics.REGISTRY.retry(metrics.host_of(url))
+        if retry_after is None:
+            time.sleep(BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5))
+    return response
+
+
+async def send_async(request, method, url, **kwargs):
+    """send() for coroutine clients: awaits request(method, url, **kwargs)."""
+    ctl = controller(url)
+    for attempt in range(MAX_RETRIES + 1):
+        probe = await ctl.acquire_async()
+        started = time.perf_counter()
+        try:
+            response = await request(method, url, **kwargs)
+        except requests.RequestException:
+            ctl.release(None, (time.perf_counter() - started) * 1000, probe=probe)
+            raise
+        except BaseException:  # includes cancellation, which would otherwise leak the slot
+            ctl.release(None, 0, probe=probe, counted=False)
+            raise
+        retryable = response.status_code in RETRY_STATUSES
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if retryable else None
+        ctl.release(response.status_code, (time.perf_counter() - started) * 1000, retry_after, probe)
+
+        if not retryable or attempt == MAX_RETRIES:
+            return response
+        ctl.note_retry()
+        metrics.REGISTRY.retry(metrics.host_of(url))
+        if retry_after is None:
+            await asyncio.sleep(BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5))
+    return response
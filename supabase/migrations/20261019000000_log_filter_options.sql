@@ -0,0 +1,62 @@
+-- Distinct usernames and modules seen in public.logs, maintained on insert so
+-- the Admin Logs filter dropdowns load from one small table instead of
+-- scanning the log history.
+
+create table if not exists public.log_filter_options (
+    kind text not null check (kind in ('username', 'module')),
+    value text not null,
+    last_seen_at timestamptz not null default now(),
+    primary key (kind, value)
+);
+
+create or replace function public.track_log_filter_options()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if new.username is not null and new.username <> '' then
+        insert into public.log_filter_options (kind, value, last_seen_at)
+        values ('username', new.username, coalesce(new.created_at, now()))
+        on conflict (kind, value) do update
+            set last_seen_at = greatest(public.log_filter_options.last_seen_at, excluded.last_seen_at);
+    end if;
+
+    if new.module is not null and new.module <> '' then
+        insert into public.log_filter_options (kind, value, last_seen_at)
+        values ('module', new.module, coalesce(new.created_at, now()))
+        on conflict (kind, value) do update
+            set last_seen_at = greatest(public.log_filter_options.last_seen_at, excluded.last_seen_at);
+    end if;
+
+    return new;
+end;
+$$;
+
+drop trigger if exists logs_track_filter_options on public.logs;
+create trigger logs_track_filter_options
+    after insert on public.logs
+    for each row execute function public.track_log_filter_options();
+
+-- Backfill from the existing history.
+insert into public.log_filter_options (kind, value, last_seen_at)
+select 'username', username, max(created_at)
+from public.logs
+where username is not null and username <> ''
+group by username
+on conflict (kind, value) do update set last_seen_at = excluded.last_seen_at;
+
+insert into public.log_filter_options (kind, value, last_seen_at)
+select 'module', module, max(created_at)
+from public.logs
+where module is not null and module <> ''
+group by module
+on conflict (kind, value) do update set last_seen_at = excluded.last_seen_at;
+
+alter table public.log_filter_options enable row level security;
+
+drop policy if exists "log_filter_options readable" on public.log_filter_options;
+create policy "log_filter_options readable"
+    on public.log_filter_options for select
+    using (true);
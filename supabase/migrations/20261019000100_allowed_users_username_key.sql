@@ -0,0 +1,29 @@
+-- Login checks look a username up by lower(trim(username)) with an exact
+-- match, so stored names are trimmed once and the normalised form is kept
+-- in an indexed generated column.
+
+update public.allowed_users
+set username = trim(username)
+where username <> trim(username);
+
+create or replace function public.trim_allowed_username()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.username := trim(new.username);
+    return new;
+end;
+$$;
+
+drop trigger if exists allowed_users_trim_username on public.allowed_users;
+create trigger allowed_users_trim_username
+    before insert or update of username on public.allowed_users
+    for each row execute function public.trim_allowed_username();
+
+alter table public.allowed_users
+    add column if not exists username_key text
+    generated always as (lower(trim(username))) stored;
+
+create index if not exists allowed_users_username_key_idx
+    on public.allowed_users (username_key);
@@ -0,0 +1,24 @@
+import pytest
+import requests
+
+from services import activity_logger
+from services.log_mirror import NO_RESPONSE, summary_requests
+
+
+def test_request_that_raises_counts_as_failed(monkeypatch):
+    def refuse(self, method, url, **kwargs):
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(activity_logger, "_original_request", refuse)
+    job = activity_logger.JobLog("Paycodes", "failed")
+    token = activity_logger._current_job.set(job)
+    try:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            activity_logger._request_with_logging(None, "post", "https://tenant.example/api/paycodes")
+    finally:
+        activity_logger._current_job.reset(token)
+    job.record("GET", "/api/paycodes", 200, 5.0)
+
+    assert (job.ok, job.failed) == (1, 1)
+    assert job.details == ["POST /api/paycodes [error]"]
+    assert summary_requests(job.summary_action()) == {200: 1, NO_RESPONSE: 1}
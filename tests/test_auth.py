@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from services.tenants import DEFAULT_CLIENT_AUTH
+
+os.environ.setdefault("CLIENT_AUTH", DEFAULT_CLIENT_AUTH)  # read when services.auth is imported
+from services import auth  # noqa: E402
+
+
+class Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.rows
+
+
+@pytest.fixture
+def allowed_users(monkeypatch):
+    # username_key as the migration generates it: lower(trim(username))
+    table = [{"username": name, "username_key": name.strip().lower()} for name in ["Alice", "alice.smith", "bob"]]
+    calls = []
+
+    def get(url, headers, params, timeout):
+        calls.append(params)
+        operator, value = params["username_key"].split(".", 1)
+        assert operator == "eq"
+        matches = [{"username": row["username"]} for row in table if row["username_key"] == value]
+        return Rows(matches[:params["limit"]])
+
+    monkeypatch.setattr(auth.requests, "get", get)
+    auth.invalidate_allowed_users_cache()
+    yield calls
+    auth.invalidate_allowed_users_cache()
+
+
+def test_lookup_is_one_exact_indexed_match(allowed_users):
+    assert auth._is_allowed_user("  ALICE ")
+    assert allowed_users == [{"select": "username", "username_key": "eq.alice", "limit": 1}]
+
+
+def test_other_names_do_not_match(allowed_users):
+    assert not auth._is_allowed_user("smith")
+    assert not auth._is_allowed_user("bo")
+
+
+def test_result_is_cached(allowed_users):
+    assert auth._is_allowed_user("bob") and auth._is_allowed_user("Bob ")
+    assert len(allowed_users) == 1
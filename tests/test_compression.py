@@ -0,0 +1,33 @@
+import pytest
+
+from services import compression
+
+HOST = "https://tenant.example"
+
+
+@pytest.fixture(autouse=True)
+def fresh_hosts(monkeypatch):
+    monkeypatch.setattr(compression, "_accepts", {})
+
+
+def test_plain_retry_that_works_switches_host_to_plain(monkeypatch):
+    monkeypatch.setattr(compression, "MODE", "1")
+    body = b"x" * compression.MIN_BYTES
+    assert compression.compressible(HOST, {"Content-Type": "application/json"}, body)
+    assert compression.retry_plain(HOST, 415)
+    compression.plain_outcome(HOST, 415, 201)
+    assert compression._accepts[HOST] is False
+    assert not compression.compressible(HOST, {"Content-Type": "application/json"}, body)
+
+
+def test_same_rejection_plain_keeps_gzip_and_stops_resending():
+    assert compression.retry_plain(HOST, 400)
+    compression.plain_outcome(HOST, 400, 400)
+    assert compression._accepts[HOST] is True
+    assert not compression.retry_plain(HOST, 400)
+
+
+def test_other_rejection_leaves_host_undecided():
+    assert compression.retry_plain(HOST, 400)
+    compression.plain_outcome(HOST, 400, 415)
+    assert HOST not in compression._accepts
@@ -0,0 +1,28 @@
+import gc
+import json
+
+from services import fastjson
+
+
+class StreamedResponse:
+    def __init__(self, body):
+        self.body = body
+        self.gc_during_reads = []
+
+    def iter_content(self, size):
+        for start in range(0, len(self.body), size):
+            self.gc_during_reads.append(gc.isenabled())
+            yield self.body[start:start + size]
+
+
+def test_read_frame_leaves_gc_on(monkeypatch):
+    monkeypatch.setattr(fastjson, "CHUNK_BYTES", 64)
+    records = [{"id": i, "name": f"loc {i}", "parent": {"id": i // 10}} for i in range(200)]
+    response = StreamedResponse(json.dumps({"content": records, "total": 200}).encode())
+
+    frame, meta = fastjson.read_frame(response)
+
+    assert len(response.gc_during_reads) > 10 and all(response.gc_during_reads)
+    assert gc.isenabled()
+    assert list(frame.columns) == ["id", "name", "parent.id"] and len(frame) == 200
+    assert meta == {"total": 200}
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from services import jobs
+from services.tenants import Tenant
+
+TENANT = Tenant("tenant", "https://tenant.example", "admin", "token")
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(jobs._executor, "submit", lambda fn, job: submitted.append(job))
+    return submitted
+
+
+@pytest.mark.parametrize("kind, target, payload, message", [
+    ("upload", "paycodes", {"rows": "abc"}, "rows must be a list of objects"),
+    ("upload", "paycodes", {"rows": [1, 2]}, "rows must be a list of objects"),
+    ("upload", "paycodes", {"rows": [{"code": "A"}], "workers": "abc"}, "workers must be a number"),
+    ("upload", "paycodes", {"rows": [{"code": "A"}], "rate": -1}, "rate must be at least 0"),
+    ("upload", "punches", {"rows": [{"externalNumber": "7"}]}, "Missing required columns: dateTime"),
+    ("timecards", "", {"rows": pd.DataFrame({"externalNumber": ["7"]})}, "Missing required columns"),
+    ("timecards", "", {"rows": [{"externalNumber": "7", "attendanceDate": "nope", "paycodeId": 1}]},
+     "Invalid attendanceDate"),
+    ("delete", "schedules", {"rows": [{"externalNumber": "7"}]}, "Missing required columns: date"),
+    ("delete", "paycodes", {"ids": "abc"}, "ids must be a list"),
+    ("export", "", {"resources": "paycodes"}, "resources must be a list"),
+])
+def test_submit_rejects_input_the_pipeline_would(queued, kind, target, payload, message):
+    with pytest.raises(ValueError, match=message):
+        jobs.submit(kind, target, TENANT, payload)
+    assert not queued
+
+
+def test_submit_coerces_options(queued):
+    job = jobs.submit(
+        "timecards", "", TENANT,
+        {"rows": [{"External Number": "7", "attendance_date": "2026-03-01", "paycodeId": 4}], "workers": "3", "rate": ""},
+    )
+    assert queued == [job]
+    assert job.payload["workers"] == 3 and job.payload["rate"] == jobs.RATE_PER_SECOND
+    assert isinstance(job.payload["rows"], pd.DataFrame)
@@ -0,0 +1,38 @@
+import threading
+import time
+
+from services import profiling
+from services.bulk import run_bulk
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _pool_task(_):
+    _busy(0.05)
+
+
+def _other_session():
+    _busy(0.3)
+
+
+def test_profile_samples_own_pool_threads_only(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "ENV_MODULES", {"Paycodes"})
+    monkeypatch.setattr(profiling, "TRACE_ALLOCATIONS", False)
+    monkeypatch.setattr(profiling, "SAMPLE_INTERVAL_SECONDS", 0.002)
+    monkeypatch.setattr(profiling, "data_dir", lambda name: tmp_path)
+
+    with profiling.profile_run("Paycodes") as report:
+        # Started after the sampler, like a run in another browser session.
+        other = threading.Thread(target=_other_session, name="other-session")
+        other.start()
+        run_bulk(range(4), _pool_task, max_workers=2, rate_per_second=0)
+        other.join()
+
+    frames = {label for stack in report.stacks for label in stack}
+    assert any(label.startswith("_pool_task") for label in frames)
+    assert not any(label.startswith("_other_session") for label in frames)
+    assert all(stack[0] == "script" or stack[0].startswith("ThreadPoolExecutor") for stack in report.stacks)
@@ -0,0 +1,27 @@
+from modules import tenant_fanout
+from services.tenants import Tenant
+
+PREPARED = [
+    {"Row": 1, "Code": "OT", "payload": {"id": 5, "code": "OT"}},
+    {"Row": 2, "Code": "leave", "payload": {"id": 6, "code": "leave"}},
+    {"Row": 3, "Code": "X", "payload": {"id": 7, "code": "X"}},
+    {"Row": 4, "Code": "N", "payload": {"code": "N"}},
+]
+
+
+def test_updates_go_to_the_same_code_on_other_tenants(monkeypatch):
+    listing = [{"id": 900, "code": "OT"}, {"id": 901, "code": "Leave "}]
+    monkeypatch.setattr(tenant_fanout, "fetch_resource", lambda host, headers, spec: listing)
+
+    matched = tenant_fanout.match_ids(PREPARED, Tenant("UAT", "https://uat.example", "u", "t"), "paycodes")
+
+    assert [item["payload"].get("id") for item in matched] == [900, 901, 7, None]
+    assert "error" in matched[2] and all("error" not in item for item in matched[:2] + matched[3:])
+    assert PREPARED[0]["payload"]["id"] == 5
+
+
+def test_current_tenant_keeps_the_sheet_ids(monkeypatch):
+    monkeypatch.setattr(tenant_fanout, "fetch_resource", lambda *args: (_ for _ in ()).throw(AssertionError))
+    current = Tenant(tenant_fanout.CURRENT_TENANT, "https://tenant.example", "u", "t")
+
+    assert tenant_fanout.match_ids(PREPARED, current, "paycodes") is PREPARED
@@ -0,0 +1,74 @@
+import pytest
+import requests
+
+from services import throttle
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle.time, "monotonic", clock)
+    return clock
+
+
+def _finish(ctl, clock, status, elapsed_ms):
+    probe = ctl.acquire()
+    clock.now += 0.1
+    ctl.release(status, elapsed_ms, probe=probe)
+
+
+def test_limit_recovers_after_latency_steps_up(clock):
+    ctl = throttle.HostController("https://tenant.example")
+    _finish(ctl, clock, 200, 40)
+    for _ in range(throttle.LATENCY_WINDOW * 3):
+        _finish(ctl, clock, 200, 200)
+
+    assert ctl.baseline_ms == 200
+    assert ctl.limit > throttle.INITIAL_IN_FLIGHT
+
+
+def test_latency_spike_still_cuts_the_limit(clock):
+    ctl = throttle.HostController("https://tenant.example")
+    for _ in range(throttle.LATENCY_WINDOW):
+        _finish(ctl, clock, 200, 40)
+    before = ctl.limit
+    _finish(ctl, clock, 200, 400)
+
+    assert ctl.limit == max(throttle.MIN_IN_FLIGHT, before * throttle.DECREASE_FACTOR)
+
+
+def test_rejected_payloads_do_not_open_the_circuit(clock):
+    ctl = throttle.HostController("https://tenant.example")
+    for _ in range(throttle.BREAKER_FAILURES * 2):
+        _finish(ctl, clock, 500, 50)
+    assert ctl.state == "closed"
+
+    for _ in range(throttle.BREAKER_FAILURES):
+        _finish(ctl, clock, 502, 50)
+    assert ctl.state == "open"
+
+
+def test_send_frees_the_slot_on_any_error():
+    ctl = throttle.controller("https://errors.example")
+
+    def broken(method, url, **kwargs):
+        raise KeyError("not a transport error")
+
+    with pytest.raises(KeyError):
+        throttle.send(broken, "GET", "https://errors.example/x")
+    assert ctl.in_flight == 0 and ctl.failures == 0
+
+    def refused(method, url, **kwargs):
+        raise requests.ConnectionError("refused")
+
+    with pytest.raises(requests.ConnectionError):
+        throttle.send(refused, "GET", "https://errors.example/x")
+    assert ctl.in_flight == 0 and ctl.failures == 1